@@ -16,5 +16,6 @@ setup(
       ],
       extras_require={
           'spidev': ['spidev==3.4'],
+          'numpy': ['numpy'],
       },
       zip_safe=False)
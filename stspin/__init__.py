@@ -1,5 +1,24 @@
 from .spin_device import SpinDevice
 from .spin_chain import SpinChain
+from .calibration import CalibrationProfile, ThresholdCalibrator
+from .control_loop import ControlLoop
+from .discovery import AlignmentGuard, ChainTopology, TopologyError
+from .edges import EdgeLine, EdgeSource, FakeEdgeSource, GpioEdgeSource
+from .families import DeviceFamily, FamilyRegister
+from .gcode import GCodeInterpreter
+from .job import Job, JobError, JobPlayer
+from .motion_queue import MotionQueue
+from .multibus import StartReport, SynchronizedStart
+from .polling import AdaptivePoller, PollState
+from .process_chain import ChainProcessError, ProcessChain
+from .scheduler import BusScheduler, TrafficClass
+from .snapshot import ChainSnapshot, SnapshotError
+from .status_events import StatusDispatcher, StatusEvent
+from .telemetry import TelemetryStore
+from .trace import ChainTracer
+from .triggers import PositionTrigger, TriggerScheduler
+from .watchdog import FaultWatchdog
+from .wire_time import WireProfiler, WireTimeModel
 
 from .constants import Command
 from .constants import Register
@@ -0,0 +1,227 @@
+import argparse
+import json
+import sys
+
+from typing import (
+    List,
+    Optional,
+)
+
+from .bench import ChainBench, Workload, formatReport
+from .constants import Constant
+from .discovery import TopologyError, discoverTopology
+from .fake import FakeTransport
+from .spin_chain import SpinChain
+from .trace import ChainTracer
+from .wire_time import WireTimeModel
+
+
+def _parseSpiSelect(text: str) -> List[int]:
+    """Parse a bus,device pair such as 0,0"""
+    try:
+        bus, device = (int(part) for part in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f'expected BUS,DEVICE such as 0,0, got {text!r}'
+        )
+
+    return [bus, device]
+
+
+def _parseWorkloads(text: str) -> List[str]:
+    """Parse a comma separated list of workload names"""
+    workloads = [name.strip() for name in text.split(',') if name.strip()]
+    unknown = [name for name in workloads if name not in Workload.All]
+
+    if unknown or not workloads:
+        raise argparse.ArgumentTypeError(
+            f'unknown workloads {", ".join(unknown)}, '
+            f'choose from {", ".join(Workload.All)}'
+        )
+
+    return workloads
+
+
+def _buildParser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m stspin')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    bench = commands.add_parser(
+        'bench',
+        help='measure bus throughput with register traffic only',
+    )
+    target = bench.add_mutually_exclusive_group(required=True)
+    target.add_argument(
+        '--spi-select', type=_parseSpiSelect, metavar='BUS,DEVICE',
+        help='spidev bus and device of the chain',
+    )
+    target.add_argument(
+        '--fake', action='store_true',
+        help='use a simulated chain instead of hardware',
+    )
+    bench.add_argument(
+        '--devices', type=int, default=1,
+        help='total devices in chain (default: %(default)s)',
+    )
+    bench.add_argument(
+        '--position', type=int, default=0,
+        help='device used by single-device workloads (default: %(default)s)',
+    )
+    bench.add_argument(
+        '--speed-hz', type=int, default=Constant.SpiSpeedHz,
+        help='SPI clock frequency (default: %(default)s)',
+    )
+    bench.add_argument(
+        '--duration', type=float, default=1.0,
+        help='seconds per workload (default: %(default)s)',
+    )
+    bench.add_argument(
+        '--workloads', type=_parseWorkloads, default=list(Workload.All),
+        help=f'comma separated, from {", ".join(Workload.All)}',
+    )
+    bench.add_argument(
+        '--json', action='store_true',
+        help='print the report as JSON',
+    )
+    bench.add_argument(
+        '--trace', metavar='PATH',
+        help='write a timeline of the last events, as Perfetto protobuf '
+        'if PATH ends in .pftrace, Chrome trace JSON otherwise',
+    )
+
+    discover = commands.add_parser(
+        'discover',
+        help='count the devices on a bus and check each of them',
+    )
+    discover.add_argument(
+        '--spi-select', type=_parseSpiSelect, metavar='BUS,DEVICE',
+        required=True,
+        help='spidev bus and device of the chain',
+    )
+    discover.add_argument(
+        '--devices', type=int, default=1,
+        help='devices the chain should have (default: %(default)s)',
+    )
+    discover.add_argument(
+        '--max-devices', type=int, default=32,
+        help='longest chain to look for (default: %(default)s)',
+    )
+    discover.add_argument(
+        '--speed-hz', type=int, default=Constant.SpiSpeedHz,
+        help='SPI clock frequency (default: %(default)s)',
+    )
+    discover.add_argument(
+        '--json', action='store_true',
+        help='print the result as JSON',
+    )
+
+    return parser
+
+
+def _runDiscover(args: argparse.Namespace) -> int:
+    if args.devices < 1 or args.max_devices < args.devices:
+        print('devices must be between 1 and max devices', file=sys.stderr)
+        return 2
+
+    chain = SpinChain(
+        args.devices,
+        spi_select=tuple(args.spi_select),
+        spi_speed_hz=args.speed_hz,
+    )
+
+    try:
+        topology = discoverTopology(chain, args.max_devices)
+    except TopologyError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps({
+            'total_devices': topology.total_devices,
+            'expected_devices': topology.expected_devices,
+            'responding': topology.responding,
+            'matches': topology.matches,
+        }, indent=2))
+    else:
+        print(
+            f'{topology.total_devices} devices found, '
+            f'{topology.expected_devices} expected'
+        )
+
+        if topology.total_devices == topology.expected_devices:
+            for position, responding in enumerate(topology.responding):
+                print(f'{position}: {"ok" if responding else "no response"}')
+
+    return 0 if topology.matches else 1
+
+
+def _runBench(args: argparse.Namespace) -> int:
+    if args.devices < 1 or args.position not in range(args.devices):
+        print('position must be within the chain', file=sys.stderr)
+        return 2
+
+    if args.duration <= 0:
+        print('duration must be positive', file=sys.stderr)
+        return 2
+
+    if args.fake:
+        # The simulated bus takes as long as the real one would
+        model = WireTimeModel(args.devices, args.speed_hz)
+        chain = SpinChain(
+            args.devices,
+            spi_transfer=FakeTransport(
+                args.devices, transfer_seconds=model.getFrameSeconds(),
+            ),
+            spi_speed_hz=args.speed_hz,
+        )
+    else:
+        chain = SpinChain(
+            args.devices,
+            spi_select=tuple(args.spi_select),
+            spi_speed_hz=args.speed_hz,
+        )
+
+    tracer = None
+
+    if args.trace:
+        tracer = ChainTracer()
+        tracer.attach(chain)
+
+    report = ChainBench(chain, args.position).run(
+        args.workloads, args.duration,
+    )
+
+    if tracer is not None:
+        if args.trace.endswith('.pftrace'):
+            tracer.writePerfetto(args.trace)
+        else:
+            tracer.writeChromeTrace(args.trace)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(formatReport(report))
+
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point
+
+    :argv: Arguments without program name, sys.argv if None
+    :returns: Exit status
+    """
+    args = _buildParser().parse_args(argv)
+
+    if 'bench' == args.command:
+        return _runBench(args)
+
+    if 'discover' == args.command:
+        return _runDiscover(args)
+
+    return 2
+
+
+if '__main__' == __name__:
+    sys.exit(main())
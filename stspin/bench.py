@@ -0,0 +1,214 @@
+import time
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import Register
+from .stats import LatencyStats
+from .wire_time import WireProfiler, WireTimeModel
+
+# Written and read back by the workloads, restored afterwards.
+# Mark is only used by GoMark and switch commands, none of which run
+ScratchRegister: Final = Register.Mark
+
+# Registers fetched by the chain_read workload
+ChainReadRegisters: Final = (
+    Register.Status,
+    Register.PosAbs,
+    Register.Speed,
+    Register.Mark,
+)
+
+
+class Workload:
+    RegisterRead: Final     = 'register_read'   # One device, scratch register
+    RegisterWrite: Final    = 'register_write'  # One device, scratch register
+    StatusPoll: Final       = 'status_poll'     # Status of every device
+    ChainRead: Final        = 'chain_read'      # Several registers, every device
+    ChainWrite: Final       = 'chain_write'     # Scratch register, every device
+
+    All: Final = (
+        RegisterRead,
+        RegisterWrite,
+        StatusPoll,
+        ChainRead,
+        ChainWrite,
+    )
+
+
+class ChainBench:
+    """Measure a chain's bus throughput without moving any motor
+
+    Each workload repeats a single register operation for a fixed time.
+    Every operation's latency is recorded, and every transfer is
+    accounted by a WireProfiler to split bus time from driver overhead.
+    """
+
+    def __init__(self, chain: Any, position: int = 0) -> None:
+        """
+        :chain: SpinChain to measure. Its transfer function is wrapped
+        :position: Device used by the single-device workloads
+        """
+        assert position in range(chain._total_devices)
+
+        self._chain: Final = chain
+        self._model: Final = WireTimeModel.fromChain(chain)
+        self._profiler: Final = WireProfiler(self._model)
+
+        chain._spi_transfer = \
+            self._profiler.wrapTransfer(chain._spi_transfer)
+        self._device: Final = chain.create(position)
+
+        self._counter = 0
+
+    def run(
+            self, workloads: Sequence[str] = Workload.All,
+            seconds: float = 1.0,
+        ) -> Dict[str, Any]:
+        """Run workloads one after the other
+        The scratch register of every device is restored afterwards
+
+        :workloads: Workload names
+        :seconds: Duration of each workload
+        :returns: Report as built by getReport
+        """
+        assert all(workload in Workload.All for workload in workloads)
+        assert seconds > 0
+
+        chain = self._chain
+        saved = chain.allGetRegister(ScratchRegister)
+        results = {}
+
+        try:
+            for workload in workloads:
+                results[workload] = self._runWorkload(workload, seconds)
+        finally:
+            chain.allSetRegister(ScratchRegister, saved)
+
+        return self.getReport(results)
+
+    def _getOperation(self, workload: str) -> Callable[[], Any]:
+        """Single operation of a workload"""
+        chain = self._chain
+        device = self._device
+        total_devices = chain._total_devices
+
+        if Workload.RegisterRead == workload:
+            return lambda: device.getRegister(ScratchRegister)
+
+        if Workload.RegisterWrite == workload:
+            return lambda: device.setRegister(
+                ScratchRegister, self._nextValue()
+            )
+
+        if Workload.StatusPoll == workload:
+            return lambda: chain.allGetRegister(Register.Status)
+
+        if Workload.ChainRead == workload:
+            return lambda: chain.allGetRegisters(ChainReadRegisters)
+
+        return lambda: chain.allSetRegister(
+            ScratchRegister, [self._nextValue()] * total_devices
+        )
+
+    def _nextValue(self) -> int:
+        """Changing scratch value, so elided writes still reach the bus"""
+        self._counter = (self._counter + 1) & 0x3FFFFF
+
+        return self._counter
+
+    def _runWorkload(self, workload: str, seconds: float) -> LatencyStats:
+        """Repeat a workload's operation for a while"""
+        operation = self._getOperation(workload)
+        profiler = self._profiler
+        latency = LatencyStats(window=1 << 16)
+        end = time.perf_counter() + seconds
+
+        while True:
+            start = time.perf_counter()
+
+            if start >= end:
+                break
+
+            with profiler.operation(workload):
+                operation()
+
+            latency.add(time.perf_counter() - start)
+
+        return latency
+
+    def getReport(self, results: Dict[str, LatencyStats]) -> Dict[str, Any]:
+        """Combine latencies with the profiled bus usage
+
+        :results: Latency of each workload run
+        :returns: Chain setup and, per workload, ops/s, latency summary,
+            bytes/s and wire, syscall and python seconds
+        """
+        operations = {
+            stats.name: stats for stats in self._profiler.getReport()
+        }
+        report: Dict[str, Any] = {
+            'devices': self._chain._total_devices,
+            'spi_speed_hz': self._chain._spi_speed_hz,
+            'frame_seconds': self._model.getFrameSeconds(),
+            'workloads': {},
+        }
+
+        for workload, latency in results.items():
+            stats = operations[workload]
+            seconds = stats.wall_seconds or 1.0
+
+            report['workloads'][workload] = {
+                'ops': stats.calls,
+                'seconds': stats.wall_seconds,
+                'ops_per_second': stats.calls / seconds,
+                'latency': latency.getSummary(),
+                'frames': stats.frames,
+                'bytes': stats.bytes,
+                'useful_bytes': stats.useful_bytes,
+                'bytes_per_second': stats.bytes / seconds,
+                'wire_seconds': stats.wire_seconds,
+                'syscall_seconds': stats.syscall_seconds,
+                'python_seconds': stats.python_seconds,
+            }
+
+        return report
+
+
+def formatReport(report: Dict[str, Any]) -> str:
+    """Render a bench report as a text table
+
+    :report: Report returned by ChainBench.run
+    :returns: Table with one line per workload
+    """
+    lines = [
+        f'{report["devices"]} devices at {report["spi_speed_hz"]} Hz, '
+        f'{report["frame_seconds"] * 1e6:.1f} us per frame',
+        f'{"workload":<16} {"ops":>8} {"ops/s":>10} '
+        f'{"p50 us":>9} {"p90 us":>9} {"p99 us":>9} {"max us":>9} '
+        f'{"bytes/s":>10} {"wire %":>7} {"syscall %":>9} {"python %":>8}',
+    ]
+
+    for workload, result in report['workloads'].items():
+        latency = result['latency']
+        seconds = result['seconds'] or 1.0
+
+        lines.append(
+            f'{workload:<16} {result["ops"]:>8} '
+            f'{result["ops_per_second"]:>10.1f} '
+            f'{latency["p50"] * 1e6:>9.1f} {latency["p90"] * 1e6:>9.1f} '
+            f'{latency["p99"] * 1e6:>9.1f} {latency["max"] * 1e6:>9.1f} '
+            f'{result["bytes_per_second"]:>10.1f} '
+            f'{result["wire_seconds"] / seconds * 100:>7.1f} '
+            f'{result["syscall_seconds"] / seconds * 100:>9.1f} '
+            f'{result["python_seconds"] / seconds * 100:>8.1f}'
+        )
+
+    return '\n'.join(lines)
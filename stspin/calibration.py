@@ -0,0 +1,297 @@
+import time
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import Register
+from .families import FamilyCodec
+
+# Thresholds that can be calibrated
+TripRegisters: Final = (Register.ThStl, Register.ThOcd)
+
+
+def getTripBits(codec: FamilyCodec, register: int) -> int:
+    """Status bits, active low, that reveal a threshold being too low
+
+    :codec: Codec of the device's family
+    :register: One of TripRegisters
+    :returns: Bits in the family's Status layout, 0 if it has none
+    """
+    status = codec.status
+
+    if Register.ThStl == register:
+        return status.not_step_loss_a | status.not_step_loss_b
+
+    assert Register.ThOcd == register
+
+    return status.not_overcurrent
+
+
+class CalibrationProfile:
+    """Calibrated thresholds of every device, ready to apply"""
+
+    def __init__(
+            self, values: List[Dict[int, int]],
+            failed: List[List[int]],
+            units: List[Dict[int, float]],
+        ) -> None:
+        """
+        :values: Calibrated raw register values, indexed by position
+        :failed: Registers that tripped even at their maximum, by position
+        :units: Calibrated values in the register's unit, by position
+        """
+        self.values: Final = values
+        self.failed: Final = failed
+        self.units: Final = units
+
+    def apply(self, chain: Any) -> None:
+        """Write the calibrated thresholds, one frame set per register
+
+        :chain: SpinChain the profile was calibrated on
+        """
+        registers = sorted({r for values in self.values for r in values})
+
+        for register in registers:
+            chain.allSetRegister(
+                register, [values.get(register) for values in self.values],
+            )
+
+    def toDict(self) -> Dict[str, Any]:
+        """Profile as JSON-serializable data
+
+        :returns: Raw values, values in units and failures, by position
+        """
+        return {
+            'devices': [
+                {
+                    'values': {f'0x{r:02X}': v for r, v in values.items()},
+                    'units': {f'0x{r:02X}': u for r, u in units.items()},
+                    'failed': [f'0x{r:02X}' for r in failed],
+                }
+                for values, units, failed
+                in zip(self.values, self.units, self.failed)
+            ],
+        }
+
+
+class ThresholdCalibrator:
+    """Find the lowest safe stall and overcurrent thresholds of many
+    devices at once
+
+    Every selected device runs the same test pattern while a binary
+    search on its own threshold narrows down the lowest value that does
+    not trip. All devices share each step: one frame set writes every
+    candidate, one runs the motors and one GetStatus reads and clears
+    every device's flags. A whole chain takes as many steps as a single
+    device, the bit width of the register plus one final check.
+    Motors must be free to run at the test speeds.
+    """
+
+    def __init__(
+            self, chain: Any,
+            positions: Optional[Sequence[int]] = None,
+            speeds: Sequence[float] = (200.0,),
+            settle_seconds: float = 0.3,
+            dwell_seconds: float = 0.5,
+            margin: int = 2,
+        ) -> None:
+        """
+        :chain: SpinChain to calibrate
+        :positions: Devices to calibrate, None for every device
+        :speeds: Full steps per second of the test pattern, each run
+            in turn at every step of the search
+        :settle_seconds: Time to reach each speed before watching flags
+        :dwell_seconds: Time spent watching flags at each speed
+        :margin: Register steps added to the lowest value not tripping
+        """
+        if positions is None:
+            positions = range(chain._total_devices)
+
+        assert speeds
+        assert settle_seconds >= 0
+        assert dwell_seconds >= 0
+        assert margin >= 0
+
+        self._chain: Final = chain
+        self._positions: Final = sorted(set(positions))
+        self._speeds: Final = list(speeds)
+        self._settle_seconds: Final = settle_seconds
+        self._dwell_seconds: Final = dwell_seconds
+        self._margin: Final = margin
+
+        assert all(
+            p in range(chain._total_devices) for p in self._positions
+        )
+
+        self.steps = 0
+
+    def calibrate(
+            self, registers: Sequence[int] = (Register.ThStl, Register.ThOcd),
+        ) -> CalibrationProfile:
+        """Calibrate thresholds one register after the other
+        The other thresholds are held at their maximum meanwhile, so only
+        the register being calibrated can trip. Every threshold is restored
+        and the motors soft stopped afterwards. Devices whose family has
+        no Status bit for a threshold are left out of its search
+
+        :registers: Registers from TripRegisters to calibrate
+        :returns: Calibrated profile, not applied
+        """
+        assert all(register in TripRegisters for register in registers)
+
+        chain = self._chain
+        codecs = chain._codecs
+        total_devices = chain._total_devices
+        saved = {
+            register: chain.allGetRegister(register)
+            for register in TripRegisters
+        }
+        values: List[Dict[int, int]] = [{} for _ in range(total_devices)]
+        failed: List[List[int]] = [[] for _ in range(total_devices)]
+
+        try:
+            for register in TripRegisters:
+                self._setMaximum(register)
+
+            for register in registers:
+                results = self._search(register)
+
+                for position, value in results.items():
+                    if value is None:
+                        failed[position].append(register)
+                    else:
+                        values[position][register] = min(
+                            value + self._margin,
+                            codecs[position].mask[register],
+                        )
+
+                self._setMaximum(register)
+        finally:
+            chain.allSoftStop(
+                [p in self._positions for p in range(total_devices)]
+            )
+
+            for register, previous in saved.items():
+                chain.allSetRegister(register, previous)
+
+        units = [
+            {
+                register: codecs[position].toUnits(register, value)
+                for register, value in device_values.items()
+            }
+            for position, device_values in enumerate(values)
+        ]
+
+        return CalibrationProfile(values, failed, units)
+
+    def _setMaximum(self, register: int) -> None:
+        """Write a threshold's maximum to every selected device"""
+        codecs = self._chain._codecs
+
+        self._chain.allSetRegister(register, [
+            codecs[p].mask[register]
+            if p in self._positions and codecs[p].supports(register) else None
+            for p in range(self._chain._total_devices)
+        ])
+
+    def _search(self, register: int) -> Dict[int, Optional[int]]:
+        """Binary search every device's lowest value that does not trip
+
+        :returns: Value for each selected device supporting the register
+            and flagging it in Status, None if it trips even at the maximum
+        """
+        codecs = self._chain._codecs
+        # Lowest value not known to trip, highest value to consider
+        # and whether that highest value was seen not tripping
+        low: Dict[int, int] = {}
+        high: Dict[int, int] = {}
+        passed: Dict[int, bool] = {}
+
+        for position in self._positions:
+            if codecs[position].supports(register) \
+                    and getTripBits(codecs[position], register):
+                low[position] = 0
+                high[position] = codecs[position].mask[register]
+                passed[position] = False
+
+        while True:
+            # Searching devices test their midpoint, converged devices
+            # never seen passing check their final value once
+            candidates = {}
+
+            for position in low:
+                if low[position] < high[position]:
+                    candidates[position] = \
+                        (low[position] + high[position]) // 2
+                elif not passed[position]:
+                    candidates[position] = low[position]
+
+            if not candidates:
+                break
+
+            trips = self._test(register, candidates)
+
+            for position, value in candidates.items():
+                if not trips[position]:
+                    high[position] = value
+                    passed[position] = True
+                elif low[position] == high[position]:
+                    # Trips even at the maximum, give up on the device
+                    low[position] = high[position] = -1
+                    passed[position] = True
+                else:
+                    low[position] = value + 1
+
+        return {
+            position: None if value < 0 else value
+            for position, value in low.items()
+        }
+
+    def _test(self, register: int, candidates: Dict[int, int]) -> Dict[int, bool]:
+        """Run the test pattern with candidate thresholds on some devices
+
+        :returns: Whether each device tripped
+        """
+        chain = self._chain
+        codecs = chain._codecs
+        total_devices = chain._total_devices
+        trips = {position: False for position in candidates}
+
+        chain.allSetRegister(
+            register, [candidates.get(p) for p in range(total_devices)],
+        )
+
+        for speed in self._speeds:
+            chain.allRun([
+                speed if p in candidates else None
+                for p in range(total_devices)
+            ])
+
+            if self._settle_seconds:
+                time.sleep(self._settle_seconds)
+
+            # Clear flags raised while accelerating
+            chain.allClearStatus()
+
+            if self._dwell_seconds:
+                time.sleep(self._dwell_seconds)
+
+            statuses = chain.allClearStatus()
+
+            for position in candidates:
+                bits = getTripBits(codecs[position], register)
+
+                if ~statuses[position] & bits:
+                    trips[position] = True
+
+        self.steps += 1
+
+        return trips
@@ -54,6 +54,7 @@ PayloadSize: Final[Dict[int, int]] = {
     Command.ResetDevice:    0,
     Command.ResetPos:       0,
     Command.Run:            3,
+    Command.StatusGet:      2,
     Command.StepClock:      0,
     Command.StopHard:       0,
     Command.StopSoft:       0,
@@ -15,4 +15,11 @@ class Constant:
 
     TickSeconds: Final[float]           = 250 * (10 ** -9)
     SpsToSpeed: Final[float]            = TickSeconds / (2 ** -28)
+    SpsToMaxSpeed: Final[float]         = TickSeconds / (2 ** -18)
+    SpsToMinSpeed: Final[float]         = TickSeconds / (2 ** -24)
     Sps2ToAcc: Final[float]             = TickSeconds**2 / (2**-40)
+
+    StepModeMask: Final                 = 0x07  # Microsteps = 2 ** STEP_SEL
+
+    SpiSpeedHz: Final                   = 5000000
+    CsDisableSeconds: Final[float]      = 800 * (10 ** -9)  # tdisCS min
@@ -0,0 +1,286 @@
+import math
+import threading
+import time
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Constant,
+    Register,
+    Status,
+)
+from .frames import (
+    DeviceLine,
+    encodeRun,
+)
+from .stats import LatencyStats
+from .utility import toSignedInt
+
+# Registers read for every tick, in a single frame set
+StateRegisters: Final = [Register.Status, Register.Speed, Register.PosAbs]
+
+
+class ChainState(NamedTuple):
+    """State of every device at the start of a tick"""
+    timestamp: float                # perf_counter time of the read
+    status: List[int]               # Raw Status register
+    speed: List[Optional[float]]    # Signed full steps/s, None if the
+                                    # device has no Speed register
+    position: List[int]             # Signed (micro)steps
+
+
+class Stop:
+    """Per-device stop request returned by a control callback"""
+
+    def __init__(self, command: int) -> None:
+        """
+        :command: Stop or HiZ command to send
+        """
+        assert command in (
+            Command.StopSoft, Command.StopHard,
+            Command.HiZSoft, Command.HiZHard,
+        )
+
+        self.command: Final = command
+
+
+StopSoft: Final = Stop(Command.StopSoft)
+StopHard: Final = Stop(Command.StopHard)
+HiZSoft: Final = Stop(Command.HiZSoft)
+HiZHard: Final = Stop(Command.HiZHard)
+
+# Per device: None to leave it alone, a speed for Run, or a Stop
+DeviceCommand = Optional[Union[float, Stop]]
+LoopCommands = Optional[Union[Sequence[DeviceCommand], Dict[int, DeviceCommand]]]
+LoopCallback = Callable[[ChainState, int], LoopCommands]
+
+
+class SkipPolicy:
+    Skip: Final         = 0  # Drop missed ticks, stay on the original grid
+    CatchUp: Final      = 1  # Run missed ticks back to back
+    Slip: Final         = 2  # Restart the grid after an overrun
+
+
+class ControlLoop:
+    """Fixed-rate control loop over a whole chain
+
+    Every tick reads Status, Speed and PosAbs of all devices in a single
+    frame set, hands them to the callback, and sends the returned speeds
+    and stops to all devices in a single frame set.
+    """
+
+    def __init__(
+            self, chain: Any,
+            period: float,
+            callback: LoopCallback,
+            skip_policy: int = SkipPolicy.Skip,
+        ) -> None:
+        """
+        :chain: SpinChain to control
+        :period: Tick period in seconds
+        :callback: Called with the chain state and tick number,
+            returns per-device commands
+        :skip_policy: What to do after a tick overran its deadline
+        """
+        assert period > 0
+        assert skip_policy in (
+            SkipPolicy.Skip, SkipPolicy.CatchUp, SkipPolicy.Slip,
+        )
+
+        self._chain: Final          = chain
+        self._period: Final         = period
+        self._callback: Final       = callback
+        self._skip_policy: Final    = skip_policy
+
+        self._thread: Optional[threading.Thread] = None
+        self._running: Final = threading.Event()
+
+        self.ticks          = 0
+        self.overruns       = 0
+        self.skipped        = 0
+        self.frame_sets     = 0
+
+        self.jitter: Final      = LatencyStats()  # Tick start lateness
+        self.read: Final        = LatencyStats()
+        self.compute: Final     = LatencyStats()
+        self.write: Final       = LatencyStats()
+        self.duration: Final    = LatencyStats()
+
+    def readState(self) -> ChainState:
+        """Read the state of every device in a single frame set
+
+        :returns: Chain state
+        """
+        values = self._chain.allGetRegisters(StateRegisters)
+        timestamp = time.perf_counter()
+
+        status = [v[Register.Status] for v in values]
+        speed = [
+            None if Register.Speed not in v
+            else (1 if s & Status.Dir else -1) * v[Register.Speed]
+            / Constant.SpsToSpeed
+            for s, v in zip(status, values)
+        ]
+        position = [toSignedInt(v[Register.PosAbs]) for v in values]
+
+        return ChainState(timestamp, status, speed, position)
+
+    def send(self, commands: LoopCommands) -> bool:
+        """Send per-device commands in a single frame set
+
+        :commands: Sequence indexed by position, or dict by position
+        :returns: True if anything was sent
+        """
+        if not commands:
+            return False
+
+        if isinstance(commands, dict):
+            items = commands.items()
+        else:
+            items = enumerate(commands)
+
+        lines: List[DeviceLine] = [None] * self._chain._total_devices
+
+        for position, command in items:
+            if command is None:
+                continue
+
+            if isinstance(command, Stop):
+                lines[position] = command.command
+            else:
+                lines[position] = encodeRun(command)
+
+        if all(line is None for line in lines):
+            return False
+
+        self._chain._exchange(lines)
+        self.frame_sets += 1
+
+        return True
+
+    def tick(self) -> None:
+        """Run a single tick immediately"""
+        start = time.perf_counter()
+        state = self.readState()
+        read = time.perf_counter()
+
+        commands = self._callback(state, self.ticks)
+        computed = time.perf_counter()
+
+        self.send(commands)
+        done = time.perf_counter()
+
+        self.ticks += 1
+        self.read.add(read - start)
+        self.compute.add(computed - read)
+        self.write.add(done - computed)
+        self.duration.add(done - start)
+
+    def run(
+            self, ticks: Optional[int] = None,
+            seconds: Optional[float] = None,
+        ) -> None:
+        """Run ticks at the fixed period in the calling thread
+
+        :ticks: Stop after this many ticks, None for no limit
+        :seconds: Stop after this long, None for no limit
+        """
+        self._running.set()
+        self._run(ticks, seconds)
+
+    def _run(self, ticks: Optional[int], seconds: Optional[float]) -> None:
+        """Tick until stopped or a limit is reached
+        Leaves the running flag alone until then, so a stop() made before
+        the background thread gets here is not lost
+        """
+        start = time.perf_counter()
+        deadline = start
+        end = None if seconds is None else start + seconds
+        remaining = ticks
+
+        while self._running.is_set():
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                remaining -= 1
+
+            now = time.perf_counter()
+
+            if end is not None and now >= end:
+                break
+
+            if deadline > now:
+                time.sleep(deadline - now)
+                now = time.perf_counter()
+
+            self.jitter.add(now - deadline)
+            self.tick()
+
+            deadline += self._period
+            now = time.perf_counter()
+
+            if now <= deadline:
+                continue
+
+            self.overruns += 1
+
+            if self._skip_policy == SkipPolicy.Skip:
+                missed = math.ceil((now - deadline) / self._period)
+                self.skipped += missed
+                deadline += missed * self._period
+
+            elif self._skip_policy == SkipPolicy.Slip:
+                deadline = now
+
+        self._running.clear()
+
+    def start(self) -> None:
+        """Run ticks in a background thread until stop()"""
+        assert self._thread is None, 'Control loop already running'
+
+        self._running.set()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(None, None),
+            name='stspin-control-loop',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop ticking, after the current tick completes"""
+        self._running.clear()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def getReport(self) -> Dict[str, Any]:
+        """Summarize deadline and latency statistics
+
+        :returns: Counters and latency summaries in seconds
+        """
+        return {
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'frame_sets': self.frame_sets,
+            'jitter': self.jitter.getSummary(),
+            'read': self.read.getSummary(),
+            'compute': self.compute.getSummary(),
+            'write': self.write.getSummary(),
+            'duration': self.duration.getSummary(),
+        }
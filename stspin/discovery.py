@@ -0,0 +1,222 @@
+from typing import (
+    Any,
+    Callable,
+    List,
+    NamedTuple,
+    Optional,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Register,
+)
+
+# Shifted through the chain to measure its length. Followed by NOPs,
+# so only NOPs are left in the devices when chip select rises
+ShiftPattern: Final = (0xE5, 0x5E, 0xEA, 0xAE)
+
+# Guard bytes appended to frames at runtime. Not a command of any
+# family, so a device latching one only flags CmdWrong
+GuardBytes: Final = (0xE5, 0xEA)
+
+# Written to the scratch register, ORed with the position
+_ScratchBase: Final = 0x2A5A00
+
+ScratchRegister: Final = Register.Mark
+
+
+class TopologyError(Exception):
+    """Chain does not have the devices it was created for"""
+
+
+class ChainTopology(NamedTuple):
+    total_devices: int          # Devices found on the bus
+    expected_devices: int       # Devices the chain was created for
+    responding: List[bool]      # Scratch readback matched, by position
+
+    @property
+    def matches(self) -> bool:
+        """Whether the chain length is right and every device responds"""
+        return self.total_devices == self.expected_devices \
+            and all(self.responding)
+
+
+def measureChainLength(
+        spi_transfer: Callable[[List[int]], List[int]],
+        max_devices: int = 32,
+    ) -> int:
+    """Count the devices on a bus by shifting a pattern through them
+    Each device delays the bus by one byte, so the pattern comes back
+    after as many bytes as there are devices. Measured twice, so stale
+    response bytes cannot fake the pattern
+
+    :spi_transfer: Transfer function of the bus, like spidev.xfer2
+    :max_devices: Longest chain to look for
+    :returns: Number of devices
+    :raises TopologyError: Pattern lost, or measurements disagree
+    """
+    assert max_devices > 0
+
+    pattern = list(ShiftPattern)
+    buffer = pattern + [Command.Nop] * max_devices
+    lengths = []
+
+    for _ in range(2):
+        received = spi_transfer(buffer)
+        length = None
+
+        for index in range(max_devices + 1):
+            if received[index:index + len(pattern)] == pattern:
+                length = index
+                break
+
+        if length is None:
+            raise TopologyError(
+                f'Shift pattern not returned, no chain of up to '
+                f'{max_devices} devices on the bus'
+            )
+
+        lengths.append(length)
+
+    if lengths[0] != lengths[1]:
+        raise TopologyError(
+            f'Chain length measured as {lengths[0]}, then {lengths[1]}'
+        )
+
+    if not lengths[0]:
+        raise TopologyError('Bus is looped back without any device')
+
+    return lengths[0]
+
+
+def checkPositions(chain: Any) -> List[bool]:
+    """Check every position answers with its own data
+    Writes a distinct value to each device's scratch register, reads them
+    back in one frame set, then restores the previous values. Misaligned
+    frames read back a neighbour's value, a missing device reads nothing
+
+    :chain: SpinChain to check
+    :returns: Whether each position read back its value
+    """
+    total_devices = chain._total_devices
+    saved = chain.allGetRegister(ScratchRegister)
+    expected = [_ScratchBase | position for position in range(total_devices)]
+
+    try:
+        chain.allSetRegister(ScratchRegister, expected)
+        values = chain.allGetRegister(ScratchRegister)
+    finally:
+        chain.allSetRegister(ScratchRegister, saved)
+
+    return [value == e for value, e in zip(values, expected)]
+
+
+def discoverTopology(chain: Any, max_devices: int = 32) -> ChainTopology:
+    """Find the real length of a chain's bus and check each device
+    Takes a few frame sets, so it suits startup checks
+
+    :chain: SpinChain whose bus is checked
+    :max_devices: Longest chain to look for
+    :returns: Devices found and the result of each position's check.
+        Positions are only checked when the length matches
+    :raises TopologyError: No chain found on the bus
+    """
+    expected = chain._total_devices
+
+    with chain._lock:
+        total_devices = measureChainLength(chain._spi_transfer, max_devices)
+
+        if total_devices == expected:
+            responding = checkPositions(chain)
+        else:
+            responding = [False] * expected
+
+    return ChainTopology(total_devices, expected, responding)
+
+
+def verifyAlignment(chain: Any) -> bool:
+    """Check the chain length with a single transfer
+    One NOP frame is sent after a guard byte, which comes back exactly
+    after the frame only if the chain has the expected length
+
+    :chain: SpinChain to check
+    :returns: True if aligned
+    """
+    total_devices = chain._total_devices
+    guard = GuardBytes[0]
+
+    with chain._lock:
+        received = chain._spi_transfer(
+            [guard] + [Command.Nop] * total_devices
+        )
+
+    return received[total_devices] == guard
+
+
+class AlignmentGuard:
+    """Check the chain length on every transfer at the cost of one byte
+
+    Each frame is sent after a guard byte. With the right number of
+    devices the guard comes back as the frame's last byte and the frame
+    itself lands on the devices as usual. Any other length returns
+    something else, so misalignment is noticed on the very next poll.
+    Guard bytes alternate, so a stale byte cannot pass twice.
+    """
+
+    def __init__(
+            self, chain: Any,
+            on_misaligned: Optional[Callable[[List[int]], None]] = None,
+        ) -> None:
+        """
+        :chain: SpinChain to guard
+        :on_misaligned: Called with the frame sent when a check fails.
+            TopologyError is raised from the transfer if None
+        """
+        self._chain: Final = chain
+        self._on_misaligned: Final = on_misaligned
+        self._transfer: Optional[Callable[[List[int]], List[int]]] = None
+        self._next = 0
+
+        self.checks = 0
+        self.failures = 0
+
+    def attach(self) -> None:
+        """Guard the chain's transfers
+        Attach before creating devices, so they share the guarded transfer
+        """
+        assert self._transfer is None, 'Guard already attached'
+
+        self._transfer = self._chain._spi_transfer
+        self._chain._spi_transfer = self._guardedTransfer
+
+    def detach(self) -> None:
+        """Give the chain back its own transfer function"""
+        assert self._transfer is not None, 'Guard not attached'
+
+        self._chain._spi_transfer = self._transfer
+        self._transfer = None
+
+    def _guardedTransfer(self, buffer: List[int]) -> List[int]:
+        """Transfer a frame behind a guard byte and check it returns"""
+        assert self._transfer is not None
+
+        guard = GuardBytes[self._next]
+        self._next ^= 1
+
+        received = self._transfer([guard] + list(buffer))
+        self.checks += 1
+
+        if received[len(buffer)] != guard:
+            self.failures += 1
+
+            if self._on_misaligned is None:
+                raise TopologyError(
+                    f'Chain of {len(buffer)} devices is misaligned'
+                )
+
+            self._on_misaligned(list(buffer))
+
+        return received[:len(buffer)]
@@ -0,0 +1,228 @@
+import os
+import select
+import struct
+import threading
+import time
+
+from typing import (
+    Dict,
+    Optional,
+)
+from typing_extensions import (
+    Final,
+)
+
+
+class EdgeLine:
+    """Open-drain outputs of the chain, wired together across devices"""
+    Busy: Final             = 0  # Low while any device is busy
+    Flag: Final             = 1  # Low while any device has an alarm
+
+    Names: Final = ('busy', 'flag')
+
+
+class EdgeSource:
+    """Levels and edges of the chain's BUSY and FLAG lines
+
+    Subclasses provide getLevel and waitEdge. Edges must be queued from
+    the moment the source is opened, so an edge happening between a
+    level check and the following wait is not lost.
+    """
+
+    def getLevel(self, line: int) -> bool:
+        """Current level of a line
+
+        :line: EdgeLine
+        :returns: True if high
+        """
+        raise NotImplementedError
+
+    def waitEdge(self, line: int, timeout: Optional[float] = None) -> bool:
+        """Wait for the next edge of a line, or consume a queued one
+
+        :line: EdgeLine
+        :timeout: Seconds to wait at most, None for no limit
+        :returns: False on timeout
+        """
+        raise NotImplementedError
+
+    def waitLevel(
+            self, line: int,
+            level: bool,
+            timeout: Optional[float] = None,
+        ) -> bool:
+        """Wait until a line is at a level
+
+        :line: EdgeLine
+        :level: True to wait for high, False for low
+        :timeout: Seconds to wait at most, None for no limit
+        :returns: False on timeout
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        # Queued edges from before the check only cost another check
+        while self.getLevel(line) != level:
+            remaining = None
+
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+
+                if remaining <= 0:
+                    return False
+
+            self.waitEdge(line, remaining)
+
+        return True
+
+    def close(self) -> None:
+        """Release the lines"""
+
+
+class FakeEdgeSource(EdgeSource):
+    """In-memory lines driven by tests or simulations"""
+
+    def __init__(self) -> None:
+        self._condition: Final = threading.Condition()
+        # Lines idle high, as pulled up
+        self._levels: Final = [True] * len(EdgeLine.Names)
+        self._pending: Final = [0] * len(EdgeLine.Names)
+
+        self.edges: Final = [0] * len(EdgeLine.Names)
+
+    def setLevel(self, line: int, level: bool) -> None:
+        """Drive a line, queueing an edge if its level changes
+
+        :line: EdgeLine
+        :level: True for high
+        """
+        with self._condition:
+            if self._levels[line] == level:
+                return
+
+            self._levels[line] = level
+            self._pending[line] += 1
+            self.edges[line] += 1
+            self._condition.notify_all()
+
+    def getLevel(self, line: int) -> bool:
+        with self._condition:
+            return self._levels[line]
+
+    def waitEdge(self, line: int, timeout: Optional[float] = None) -> bool:
+        with self._condition:
+            if not self._condition.wait_for(
+                    lambda: self._pending[line], timeout):
+                return False
+
+            self._pending[line] -= 1
+
+        return True
+
+
+# {{{ Linux GPIO character device ABI v1
+_GpioIoctlType: Final = 0xB4
+_HandleRequestInput: Final = 1 << 0
+_EventRequestBothEdges: Final = 0x3
+
+# lineoffset, handleflags, eventflags, consumer_label, fd
+_EventRequest: Final = struct.Struct('<III32si')
+# timestamp in ns, event id
+_EventData: Final = struct.Struct('<QI4x')
+_LineValues: Final = struct.Struct('<64B')
+
+
+def _ioWR(number: int, size: int) -> int:
+    """Linux _IOWR ioctl request code"""
+    return (3 << 30) | (size << 16) | (_GpioIoctlType << 8) | number
+
+
+_GetLineEventIoctl: Final = _ioWR(0x04, _EventRequest.size)
+_GetLineValuesIoctl: Final = _ioWR(0x08, _LineValues.size)
+# }}}
+
+
+class GpioEdgeSource(EdgeSource):
+    """BUSY and FLAG lines read through a Linux GPIO character device
+
+    Each line is requested for both edges, so the kernel timestamps and
+    queues edges while nobody waits. Waits block in poll() on the line's
+    event file, without any SPI traffic.
+    """
+
+    def __init__(
+            self, chip: str = '/dev/gpiochip0',
+            busy_offset: Optional[int] = None,
+            flag_offset: Optional[int] = None,
+            consumer: str = 'stspin',
+        ) -> None:
+        """
+        :chip: GPIO character device
+        :busy_offset: Line offset of the BUSY output on the chip, None if
+            not wired
+        :flag_offset: Line offset of the FLAG output on the chip, None if
+            not wired
+        :consumer: Label shown for the lines, e.g. by gpioinfo
+        """
+        import fcntl
+
+        assert busy_offset is not None or flag_offset is not None
+
+        self._ioctl: Final = fcntl.ioctl
+        self._fds: Final[Dict[int, int]] = {}
+
+        chip_fd = os.open(chip, os.O_RDONLY)
+
+        try:
+            for line, offset in (
+                    (EdgeLine.Busy, busy_offset),
+                    (EdgeLine.Flag, flag_offset),
+                ):
+                if offset is None:
+                    continue
+
+                request = bytearray(_EventRequest.pack(
+                    offset,
+                    _HandleRequestInput,
+                    _EventRequestBothEdges,
+                    consumer.encode()[:31],
+                    0,
+                ))
+                self._ioctl(chip_fd, _GetLineEventIoctl, request)
+                self._fds[line] = _EventRequest.unpack(request)[4]
+        except OSError:
+            self.close()
+            raise
+        finally:
+            os.close(chip_fd)
+
+        self.last_timestamp_ns = 0
+
+    def _getFd(self, line: int) -> int:
+        fd = self._fds.get(line)
+        assert fd is not None, f'{EdgeLine.Names[line]} line not wired'
+
+        return fd
+
+    def getLevel(self, line: int) -> bool:
+        values = bytearray(_LineValues.size)
+        self._ioctl(self._getFd(line), _GetLineValuesIoctl, values)
+
+        return bool(values[0])
+
+    def waitEdge(self, line: int, timeout: Optional[float] = None) -> bool:
+        fd = self._getFd(line)
+        readable, _, _ = select.select([fd], [], [], timeout)
+
+        if not readable:
+            return False
+
+        data = os.read(fd, _EventData.size)
+        self.last_timestamp_ns, _ = _EventData.unpack(data)
+
+        return True
+
+    def close(self) -> None:
+        for fd in self._fds.values():
+            os.close(fd)
+
+        self._fds.clear()
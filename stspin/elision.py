@@ -0,0 +1,272 @@
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Constant,
+    MotorStatus,
+    Register,
+    Status,
+)
+from .families import (
+    FamilyCodec,
+    L6470,
+    VolatileRegisters,
+    getCodec,
+)
+from .frames import (
+    CommandLength,
+    DeviceLine,
+)
+from .utility import toInt
+
+_MotorStatusMask: Final = MotorStatus.ConstantSpeed
+
+_RunMask: Final = 0xFF & ~Constant.DirForward
+
+
+def _iterCommands(
+        line: Sequence[int],
+        command_length: Sequence[int] = CommandLength,
+    ) -> Iterator[Tuple[int, int]]:
+    """Split a device's bytes into commands
+
+    :line: Bytes sent to one device
+    :command_length: Bus length of every command byte for the device
+    :returns: Iterator over (offset, length) of every non-NOP command
+    """
+    offset = 0
+
+    while offset < len(line):
+        command = line[offset]
+        length = command_length[command]
+
+        if Command.Nop != command:
+            yield offset, length
+
+        offset += length
+
+
+class CommandMemory:
+    """Last command state of every device in a chain
+
+    Remembers the active Run and the last value written to or read from
+    every configuration register, so commands that would not change
+    anything on a device can be dropped before they reach the bus.
+    Status reads showing the motor stopped by itself clear the Run.
+    """
+
+    def __init__(
+            self, total_devices: int,
+            codecs: Optional[Sequence[FamilyCodec]] = None,
+        ) -> None:
+        """
+        :total_devices: Total number of devices in chain
+        :codecs: Register codec of each position, all L6470 if None.
+            Registers are remembered by canonical id
+        """
+        if codecs is None:
+            codecs = [getCodec(L6470)] * total_devices
+
+        self._total_devices: Final = total_devices
+        self._codecs: Final = list(codecs)
+
+        # Status bits of each device that end a Run by themselves when
+        # set, and active low ones that do when cleared
+        self._stopped_bits: Final = [
+            Status.HiZ | Status.SwitchEvent | codec.status.cmd_not_performed
+            | codec.status.thermal_shutdown
+            for codec in self._codecs
+        ]
+        self._stopped_active_low_bits: Final = [
+            codec.status.not_step_loss_a | codec.status.not_step_loss_b
+            | codec.status.not_overcurrent | codec.status.not_thermal_shutdown
+            for codec in self._codecs
+        ]
+
+        self._runs: Final[List[Optional[List[int]]]] = [None] * total_devices
+        self._registers: Final[List[Dict[int, int]]] = \
+            [{} for _ in range(total_devices)]
+
+        self.elided_commands: Final = [0] * total_devices
+        self.saved_bytes = 0
+        self.elided_frame_sets = 0
+
+    def forget(self, position: Optional[int] = None) -> None:
+        """Forget everything about a device
+
+        :position: Device position in chain, None for every device
+        """
+        positions = range(self._total_devices) if position is None \
+            else [position]
+
+        for position in positions:
+            self._runs[position] = None
+            self._registers[position].clear()
+
+    def remember(self, position: int, register: int, value: int) -> None:
+        """Record a register value known to be on a device
+        Volatile registers are never remembered
+
+        :position: Device position in chain
+        :register: Register location
+        :value: Register value
+        """
+        if register not in VolatileRegisters:
+            self._registers[position][register] = value
+
+    def isRedundant(self, position: int, line: Sequence[int]) -> bool:
+        """Check whether a device's bytes would change nothing on it
+        Only a line holding a single Run or register write can be redundant
+
+        :position: Device position in chain
+        :line: Bytes for the device
+        :returns: True if the bytes can be dropped
+        """
+        if not line:
+            return False
+
+        command = line[0]
+        codec = self._codecs[position]
+
+        if codec.command_length[command] != len(line):
+            return False
+
+        if command & _RunMask == Command.Run:
+            return self._runs[position] == list(line)
+
+        if command & 0xE0 == Command.ParamSet and Command.Nop != command:
+            register = codec.canonical[command & 0x1F]
+            known = self._registers[position].get(register)
+
+            return known is not None and known == toInt(list(line[1:]))
+
+        return False
+
+    def filter(self, lines: List[DeviceLine]) -> List[DeviceLine]:
+        """Drop the lines that would not change anything
+
+        :lines: Bytes for each position in the chain, None for NOP
+        :returns: Lines to send, with redundant ones replaced by None
+        """
+        frames_before = 0
+        frames_after = 0
+        kept: List[DeviceLine] = []
+
+        for position, line in enumerate(lines):
+            if isinstance(line, int):
+                line = [line]
+
+            length = len(line) if line else 0
+            frames_before = max(frames_before, length)
+
+            if line and self.isRedundant(position, line):
+                self.elided_commands[position] += 1
+                line = None
+            else:
+                frames_after = max(frames_after, length)
+
+            kept.append(line)
+
+        if frames_before and not frames_after:
+            self.elided_frame_sets += 1
+
+        self.saved_bytes += (frames_before - frames_after) * self._total_devices
+
+        return kept
+
+    def observe(
+            self, lines: Sequence[DeviceLine],
+            responses: Sequence[Sequence[int]],
+        ) -> None:
+        """Update the memory from a frame set that was sent
+
+        :lines: Bytes sent to each position, None for NOP
+        :responses: Response bytes of each position
+        """
+        for position, line in enumerate(lines):
+            if line is None:
+                continue
+
+            if isinstance(line, int):
+                line = [line]
+
+            response = responses[position]
+
+            command_length = self._codecs[position].command_length
+
+            for offset, length in _iterCommands(line, command_length):
+                self._observeCommand(
+                    position,
+                    line[offset:offset + length],
+                    response[offset + 1:offset + length],
+                )
+
+    def _observeCommand(
+            self, position: int,
+            data: Sequence[int],
+            response: Sequence[int],
+        ) -> None:
+        """Update the memory from a single command sent to a device"""
+        command = data[0]
+        canonical = self._codecs[position].canonical
+
+        if command & 0xE0 == Command.ParamSet:
+            self.remember(
+                position, canonical[command & 0x1F], toInt(list(data[1:])),
+            )
+
+        elif command & 0xE0 == Command.ParamGet:
+            register = canonical[command & 0x1F]
+            value = toInt(list(response))
+
+            if Register.Status == register:
+                self.observeStatus(position, value)
+            else:
+                self.remember(position, register, value)
+
+        elif Command.StatusGet == command:
+            self.observeStatus(position, toInt(list(response)))
+
+        elif command & _RunMask == Command.Run:
+            self._runs[position] = list(data)
+
+        elif Command.ResetDevice == command:
+            self.forget(position)
+
+        else:
+            # Any other motion or stop command replaces a Run
+            self._runs[position] = None
+
+    def observeStatus(self, position: int, status: int) -> None:
+        """Clear the remembered Run if Status shows the motor stopped
+
+        :position: Device position in chain
+        :status: Status register value
+        """
+        stopped = (status & _MotorStatusMask) == MotorStatus.Stopped \
+            or status & self._stopped_bits[position] \
+            or ~status & self._stopped_active_low_bits[position]
+
+        if stopped:
+            self._runs[position] = None
+
+    def getReport(self) -> Dict[str, int]:
+        """Summarize what was saved
+
+        :returns: Elided commands, elided frame sets and saved bytes
+        """
+        return {
+            'elided_commands': sum(self.elided_commands),
+            'elided_frame_sets': self.elided_frame_sets,
+            'saved_bytes': self.saved_bytes,
+        }
@@ -0,0 +1,314 @@
+import time
+
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Constant,
+    MotorStatus,
+    Register,
+    Status,
+)
+from .families import (
+    DeviceFamily,
+    FamilyCodec,
+    L6470,
+    getCodec,
+)
+
+# Power-up register values, by canonical id, Status alarm bits following
+# the family's layout
+ResetValues: Final[Dict[int, int]] = {
+    Register.Acc:       0x08A,
+    Register.Dec:       0x08A,
+    Register.SpeedMax:  0x041,
+    Register.KvalHold:  0x29,
+    Register.KvalRun:   0x29,
+    Register.KvalAcc:   0x29,
+    Register.KvalDec:   0x29,
+    Register.SpeedInt:  0x0408,
+    Register.SlpSt:     0x19,
+    Register.SlpFnAcc:  0x29,
+    Register.SlpFnDec:  0x29,
+    Register.ThOcd:     0x8,
+    Register.ThStl:     0x40,
+    Register.SpeedFS:   0x027,
+    Register.StepMode:  0x7,
+    Register.AlarmEn:   0xFF,
+    Register.Config:    0x2E88,
+    Register.Status:    Status.HiZ | Status.NotBusy | Status.SwitchFlag,
+}
+
+
+class FakeDevice:
+    """Register-level model of a single device
+    Motion completes instantly: positioning commands jump to their
+    target and Run sets Speed, so no command leaves the device busy
+    """
+
+    def __init__(self, codec: FamilyCodec) -> None:
+        """
+        :codec: Register codec of the device family
+        """
+        self._codec: Final = codec
+        self.registers: Final[Dict[int, int]] = {}
+        self._output: List[int] = []
+        self._command: List[int] = []
+        self._remaining = 0
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Return to power-up state"""
+        codec = self._codec
+
+        self.registers.clear()
+
+        for register in range(len(codec.size)):
+            if codec.supports(register):
+                self.registers[register] = \
+                    ResetValues.get(register, 0) & codec.mask[register]
+
+        self.registers[Register.Status] |= codec.status.active_low
+
+        self._output = []
+        self._command = []
+        self._remaining = 0
+
+    def getOutput(self) -> int:
+        """Byte shifted out on MISO during the next transfer"""
+        return self._output[0] if self._output else Command.Nop
+
+    def latch(self, data_byte: int) -> None:
+        """Process the byte received during a transfer
+
+        :data_byte: Byte latched on chip select rise
+        """
+        if self._output:
+            self._output.pop(0)
+
+        if self._remaining:
+            self._command.append(data_byte)
+            self._remaining -= 1
+
+            if not self._remaining:
+                self._execute(self._command)
+
+            return
+
+        if Command.Nop == data_byte:
+            return
+
+        length = self._codec.command_length[data_byte]
+        self._command = [data_byte]
+
+        if data_byte & 0xE0 == Command.ParamGet:
+            register = self._codec.canonical[data_byte & 0x1F]
+            size = length - 1
+
+            if register < 0:
+                self._flagWrong()
+                return
+
+            self._output = list(
+                self.registers[register].to_bytes(size, 'big')
+            )
+
+        elif Command.StatusGet == data_byte:
+            layout = self._codec.status
+            status = self.registers[Register.Status]
+            self._output = list(status.to_bytes(2, 'big'))
+            self.registers[Register.Status] = \
+                (status & ~layout.latched) | layout.active_low
+
+        elif length > 1:
+            self._remaining = length - 1
+
+        else:
+            self._execute(self._command)
+
+    def _flagWrong(self) -> None:
+        """Report an unknown command in Status"""
+        self.registers[Register.Status] |= self._codec.status.cmd_wrong
+
+    def _setMotion(self, speed: int, direction: Optional[int]) -> None:
+        """Update Speed, direction and motor state of Status"""
+        status = self.registers[Register.Status] & ~(
+            Status.HiZ | MotorStatus.ConstantSpeed
+        )
+
+        if direction is not None:
+            status = (status & ~Status.Dir) \
+                | (Status.Dir if direction else 0)
+
+        if speed:
+            status |= MotorStatus.ConstantSpeed
+
+        self.registers[Register.Status] = status
+
+        if Register.Speed in self.registers:
+            self.registers[Register.Speed] = speed
+
+    def _moveTo(self, position: int) -> None:
+        """Jump to an absolute position"""
+        self.registers[Register.PosAbs] = position & ((1 << 22) - 1)
+        self._setMotion(0, None)
+
+    def _execute(self, data: List[int]) -> None:
+        """Run a complete command"""
+        command = data[0]
+        payload = int.from_bytes(bytes(data[1:]), 'big')
+        direction = command & Constant.DirForward
+        registers = self.registers
+
+        if command & 0xE0 == Command.ParamSet:
+            register = self._codec.canonical[command & 0x1F]
+
+            if register < 0 or Register.Status == register:
+                self._flagWrong()
+            else:
+                registers[register] = payload & self._codec.mask[register]
+
+        elif command & 0xFE == Command.Run:
+            self._setMotion(payload, direction)
+
+        elif command & 0xFE == Command.Move:
+            steps = payload if direction else -payload
+            self._setMotion(0, direction)
+            self._moveTo(registers[Register.PosAbs] + steps)
+
+        elif command in (Command.GoTo, Command.GoToDir, Command.GoToDir | 1):
+            self._moveTo(payload)
+
+        elif command == Command.GoHome:
+            self._moveTo(0)
+
+        elif command == Command.GoMark:
+            self._moveTo(registers[Register.Mark])
+
+        elif command == Command.ResetPos:
+            registers[Register.PosAbs] = 0
+
+        elif command == Command.ResetDevice:
+            self.reset()
+
+        elif command in (Command.StopSoft, Command.StopHard):
+            self._setMotion(0, None)
+
+        elif command in (Command.HiZSoft, Command.HiZHard):
+            self._setMotion(0, None)
+            registers[Register.Status] |= Status.HiZ
+
+        elif command & 0xF6 in (Command.GoUntil, Command.ReleaseSw):
+            # No switch is wired, so the motor would never stop
+            self._setMotion(payload, direction)
+
+        elif command & 0xFE == Command.StepClock:
+            registers[Register.Status] |= self._codec.status.step_clock_mode
+
+        else:
+            self._flagWrong()
+
+
+class FakeTransport:
+    """Drop-in spi_transfer simulating a daisy chain of devices
+
+    The chain is a shift register of one byte per device. A transfer of
+    any length shifts its bytes in at the far end while the devices'
+    output bytes come out at position 0, then every device latches the
+    byte it holds. Transfers longer or shorter than the chain misalign
+    just like on the real bus.
+    """
+
+    def __init__(
+            self, total_devices: int,
+            families: Optional[Sequence[DeviceFamily]] = None,
+            transfer_seconds: float = 0.0,
+        ) -> None:
+        """
+        :total_devices: Number of devices really on the bus
+        :families: Device family of each position, all L6470 if None
+        :transfer_seconds: Time each transfer takes, 0 for none.
+            Busy-waited, since sleeps are too coarse for bus timings
+        """
+        assert total_devices > 0
+        assert families is None or len(families) == total_devices
+        assert transfer_seconds >= 0
+
+        self.devices: Final = [
+            FakeDevice(getCodec(family))
+            for family in (families or [L6470] * total_devices)
+        ]
+        self._transfer_seconds: Final = transfer_seconds
+
+        self.transfers = 0
+        self.bytes = 0
+
+    def __call__(self, buffer: List[int]) -> List[int]:
+        """Transfer bytes like spidev.xfer2
+
+        :buffer: Bytes to send, buffer[0] reaching position 0
+        :returns: Bytes received, one per byte sent
+        """
+        if self._transfer_seconds:
+            end = time.perf_counter() + self._transfer_seconds
+
+            while time.perf_counter() < end:
+                pass
+
+        stream = [device.getOutput() for device in self.devices] + \
+            list(buffer)
+        received = stream[len(buffer):]
+
+        for device, data_byte in zip(self.devices, received):
+            device.latch(data_byte)
+
+        self.transfers += 1
+        self.bytes += len(buffer)
+
+        return stream[:len(buffer)]
+
+
+class RecordingTransport:
+    """spi_transfer keeping a copy of every frame sent
+    Answers with a fixed byte, or passes the frames on to another
+    transfer function like FakeTransport
+    """
+
+    def __init__(
+            self, response: int = 0x00,
+            transfer: Optional[Callable[[List[int]], List[int]]] = None,
+        ) -> None:
+        """
+        :response: Byte received for every byte sent without a transfer
+        :transfer: Transfer function answering instead, None for none
+        """
+        assert response in range(0x100)
+
+        self._response: Final = response
+        self._transfer: Final = transfer
+
+        # Bytes of every transfer, in order
+        self.frames: Final[List[List[int]]] = []
+
+    def __call__(self, buffer: List[int]) -> List[int]:
+        """Transfer bytes like spidev.xfer2
+
+        :buffer: Bytes to send
+        :returns: Bytes received, one per byte sent
+        """
+        self.frames.append(list(buffer))
+
+        if self._transfer is not None:
+            return self._transfer(buffer)
+
+        return [self._response] * len(buffer)
@@ -0,0 +1,447 @@
+from typing import (
+    Dict,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Constant,
+    Register,
+    Status,
+)
+from .frames import CommandLength
+
+# Canonical register ids are the L6470 addresses, or 0x20 ORed with the
+# address for registers that exist only in other families
+CanonicalIds: Final = 0x40
+
+
+# Registers changed by the device itself rather than by configuration
+VolatileRegisters: Final = frozenset((
+    Register.AdcOut,
+    Register.Mark,
+    Register.PosAbs,
+    Register.PosEl,
+    Register.Speed,
+    Register.Status,
+))
+
+
+class FamilyRegister:
+    Tval: Final             = 0x20 | 0x09  # L6474 single torque value
+    TvalHold: Final         = 0x20 | 0x09
+    TvalRun: Final          = 0x20 | 0x0A
+    TvalAcc: Final          = 0x20 | 0x0B
+    TvalDec: Final          = 0x20 | 0x0C
+    TFast: Final            = 0x20 | 0x0E
+    TonMin: Final           = 0x20 | 0x0F
+    ToffMin: Final          = 0x20 | 0x10
+    GateCfg1: Final         = 0x20 | 0x18
+    GateCfg2: Final         = 0x20 | 0x19
+
+
+class RegisterSpec(NamedTuple):
+    """Layout of one register in one device family
+    Physical value = (raw + offset) * scale
+    """
+    address: int
+    bits: int
+    signed: bool = False
+    scale: float = 1.0
+    offset: float = 0.0
+    unit: str = ''
+
+
+# {{{ Register maps
+_SpeedScale: Final = 1 / Constant.SpsToSpeed
+_AccScale: Final = 1 / Constant.Sps2ToAcc
+_MaxSpeedScale: Final = 1 / Constant.SpsToMaxSpeed
+_MinSpeedScale: Final = 1 / Constant.SpsToMinSpeed
+_IntSpeedScale: Final = 2 ** -26 / Constant.TickSeconds
+
+# Position and speed profile registers shared by every family with one
+_ProfileRegisters: Final[Dict[int, RegisterSpec]] = {
+    Register.PosAbs:    RegisterSpec(0x01, 22, True, unit='step'),
+    Register.PosEl:     RegisterSpec(0x02, 9),
+    Register.Mark:      RegisterSpec(0x03, 22, True, unit='step'),
+    Register.Speed:     RegisterSpec(0x04, 20, scale=_SpeedScale,
+                                     unit='step/s'),
+    Register.Acc:       RegisterSpec(0x05, 12, scale=_AccScale,
+                                     unit='step/s^2'),
+    Register.Dec:       RegisterSpec(0x06, 12, scale=_AccScale,
+                                     unit='step/s^2'),
+    Register.SpeedMax:  RegisterSpec(0x07, 10, scale=_MaxSpeedScale,
+                                     unit='step/s'),
+    # Bit 12 is the low speed optimization flag, not part of the speed
+    Register.SpeedMin:  RegisterSpec(0x08, 13, scale=_MinSpeedScale,
+                                     unit='step/s'),
+    Register.AdcOut:    RegisterSpec(0x12, 5),
+    Register.StepMode:  RegisterSpec(0x16, 8),
+    Register.AlarmEn:   RegisterSpec(0x17, 8),
+}
+
+# Voltage mode drive registers of the L6470 and L6480
+_VoltageRegisters: Final[Dict[int, RegisterSpec]] = {
+    Register.KvalHold:  RegisterSpec(0x09, 8, scale=1 / 256),
+    Register.KvalRun:   RegisterSpec(0x0A, 8, scale=1 / 256),
+    Register.KvalAcc:   RegisterSpec(0x0B, 8, scale=1 / 256),
+    Register.KvalDec:   RegisterSpec(0x0C, 8, scale=1 / 256),
+    Register.SpeedInt:  RegisterSpec(0x0D, 14, scale=_IntSpeedScale,
+                                     unit='step/s'),
+    Register.SlpSt:     RegisterSpec(0x0E, 8, scale=0.000015,
+                                     unit='s/step'),
+    Register.SlpFnAcc:  RegisterSpec(0x0F, 8, scale=0.000015,
+                                     unit='s/step'),
+    Register.SlpFnDec:  RegisterSpec(0x10, 8, scale=0.000015,
+                                     unit='s/step'),
+    Register.KTherm:    RegisterSpec(0x11, 4, scale=0.03125, offset=32),
+}
+
+# Current mode drive registers of the L6472 and L6474
+_CurrentRegisters: Final[Dict[int, RegisterSpec]] = {
+    FamilyRegister.TFast:   RegisterSpec(0x0E, 8),
+    FamilyRegister.TonMin:  RegisterSpec(0x0F, 7, scale=0.5e-6, offset=1,
+                                         unit='s'),
+    FamilyRegister.ToffMin: RegisterSpec(0x10, 7, scale=0.5e-6, offset=1,
+                                         unit='s'),
+    Register.ThOcd:         RegisterSpec(0x13, 4, scale=0.375, offset=1,
+                                         unit='A'),
+    Register.Config:        RegisterSpec(0x18, 16),
+    Register.Status:        RegisterSpec(0x19, 16),
+}
+# }}}
+
+# Every command opcode, without ORed flags
+_AllCommands: Final[FrozenSet[int]] = frozenset((
+    Command.Nop, Command.ParamSet, Command.ParamGet, Command.Run,
+    Command.StepClock, Command.Move, Command.GoTo, Command.GoToDir,
+    Command.GoUntil, Command.ReleaseSw, Command.GoHome, Command.GoMark,
+    Command.ResetPos, Command.ResetDevice, Command.StopSoft,
+    Command.StopHard, Command.HiZSoft, Command.HiZHard, Command.StatusGet,
+))
+
+
+class StatusLayout(NamedTuple):
+    """Status bits that move between device families, 0 where absent
+    Bits named Not* are active low, like in Status
+    """
+    cmd_not_performed: int
+    cmd_wrong: int
+    not_undervoltage: int
+    not_thermal_warning: int
+    not_thermal_shutdown: int
+    thermal_status: int         # Active high field, 0 when normal
+    not_overcurrent: int
+    not_step_loss_a: int
+    not_step_loss_b: int
+    step_clock_mode: int
+
+    @property
+    def latched(self) -> int:
+        """Active high flags cleared by GetStatus"""
+        return Status.SwitchEvent | self.cmd_not_performed | self.cmd_wrong
+
+    @property
+    def thermal_shutdown(self) -> int:
+        """Bit of thermal_status set once the bridges are shut down"""
+        return self.thermal_status & ~(self.thermal_status >> 1)
+
+    @property
+    def active_low(self) -> int:
+        """Active low alarm bits, high while there is no alarm"""
+        return self.not_undervoltage | self.not_thermal_warning \
+            | self.not_thermal_shutdown | self.not_overcurrent \
+            | self.not_step_loss_a | self.not_step_loss_b
+
+    def getAlarms(self, status: int) -> int:
+        """Alarm conditions of a Status value, those that pull FLAG low
+
+        :status: Status register value in this layout
+        :returns: Alarm bits that are set, or low for active low bits
+        """
+        return status & (self.latched | self.thermal_status) \
+            | ~status & self.active_low
+
+
+L6470Status: Final = StatusLayout(
+    cmd_not_performed=Status.CmdNotPerformed,
+    cmd_wrong=Status.CmdWrong,
+    not_undervoltage=Status.NotUndervoltage,
+    not_thermal_warning=Status.NotThermalWarning,
+    not_thermal_shutdown=Status.NotThermalShutdown,
+    thermal_status=0,
+    not_overcurrent=Status.NotOvercurrent,
+    not_step_loss_a=Status.NotStepLossA,
+    not_step_loss_b=Status.NotStepLossB,
+    step_clock_mode=Status.StepClockMode,
+)
+
+# No stall detection
+L6472Status: Final = L6470Status._replace(
+    not_step_loss_a=0,
+    not_step_loss_b=0,
+)
+
+# Step-clock only, so no step clock mode flag either
+L6474Status: Final = L6472Status._replace(step_clock_mode=0)
+
+# One command error flag, a two-bit thermal status, and the alarm bits
+# moved up by one
+L6480Status: Final = StatusLayout(
+    cmd_not_performed=0x0080,
+    cmd_wrong=0x0080,
+    not_undervoltage=0x0200,
+    not_thermal_warning=0,
+    not_thermal_shutdown=0,
+    thermal_status=0x1800,
+    not_overcurrent=0x2000,
+    not_step_loss_a=0x4000,
+    not_step_loss_b=0x8000,
+    step_clock_mode=0x0100,
+)
+
+
+class DeviceFamily(NamedTuple):
+    """Register map, command set and Status layout of one device family"""
+    name: str
+    registers: Dict[int, RegisterSpec]  # By canonical register id
+    commands: FrozenSet[int]            # Opcodes without ORed flags
+    status: StatusLayout = L6470Status
+
+
+L6470: Final = DeviceFamily('L6470', {
+    **_ProfileRegisters,
+    **_VoltageRegisters,
+    Register.ThOcd:     RegisterSpec(0x13, 4, scale=0.375, offset=1,
+                                     unit='A'),
+    Register.ThStl:     RegisterSpec(0x14, 7, scale=0.03125, offset=1,
+                                     unit='A'),
+    Register.SpeedFS:   RegisterSpec(0x15, 10, scale=_MaxSpeedScale,
+                                     offset=0.5, unit='step/s'),
+    Register.Config:    RegisterSpec(0x18, 16),
+    Register.Status:    RegisterSpec(0x19, 16),
+}, _AllCommands)
+
+L6472: Final = DeviceFamily('L6472', {
+    **_ProfileRegisters,
+    **_CurrentRegisters,
+    FamilyRegister.TvalHold:    RegisterSpec(0x09, 7, scale=0.03125,
+                                             offset=1, unit='A'),
+    FamilyRegister.TvalRun:     RegisterSpec(0x0A, 7, scale=0.03125,
+                                             offset=1, unit='A'),
+    FamilyRegister.TvalAcc:     RegisterSpec(0x0B, 7, scale=0.03125,
+                                             offset=1, unit='A'),
+    FamilyRegister.TvalDec:     RegisterSpec(0x0C, 7, scale=0.03125,
+                                             offset=1, unit='A'),
+    Register.SpeedFS:           RegisterSpec(0x15, 10, scale=_MaxSpeedScale,
+                                             offset=0.5, unit='step/s'),
+}, _AllCommands, L6472Status)
+
+# Step-clock only: no speed profile, and Enable/Disable share the
+# opcodes of StopHard/HiZHard
+L6474: Final = DeviceFamily('L6474', {
+    Register.PosAbs:        _ProfileRegisters[Register.PosAbs],
+    Register.PosEl:         _ProfileRegisters[Register.PosEl],
+    Register.Mark:          _ProfileRegisters[Register.Mark],
+    Register.AdcOut:        _ProfileRegisters[Register.AdcOut],
+    Register.StepMode:      _ProfileRegisters[Register.StepMode],
+    Register.AlarmEn:       _ProfileRegisters[Register.AlarmEn],
+    **_CurrentRegisters,
+    FamilyRegister.Tval:    RegisterSpec(0x09, 7, scale=0.03125, offset=1,
+                                         unit='A'),
+}, frozenset((
+    Command.Nop, Command.ParamSet, Command.ParamGet,
+    Command.StopHard, Command.HiZHard, Command.StatusGet,
+)), L6474Status)
+
+# Gate driver version of the L6470: Config and Status move up to make
+# room for the gate configuration registers
+L6480: Final = DeviceFamily('L6480', {
+    **_ProfileRegisters,
+    **_VoltageRegisters,
+    Register.ThOcd:             RegisterSpec(0x13, 5, scale=0.03125,
+                                             offset=1, unit='V'),
+    Register.ThStl:             RegisterSpec(0x14, 5, scale=0.03125,
+                                             offset=1, unit='V'),
+    Register.SpeedFS:           RegisterSpec(0x15, 11, scale=_MaxSpeedScale,
+                                             offset=0.5, unit='step/s'),
+    FamilyRegister.GateCfg1:    RegisterSpec(0x18, 16),
+    FamilyRegister.GateCfg2:    RegisterSpec(0x19, 8),
+    Register.Config:            RegisterSpec(0x1A, 16),
+    Register.Status:            RegisterSpec(0x1B, 16),
+}, _AllCommands, L6480Status)
+
+Families: Final[Dict[str, DeviceFamily]] = {
+    family.name: family for family in (L6470, L6472, L6474, L6480)
+}
+
+
+class FamilyCodec:
+    """Register codec of one device family, compiled to flat tables
+
+    Every table is indexed by canonical register id. Unsupported
+    registers have a size of 0 and no prefix bytes.
+    """
+
+    def __init__(self, family: DeviceFamily) -> None:
+        """
+        :family: Device family to compile
+        """
+        self.family: Final = family
+        self.status: Final = family.status
+
+        self.address: Final = [-1] * CanonicalIds
+        self.size: Final = [0] * CanonicalIds
+        self.mask: Final = [0] * CanonicalIds
+        self.sign_bit: Final = [0] * CanonicalIds
+        self.volatile: Final = [False] * CanonicalIds
+        self.scale: Final = [1.0] * CanonicalIds
+        self.offset: Final = [0.0] * CanonicalIds
+
+        # ParamGet with its NOP readback bytes, and ParamSet byte
+        self._get: Final[List[Optional[List[int]]]] = [None] * CanonicalIds
+        self._set: Final = [0] * CanonicalIds
+
+        # Canonical id of every physical address, -1 if unused
+        self.canonical: Final = [-1] * 0x20
+
+        # Bus length of every command byte, for this family's registers
+        self.command_length: Final = list(CommandLength)
+
+        for address in range(1, 0x20):
+            self.command_length[Command.ParamSet | address] = 1
+            self.command_length[Command.ParamGet | address] = 1
+
+        for register, spec in family.registers.items():
+            size = (spec.bits + 7) // 8
+
+            self.address[register] = spec.address
+            self.canonical[spec.address] = register
+            self.size[register] = size
+            self.mask[register] = (1 << spec.bits) - 1
+            self.sign_bit[register] = 1 << (spec.bits - 1) \
+                if spec.signed else 0
+            self.volatile[register] = register in VolatileRegisters
+            self.scale[register] = spec.scale
+            self.offset[register] = spec.offset
+
+            self._get[register] = \
+                [Command.ParamGet | spec.address] + [Command.Nop] * size
+            self._set[register] = Command.ParamSet | spec.address
+
+            self.command_length[Command.ParamGet | spec.address] = 1 + size
+            self.command_length[Command.ParamSet | spec.address] = 1 + size
+
+    def supports(self, register: int) -> bool:
+        """Check whether the family has a register
+
+        :register: Canonical register id
+        :returns: True if the register exists
+        """
+        return self.size[register] != 0
+
+    def supportsCommand(self, command: int) -> bool:
+        """Check whether the family accepts a command
+
+        :command: Command byte, flags are ignored
+        :returns: True if the opcode exists
+        """
+        if command & 0xE0 in (Command.ParamGet, Command.ParamSet) \
+                and Command.Nop != command:
+            return self.canonical[command & 0x1F] >= 0
+
+        return any(
+            command & ~flags == opcode
+            for opcode in self.family.commands
+            for flags in (0x00, 0x01, 0x08, 0x09)
+        )
+
+    def encodeGet(self, register: int) -> List[int]:
+        """Encode a register read, with its NOP readback bytes
+
+        :register: Canonical register id
+        :returns: Bytes to send to the device
+        """
+        data = self._get[register]
+
+        if data is None:
+            raise KeyError(
+                f'{self.family.name} has no register 0x{register:02X}'
+            )
+
+        return list(data)
+
+    def encodeSet(self, register: int, value: int) -> List[int]:
+        """Encode a register write, masking the value to the register
+
+        :register: Canonical register id
+        :value: Raw register value, negative for signed registers
+        :returns: Bytes to send to the device
+        """
+        size = self.size[register]
+
+        if not size:
+            raise KeyError(
+                f'{self.family.name} has no register 0x{register:02X}'
+            )
+
+        return [self._set[register]] + list(
+            (value & self.mask[register]).to_bytes(size, 'big')
+        )
+
+    def decode(self, register: int, data: Sequence[int]) -> int:
+        """Decode the readback bytes of a register
+
+        :register: Canonical register id
+        :data: Response bytes following the command byte, MSB first
+        :returns: Raw value, sign extended for signed registers
+        """
+        value = int.from_bytes(bytes(data), 'big') & self.mask[register]
+        sign_bit = self.sign_bit[register]
+
+        if value & sign_bit:
+            value -= sign_bit << 1
+
+        return value
+
+    def toUnits(self, register: int, value: int) -> float:
+        """Convert a raw register value to its physical unit
+
+        :register: Canonical register id
+        :value: Raw value
+        :returns: Value in the unit of the register spec
+        """
+        return (value + self.offset[register]) * self.scale[register]
+
+    def fromUnits(self, register: int, value: float) -> int:
+        """Convert a physical value to the nearest raw register value
+
+        :register: Canonical register id
+        :value: Value in the unit of the register spec
+        :returns: Raw value
+        """
+        return round(value / self.scale[register] - self.offset[register])
+
+
+_Codecs: Final[Dict[str, FamilyCodec]] = {}
+
+
+def getCodec(family: DeviceFamily) -> FamilyCodec:
+    """Compiled codec of a family, shared by every chain using it
+
+    :family: Device family
+    :returns: Codec
+    """
+    codec = _Codecs.get(family.name)
+
+    if codec is None or codec.family is not family:
+        codec = _Codecs[family.name] = FamilyCodec(family)
+
+    return codec
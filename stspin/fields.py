@@ -0,0 +1,451 @@
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import Register
+from .families import (
+    FamilyCodec,
+    FamilyRegister,
+)
+from .utility import toInt
+
+
+class FieldSpec(NamedTuple):
+    """Bitfield within a register"""
+    shift: int
+    width: int
+
+
+# {{{ Field layouts
+_StepModeFields: Final = {
+    'step_sel':         FieldSpec(0, 3),
+    'sync_sel':         FieldSpec(4, 3),
+    'sync_en':          FieldSpec(7, 1),
+}
+
+_AlarmEnFields: Final = {
+    'overcurrent':      FieldSpec(0, 1),
+    'thermal_shutdown': FieldSpec(1, 1),
+    'thermal_warning':  FieldSpec(2, 1),
+    'undervoltage':     FieldSpec(3, 1),
+    'stall_a':          FieldSpec(4, 1),
+    'stall_b':          FieldSpec(5, 1),
+    'switch_on':        FieldSpec(6, 1),
+    'wrong_cmd':        FieldSpec(7, 1),
+}
+
+_SpeedMinFields: Final = {
+    'min_speed':        FieldSpec(0, 12),
+    'lspd_opt':         FieldSpec(12, 1),
+}
+
+_TFastFields: Final = {
+    'fast_step':        FieldSpec(0, 4),
+    'toff_fast':        FieldSpec(4, 4),
+}
+
+# Field layouts by family name and canonical register id
+FamilyFields: Final[Dict[str, Dict[int, Dict[str, FieldSpec]]]] = {
+    'L6470': {
+        Register.StepMode:  _StepModeFields,
+        Register.AlarmEn:   _AlarmEnFields,
+        Register.SpeedMin:  _SpeedMinFields,
+        Register.KTherm:    {'k_therm': FieldSpec(0, 4)},
+        Register.Config: {
+            'osc_sel':      FieldSpec(0, 4),
+            'sw_mode':      FieldSpec(4, 1),
+            'en_vscomp':    FieldSpec(5, 1),
+            'oc_sd':        FieldSpec(7, 1),
+            'pow_sr':       FieldSpec(8, 2),
+            'f_pwm_dec':    FieldSpec(10, 3),
+            'f_pwm_int':    FieldSpec(13, 3),
+        },
+    },
+    'L6472': {
+        Register.StepMode:  _StepModeFields,
+        Register.AlarmEn:   _AlarmEnFields,
+        Register.SpeedMin:  _SpeedMinFields,
+        FamilyRegister.TFast: _TFastFields,
+        Register.Config: {
+            'osc_sel':      FieldSpec(0, 4),
+            'sw_mode':      FieldSpec(4, 1),
+            'en_tqreg':     FieldSpec(5, 1),
+            'oc_sd':        FieldSpec(7, 1),
+            'pow_sr':       FieldSpec(8, 2),
+            'tsw':          FieldSpec(10, 5),
+        },
+    },
+    'L6474': {
+        Register.StepMode: {
+            'step_sel':     FieldSpec(0, 3),
+            'sync_sel':     FieldSpec(4, 3),
+        },
+        Register.AlarmEn:   _AlarmEnFields,
+        FamilyRegister.TFast: _TFastFields,
+        Register.Config: {
+            'osc_sel':      FieldSpec(0, 4),
+            'en_tqreg':     FieldSpec(5, 1),
+            'oc_sd':        FieldSpec(7, 1),
+            'pow_sr':       FieldSpec(8, 2),
+            'toff':         FieldSpec(10, 5),
+        },
+    },
+    'L6480': {
+        Register.StepMode:  _StepModeFields,
+        Register.AlarmEn:   _AlarmEnFields,
+        Register.SpeedMin:  _SpeedMinFields,
+        Register.KTherm:    {'k_therm': FieldSpec(0, 4)},
+        Register.SpeedFS: {
+            'fs_spd':       FieldSpec(0, 10),
+            'boost_mode':   FieldSpec(10, 1),
+        },
+        Register.Config: {
+            'osc_sel':      FieldSpec(0, 4),
+            'sw_mode':      FieldSpec(4, 1),
+            'en_vscomp':    FieldSpec(5, 1),
+            'oc_sd':        FieldSpec(7, 1),
+            'uvloval':      FieldSpec(8, 1),
+            'vccval':       FieldSpec(9, 1),
+            'f_pwm_dec':    FieldSpec(10, 3),
+            'f_pwm_int':    FieldSpec(13, 3),
+        },
+        FamilyRegister.GateCfg1: {
+            'tcc':          FieldSpec(0, 5),
+            'igate':        FieldSpec(5, 3),
+            'tboost':       FieldSpec(8, 3),
+            'wd_en':        FieldSpec(11, 1),
+        },
+        FamilyRegister.GateCfg2: {
+            'tdt':          FieldSpec(0, 5),
+            'tblank':       FieldSpec(5, 3),
+        },
+    },
+}
+# }}}
+
+# Canonical register ids by attribute name, e.g. 'StepMode'
+RegisterIds: Final[Dict[str, int]] = {
+    name: value
+    for source in (Register, FamilyRegister)
+    for name, value in vars(source).items()
+    if not name.startswith('_') and isinstance(value, int)
+}
+
+# Lines of bytes to send by position, returning responses by position
+SendLines = Callable[[Dict[int, List[int]]], Dict[int, List[int]]]
+
+
+class FieldEditor:
+    """Read-modify-write engine for register bitfields
+
+    Outside a batch every field write is one register read and one
+    register write. Inside a batch, edits to the same register merge,
+    and on exit every register needing its old value is read in one
+    frame set and every edited register is written in one frame set.
+    Registers are not read at all when the edits cover all their bits.
+    """
+
+    def __init__(
+            self, codecs: Dict[int, FamilyCodec],
+            send: SendLines,
+        ) -> None:
+        """
+        :codecs: Register codec of every position that can be edited
+        :send: Sends per-position bytes as one frame set
+        """
+        self._codecs: Final = codecs
+        self._send: Final = send
+        self._depth = 0
+
+        # Register values known within a batch, by (position, register)
+        self._values: Final[Dict[Tuple[int, int], int]] = {}
+        # Pending (mask, bits) by (position, register)
+        self._edits: Final[Dict[Tuple[int, int], Tuple[int, int]]] = {}
+
+        self.read_frame_sets = 0
+        self.write_frame_sets = 0
+
+    def getSpec(self, position: int, register: int, name: str) -> FieldSpec:
+        """Layout of a field in a device's family
+
+        :position: Device position in chain
+        :register: Canonical register id
+        :name: Field name
+        :returns: Field layout
+        """
+        family = self._codecs[position].family.name
+
+        try:
+            return FamilyFields[family][register][name]
+        except KeyError:
+            raise AttributeError(
+                f'{family} register 0x{register:02X} has no field {name}'
+            ) from None
+
+    def hasField(self, position: int, register: int, name: str) -> bool:
+        """Check whether a device's family has a field
+
+        :position: Device position in chain
+        :register: Canonical register id
+        :name: Field name
+        :returns: True if the field exists
+        """
+        family = self._codecs[position].family.name
+
+        return name in FamilyFields[family].get(register, {})
+
+    def readField(
+            self, positions: Sequence[int],
+            register: int,
+            name: str,
+        ) -> Dict[int, int]:
+        """Read a field of several devices in one frame set
+
+        :positions: Device positions
+        :register: Canonical register id
+        :name: Field name
+        :returns: Field value by position
+        """
+        specs = {p: self.getSpec(p, register, name) for p in positions}
+        missing = [p for p in positions if (p, register) not in self._values]
+        values = dict(self._values)
+
+        if missing:
+            fetched = self._fetch({p: [register] for p in missing})
+            values.update(fetched)
+
+            if self._depth:
+                self._values.update(fetched)
+
+        result = {}
+
+        for position, spec in specs.items():
+            key = (position, register)
+            mask, bits = self._edits.get(key, (0, 0))
+            value = (values[key] & ~mask) | bits
+            result[position] = (value >> spec.shift) & ((1 << spec.width) - 1)
+
+        return result
+
+    def writeField(
+            self, values: Dict[int, int],
+            register: int,
+            name: str,
+        ) -> None:
+        """Change a field of several devices
+
+        :values: Field value by position
+        :register: Canonical register id
+        :name: Field name
+        """
+        for position, value in values.items():
+            spec = self.getSpec(position, register, name)
+
+            assert value >= 0
+            assert value < 1 << spec.width
+
+            field_mask = ((1 << spec.width) - 1) << spec.shift
+            key = (position, register)
+            mask, bits = self._edits.get(key, (0, 0))
+            self._edits[key] = (
+                mask | field_mask,
+                (bits & ~field_mask) | (value << spec.shift),
+            )
+
+        if not self._depth:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write every pending edit, reading old values where needed"""
+        if not self._edits:
+            return
+
+        needed: Dict[int, List[int]] = {}
+
+        for (position, register), (mask, _) in self._edits.items():
+            if (position, register) in self._values:
+                continue
+
+            if mask != self._codecs[position].mask[register]:
+                needed.setdefault(position, []).append(register)
+
+        values = dict(self._values)
+
+        if needed:
+            values.update(self._fetch(needed))
+
+        lines: Dict[int, List[int]] = {}
+
+        for (position, register), (mask, bits) in self._edits.items():
+            value = (values.get((position, register), 0) & ~mask) | bits
+            lines.setdefault(position, []).extend(
+                self._codecs[position].encodeSet(register, value)
+            )
+
+            if self._depth:
+                self._values[(position, register)] = value
+
+        self._edits.clear()
+        self._send(lines)
+        self.write_frame_sets += 1
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Merge field edits until the outermost batch ends
+        Edits are discarded if the block raises
+        """
+        self._depth += 1
+
+        try:
+            yield
+        except BaseException:
+            self._edits.clear()
+            raise
+        finally:
+            self._depth -= 1
+
+            if not self._depth:
+                try:
+                    self.flush()
+                finally:
+                    self._values.clear()
+
+    def _fetch(
+            self, wanted: Dict[int, List[int]],
+        ) -> Dict[Tuple[int, int], int]:
+        """Read registers of several devices in one frame set"""
+        lines = {}
+
+        for position, registers in wanted.items():
+            codec = self._codecs[position]
+            lines[position] = [
+                data_byte
+                for register in registers
+                for data_byte in codec.encodeGet(register)
+            ]
+
+        responses = self._send(lines)
+        self.read_frame_sets += 1
+        values = {}
+
+        for position, registers in wanted.items():
+            codec = self._codecs[position]
+            response = responses[position]
+            offset = 0
+
+            for register in registers:
+                size = codec.size[register]
+                values[(position, register)] = \
+                    toInt(response[offset + 1:offset + 1 + size])
+                offset += 1 + size
+
+        return values
+
+
+class RegisterFields:
+    """Field accessors of one register, for one device or a whole chain
+
+    For a device, fields read and write plain ints. For a chain, fields
+    read as a list by position (None where a family lacks the field) and
+    accept a single value for every device or a list with None to skip.
+    """
+
+    def __init__(
+            self, editor: FieldEditor,
+            positions: Sequence[int],
+            register: int,
+            single: bool,
+        ) -> None:
+        object.__setattr__(self, '_editor', editor)
+        object.__setattr__(self, '_positions', list(positions))
+        object.__setattr__(self, '_register', register)
+        object.__setattr__(self, '_single', single)
+
+    def __getattr__(self, name: str) -> Union[int, List[Optional[int]]]:
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        positions = self._getPositions(name)
+        values = self._editor.readField(positions, self._register, name)
+
+        if self._single:
+            return values[self._positions[0]]
+
+        total = max(self._positions) + 1 if self._positions else 0
+
+        return [values.get(position) for position in range(total)]
+
+    def __setattr__(
+            self, name: str,
+            value: Union[int, Sequence[Optional[int]]],
+        ) -> None:
+        if isinstance(value, int):
+            values = {p: value for p in self._getPositions(name)}
+        else:
+            assert not self._single
+            values = {
+                position: v for position, v in enumerate(value)
+                if v is not None
+            }
+
+        self._editor.writeField(values, self._register, name)
+
+    def _getPositions(self, name: str) -> List[int]:
+        """Positions whose family has a field, all of them for a device"""
+        if self._single:
+            return self._positions
+
+        return [
+            position for position in self._positions
+            if self._editor.hasField(position, self._register, name)
+        ]
+
+
+class Fields:
+    """Named register field accessors, e.g. fields.StepMode.step_sel"""
+
+    def __init__(
+            self, editor: FieldEditor,
+            positions: Sequence[int],
+            single: bool,
+        ) -> None:
+        """
+        :editor: Engine doing the reads and writes
+        :positions: Device positions the fields apply to
+        :single: True for a single device's fields, read as plain ints
+        """
+        assert not single or len(positions) == 1
+
+        self._editor: Final = editor
+        self._positions: Final = list(positions)
+        self._single: Final = single
+
+    def __getattr__(self, name: str) -> RegisterFields:
+        if name.startswith('_') or name not in RegisterIds:
+            raise AttributeError(name)
+
+        return RegisterFields(
+            self._editor,
+            self._positions,
+            RegisterIds[name],
+            self._single,
+        )
+
+    def batch(self):
+        """Merge field edits until the outermost batch ends
+
+        :returns: Context manager
+        """
+        return self._editor.batch()
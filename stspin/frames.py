@@ -0,0 +1,280 @@
+from typing import (
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Constant,
+    Register,
+)
+from .constants.command import PayloadSize
+from .constants.register import RegisterSize
+from .utility import (
+    toByteArrayWithLength,
+    toPlusAndDir,
+)
+
+# Per-device bytes of a frame set: a byte list, a single byte or None for NOP
+DeviceLine = Optional[Union[int, Sequence[int]]]
+
+PositionMask: Final = (1 << 22) - 1
+
+
+def _decodeCommandLength(command: int) -> int:
+    """Calculate how many bytes a command occupies on the bus
+
+    :command: First byte of a command, including any ORed flags
+    :returns: 1 + number of payload (or response) bytes following it
+
+    """
+    if Command.Nop == command:
+        return 1
+
+    if command & 0xE0 in (Command.ParamGet, Command.ParamSet):
+        return 1 + RegisterSize.get(command & 0x1F, 0)
+
+    candidates = (
+        command,
+        command & ~Constant.DirForward,
+        command & ~(Constant.DirForward | Constant.ActSetMark),
+    )
+
+    for base in candidates:
+        if base in PayloadSize:
+            return 1 + PayloadSize[base]
+
+    return 1
+
+
+# Indexed by command byte, so decoding a stream needs no dict lookups
+CommandLength: Final[List[int]] = [
+    _decodeCommandLength(command) for command in range(0x100)
+]
+
+
+def getCommandLength(command: int) -> int:
+    """Get the number of bytes a command occupies on the bus
+
+    :command: First byte of a command, including any ORed flags
+    :returns: 1 + number of payload (or response) bytes following it
+
+    """
+    assert command >= 0
+    assert command <= 0xFF
+
+    return CommandLength[command]
+
+
+def encodeCommand(
+        command: int,
+        payload: Optional[int] = None,
+        payload_size: Optional[int] = None) -> List[int]:
+    """Encode a command and its payload (if any) as bytes
+
+    :command: Command byte, including any ORed flags
+    :payload: Payload (if any)
+    :payload_size: Payload size in bytes
+    :returns: Bytes to send to the device, MSB first
+    """
+    assert (payload is None) == (payload_size is None), \
+        'payload and payload_size must be either both None, xor present'
+
+    if payload is None or payload_size is None:
+        return [command]
+
+    return [command] + toByteArrayWithLength(payload, payload_size)
+
+
+def encodeParamGet(register: int) -> List[int]:
+    """Encode a register read, including the NOPs clocking out the value
+
+    :register: Register to read
+    :returns: Bytes to send to the device
+    """
+    RegisterSize = Register.getSize(register)
+
+    return [Command.ParamGet | register] + [Command.Nop] * RegisterSize
+
+
+def encodeParamSet(register: int, value: int) -> List[int]:
+    """Encode a register write
+
+    :register: Register to write
+    :value: Value register should be set to
+    :returns: Bytes to send to the device
+    """
+    RegisterSize = Register.getSize(register)
+
+    return encodeCommand(Command.ParamSet | register, value, RegisterSize)
+
+
+def encodeMove(steps: int) -> List[int]:
+    """Encode a relative move
+
+    :steps: Signed number of (micro)steps to take
+    :returns: Bytes to send to the device
+    """
+    assert steps >= -Constant.MaxSteps
+    assert steps <= Constant.MaxSteps
+
+    direction, steps = toPlusAndDir(steps)
+    PayloadSize = Command.getPayloadSize(Command.Move)
+
+    return encodeCommand(Command.Move | direction, steps, PayloadSize)
+
+
+def encodeRun(steps_per_second: float) -> List[int]:
+    """Encode a constant speed run
+
+    :steps_per_second: Full steps per second from -15625 up to 15625
+    :returns: Bytes to send to the device
+    """
+    assert steps_per_second >= -Constant.MaxStepsPerSecond
+    assert steps_per_second <= Constant.MaxStepsPerSecond
+
+    speed = int(steps_per_second * Constant.SpsToSpeed)
+    direction, speed = toPlusAndDir(speed)
+    PayloadSize = Command.getPayloadSize(Command.Run)
+
+    return encodeCommand(Command.Run | direction, speed, PayloadSize)
+
+
+def encodeGoTo(position: int) -> List[int]:
+    """Encode an absolute move taking the shortest path
+
+    :position: Absolute position in (micro)steps
+    :returns: Bytes to send to the device
+    """
+    assert position < 1 << 21
+    assert position >= -(1 << 21)
+
+    PayloadSize = Command.getPayloadSize(Command.GoTo)
+
+    return encodeCommand(Command.GoTo, position & PositionMask, PayloadSize)
+
+
+def encodeGoToDir(direction: int, position: int) -> List[int]:
+    """Encode an absolute move in a forced direction
+
+    :direction: Constant.DirReverse or Constant.DirForward
+    :position: Absolute position in (micro)steps
+    :returns: Bytes to send to the device
+    """
+    assert direction >= 0
+    assert direction < Constant.DirMax
+    assert position < 1 << 21
+    assert position >= -(1 << 21)
+
+    PayloadSize = Command.getPayloadSize(Command.GoToDir)
+
+    return encodeCommand(
+        Command.GoToDir | direction,
+        position & PositionMask,
+        PayloadSize,
+    )
+
+
+def encodeGoUntil(action: int, steps_per_second: float) -> List[int]:
+    """Encode a run until the switch closes
+
+    :action: Constant.ActResetPos or Constant.ActSetMark
+    :steps_per_second: Full steps per second from -15625 up to 15625
+    :returns: Bytes to send to the device
+    """
+    assert action in (Constant.ActResetPos, Constant.ActSetMark)
+    assert steps_per_second >= -Constant.MaxStepsPerSecond
+    assert steps_per_second <= Constant.MaxStepsPerSecond
+
+    speed = int(steps_per_second * Constant.SpsToSpeed)
+    direction, speed = toPlusAndDir(speed)
+    PayloadSize = Command.getPayloadSize(Command.GoUntil)
+
+    return encodeCommand(
+        Command.GoUntil | action | direction,
+        speed,
+        PayloadSize,
+    )
+
+
+def encodeReleaseSw(action: int, direction: int) -> List[int]:
+    """Encode a move at minimum speed until the switch opens
+
+    :action: Constant.ActResetPos or Constant.ActSetMark
+    :direction: Constant.DirReverse or Constant.DirForward
+    :returns: Bytes to send to the device
+    """
+    assert action in (Constant.ActResetPos, Constant.ActSetMark)
+    assert direction >= 0
+    assert direction < Constant.DirMax
+
+    return [Command.ReleaseSw | action | direction]
+
+
+def encodeStepClock(direction: int) -> List[int]:
+    """Encode a switch to step-clock mode
+
+    :direction: Constant.DirReverse or Constant.DirForward
+    :returns: Bytes to send to the device
+    """
+    assert direction >= 0
+    assert direction < Constant.DirMax
+
+    return [Command.StepClock | direction]
+
+
+def toFrames(
+        lines: Sequence[DeviceLine],
+        align_end: bool = False,
+    ) -> List[List[int]]:
+    """Turn per-device command bytes into a frame set
+    Shorter lines are padded with NOPs
+
+    :lines: Bytes for each position in the chain, None for NOP
+    :align_end: Pad in front instead, so every command completes
+        on the last transfer
+    :returns: List of transfers, each holding one byte per position
+    """
+    padded = []
+
+    for line in lines:
+        if line is None:
+            padded.append([])
+        elif isinstance(line, int):
+            padded.append([line])
+        else:
+            padded.append(list(line))
+
+    frame_count = max([len(line) for line in padded] + [1])
+
+    for line in padded:
+        padding = [Command.Nop] * (frame_count - len(line))
+
+        if align_end:
+            line[:0] = padding
+        else:
+            line.extend(padding)
+
+    return [
+        [line[frame] for line in padded] for frame in range(frame_count)
+    ]
+
+
+def fromFrames(responses: Sequence[Sequence[int]]) -> List[List[int]]:
+    """Turn the responses of a frame set into per-device byte lists
+
+    :responses: List of transfer responses, one byte per position
+    :returns: Response bytes for each position in the chain
+    """
+    if not responses:
+        return []
+
+    return [
+        [response[position] for response in responses]
+        for position in range(len(responses[0]))
+    ]
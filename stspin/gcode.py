@@ -0,0 +1,348 @@
+import math
+import re
+import time
+
+from collections import deque
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Constant,
+    Register,
+    Status,
+)
+from .frames import (
+    DeviceLine,
+    PositionMask,
+    encodeGoTo,
+    encodeParamSet,
+)
+
+_Comment: Final = re.compile(r'\([^)]*\)|;.*$')
+# The number is optional, so bare axis letters can select axes, e.g. M18 X
+_Word: Final = re.compile(r'([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))?')
+
+MaxSpeedRegister: Final = 0x3FF
+
+
+class GCodeLine(NamedTuple):
+    """A parsed line of G-code"""
+    codes: List[str]                # G and M codes in order, e.g. ['G90', 'G1']
+    words: Dict[str, float]         # Every other word, e.g. {'X': 1.5}
+
+
+class ChainBlock(NamedTuple):
+    """Commands for all axes of one G-code line, sent as one frame set"""
+    lines: List[DeviceLine]         # Bytes per chain position, None for NOP
+    positions: List[int]            # Chain positions that must be idle first
+
+
+def parseLine(line: str) -> Optional[GCodeLine]:
+    """Parse a single line of G-code
+
+    :line: Line of text, comments and line numbers are ignored
+    :returns: Parsed line, None if there is nothing to execute
+    """
+    line = _Comment.sub('', line.split('*', 1)[0].upper())
+
+    codes = []
+    words = {}
+
+    for letter, number in _Word.findall(line):
+        if not number:
+            if letter not in 'GMN':
+                words[letter] = 0.0
+        elif letter in 'GM':
+            codes.append(f'{letter}{float(number):g}')
+        elif letter != 'N':
+            words[letter] = float(number)
+
+    if not codes and not words:
+        return None
+
+    return GCodeLine(codes, words)
+
+
+def readLines(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Lazily iterate the lines of a G-code file or iterable
+
+    :source: Path to a file, or an iterable of lines
+    :returns: Iterator over lines
+    """
+    if isinstance(source, str):
+        with open(source) as gcode_file:
+            yield from gcode_file
+    else:
+        yield from source
+
+
+class GCodeInterpreter:
+    """Streaming G-code interpreter driving a SpinChain
+
+    Supports G0, G1, G28, G90, G91, G92, M17 and M18.
+    Lines are read lazily and translated into frame sets while the chips
+    are busy with previous blocks, so memory use is bounded by the
+    lookahead regardless of the size of the job.
+    """
+
+    def __init__(
+            self, chain: Any,
+            axes: Dict[str, int],
+            steps_per_unit: Dict[str, float],
+            max_speed: Dict[str, float],
+            microsteps: Dict[str, int],
+            lookahead: int = 32,
+            poll_seconds: float = 0.002,
+        ) -> None:
+        """
+        :chain: SpinChain to drive
+        :axes: Chain position of each axis letter, e.g. {'X': 0, 'Y': 1}
+        :steps_per_unit: (Micro)steps per G-code unit of each axis
+        :max_speed: Full steps per second used for rapid moves of each axis
+        :microsteps: Microsteps per full step of each axis
+        :lookahead: Number of translated blocks kept ready
+        :poll_seconds: Delay between Status polls while waiting
+        """
+        assert lookahead > 0
+        assert set(axes) == set(steps_per_unit)
+        assert set(axes) == set(max_speed)
+        assert set(axes) == set(microsteps)
+
+        self._chain: Final              = chain
+        self._axes: Final               = dict(axes)
+        self._steps_per_unit: Final     = dict(steps_per_unit)
+        self._max_speed: Final          = dict(max_speed)
+        self._microsteps: Final         = dict(microsteps)
+        self._lookahead: Final          = lookahead
+        self._poll_seconds: Final       = poll_seconds
+        self._positions: Final          = sorted(set(axes.values()))
+
+        self._absolute                  = True
+        self._rapid                     = True
+        self._feed                      = 0.0   # units per minute
+        self._position: Dict[str, int]  = {axis: 0 for axis in axes}
+
+        self.lines_read                 = 0
+        self.blocks_sent                = 0
+        self.polls                      = 0
+
+    def translate(self, lines: Iterable[str]) -> Iterator[ChainBlock]:
+        """Lazily translate G-code lines into chain blocks
+
+        :lines: Lines of G-code
+        :returns: Iterator over blocks, in execution order
+        """
+        for line in lines:
+            self.lines_read += 1
+            parsed = parseLine(line)
+
+            if parsed is None:
+                continue
+
+            yield from self._translateLine(parsed)
+
+    def execute(self, source: Union[str, Iterable[str]]) -> None:
+        """Run a G-code job to completion
+
+        :source: Path to a file, or an iterable of lines
+        """
+        blocks = self.translate(readLines(source))
+        pending: Deque[ChainBlock] = deque()
+        exhausted = False
+
+        while True:
+            exhausted = exhausted or self._prefetch(blocks, pending)
+
+            if not pending:
+                break
+
+            block = pending.popleft()
+
+            # Blocks run one after the other, whichever axes they move
+            while self._isBusy():
+                # Translate further ahead while waiting on the chips, so
+                # Status is polled once per sleep however long that takes
+                exhausted = exhausted or self._prefetch(blocks, pending)
+                time.sleep(self._poll_seconds)
+
+            self._chain.runCommands(block.lines)
+            self.blocks_sent += 1
+
+    def _prefetch(
+            self, blocks: Iterator[ChainBlock],
+            pending: Deque[ChainBlock],
+        ) -> bool:
+        """Translate blocks until the lookahead is full
+
+        :blocks: Translated blocks not yet pending
+        :pending: Blocks waiting to be sent
+        :returns: True once every block was translated
+        """
+        while len(pending) < self._lookahead:
+            block = next(blocks, None)
+
+            if block is None:
+                return True
+
+            pending.append(block)
+
+        return False
+
+    def _isBusy(self) -> bool:
+        """Poll Status of all devices once
+
+        :returns: True if any axis of the interpreter is busy
+        """
+        statuses = self._chain.allGetRegister(Register.Status)
+        self.polls += 1
+
+        return any(
+            not (statuses[position] & Status.NotBusy)
+            for position in self._positions
+        )
+
+    def _newLines(self) -> List[DeviceLine]:
+        """NOP for every chain position"""
+        return [None] * self._chain._total_devices
+
+    def _translateLine(self, parsed: GCodeLine) -> Iterator[ChainBlock]:
+        """Translate one parsed line, applying modal state
+
+        :parsed: Parsed line
+        :returns: Iterator over resulting blocks
+        """
+        motion = False
+
+        for code in parsed.codes:
+            if code == 'G90':
+                self._absolute = True
+            elif code == 'G91':
+                self._absolute = False
+            elif code in ('G0', 'G1'):
+                self._rapid = code == 'G0'
+                motion = True
+            elif code == 'G28':
+                yield self._home(parsed.words)
+                return
+            elif code == 'G92':
+                yield self._setPosition(parsed.words)
+                return
+            elif code == 'M17':
+                yield self._bridges(parsed.words, Command.StopHard)
+                return
+            elif code == 'M18':
+                yield self._bridges(parsed.words, Command.HiZSoft)
+                return
+
+        if 'F' in parsed.words:
+            self._feed = parsed.words['F']
+
+        if motion or any(axis in parsed.words for axis in self._axes):
+            block = self._move(parsed.words)
+
+            if block is not None:
+                yield block
+
+    def _selectAxes(self, words: Dict[str, float]) -> List[str]:
+        """Axes named on a line, or every axis if none is named"""
+        named = [axis for axis in self._axes if axis in words]
+
+        return named or list(self._axes)
+
+    def _move(self, words: Dict[str, float]) -> Optional[ChainBlock]:
+        """Translate a G0/G1 move into GoTo commands with per-axis speeds
+        """
+        targets = {}
+        distances = {}
+
+        for axis in self._axes:
+            if axis not in words:
+                continue
+
+            steps = int(round(words[axis] * self._steps_per_unit[axis]))
+            target = steps if self._absolute else self._position[axis] + steps
+
+            assert target < 1 << 21, f'{axis} target out of range'
+            assert target >= -(1 << 21), f'{axis} target out of range'
+
+            if target != self._position[axis]:
+                targets[axis] = target
+                distances[axis] = \
+                    (target - self._position[axis]) / self._steps_per_unit[axis]
+
+        if not targets:
+            return None
+
+        length = math.sqrt(sum(d ** 2 for d in distances.values()))
+        duration = 0.0
+
+        if not self._rapid and self._feed > 0:
+            duration = length / (self._feed / 60)
+
+        lines = self._newLines()
+
+        for axis, target in targets.items():
+            full_steps = abs(target - self._position[axis]) \
+                / self._microsteps[axis]
+            speed = self._max_speed[axis]
+
+            if duration:
+                speed = min(speed, full_steps / duration)
+
+            speed_register = int(round(speed * Constant.SpsToMaxSpeed))
+            speed_register = min(max(speed_register, 1), MaxSpeedRegister)
+
+            lines[self._axes[axis]] = \
+                encodeParamSet(Register.SpeedMax, speed_register) \
+                + encodeGoTo(target)
+            self._position[axis] = target
+
+        return ChainBlock(lines, [self._axes[axis] for axis in targets])
+
+    def _home(self, words: Dict[str, float]) -> ChainBlock:
+        """Translate G28 into GoHome commands"""
+        axes = self._selectAxes(words)
+        lines = self._newLines()
+
+        for axis in axes:
+            lines[self._axes[axis]] = [Command.GoHome]
+            self._position[axis] = 0
+
+        return ChainBlock(lines, list(self._axes.values()))
+
+    def _setPosition(self, words: Dict[str, float]) -> ChainBlock:
+        """Translate G92 into PosAbs writes"""
+        axes = self._selectAxes(words)
+        lines = self._newLines()
+
+        for axis in axes:
+            steps = int(round(words.get(axis, 0.0) * self._steps_per_unit[axis]))
+            lines[self._axes[axis]] = encodeParamSet(
+                Register.PosAbs,
+                steps & PositionMask,
+            )
+            self._position[axis] = steps
+
+        return ChainBlock(lines, list(self._axes.values()))
+
+    def _bridges(self, words: Dict[str, float], command: int) -> ChainBlock:
+        """Translate M17/M18 into holding or HiZ commands"""
+        lines = self._newLines()
+
+        for axis in self._selectAxes(words):
+            lines[self._axes[axis]] = [command]
+
+        return ChainBlock(lines, list(self._axes.values()))
@@ -0,0 +1,34 @@
+from typing import (
+    Any,
+    Callable,
+    List,
+)
+
+
+def instrumentMethods(
+        target: Any,
+        around: Callable[[str, Callable], Callable]) -> List[str]:
+    """Replace the public methods of an instance with wrapped versions
+    Only the instance is patched, the class is left untouched
+
+    :target: SpinChain, SpinDevice or similar instance
+    :around: Factory taking (qualified name, bound method),
+        returning the callable to install in its place
+    :returns: Qualified names of the wrapped methods
+
+    """
+    class_name = type(target).__name__
+    wrapped = []
+
+    for name in dir(type(target)):
+        if name.startswith('_'):
+            continue
+
+        if not callable(getattr(type(target), name)):
+            continue
+
+        qualified_name = f'{class_name}.{name}'
+        setattr(target, name, around(qualified_name, getattr(target, name)))
+        wrapped.append(qualified_name)
+
+    return wrapped
@@ -0,0 +1,448 @@
+import mmap
+import struct
+import time
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Register,
+    Status,
+)
+from .families import (
+    DeviceFamily,
+    L6470,
+    getCodec,
+)
+from .frames import (
+    DeviceLine,
+    encodeGoTo,
+    encodeMove,
+    encodeRun,
+    toFrames,
+)
+
+Magic: Final = b'STSPJOB\x00'
+Version: Final = 1
+
+# Magic, version, total devices, record count, frame count
+_Header: Final = struct.Struct('<8sHHII')
+# Kind, frame count, offset of first frame, positions, seconds, timeout
+_Record: Final = struct.Struct('<B3xIIQdd')
+
+# Kind, frames, positions mask, seconds and timeout of a job step
+_Step = Tuple[int, Optional[List[List[int]]], int, float, float]
+
+
+class StepKind:
+    Frames: Final           = 0  # Send a frame set
+    Delay: Final            = 1  # Wait some seconds
+    At: Final               = 2  # Wait until some seconds after the start
+    WaitIdle: Final         = 3  # Poll Status until devices are not busy
+
+
+class JobError(Exception):
+    """Job file invalid, not for this chain, or a barrier timed out"""
+
+
+class Job:
+    """Sequence of chain-wide commands and sync points
+
+    Every command is encoded when it is added, so compiling only writes
+    out ready-to-send frames. Each command becomes one frame set, exactly
+    as the matching SpinChain method would send it.
+    """
+
+    def __init__(
+            self, total_devices: int,
+            families: Optional[Sequence[DeviceFamily]] = None,
+        ) -> None:
+        """
+        :total_devices: Total number of devices in chain
+        :families: Device family of each position, all L6470 if None
+        """
+        assert total_devices > 0
+        assert families is None or len(families) == total_devices
+        assert total_devices <= 64, 'Barrier positions are a 64-bit mask'
+
+        self._total_devices: Final = total_devices
+        self._codecs: Final = [
+            getCodec(family)
+            for family in (families or [L6470] * total_devices)
+        ]
+        self._steps: Final[List[_Step]] = []
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def send(self, lines: Sequence[DeviceLine]) -> 'Job':
+        """Add a frame set of raw per-device bytes
+
+        :lines: Bytes for each position, None for NOP
+        :returns: The job, for chaining
+        """
+        assert len(lines) <= self._total_devices
+
+        lines = list(lines) + [None] * (self._total_devices - len(lines))
+        self._steps.append((StepKind.Frames, toFrames(lines), 0, 0.0, 0.0))
+
+        return self
+
+    def move(self, steps: Sequence[Optional[int]]) -> 'Job':
+        """Add a relative move, like SpinChain.allMove
+
+        :steps: Signed (micro)steps for each position, None for NOP
+        :returns: The job, for chaining
+        """
+        return self.send([None if s is None else encodeMove(s) for s in steps])
+
+    def goTo(self, positions: Sequence[Optional[int]]) -> 'Job':
+        """Add an absolute move, like SpinChain.allGoTo
+
+        :positions: Absolute (micro)steps for each position, None for NOP
+        :returns: The job, for chaining
+        """
+        return self.send(
+            [None if p is None else encodeGoTo(p) for p in positions]
+        )
+
+    def run(self, speeds: Sequence[Optional[float]]) -> 'Job':
+        """Add a constant speed run, like SpinChain.allRun
+
+        :speeds: Full steps per second for each position, None for NOP
+        :returns: The job, for chaining
+        """
+        return self.send([None if s is None else encodeRun(s) for s in speeds])
+
+    def command(
+            self, command: int,
+            selected: Optional[Sequence[bool]] = None,
+        ) -> 'Job':
+        """Add a command without payload, e.g. Command.StopSoft
+
+        :command: Command byte
+        :selected: Whether each position receives it, None for every device
+        :returns: The job, for chaining
+        """
+        if selected is None:
+            selected = [True] * self._total_devices
+
+        return self.send([command if s else None for s in selected])
+
+    def setRegister(
+            self, register: int,
+            values: Sequence[Optional[int]],
+        ) -> 'Job':
+        """Add a register write, like SpinChain.allSetRegister
+
+        :register: Canonical register id
+        :values: Value for each position, None for NOP
+        :returns: The job, for chaining
+        """
+        return self.send([
+            None if v is None else codec.encodeSet(register, v)
+            for codec, v in zip(self._codecs, values)
+        ])
+
+    def delay(self, seconds: float) -> 'Job':
+        """Wait after the previous step
+
+        :seconds: Time to wait
+        :returns: The job, for chaining
+        """
+        assert seconds >= 0
+
+        self._steps.append((StepKind.Delay, None, 0, seconds, 0.0))
+
+        return self
+
+    def at(self, seconds: float) -> 'Job':
+        """Wait until some time after the job started
+        Keeps later steps on schedule however long earlier ones took
+
+        :seconds: Time since the start of the job
+        :returns: The job, for chaining
+        """
+        assert seconds >= 0
+
+        self._steps.append((StepKind.At, None, 0, seconds, 0.0))
+
+        return self
+
+    def waitIdle(
+            self, positions: Optional[Sequence[int]] = None,
+            poll_seconds: float = 0.001,
+            timeout: float = 0.0,
+        ) -> 'Job':
+        """Wait until devices are no longer busy, polling Status
+
+        :positions: Devices to wait for, None for every device
+        :poll_seconds: Time between Status polls
+        :timeout: Seconds before playback fails, 0 to wait forever
+        :returns: The job, for chaining
+        """
+        assert poll_seconds >= 0
+        assert timeout >= 0
+
+        if positions is None:
+            positions = range(self._total_devices)
+
+        mask = 0
+
+        for position in positions:
+            assert position in range(self._total_devices)
+            mask |= 1 << position
+
+        self._steps.append(
+            (StepKind.WaitIdle, None, mask, poll_seconds, timeout)
+        )
+
+        return self
+
+    def toBytes(self) -> bytes:
+        """Compile to the job file format
+
+        :returns: Job file contents
+        """
+        total_devices = self._total_devices
+        # Status read of every device, shared by all barriers
+        poll_frames = toFrames([
+            codec.encodeGet(Register.Status) for codec in self._codecs
+        ])
+        # Barriers all point at the poll frames, stored first
+        frames: List[List[int]] = list(poll_frames)
+        records = []
+
+        for kind, step_frames, positions, seconds, timeout in self._steps:
+            if StepKind.Frames == kind:
+                assert step_frames is not None
+                records.append(_Record.pack(
+                    kind, len(step_frames), len(frames), 0, 0.0, 0.0,
+                ))
+                frames.extend(step_frames)
+
+            elif StepKind.WaitIdle == kind:
+                records.append(_Record.pack(
+                    kind, len(poll_frames), 0, positions, seconds, timeout,
+                ))
+
+            else:
+                records.append(_Record.pack(kind, 0, 0, 0, seconds, 0.0))
+
+        data = [
+            _Header.pack(
+                Magic, Version, total_devices, len(records), len(frames),
+            ),
+        ]
+        data.extend(records)
+        data.extend(bytes(frame) for frame in frames)
+
+        return b''.join(data)
+
+    def compile(self, path: str) -> None:
+        """Write the job file
+
+        :path: Output file
+        """
+        with open(path, 'wb') as f:
+            f.write(self.toBytes())
+
+
+class JobPlayer:
+    """Stream a compiled job to a chain from a memory-mapped file
+
+    Frames are sent straight from the mapping, so playing a job costs a
+    slice and a transfer per frame whatever built it. Each frame set is
+    sent under the chain's lock. Devices created from the chain are not
+    told about the job's commands, and elided command memory is cleared
+    after playback.
+    """
+
+    def __init__(self, chain: Any, path: str) -> None:
+        """
+        :chain: SpinChain to play the job on
+        :path: Job file written by Job.compile
+        :raises JobError: File invalid or compiled for another chain length
+        """
+        self._chain: Final = chain
+        self._file: Final = open(path, 'rb')
+
+        try:
+            self._mmap: Final = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ,
+            )
+        except ValueError:
+            self._file.close()
+            raise JobError(f'{path}: empty file')
+
+        try:
+            self._records = self._load(path)
+        except JobError:
+            self.close()
+            raise
+
+        self.runs = 0
+        self.frames = 0
+        self.polls = 0
+        self.max_late_seconds = 0.0
+
+    def _load(self, path: str) -> List[Tuple[int, int, int, int, float, float]]:
+        """Check the header and read the record table"""
+        if len(self._mmap) < _Header.size:
+            raise JobError(f'{path}: too short for a job file')
+
+        magic, version, total_devices, record_count, frame_count = \
+            _Header.unpack_from(self._mmap, 0)
+
+        if Magic != magic or Version != version:
+            raise JobError(f'{path}: not a version {Version} job file')
+
+        if total_devices != self._chain._total_devices:
+            raise JobError(
+                f'{path}: compiled for {total_devices} devices, '
+                f'chain has {self._chain._total_devices}'
+            )
+
+        self._frames_offset: Final = \
+            _Header.size + record_count * _Record.size
+        expected = self._frames_offset + frame_count * total_devices
+
+        if len(self._mmap) != expected:
+            raise JobError(f'{path}: size {len(self._mmap)}, expected {expected}')
+
+        return list(_Record.iter_unpack(
+            self._mmap[_Header.size:self._frames_offset]
+        ))
+
+    def close(self) -> None:
+        """Unmap and close the job file"""
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'JobPlayer':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def play(self, repeat: int = 1) -> None:
+        """Play the job
+
+        :repeat: Number of times to run it back to back
+        :raises JobError: A barrier timed out
+        """
+        assert repeat > 0
+
+        chain = self._chain
+        total_devices = chain._total_devices
+        view = memoryview(self._mmap)
+        base = self._frames_offset
+
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+
+                for kind, count, offset, positions, seconds, timeout in \
+                        self._records:
+                    if StepKind.Frames == kind:
+                        first = base + offset * total_devices
+
+                        with chain._lock:
+                            transfer = chain._spi_transfer
+
+                            for index in range(count):
+                                start_byte = first + index * total_devices
+                                transfer(view[
+                                    start_byte:start_byte + total_devices
+                                ].tolist())
+
+                        self.frames += count
+
+                    elif StepKind.Delay == kind:
+                        time.sleep(seconds)
+
+                    elif StepKind.At == kind:
+                        remaining = start + seconds - time.perf_counter()
+
+                        if remaining > 0:
+                            time.sleep(remaining)
+                        else:
+                            self.max_late_seconds = \
+                                max(self.max_late_seconds, -remaining)
+
+                    else:
+                        self._waitIdle(
+                            view, base + offset * total_devices, count,
+                            positions, seconds, timeout,
+                        )
+
+                self.runs += 1
+        finally:
+            view.release()
+
+            if chain._memory is not None:
+                chain._memory.forget()
+
+    def _waitIdle(
+            self, view: memoryview,
+            first: int,
+            count: int,
+            positions: int,
+            poll_seconds: float,
+            timeout: float,
+        ) -> None:
+        """Poll Status until the selected devices are not busy"""
+        chain = self._chain
+        total_devices = chain._total_devices
+        selected = [p for p in range(total_devices) if positions >> p & 1]
+        deadline = time.perf_counter() + timeout
+
+        while True:
+            with chain._lock:
+                responses = [
+                    chain._spi_transfer(
+                        view[start_byte:start_byte + total_devices].tolist()
+                    )
+                    for start_byte in range(
+                        first, first + count * total_devices, total_devices,
+                    )
+                ]
+
+            self.polls += 1
+
+            # Status is two bytes on every family
+            if all(responses[2][p] & Status.NotBusy for p in selected):
+                return
+
+            if timeout and time.perf_counter() >= deadline:
+                raise JobError(
+                    f'Devices still busy after {timeout} s: ' + ', '.join(
+                        str(p) for p in selected
+                        if not responses[2][p] & Status.NotBusy
+                    )
+                )
+
+            if poll_seconds:
+                time.sleep(poll_seconds)
+
+    def getReport(self) -> Dict[str, Any]:
+        """Summarize playback
+
+        :returns: Runs, frames sent, Status polls and worst lateness
+            of At steps
+        """
+        return {
+            'runs': self.runs,
+            'frames': self.frames,
+            'polls': self.polls,
+            'max_late_seconds': self.max_late_seconds,
+        }
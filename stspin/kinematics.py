@@ -0,0 +1,283 @@
+import math
+
+from typing import (
+    Optional,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Constant,
+)
+
+
+class KinematicsError(Exception):
+    """Motion parameters of an axis cannot predict its motion"""
+
+
+class TrapezoidSegment:
+    """Predicted trapezoidal motion of a single positioning command
+    Distances are unsigned (micro)steps, times in seconds from the start
+    """
+
+    def __init__(
+            self, distance: float,
+            speed: float,
+            max_speed: float,
+            acceleration: float,
+            deceleration: float,
+        ) -> None:
+        """
+        :distance: Distance to travel in (micro)steps
+        :speed: Speed at the start of the segment in (micro)steps/s
+        :max_speed: Speed limit in (micro)steps/s
+        :acceleration: Acceleration in (micro)steps/s^2
+        :deceleration: Deceleration in (micro)steps/s^2
+        """
+        assert max_speed > 0
+        assert acceleration > 0
+        assert deceleration > 0
+
+        distance = abs(distance)
+        speed = min(abs(speed), max_speed)
+
+        accel_distance = (max_speed ** 2 - speed ** 2) / (2 * acceleration)
+        decel_distance = max_speed ** 2 / (2 * deceleration)
+
+        if accel_distance + decel_distance <= distance:
+            peak = max_speed
+        else:
+            peak = math.sqrt(
+                (2 * distance + speed ** 2 / acceleration)
+                / (1 / acceleration + 1 / deceleration)
+            )
+            peak = max(peak, speed)
+
+        self.distance: Final        = distance
+        self.speed: Final           = speed
+        self.peak_speed: Final      = peak
+        self.acceleration: Final    = acceleration
+        self.deceleration: Final    = deceleration
+
+        self.accel_seconds: Final = (peak - speed) / acceleration
+        self.decel_seconds: Final = peak / deceleration
+
+        self.accel_distance: Final = \
+            (speed + peak) / 2 * self.accel_seconds
+        cruise_distance = max(
+            0.0,
+            distance - self.accel_distance - peak ** 2 / (2 * deceleration)
+        )
+        self.cruise_seconds: Final = cruise_distance / peak if peak else 0.0
+        self.decel_start: Final = self.accel_distance + cruise_distance
+
+        self.duration: Final = \
+            self.accel_seconds + self.cruise_seconds + self.decel_seconds
+
+    def getDistanceAt(self, seconds: float) -> float:
+        """Distance travelled after some time
+
+        :seconds: Time since the segment started
+        :returns: Distance in (micro)steps
+        """
+        if seconds <= 0:
+            return 0.0
+
+        if seconds < self.accel_seconds:
+            return self.speed * seconds \
+                + self.acceleration * seconds ** 2 / 2
+
+        seconds -= self.accel_seconds
+
+        if seconds < self.cruise_seconds:
+            return self.accel_distance + self.peak_speed * seconds
+
+        seconds = min(seconds - self.cruise_seconds, self.decel_seconds)
+
+        return min(
+            self.distance,
+            self.decel_start + self.peak_speed * seconds
+            - self.deceleration * seconds ** 2 / 2
+        )
+
+    def getSpeedAt(self, seconds: float) -> float:
+        """Speed after some time
+
+        :seconds: Time since the segment started
+        :returns: Unsigned speed in (micro)steps/s
+        """
+        if seconds <= 0:
+            return self.speed
+
+        if seconds < self.accel_seconds:
+            return self.speed + self.acceleration * seconds
+
+        seconds -= self.accel_seconds
+
+        if seconds < self.cruise_seconds:
+            return self.peak_speed
+
+        seconds -= self.cruise_seconds
+
+        return max(0.0, self.peak_speed - self.deceleration * seconds)
+
+    def getTimeAt(self, distance: float) -> float:
+        """Time at which a distance is reached
+
+        :distance: Distance in (micro)steps from the start
+        :returns: Seconds since the segment started
+        """
+        distance = min(max(distance, 0.0), self.distance)
+
+        if distance < self.accel_distance:
+            return (
+                -self.speed
+                + math.sqrt(self.speed ** 2 + 2 * self.acceleration * distance)
+            ) / self.acceleration
+
+        if distance < self.decel_start:
+            return self.accel_seconds \
+                + (distance - self.accel_distance) / self.peak_speed
+
+        remaining = self.peak_speed ** 2 \
+            - 2 * self.deceleration * (distance - self.decel_start)
+
+        return self.accel_seconds + self.cruise_seconds + (
+            self.peak_speed - math.sqrt(max(0.0, remaining))
+        ) / self.deceleration
+
+
+class AxisKinematics:
+    """Motion parameters of a single axis, in (micro)steps"""
+
+    def __init__(
+            self, acceleration: float,
+            deceleration: float,
+            max_speed: float,
+            microsteps: int = 1,
+        ) -> None:
+        """
+        :acceleration: Acceleration in full steps/s^2
+        :deceleration: Deceleration in full steps/s^2
+        :max_speed: Speed limit in full steps/s
+        :microsteps: Microsteps per full step, as selected by StepMode
+        """
+        assert acceleration > 0
+        assert deceleration > 0
+        assert max_speed > 0
+        assert microsteps > 0
+
+        self.microsteps: Final      = microsteps
+        self.acceleration: Final    = acceleration * microsteps
+        self.deceleration: Final    = deceleration * microsteps
+        self.max_speed: Final       = max_speed * microsteps
+
+    @classmethod
+    def fromRegisters(
+            cls, acc: Optional[int],
+            dec: Optional[int],
+            speed_max: Optional[int],
+            step_mode: Optional[int],
+        ) -> 'AxisKinematics':
+        """Create kinematics from raw register values
+
+        :acc: Acc register value
+        :dec: Dec register value
+        :speed_max: SpeedMax register value
+        :step_mode: StepMode register value
+        :returns: Kinematics of the axis
+        :raises KinematicsError: A register is missing from the device's
+            family, as None, or a rate is 0
+        """
+        registers = {
+            'Acc': acc, 'Dec': dec, 'SpeedMax': speed_max,
+            'StepMode': step_mode,
+        }
+        missing = [name for name, value in registers.items() if value is None]
+
+        if missing:
+            raise KinematicsError(
+                f'Device has no {", ".join(missing)} register'
+            )
+
+        assert acc is not None and dec is not None \
+            and speed_max is not None and step_mode is not None
+
+        zero = [
+            name for name, value in registers.items()
+            if not value and 'StepMode' != name
+        ]
+
+        if zero:
+            raise KinematicsError(f'{", ".join(zero)} is 0, motion never ends')
+
+        return cls(
+            acc / Constant.Sps2ToAcc,
+            dec / Constant.Sps2ToAcc,
+            speed_max / Constant.SpsToMaxSpeed,
+            1 << (step_mode & Constant.StepModeMask),
+        )
+
+    def getSegment(
+            self, distance: float,
+            speed: float = 0.0,
+            max_speed: float = 0.0,
+        ) -> TrapezoidSegment:
+        """Predict a positioning command
+
+        :distance: Distance to travel in (micro)steps
+        :speed: Current speed in (micro)steps/s
+        :max_speed: Speed limit in (micro)steps/s, 0 for the axis limit
+        :returns: Predicted segment
+        """
+        return TrapezoidSegment(
+            distance,
+            speed,
+            max_speed or self.max_speed,
+            self.acceleration,
+            self.deceleration,
+        )
+
+    def getMoveSeconds(self, distance: float, speed: float = 0.0) -> float:
+        """Predict the duration of a positioning command
+
+        :distance: Distance to travel in (micro)steps
+        :speed: Current speed in (micro)steps/s
+        :returns: Duration in seconds
+        """
+        return self.getSegment(distance, speed).duration
+
+    def getStopSeconds(self, speed: float) -> float:
+        """Predict the time a soft stop takes
+
+        :speed: Current speed in (micro)steps/s
+        :returns: Duration in seconds
+        """
+        return abs(speed) / self.deceleration
+
+    def getEarliestSeconds(self, distance: float, speed: float = 0.0) -> float:
+        """Predict the soonest a distance can be covered, accelerating
+        fully and never decelerating. Commands sent meanwhile cannot make
+        the axis get there any sooner
+
+        :distance: Distance to travel in (micro)steps
+        :speed: Current speed towards the distance in (micro)steps/s,
+            negative when moving away
+        :returns: Duration in seconds
+        """
+        distance = abs(distance)
+        # Moving away has to stop first, which only takes longer than
+        # starting from rest
+        speed = min(max(speed, 0.0), self.max_speed)
+
+        accel_seconds = (self.max_speed - speed) / self.acceleration
+        accel_distance = (speed + self.max_speed) / 2 * accel_seconds
+
+        if distance <= accel_distance:
+            return (
+                -speed
+                + math.sqrt(speed ** 2 + 2 * self.acceleration * distance)
+            ) / self.acceleration
+
+        return accel_seconds + (distance - accel_distance) / self.max_speed
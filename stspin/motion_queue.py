@@ -0,0 +1,304 @@
+import time
+
+from collections import deque
+from typing import (
+    Any,
+    Deque,
+    List,
+    Optional,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Register,
+    Status,
+)
+from .frames import (
+    DeviceLine,
+    encodeGoTo,
+    encodeGoToDir,
+    encodeMove,
+)
+from .kinematics import (
+    AxisKinematics,
+    KinematicsError,
+)
+from .utility import toSignedInt
+
+
+class MotionQueueStats:
+    """Counters of a MotionQueue"""
+
+    def __init__(self) -> None:
+        self.polls              = 0
+        self.frame_sets         = 0
+        self.segments           = 0
+        self.dwell_count        = 0
+        self.dwell_total        = 0.0
+        self.dwell_max          = 0.0
+
+    @property
+    def dwell_mean(self) -> float:
+        """Mean upper bound of the idle time between segments"""
+        return self.dwell_total / self.dwell_count if self.dwell_count else 0.0
+
+
+class MotionQueue:
+    """Host-side queue of positioning commands for every device of a chain
+
+    The devices have no command queue of their own, so the next segment
+    can only be sent once BUSY is released. All devices share one chain-wide
+    Status poll, the poll rate is raised just before predicted segment ends,
+    and every segment that can start is sent in the same frame set.
+    """
+
+    def __init__(
+            self, chain: Any,
+            poll_seconds: float = 0.05,
+            dense_poll_seconds: float = 0.001,
+            guard_seconds: float = 0.02,
+            kinematics: Optional[List[Optional[AxisKinematics]]] = None,
+        ) -> None:
+        """
+        :chain: SpinChain to drive
+        :poll_seconds: Poll period while no segment is about to end
+        :dense_poll_seconds: Poll period close to a predicted segment end
+        :guard_seconds: How long before a predicted end to poll densely
+        :kinematics: Per-device motion parameters used for predictions.
+            Read from the devices when None
+        """
+        assert poll_seconds > 0
+        assert dense_poll_seconds > 0
+        assert guard_seconds >= 0
+
+        total_devices = chain._total_devices
+
+        self._chain: Final              = chain
+        self._poll_seconds: Final       = poll_seconds
+        self._dense_poll_seconds: Final = dense_poll_seconds
+        self._guard_seconds: Final      = guard_seconds
+        self._kinematics                = kinematics
+
+        # Pending (bytes, signed steps of relative moves) per device
+        self._queues: Final[List[Deque[Tuple[List[int], Optional[int]]]]] = \
+            [deque() for _ in range(total_devices)]
+        self._active: Final[List[bool]] = [False] * total_devices
+        self._expected_end: Final[List[Optional[float]]] = \
+            [None] * total_devices
+        self._last_busy_poll: Final[List[float]] = [0.0] * total_devices
+        self._positions: Optional[List[int]] = None
+
+        self.stats: Final = MotionQueueStats()
+
+    def __len__(self) -> int:
+        """Number of segments not yet sent"""
+        return sum(len(queue) for queue in self._queues)
+
+    def move(self, position: int, steps: int) -> None:
+        """Queue a relative move
+
+        :position: Device position in chain
+        :steps: Signed number of (micro)steps to take
+        """
+        self._queues[position].append((encodeMove(steps), steps))
+
+    def goTo(self, position: int, target: int) -> None:
+        """Queue an absolute move taking the shortest path
+
+        :position: Device position in chain
+        :target: Absolute position in (micro)steps
+        """
+        self._queues[position].append((encodeGoTo(target), None))
+
+    def goToDir(self, position: int, direction: int, target: int) -> None:
+        """Queue an absolute move in a forced direction
+
+        :position: Device position in chain
+        :direction: Constant.DirReverse or Constant.DirForward
+        :target: Absolute position in (micro)steps
+        """
+        self._queues[position].append((encodeGoToDir(direction, target), None))
+
+    def clear(self) -> None:
+        """Drop all segments not yet sent"""
+        for queue in self._queues:
+            queue.clear()
+
+    def isDone(self) -> bool:
+        """Check whether every segment was sent and has completed
+
+        :returns: True if there is nothing left to wait for
+        """
+        return not len(self) and not any(self._active)
+
+    def loadKinematics(self) -> None:
+        """Read motion parameters and positions from all devices
+        Used to predict when segments end. Devices lacking Acc, Dec or
+        SpeedMax, or with one of them at 0, get no predictions and are
+        polled at the regular rate
+        """
+        chain = self._chain
+
+        acc = chain.allGetRegister(Register.Acc)
+        dec = chain.allGetRegister(Register.Dec)
+        speed_max = chain.allGetRegister(Register.SpeedMax)
+        step_mode = chain.allGetRegister(Register.StepMode)
+
+        kinematics: List[Optional[AxisKinematics]] = []
+
+        for registers in zip(acc, dec, speed_max, step_mode):
+            try:
+                kinematics.append(AxisKinematics.fromRegisters(*registers))
+            except KinematicsError:
+                kinematics.append(None)
+
+        self._kinematics = kinematics
+        self._positions = chain.allGetPosition()
+
+    def poll(self) -> int:
+        """Poll all devices once and start every segment that can start
+
+        :returns: Number of segments started
+        """
+        chain = self._chain
+        statuses = chain.allGetRegister(Register.Status)
+        now = time.perf_counter()
+        self.stats.polls += 1
+
+        lines: List[DeviceLine] = [None] * len(statuses)
+        started = 0
+
+        for position, status in enumerate(statuses):
+            if not (status & Status.NotBusy):
+                self._last_busy_poll[position] = now
+                continue
+
+            self._active[position] = False
+            self._expected_end[position] = None
+
+            if not self._queues[position]:
+                continue
+
+            data, _ = self._queues[position][0]
+            lines[position] = data
+            started += 1
+
+        if not started:
+            return 0
+
+        chain.runCommands(lines)
+        sent = time.perf_counter()
+        self.stats.frame_sets += 1
+
+        for position, line in enumerate(lines):
+            if line is None:
+                continue
+
+            data, steps = self._queues[position].popleft()
+            self._active[position] = True
+            self._expected_end[position] = self._predictEnd(
+                position, data, steps, sent,
+            )
+            self.stats.segments += 1
+
+            if self._last_busy_poll[position]:
+                dwell = sent - self._last_busy_poll[position]
+                self.stats.dwell_count += 1
+                self.stats.dwell_total += dwell
+                self.stats.dwell_max = max(self.stats.dwell_max, dwell)
+
+            # Not busy until the first poll after this segment started
+            self._last_busy_poll[position] = 0.0
+
+        return started
+
+    def getNextPollTime(self) -> float:
+        """Get the perf_counter time of the next poll
+
+        :returns: perf_counter timestamp
+        """
+        now = time.perf_counter()
+        next_poll = now + self._poll_seconds
+
+        for position, expected_end in enumerate(self._expected_end):
+            if not self._active[position] or expected_end is None:
+                continue
+
+            dense_start = expected_end - self._guard_seconds
+
+            if dense_start <= now:
+                return now + self._dense_poll_seconds
+
+            next_poll = min(next_poll, dense_start)
+
+        return next_poll
+
+    def runUntilDone(self, timeout: Optional[float] = None) -> bool:
+        """Keep polling and starting segments until the queue drains
+
+        :timeout: Maximum time to spend in seconds, None to wait forever
+        :returns: True if every segment completed
+        """
+        if self._kinematics is None:
+            self.loadKinematics()
+        elif self._positions is None:
+            self._positions = self._chain.allGetPosition()
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        while True:
+            self.poll()
+
+            if self.isDone():
+                return True
+
+            next_poll = self.getNextPollTime()
+
+            if deadline is not None and next_poll > deadline:
+                return False
+
+            delay = next_poll - time.perf_counter()
+
+            if delay > 0:
+                time.sleep(delay)
+
+    def _predictEnd(
+            self, position: int,
+            data: List[int],
+            steps: Optional[int],
+            start: float,
+        ) -> Optional[float]:
+        """Predict when a segment that just started will end
+        Also tracks the expected position after the segment
+
+        :position: Device position in chain
+        :data: Bytes of the segment
+        :steps: Signed distance for relative moves, None otherwise
+        :start: perf_counter time the segment was sent
+        :returns: Predicted perf_counter end time, None if unknown
+        """
+        positions = self._positions
+
+        if positions is None:
+            return None
+
+        if steps is None:
+            target = toSignedInt(
+                (data[1] << 16) | (data[2] << 8) | data[3]
+            )
+            distance = target - positions[position]
+        else:
+            target = positions[position] + steps
+            distance = steps
+
+        positions[position] = target
+
+        kinematics = self._kinematics[position] if self._kinematics else None
+
+        if kinematics is None:
+            return None
+
+        return start + kinematics.getMoveSeconds(distance)
@@ -0,0 +1,268 @@
+import sys
+import threading
+import time
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import Command
+from .frames import (
+    DeviceLine,
+    encodeMove,
+    encodeRun,
+    toFrames,
+)
+from .stats import LatencyStats
+from .utility import toPlusAndDir
+
+
+class StartReport(NamedTuple):
+    deadline_ns: int            # perf_counter_ns the final frames were due
+    sent_ns: List[int]          # Final transfer started, by chain
+    latched_ns: List[int]       # Final transfer returned, by chain
+
+    @property
+    def skew_ns(self) -> int:
+        """Spread of the final transfers' completion across chains"""
+        return max(self.latched_ns) - min(self.latched_ns)
+
+    @property
+    def late_ns(self) -> int:
+        """Delay of the latest final transfer start after the deadline"""
+        return max(self.sent_ns) - self.deadline_ns
+
+
+class SynchronizedStart:
+    """Start motors on several SPI buses at the same moment
+
+    Every chain has its own bus and lock, so a frame set per chain sent
+    one after the other starts the last chain a whole frame set late.
+    Instead, commands are padded in front so each one completes on the
+    final transfer of its frame set, and everything before that final
+    transfer is sent ahead. One armed thread per chain then holds its
+    chain's lock and spins on a shared perf_counter_ns deadline, sending
+    the final transfer, which latches every command, as soon as it
+    passes. The thread switch interval is lowered while spinning, so
+    threads waiting for the GIL get it within microseconds.
+
+    Devices created from the chains are told about directions, like the
+    chain's own motion commands do. Elided command memory of every chain
+    is cleared afterwards. If a chain fails to arm, the others complete
+    their staged commands and hard stop the commanded devices at once,
+    rather than leave them waiting for the missing bytes.
+    """
+
+    def __init__(
+            self, chains: Sequence[Any],
+            lead_seconds: float = 0.002,
+            spin_seconds: float = 0.0005,
+            switch_interval: Optional[float] = 1e-5,
+        ) -> None:
+        """
+        :chains: SpinChains, each on its own bus
+        :lead_seconds: Time from every chain being armed to the deadline
+        :spin_seconds: Time before the deadline threads stop sleeping
+            and spin
+        :switch_interval: Thread switch interval while spinning,
+            None to leave it unchanged
+        """
+        assert chains
+        assert lead_seconds > 0
+        assert spin_seconds >= 0
+        assert switch_interval is None or switch_interval > 0
+
+        self._chains: Final = list(chains)
+        self._lead_ns: Final = int(lead_seconds * 1e9)
+        self._spin_ns: Final = int(spin_seconds * 1e9)
+        self._switch_interval: Final = switch_interval
+
+        # Final transfer completion spread and start lateness, in seconds
+        self.skew: Final = LatencyStats()
+        self.late: Final = LatencyStats()
+        self.last: Optional[StartReport] = None
+
+    def start(self, lines: Sequence[Sequence[DeviceLine]]) -> StartReport:
+        """Send per-device commands to every chain, latching together
+
+        :lines: Bytes for each position of each chain, None for NOP.
+            Missing trailing positions receive NOPs
+        :returns: Deadline and final transfer times of each chain
+        """
+        assert len(lines) == len(self._chains)
+
+        frame_sets = []
+
+        for chain, chain_lines in zip(self._chains, lines):
+            assert len(chain_lines) <= chain._total_devices
+
+            frame_sets.append(toFrames(
+                list(chain_lines)
+                + [None] * (chain._total_devices - len(chain_lines)),
+                align_end=True,
+            ))
+
+        return self._release(frame_sets)
+
+    def run(self, speeds: Sequence[Sequence[Optional[float]]]) -> StartReport:
+        """Run motors of every chain, like SpinChain.allRun
+
+        :speeds: Full steps per second for each position of each chain,
+            None for NOP
+        :returns: Deadline and final transfer times of each chain
+        """
+        report = self.start([
+            [None if s is None else encodeRun(s) for s in chain_speeds]
+            for chain_speeds in speeds
+        ])
+        self._setDirections(speeds)
+
+        return report
+
+    def move(self, steps: Sequence[Sequence[Optional[int]]]) -> StartReport:
+        """Move motors of every chain, like SpinChain.allMove
+
+        :steps: Signed (micro)steps for each position of each chain,
+            None for NOP
+        :returns: Deadline and final transfer times of each chain
+        """
+        report = self.start([
+            [None if s is None else encodeMove(s) for s in chain_steps]
+            for chain_steps in steps
+        ])
+        self._setDirections(steps)
+
+        return report
+
+    def _setDirections(self, values: Sequence[Sequence[Any]]) -> None:
+        for chain, chain_values in zip(self._chains, values):
+            chain._setDirections([
+                None if v is None else toPlusAndDir(v)[0]
+                for v in chain_values
+            ])
+
+    def _release(self, frame_sets: List[List[List[int]]]) -> StartReport:
+        """Arm a thread per chain and release the final transfers"""
+        count = len(self._chains)
+        armed = threading.Semaphore(0)
+        go = threading.Event()
+        # Deadline, or 0 when aborting
+        deadline = [0]
+        sent_ns = [0] * count
+        latched_ns = [0] * count
+        errors: List[BaseException] = []
+        # Hard stop of every commanded position, sent instead of waiting
+        # for the deadline when another chain fails to arm
+        stop_frames = [
+            [
+                Command.StopHard
+                if any(Command.Nop != frame[p] for frame in frames)
+                else Command.Nop
+                for p in range(len(frames[0]))
+            ]
+            for frames in frame_sets
+        ]
+
+        def arm(index: int) -> None:
+            chain = self._chains[index]
+            frames = frame_sets[index]
+            is_armed = False
+
+            try:
+                with chain._lock:
+                    transfer = chain._spi_transfer
+
+                    for frame in frames[:-1]:
+                        transfer(frame)
+
+                    final = frames[-1]
+                    is_armed = True
+                    armed.release()
+                    go.wait()
+
+                    if not deadline[0]:
+                        if len(frames) > 1:
+                            # Staged bytes would complete with whatever
+                            # comes next, so finish the commands and stop
+                            transfer(final)
+                            transfer(stop_frames[index])
+
+                        return
+
+                    # Sleep most of the way, then spin
+                    remaining = \
+                        deadline[0] - self._spin_ns - time.perf_counter_ns()
+
+                    if remaining > 0:
+                        time.sleep(remaining / 1e9)
+
+                    while time.perf_counter_ns() < deadline[0]:
+                        pass
+
+                    sent_ns[index] = time.perf_counter_ns()
+                    transfer(final)
+                    latched_ns[index] = time.perf_counter_ns()
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                if not is_armed:
+                    armed.release()
+
+        threads = [
+            threading.Thread(target=arm, args=(index,), daemon=True)
+            for index in range(count)
+        ]
+        previous_interval = sys.getswitchinterval()
+
+        try:
+            for thread in threads:
+                thread.start()
+
+            for _ in range(count):
+                armed.acquire()
+
+            if not errors:
+                if self._switch_interval is not None:
+                    sys.setswitchinterval(self._switch_interval)
+
+                deadline[0] = time.perf_counter_ns() + self._lead_ns
+
+            go.set()
+
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(previous_interval)
+
+            for chain in self._chains:
+                if chain._memory is not None:
+                    chain._memory.forget()
+
+        if errors:
+            raise errors[0]
+
+        report = StartReport(deadline[0], sent_ns, latched_ns)
+        self.skew.add(report.skew_ns / 1e9)
+        self.late.add(report.late_ns / 1e9)
+        self.last = report
+
+        return report
+
+    def getReport(self) -> Dict[str, Any]:
+        """Summarize the starts so far
+
+        :returns: Final transfer skew and lateness summaries in seconds
+        """
+        return {
+            'chains': len(self._chains),
+            'skew': self.skew.getSummary(),
+            'late': self.late.getSummary(),
+        }
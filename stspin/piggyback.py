@@ -0,0 +1,184 @@
+import time
+
+from typing import (
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import Register
+from .families import FamilyCodec
+from .frames import DeviceLine
+from .utility import toInt
+
+# Registers read in idle slots by default, in rotation
+DefaultRegisters: Final = (
+    Register.Status,
+    Register.PosAbs,
+    Register.Speed,
+)
+
+
+class CachedValue(NamedTuple):
+    value: int                  # Raw register value
+    timestamp: float            # perf_counter time of the read
+
+
+class PiggybackReader:
+    """Fill idle positions of frame sets with register reads
+
+    A frame set is as long as its longest command, and every other
+    position only receives NOPs meanwhile. Those positions get ParamGet
+    reads that fit in the frame set instead, rotating through the
+    registers of each device, and the values read are cached with their
+    time. Frame sets too short for any read are sent unchanged, so the
+    reads never cost an extra transfer. ParamGet Status does not clear
+    the Status flags, unlike GetStatus.
+    """
+
+    def __init__(
+            self, codecs: Sequence[FamilyCodec],
+            registers: Sequence[int] = DefaultRegisters,
+        ) -> None:
+        """
+        :codecs: Register codec of each position
+        :registers: Canonical register ids to read, in rotation.
+            Registers a device's family lacks are skipped for it
+        """
+        assert registers
+
+        self._codecs: Final = list(codecs)
+        # Registers and their bus length for each position
+        self._rotations: Final[List[List[Tuple[int, int]]]] = [
+            [
+                (register, 1 + codec.size[register])
+                for register in registers
+                if codec.supports(register)
+            ]
+            for codec in self._codecs
+        ]
+        self._next: Final = [0] * len(self._codecs)
+        self._values: Final[List[Dict[int, CachedValue]]] = \
+            [{} for _ in self._codecs]
+
+        self.reads = 0
+        self.frame_sets = 0
+
+    def fill(
+            self, lines: Sequence[DeviceLine],
+        ) -> Tuple[List[DeviceLine], Dict[int, List[int]]]:
+        """Add reads to the idle positions of a frame set
+
+        :lines: Bytes for each position, None for NOP
+        :returns: Lines with reads added, and the registers read
+            by each filled position, in order
+        """
+        frames = max(
+            (
+                1 if isinstance(line, int) else len(line)
+                for line in lines if line is not None
+            ),
+            default=1,
+        )
+        filled_lines = list(lines)
+        filled = {}
+
+        for position, line in enumerate(lines):
+            rotation = self._rotations[position]
+
+            if line is not None or not rotation:
+                continue
+
+            registers = []
+            room = frames
+            index = self._next[position]
+
+            # Stop at the first register that does not fit, so a long one
+            # is not skipped forever by shorter ones after it
+            while room >= rotation[index][1] and len(registers) < len(rotation):
+                register, length = rotation[index]
+                registers.append(register)
+                room -= length
+                index = (index + 1) % len(rotation)
+
+            if registers:
+                self._next[position] = index
+                filled[position] = registers
+                filled_lines[position] = self._encode(position, registers)
+
+        return filled_lines, filled
+
+    def _encode(self, position: int, registers: Sequence[int]) -> List[int]:
+        """ParamGet commands reading some registers of a device"""
+        codec = self._codecs[position]
+        line: List[int] = []
+
+        for register in registers:
+            line.extend(codec.encodeGet(register))
+
+        return line
+
+    def collect(
+            self, filled: Dict[int, List[int]],
+            responses: Sequence[Sequence[int]],
+        ) -> None:
+        """Cache the values read in a frame set
+
+        :filled: Registers read by each filled position, from fill
+        :responses: Response bytes of each position
+        """
+        if not filled:
+            return
+
+        now = time.perf_counter()
+
+        for position, registers in filled.items():
+            response = responses[position]
+            size = self._codecs[position].size
+            values = self._values[position]
+            offset = 0
+
+            for register in registers:
+                length = size[register]
+                values[register] = CachedValue(
+                    toInt(list(response[offset + 1:offset + 1 + length])),
+                    now,
+                )
+                offset += 1 + length
+
+            self.reads += len(registers)
+
+        self.frame_sets += 1
+
+    def getLatest(self, position: int, register: int) -> Optional[CachedValue]:
+        """Last value read of a register
+
+        :position: Device position in chain
+        :register: Canonical register id
+        :returns: Value and time, None if never read
+        """
+        return self._values[position].get(register)
+
+    def getLatestValues(self, register: int) -> List[Optional[CachedValue]]:
+        """Last value read of a register on every device
+
+        :register: Canonical register id
+        :returns: Value and time of each position, None if never read
+        """
+        return [values.get(register) for values in self._values]
+
+    def getReport(self) -> Dict[str, int]:
+        """Summarize the reads made
+
+        :returns: Register reads and frame sets that carried some
+        """
+        return {
+            'reads': self.reads,
+            'frame_sets': self.frame_sets,
+        }
@@ -0,0 +1,308 @@
+import threading
+import time
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Constant,
+    MotorStatus,
+    Register,
+    Status,
+)
+from .frames import DeviceLine
+from .status_events import StatusDispatcher
+from .utility import toInt
+
+
+class PollState:
+    Parked: Final           = 0  # Bridges in high impedance
+    Holding: Final          = 1  # Stopped, holding position
+    Accelerating: Final     = 2
+    Cruising: Final         = 3  # Constant speed
+    Stopping: Final         = 4  # Decelerating, or a stop is expected soon
+
+    Names: Final = (
+        'parked', 'holding', 'accelerating', 'cruising', 'stopping',
+    )
+
+
+# Polls per second of a device in each state
+DefaultRates: Final[Dict[int, float]] = {
+    PollState.Parked:       2.0,
+    PollState.Holding:      5.0,
+    PollState.Accelerating: 100.0,
+    PollState.Cruising:     20.0,
+    PollState.Stopping:     500.0,
+}
+
+
+def getPollState(status: int) -> int:
+    """Poll state of a device from its Status register
+
+    :status: Status register value
+    :returns: PollState
+    """
+    motion = status & MotorStatus.ConstantSpeed
+
+    if MotorStatus.Accelerating == motion:
+        return PollState.Accelerating
+
+    if MotorStatus.Decelerating == motion:
+        return PollState.Stopping
+
+    if MotorStatus.ConstantSpeed == motion:
+        return PollState.Cruising
+
+    if status & Status.HiZ:
+        return PollState.Parked
+
+    return PollState.Holding
+
+
+class AdaptivePoller:
+    """Poll each device's Status at a rate following its motion
+
+    Every read decodes the motion bits, HiZ and BUSY of Status into a
+    PollState, which sets when that device is read next. A parked motor
+    then costs a read every few seconds, while one decelerating is read
+    densely, and once more when its Speed and Dec predict it stops.
+    Motion code knowing when a move ends can announce it with
+    expectStop, so the device is read densely shortly before. Devices
+    due together share a frame set, the others receiving NOPs, so bus
+    load follows motion activity rather than the number of axes.
+
+    Status is read with ParamGet, which leaves its flags latched for
+    GetStatus. Moving devices also get Speed read in the same frame set.
+    """
+
+    def __init__(
+            self, chain: Any,
+            rates: Optional[Dict[int, float]] = None,
+            stop_window_seconds: float = 0.02,
+            dispatcher: Optional[StatusDispatcher] = None,
+        ) -> None:
+        """
+        :chain: SpinChain to poll
+        :rates: Polls per second for each PollState, DefaultRates for
+            states left out
+        :stop_window_seconds: Time before an expected stop when a device
+            is polled as stopping
+        :dispatcher: Fed every read, with the latest Status of devices
+            not read, so its callbacks fire on changes
+        """
+        rates = {**DefaultRates, **(rates or {})}
+
+        assert all(rate > 0 for rate in rates.values())
+        assert stop_window_seconds >= 0
+
+        total_devices = chain._total_devices
+
+        self._chain: Final = chain
+        self._periods: Final = {
+            state: 1 / rate for state, rate in rates.items()
+        }
+        self._stop_window_seconds: Final = stop_window_seconds
+        self._dispatcher: Final = dispatcher
+        # Deceleration of each device in full steps/s^2, None if unknown
+        self._decelerations: Final[List[Optional[float]]] = [
+            None if dec is None else dec / Constant.Sps2ToAcc
+            for dec in chain.allGetRegister(Register.Dec)
+        ]
+
+        self._condition: Final = threading.Condition()
+        self._due: Final = [0.0] * total_devices
+        self._expected_stops: Final[List[Optional[float]]] = \
+            [None] * total_devices
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Latest read of each device
+        self.statuses: Final = [0] * total_devices
+        self.states: Final = [PollState.Holding] * total_devices
+        self.speeds: Final = [0.0] * total_devices
+
+        self.frame_sets = 0
+        self.frames = 0
+        self.reads: Final = [0] * len(PollState.Names)
+        self.started = time.perf_counter()
+
+    def expectStop(self, position: int, seconds: float) -> None:
+        """Announce that a device should stop after some time,
+        e.g. from AxisKinematics.getMoveSeconds
+
+        :position: Device position in chain
+        :seconds: Time from now until the stop
+        """
+        assert seconds >= 0
+
+        with self._condition:
+            stop = time.perf_counter() + seconds
+            self._expected_stops[position] = stop
+            self._due[position] = min(
+                self._due[position], stop - self._stop_window_seconds,
+            )
+            self._condition.notify_all()
+
+    def poll(self) -> float:
+        """Read the devices that are due in one frame set
+
+        :returns: Seconds until the next device is due
+        """
+        chain = self._chain
+        codecs = chain._codecs
+        now = time.perf_counter()
+
+        with self._condition:
+            due = [
+                position for position, due_time in enumerate(self._due)
+                if due_time <= now
+            ]
+
+        if due:
+            lines: List[DeviceLine] = [None] * chain._total_devices
+            read: Dict[int, Sequence[int]] = {}
+
+            for position in due:
+                registers = [Register.Status]
+
+                if self.states[position] >= PollState.Accelerating \
+                        and codecs[position].supports(Register.Speed):
+                    registers.append(Register.Speed)
+
+                read[position] = registers
+                lines[position] = [
+                    byte for register in registers
+                    for byte in codecs[position].encodeGet(register)
+                ]
+
+            responses = chain._exchange(lines)
+            read_time = time.perf_counter()
+
+            self.frame_sets += 1
+            self.frames += len(responses[due[0]])
+
+            for position, registers in read.items():
+                values = {}
+                offset = 0
+
+                for register in registers:
+                    size = codecs[position].size[register]
+                    values[register] = toInt(
+                        responses[position][offset + 1:offset + 1 + size]
+                    )
+                    offset += 1 + size
+
+                self._update(position, values, read_time)
+
+            if self._dispatcher is not None:
+                self._dispatcher.dispatch(self.statuses)
+
+        with self._condition:
+            return max(0.0, min(self._due) - time.perf_counter())
+
+    def _update(
+            self, position: int,
+            values: Dict[int, int],
+            read_time: float,
+        ) -> None:
+        """Record a device's read and schedule its next one"""
+        status = values[Register.Status]
+        state = getPollState(status)
+        speed = 0.0
+
+        if Register.Speed in values:
+            speed = self._chain._codecs[position].toUnits(
+                Register.Speed, values[Register.Speed],
+            )
+
+        self.statuses[position] = status
+        self.speeds[position] = speed
+        self.reads[self.states[position]] += 1
+
+        with self._condition:
+            expected_stop = self._expected_stops[position]
+
+            if not status & Status.NotBusy or state >= PollState.Accelerating:
+                if expected_stop is not None \
+                        and read_time >= expected_stop \
+                        - self._stop_window_seconds:
+                    state = PollState.Stopping
+            else:
+                # Stopped, any expected stop happened
+                self._expected_stops[position] = expected_stop = None
+
+            due = read_time + self._periods[state]
+            deceleration = self._decelerations[position]
+
+            if PollState.Stopping == state and speed and deceleration:
+                # Read once more right when the deceleration should end
+                due = min(due, read_time + speed / deceleration)
+
+            if expected_stop is not None:
+                due = min(due, max(
+                    read_time + self._periods[PollState.Stopping],
+                    expected_stop - self._stop_window_seconds,
+                ))
+
+            self.states[position] = state
+            self._due[position] = due
+
+    def start(self) -> None:
+        """Poll in a background thread"""
+        assert self._thread is None, 'Poller already running'
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            name='stspin-poller',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            delay = self.poll()
+
+            with self._condition:
+                if not self._running:
+                    return
+
+                # Announced stops wake the thread up
+                self._condition.wait(delay)
+
+    def getReport(self) -> Dict[str, Any]:
+        """Summarize polling
+
+        :returns: Frame sets and frames sent, frames per second, reads
+            by state and the current state of each device
+        """
+        seconds = time.perf_counter() - self.started
+
+        return {
+            'frame_sets': self.frame_sets,
+            'frames': self.frames,
+            'frames_per_second': self.frames / seconds if seconds else 0.0,
+            'reads': {
+                name: count for name, count in zip(PollState.Names, self.reads)
+            },
+            'states': [PollState.Names[state] for state in self.states],
+        }
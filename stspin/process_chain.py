@@ -0,0 +1,456 @@
+import multiprocessing
+import os
+import struct
+import threading
+import time
+
+from collections import deque
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import Constant
+from .edges import EdgeSource
+from .families import DeviceFamily
+from .spin_chain import SpinChain
+
+# Message length prefix, and the length marking a skip to the ring start
+_Length: Final = struct.Struct('<I')
+_Wrap: Final = 0xFFFFFFFF
+
+# Kind and sequence number heading every request and response
+_Message: Final = struct.Struct('<BI')
+
+
+class MessageKind:
+    Frames: Final           = 0  # Frame set to send, or its responses
+    Stop: Final             = 1  # Child exits
+    Error: Final            = 2  # Transfer failed, followed by the message
+    Transfer: Final         = 3  # Single transfer of any length
+
+
+class ChainProcessError(Exception):
+    """Bus process failed, exited or did not answer in time"""
+
+
+class SharedRing:
+    """Single-producer single-consumer ring of byte messages
+
+    Lives in a shared memory block, so two processes exchange messages
+    without pickling or a pipe. The producer releases the ready semaphore
+    once a message is written, the consumer releases the freed semaphore
+    once it is read. Semaphore operations order memory between processes,
+    so the peer never sees a message before its bytes, on weakly ordered
+    hosts like the ARM cores of a Raspberry Pi as well as on x86. Each
+    side keeps its own index: the producer learns how far the consumer
+    got from the sizes of the messages freed.
+    Messages are length-prefixed and never split: one not fitting before
+    the end of the ring starts over at its beginning. Waiting spins on the
+    semaphore for a while, then blocks on it.
+    """
+
+    def __init__(
+            self, buffer: memoryview,
+            ready: Optional[Any] = None,
+            freed: Optional[Any] = None,
+            spin_seconds: float = 0.0002,
+            check_seconds: float = 0.01,
+        ) -> None:
+        """
+        :buffer: Shared memory of the ring
+        :ready: Semaphore counting messages written, created with the
+            multiprocessing context of the peer. None for a ring used
+            within one process
+        :freed: Semaphore counting messages read, like ready
+        :spin_seconds: Time a wait spins before it blocks
+        :check_seconds: Time between checks of the peer while blocked
+        """
+        assert (ready is None) == (freed is None)
+
+        self._buffer: Final = buffer
+        self._capacity: Final = len(buffer) & ~3
+        self._ready: Final = threading.Semaphore(0) \
+            if ready is None else ready
+        self._freed: Final = threading.Semaphore(0) \
+            if freed is None else freed
+        self._spin_seconds: Final = spin_seconds
+        self._check_seconds: Final = check_seconds
+
+        # Producer: bytes written, bytes known to be read, and the
+        # sizes of the messages not yet freed
+        self._head = 0
+        self._freed_tail = 0
+        self._unfreed: Final[Deque[int]] = deque()
+
+        # Consumer: bytes read
+        self._tail = 0
+
+        assert self._capacity >= 64
+
+    @staticmethod
+    def getSize(capacity: int) -> int:
+        """Shared memory needed for a ring
+
+        :capacity: Bytes of messages the ring holds
+        :returns: Size in bytes
+        """
+        return capacity
+
+    def _wait(
+            self, semaphore: Any,
+            start: float,
+            timeout: Optional[float],
+            isAlive: Optional[Callable[[], bool]],
+        ) -> None:
+        """Acquire a semaphore
+
+        :raises ChainProcessError: Timed out, or the peer exited
+        """
+        spin_until = start + self._spin_seconds
+
+        while True:
+            if semaphore.acquire(False):
+                return
+
+            if time.perf_counter() >= spin_until:
+                break
+
+        while True:
+            wait = self._check_seconds
+
+            if timeout is not None:
+                remaining = start + timeout - time.perf_counter()
+
+                if remaining <= 0:
+                    raise ChainProcessError(f'No answer within {timeout} s')
+
+                wait = min(wait, remaining)
+
+            if semaphore.acquire(True, wait):
+                return
+
+            if isAlive is not None and not isAlive():
+                raise ChainProcessError('Bus process exited')
+
+    def put(
+            self, data: bytes,
+            timeout: Optional[float] = None,
+            isAlive: Optional[Callable[[], bool]] = None,
+        ) -> None:
+        """Append a message, waiting for room
+
+        :data: Message
+        :timeout: Seconds to wait for room at most, None for no limit
+        :isAlive: Checked while waiting, whether the consumer still runs
+        :raises ChainProcessError: No room in time, or the consumer exited
+        """
+        capacity = self._capacity
+        size = (_Length.size + len(data) + 3) & ~3
+
+        assert size <= capacity // 2, 'Message too long for the ring'
+
+        start = time.perf_counter()
+        head = self._head
+        position = head % capacity
+        skip = capacity - position if position + size > capacity else 0
+
+        while head + skip + size - self._freed_tail > capacity:
+            self._wait(self._freed, start, timeout, isAlive)
+            self._freed_tail += self._unfreed.popleft()
+
+        buffer = self._buffer
+
+        if skip:
+            _Length.pack_into(buffer, position, _Wrap)
+            position = 0
+
+        _Length.pack_into(buffer, position, len(data))
+        buffer[position + _Length.size:position + _Length.size + len(data)] \
+            = data
+
+        self._head = head + skip + size
+        self._unfreed.append(skip + size)
+
+        # Publish only once the message is complete
+        self._ready.release()
+
+    def get(
+            self, timeout: Optional[float] = None,
+            isAlive: Optional[Callable[[], bool]] = None,
+        ) -> bytes:
+        """Take the oldest message, waiting for one
+
+        :timeout: Seconds to wait at most, None for no limit
+        :isAlive: Checked while waiting, whether the producer still runs
+        :returns: Message
+        :raises ChainProcessError: Nothing in time, or the producer exited
+        """
+        self._wait(self._ready, time.perf_counter(), timeout, isAlive)
+
+        capacity = self._capacity
+        buffer = self._buffer
+        position = self._tail % capacity
+        length = _Length.unpack_from(buffer, position)[0]
+
+        if _Wrap == length:
+            self._tail += capacity - position
+            position = 0
+            length = _Length.unpack_from(buffer, 0)[0]
+
+        start = position + _Length.size
+        data = bytes(buffer[start:start + length])
+        self._tail += (_Length.size + length + 3) & ~3
+
+        # Hand the room back only once the message is copied out
+        self._freed.release()
+
+        return data
+
+
+def _serve(
+        request_name: str,
+        response_name: str,
+        total_devices: int,
+        spi_select: Optional[Tuple[int, int]],
+        transfer_factory: Optional[
+            Callable[[], Callable[[List[int]], List[int]]]
+        ],
+        spi_speed_hz: int,
+        cpus: Optional[Set[int]],
+        semaphores: Tuple[Any, Any, Any, Any],
+    ) -> None:
+    """Bus process: send the frame sets received and return responses"""
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+
+    request_memory = shared_memory.SharedMemory(request_name)
+    response_memory = shared_memory.SharedMemory(response_name)
+    requests = SharedRing(request_memory.buf, *semaphores[:2])
+    responses = SharedRing(response_memory.buf, *semaphores[2:])
+    parent = os.getppid()
+
+    def isParentAlive() -> bool:
+        return os.getppid() == parent
+
+    try:
+        if transfer_factory is not None:
+            transfer = transfer_factory()
+        else:
+            import spidev
+
+            assert spi_select is not None
+
+            spi = spidev.SpiDev()
+            spi.open(*spi_select)
+            spi.mode = 3
+            spi.lsbfirst = False
+            spi.max_speed_hz = spi_speed_hz
+            spi.cshigh = False
+            transfer = spi.xfer2
+
+        while True:
+            try:
+                request = requests.get(isAlive=isParentAlive)
+            except ChainProcessError:
+                break
+
+            kind, sequence = _Message.unpack_from(request)
+
+            if MessageKind.Stop == kind:
+                break
+
+            try:
+                miso = bytearray(_Message.pack(MessageKind.Frames, sequence))
+
+                if MessageKind.Transfer == kind:
+                    miso.extend(transfer(list(request[_Message.size:])))
+                else:
+                    for start in range(
+                            _Message.size, len(request), total_devices):
+                        miso.extend(transfer(
+                            list(request[start:start + total_devices])
+                        ))
+            except Exception as e:
+                miso = bytearray(_Message.pack(MessageKind.Error, sequence))
+                miso.extend(repr(e).encode())
+
+            responses.put(bytes(miso))
+    finally:
+        request_memory.close()
+        response_memory.close()
+
+
+class ProcessChain(SpinChain):
+    """SpinChain whose bus is driven from a dedicated child process
+
+    Planning, parsing and analytics in the application then never hold
+    the GIL while frames go out. Commands are encoded here as usual, and
+    each frame set travels to the bus process as raw bytes through a
+    shared memory ring, its responses coming back through another one.
+    Requests are numbered, so a response arriving after its request timed
+    out is dropped instead of answering the next one.
+
+    Every SpinChain method works unchanged. Frame sets cost one round trip
+    each, while code sending single transfers through _spi_transfer, like
+    jobs and the watchdog, pays one per transfer. Single transfers keep
+    their length, so alignment checks and guards work as on a local bus.
+    Wrappers of _spi_transfer, like tracers, only see those single
+    transfers.
+    """
+
+    def __init__(
+            self, total_devices: int,
+            spi_select: Optional[Tuple[int, int]] = None,
+            transfer_factory: Optional[
+                Callable[[], Callable[[List[int]], List[int]]]
+            ] = None,
+            spi_speed_hz: int = Constant.SpiSpeedHz,
+            families: Optional[Sequence[DeviceFamily]] = None,
+            edge_source: Optional[EdgeSource] = None,
+            ring_bytes: int = 1 << 16,
+            cpus: Optional[Set[int]] = None,
+            timeout: float = 5.0,
+        ) -> None:
+        """
+        :total_devices: Total number of devices in chain
+        :spi_select: A SPI bus, device pair, e.g. (0, 0), opened by the
+            bus process
+        :transfer_factory: Picklable callable creating a transfer function
+            in the bus process, like spidev.xfer2, instead of spi_select
+        :spi_speed_hz: SPI clock frequency used with spi_select
+        :families: Device family of each position, all L6470 if None
+        :edge_source: BUSY and FLAG lines of the chain, read here
+        :ring_bytes: Capacity of each ring, the longest frame set has to
+            fit in half of it
+        :cpus: CPUs the bus process is pinned to, None for any
+        :timeout: Seconds to wait for the bus process to answer
+        """
+        assert (spi_select is None) != (transfer_factory is None), \
+            'Either supply a transfer factory or use spidev\'s'
+        assert timeout > 0
+
+        context = multiprocessing.get_context('spawn')
+        semaphores = tuple(context.Semaphore(0) for _ in range(4))
+
+        self._timeout: Final = timeout
+        self._ring_lock: Final = threading.Lock()
+        self._sequence = 0
+        self._memories: Final = [
+            shared_memory.SharedMemory(
+                create=True, size=SharedRing.getSize(ring_bytes),
+            )
+            for _ in range(2)
+        ]
+
+        self._requests: Final = SharedRing(
+            self._memories[0].buf, *semaphores[:2],
+        )
+        self._responses: Final = SharedRing(
+            self._memories[1].buf, *semaphores[2:],
+        )
+        self._process: Final = context.Process(
+            target=_serve,
+            args=(
+                self._memories[0].name, self._memories[1].name,
+                total_devices, spi_select, transfer_factory, spi_speed_hz,
+                cpus, semaphores,
+            ),
+            name='stspin-bus',
+            daemon=True,
+        )
+
+        try:
+            self._process.start()
+        except BaseException:
+            for memory in self._memories:
+                memory.close()
+                memory.unlink()
+            raise
+
+        super().__init__(
+            total_devices,
+            spi_transfer=self._transferFrame,
+            spi_speed_hz=spi_speed_hz,
+            families=families,
+            edge_source=edge_source,
+        )
+
+    def _roundTrip(self, kind: int, payload: bytes) -> bytes:
+        """Send a request to the bus process and wait for its response
+        Responses to earlier requests that timed out are dropped
+        """
+        isAlive = self._process.is_alive
+
+        with self._ring_lock:
+            self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+            sequence = self._sequence
+
+            self._requests.put(
+                _Message.pack(kind, sequence) + payload,
+                self._timeout, isAlive,
+            )
+
+            while True:
+                response = self._responses.get(self._timeout, isAlive)
+                kind, answered = _Message.unpack_from(response)
+
+                if answered == sequence:
+                    break
+
+        if MessageKind.Error == kind:
+            raise ChainProcessError(
+                f'Transfer failed: {response[_Message.size:].decode()}'
+            )
+
+        return response[_Message.size:]
+
+    def _transferFrame(self, data: List[int]) -> List[int]:
+        """Single transfer through the bus process, like spidev.xfer2"""
+        return list(self._roundTrip(MessageKind.Transfer, bytes(data)))
+
+    def _transferFrames(self, frames: List[List[int]]) -> List[List[int]]:
+        total_devices = self._total_devices
+        miso = self._roundTrip(
+            MessageKind.Frames, b''.join(bytes(f) for f in frames),
+        )
+
+        return [
+            list(miso[start:start + total_devices])
+            for start in range(0, len(miso), total_devices)
+        ]
+
+    def close(self) -> None:
+        """Stop the bus process and free the rings"""
+        if self._process.is_alive():
+            with self._ring_lock:
+                self._requests.put(
+                    _Message.pack(MessageKind.Stop, 0), self._timeout,
+                    self._process.is_alive,
+                )
+
+            self._process.join(self._timeout)
+
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+
+        for memory in self._memories:
+            memory.close()
+            memory.unlink()
+
+    def __enter__(self) -> 'ProcessChain':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
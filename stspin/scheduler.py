@@ -0,0 +1,386 @@
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .stats import LatencyStats
+from .wire_time import WireTimeModel
+
+
+class TrafficClass:
+    Safety: Final           = 0  # Fault handling, never throttled
+    Command: Final          = 1  # Motion and configuration
+    Telemetry: Final        = 2  # Periodic monitoring reads
+    Diagnostics: Final      = 3  # Anything that can wait
+
+    Names: Final = ('safety', 'command', 'telemetry', 'diagnostics')
+
+
+# Share of the bus a class may use while higher classes need it
+DefaultBudgets: Final[Dict[int, float]] = {
+    TrafficClass.Telemetry:     0.25,
+    TrafficClass.Diagnostics:   0.05,
+}
+
+
+class ClassUsage:
+    """Accumulated bus usage of a single traffic class"""
+
+    def __init__(self, name: str) -> None:
+        self.name: Final            = name
+        self.grants                 = 0
+        self.frames                 = 0
+        self.wire_seconds           = 0.0
+        self.bus_seconds            = 0.0
+        self.held_seconds           = 0.0
+        self.throttled              = 0
+        self.dropped                = 0
+        self.wait: Final            = LatencyStats()
+
+
+class BusScheduler:
+    """Priority lock sharing a chain's bus between traffic classes
+
+    Replaces the chain's own lock, so every frame set is granted to the
+    waiting thread with the most urgent traffic class. The class of a
+    thread's traffic is set with traffic(); untagged traffic counts as
+    default_class. Every transfer costs its modelled wire time, or its
+    measured duration when driver overhead makes it longer. The bus is
+    handed over on release, so a waiting class gets its turn even when a
+    more urgent thread uses the bus in a tight loop. A class with a
+    budget is throttled once it used more than its share of the last
+    window, but only while more urgent classes have used or are waiting
+    for the bus, so it still gets an idle bus.
+    """
+
+    def __init__(
+            self, chain: Any,
+            budgets: Optional[Dict[int, float]] = None,
+            window_seconds: float = 0.1,
+            default_class: int = TrafficClass.Command,
+        ) -> None:
+        """
+        :chain: SpinChain whose bus is shared
+        :budgets: Share of bus time per traffic class, from 0 to 1.
+            Classes without a budget are never throttled
+        :window_seconds: Period over which budgets are enforced
+        :default_class: Traffic class of untagged traffic
+        """
+        if budgets is None:
+            budgets = DefaultBudgets
+
+        assert window_seconds > 0
+        assert default_class in range(len(TrafficClass.Names))
+        assert TrafficClass.Safety not in budgets
+        assert all(0 < budget <= 1 for budget in budgets.values())
+
+        self._chain: Final          = chain
+        self._model: Final          = WireTimeModel.fromChain(chain)
+        self._budgets: Final        = dict(budgets)
+        self._window: Final         = window_seconds
+        self._default_class: Final  = default_class
+
+        self._condition: Final = threading.Condition(threading.Lock())
+        self._local: Final = threading.local()
+        self._queues: Final[List[Deque[object]]] = \
+            [deque() for _ in TrafficClass.Names]
+
+        self._owner: Optional[int] = None
+        self._granted: Optional[object] = None  # Ticket chosen to go next
+        self._owner_class = default_class
+        self._depth = 0
+        self._acquired_at = 0.0
+
+        # (time, class, charged seconds) of transfers in the current window
+        self._recent: Final[Deque[Tuple[float, int, float]]] = deque()
+        self._window_seconds: Final = [0.0] * len(TrafficClass.Names)
+
+        self._usage: Final = [ClassUsage(name) for name in TrafficClass.Names]
+
+        self._lock: Any = None
+        self._transfer: Optional[Callable[[List[int]], List[int]]] = None
+
+    def attach(self) -> None:
+        """Put the scheduler in charge of the chain's bus
+        Must be called before other threads use the chain
+        """
+        assert self._lock is None, 'Scheduler already attached'
+
+        chain = self._chain
+        self._lock = chain._lock
+        self._transfer = chain._spi_transfer
+
+        chain._lock = self
+        chain._spi_transfer = self._accountTransfer
+
+    def detach(self) -> None:
+        """Give the chain back its own lock"""
+        assert self._lock is not None, 'Scheduler not attached'
+
+        chain = self._chain
+        chain._lock = self._lock
+        chain._spi_transfer = self._transfer
+
+        self._lock = None
+        self._transfer = None
+
+    @contextmanager
+    def traffic(self, traffic_class: int) -> Iterator[None]:
+        """Tag the calling thread's chain traffic with a class
+
+        :traffic_class: TrafficClass of the traffic within the block
+        """
+        assert traffic_class in range(len(TrafficClass.Names))
+
+        stack = self._getClassStack()
+        stack.append(traffic_class)
+
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def getTrafficClass(self) -> int:
+        """Traffic class of the calling thread
+
+        :returns: TrafficClass
+        """
+        stack = self._getClassStack()
+
+        return stack[-1] if stack else self._default_class
+
+    def admit(self, traffic_class: int) -> bool:
+        """Check whether optional traffic should run now instead of waiting
+        Callers that can skip a sample use this to downsample
+
+        :traffic_class: TrafficClass of the traffic
+        :returns: False if the class is throttled or more urgent traffic
+            is waiting
+        """
+        with self._condition:
+            self._expire(time.perf_counter())
+            admitted = not self._isThrottled(traffic_class) \
+                and not self._hasUrgentWaiters(traffic_class)
+
+            if not admitted:
+                self._usage[traffic_class].dropped += 1
+
+        return admitted
+
+    def sampleTelemetry(self, store: Any) -> bool:
+        """Sample a telemetry store unless commands need the bus
+
+        :store: TelemetryStore to sample the chain into
+        :returns: True if the sample was taken, False if dropped
+        """
+        if not self.admit(TrafficClass.Telemetry):
+            return False
+
+        with self.traffic(TrafficClass.Telemetry):
+            store.sample(self._chain)
+
+        return True
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        """Wait for the bus, like RLock.acquire
+
+        :blocking: Wait if the bus cannot be granted right away
+        :timeout: Seconds to wait at most, -1 for no limit
+        :returns: True if the bus was granted
+        """
+        ident = threading.get_ident()
+        start = time.perf_counter()
+
+        with self._condition:
+            if self._owner == ident:
+                self._depth += 1
+                return True
+
+            traffic_class = self.getTrafficClass()
+            ticket = object()
+            queue = self._queues[traffic_class]
+            queue.append(ticket)
+            throttled = False
+
+            while True:
+                now = time.perf_counter()
+                self._expire(now)
+
+                if self._owner is None and self._granted is None:
+                    self._granted = self._selectNext()
+
+                if self._granted is ticket:
+                    break
+
+                if queue[0] is ticket and self._isThrottled(traffic_class):
+                    throttled = True
+
+                remaining = None
+
+                if timeout >= 0:
+                    remaining = start + timeout - now
+
+                if not blocking or (remaining is not None and remaining <= 0):
+                    queue.remove(ticket)
+
+                    if self._granted is ticket:
+                        self._granted = None
+                        self._condition.notify_all()
+
+                    return False
+
+                # A throttled class waits for its usage to leave the window
+                delay = self._window / 10 if throttled else None
+
+                if remaining is not None:
+                    delay = remaining if delay is None \
+                        else min(delay, remaining)
+
+                self._condition.wait(delay)
+
+            queue.popleft()
+            self._granted = None
+
+            usage = self._usage[traffic_class]
+            usage.grants += 1
+            usage.throttled += throttled
+            usage.wait.add(now - start)
+
+            self._owner = ident
+            self._owner_class = traffic_class
+            self._depth = 1
+            self._acquired_at = now
+
+        return True
+
+    def release(self) -> None:
+        """Release the bus, like RLock.release"""
+        with self._condition:
+            assert self._owner == threading.get_ident(), \
+                'Bus released by a thread not holding it'
+
+            self._depth -= 1
+
+            if self._depth:
+                return
+
+            self._usage[self._owner_class].held_seconds += \
+                time.perf_counter() - self._acquired_at
+            self._owner = None
+            # Hand the bus over directly, so a thread releasing and
+            # acquiring again in a loop cannot starve the waiters
+            self._granted = self._selectNext()
+            self._condition.notify_all()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *args: Any) -> None:
+        self.release()
+
+    def getUsage(self) -> Dict[str, Dict[str, Any]]:
+        """Bus time actually used by each traffic class
+
+        :returns: Counters, modelled wire, charged bus and held seconds,
+            share of total bus time and wait summary, by class name
+        """
+        with self._condition:
+            total = sum(usage.bus_seconds for usage in self._usage) or 1.0
+
+            return {
+                usage.name: {
+                    'grants': usage.grants,
+                    'frames': usage.frames,
+                    'wire_seconds': usage.wire_seconds,
+                    'bus_seconds': usage.bus_seconds,
+                    'held_seconds': usage.held_seconds,
+                    'share': usage.bus_seconds / total,
+                    'throttled': usage.throttled,
+                    'dropped': usage.dropped,
+                    'wait': usage.wait.getSummary(),
+                }
+                for usage in self._usage
+            }
+
+    def _accountTransfer(self, buffer: List[int]) -> List[int]:
+        """Transfer a frame, charging its wire time to the bus owner"""
+        assert self._transfer is not None
+
+        start = time.perf_counter()
+        response = self._transfer(buffer)
+        end = time.perf_counter()
+        wire_seconds = self._model.getFrameSeconds()
+        seconds = max(wire_seconds, end - start)
+
+        with self._condition:
+            if self._owner == threading.get_ident():
+                traffic_class = self._owner_class
+            else:
+                traffic_class = self.getTrafficClass()
+
+            usage = self._usage[traffic_class]
+            usage.frames += 1
+            usage.wire_seconds += wire_seconds
+            usage.bus_seconds += seconds
+
+            self._recent.append((end, traffic_class, seconds))
+            self._window_seconds[traffic_class] += seconds
+
+        return response
+
+    def _getClassStack(self) -> List[int]:
+        """Traffic classes set by traffic() in the calling thread"""
+        stack = getattr(self._local, 'stack', None)
+
+        if stack is None:
+            stack = self._local.stack = []
+
+        return stack
+
+    def _expire(self, now: float) -> None:
+        """Drop transfers older than the window from the budget sums"""
+        recent = self._recent
+
+        while recent and recent[0][0] < now - self._window:
+            _, traffic_class, seconds = recent.popleft()
+            self._window_seconds[traffic_class] -= seconds
+
+    def _selectNext(self) -> Optional[object]:
+        """Choose the waiter of the most urgent class not throttled"""
+        for traffic_class, queue in enumerate(self._queues):
+            if queue and not self._isThrottled(traffic_class):
+                return queue[0]
+
+        return None
+
+    def _hasUrgentWaiters(self, traffic_class: int) -> bool:
+        """Check whether a more urgent class is waiting for the bus"""
+        return any(self._queues[c] for c in range(traffic_class))
+
+    def _isThrottled(self, traffic_class: int) -> bool:
+        """Check whether a class used up its budget under contention"""
+        budget = self._budgets.get(traffic_class)
+
+        if budget is None:
+            return False
+
+        contended = self._hasUrgentWaiters(traffic_class) or any(
+            self._window_seconds[c] > 0 for c in range(traffic_class)
+        )
+
+        return contended \
+            and self._window_seconds[traffic_class] >= budget * self._window
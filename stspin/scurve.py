@@ -0,0 +1,359 @@
+import math
+import time
+
+from array import array
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Constant,
+    Register,
+    Status,
+)
+from .frames import (
+    encodeRun,
+    toFrames,
+)
+from .stats import LatencyStats
+
+# Registers read to compare achieved against planned speed
+CheckRegisters: Final = [Register.Status, Register.Speed]
+
+
+class SCurveSegment:
+    """Jerk-limited speed profile of a single move
+    Speeds are full steps/s, times in seconds from the start.
+    Acceleration ramps up and down at the jerk limit, so the profile has
+    up to seven phases, symmetric between acceleration and deceleration
+    """
+
+    def __init__(
+            self, distance: float,
+            max_speed: float,
+            acceleration: float,
+            jerk: float,
+        ) -> None:
+        """
+        :distance: Signed distance in full steps
+        :max_speed: Speed limit in full steps/s
+        :acceleration: Acceleration limit in full steps/s^2
+        :jerk: Jerk limit in full steps/s^3
+        """
+        assert max_speed > 0
+        assert max_speed <= Constant.MaxStepsPerSecond
+        assert acceleration > 0
+        assert jerk > 0
+
+        self.direction: Final = -1 if distance < 0 else 1
+        self.distance: Final = abs(distance)
+        self.acceleration: Final = acceleration
+        self.jerk: Final = jerk
+
+        if 2 * self._getRampDistance(max_speed) <= self.distance:
+            peak = max_speed
+        else:
+            # Bisect the peak speed whose two ramps cover the distance
+            low, high = 0.0, max_speed
+
+            for _ in range(60):
+                peak = (low + high) / 2
+
+                if 2 * self._getRampDistance(peak) > self.distance:
+                    high = peak
+                else:
+                    low = peak
+
+            peak = low
+
+        self.peak_speed: Final = peak
+        self.jerk_seconds, self.ramp_seconds = self._getRampTimes(peak)
+
+        cruise_distance = self.distance - 2 * self._getRampDistance(peak)
+        self.cruise_seconds: Final = \
+            max(0.0, cruise_distance) / peak if peak else 0.0
+
+        self.duration: Final = 2 * self.ramp_seconds + self.cruise_seconds
+
+    def _getRampTimes(self, speed: float) -> Tuple[float, float]:
+        """Times of a ramp from standstill to a speed
+
+        :speed: Speed reached at the end of the ramp
+        :returns: Seconds spent at the jerk limit per half, and whole ramp
+        """
+        if speed * self.jerk >= self.acceleration ** 2:
+            jerk_seconds = self.acceleration / self.jerk
+
+            return jerk_seconds, speed / self.acceleration + jerk_seconds
+
+        jerk_seconds = math.sqrt(speed / self.jerk)
+
+        return jerk_seconds, 2 * jerk_seconds
+
+    def _getRampDistance(self, speed: float) -> float:
+        """Distance of a ramp from standstill to a speed
+        The ramp is point symmetric, so it averages half the speed
+        """
+        return speed * self._getRampTimes(speed)[1] / 2
+
+    def _getRampSpeed(self, seconds: float) -> float:
+        """Speed after some time on the ramp from standstill"""
+        jerk_seconds = self.jerk_seconds
+
+        if seconds < jerk_seconds:
+            return self.jerk * seconds ** 2 / 2
+
+        remaining = self.ramp_seconds - seconds
+
+        if remaining < jerk_seconds:
+            return self.peak_speed - self.jerk * remaining ** 2 / 2
+
+        peak_acceleration = self.jerk * jerk_seconds
+
+        return self.jerk * jerk_seconds ** 2 / 2 \
+            + peak_acceleration * (seconds - jerk_seconds)
+
+    def getSpeedAt(self, seconds: float) -> float:
+        """Planned speed after some time
+
+        :seconds: Time since the move started
+        :returns: Signed speed in full steps/s
+        """
+        if seconds <= 0 or seconds >= self.duration:
+            return 0.0
+
+        if seconds < self.ramp_seconds:
+            speed = self._getRampSpeed(seconds)
+        elif seconds < self.ramp_seconds + self.cruise_seconds:
+            speed = self.peak_speed
+        else:
+            speed = self._getRampSpeed(self.duration - seconds)
+
+        return self.direction * speed
+
+
+class SpeedTable:
+    """Precomputed Run speeds of several axes at a fixed update rate
+    Speeds are held as signed Speed register values in one flat array,
+    all axes of a tick next to each other
+    """
+
+    def __init__(self, axes: int, rate_hz: float, speeds: array) -> None:
+        """
+        :axes: Number of axes
+        :rate_hz: Updates per second
+        :speeds: Signed Speed register values, tick-major
+        """
+        assert axes > 0
+        assert rate_hz > 0
+        assert len(speeds) % axes == 0
+
+        self.axes: Final = axes
+        self.rate_hz: Final = rate_hz
+        self.speeds: Final = speeds
+        self.ticks: Final = len(speeds) // axes
+
+    @classmethod
+    def fromSegments(
+            cls, segments: Sequence[Optional[SCurveSegment]],
+            rate_hz: float,
+        ) -> 'SpeedTable':
+        """Sample the profiles of several axes
+        Each tick holds the mean speed over its interval, taken at its
+        midpoint, so the commanded speeds integrate to the move distance.
+        The last tick of every axis is 0
+
+        :segments: Profile of each axis, None for an axis that stays still
+        :rate_hz: Updates per second
+        :returns: Speed table
+        """
+        assert segments
+
+        duration = max(
+            [segment.duration for segment in segments if segment] + [0.0]
+        )
+        ticks = math.ceil(duration * rate_hz) + 1
+        speeds = array('i', bytes(4 * ticks * len(segments)))
+
+        for axis, segment in enumerate(segments):
+            if segment is None:
+                continue
+
+            for tick in range(ticks):
+                speed = segment.getSpeedAt((tick + 0.5) / rate_hz)
+                speeds[tick * len(segments) + axis] = \
+                    int(speed * Constant.SpsToSpeed)
+
+        return cls(len(segments), rate_hz, speeds)
+
+    def getSpeed(self, tick: int, axis: int) -> float:
+        """Planned speed of an axis during a tick
+
+        :tick: Tick index
+        :axis: Axis index
+        :returns: Signed speed in full steps/s
+        """
+        return self.speeds[tick * self.axes + axis] / Constant.SpsToSpeed
+
+    def getSeconds(self) -> float:
+        """Time needed to stream the whole table
+
+        :returns: Duration in seconds
+        """
+        return self.ticks / self.rate_hz
+
+
+class SCurveStreamer:
+    """Stream a speed table to a chain with one Run frame set per tick
+
+    Frames are compiled up front; ticks where no axis changes speed are
+    not sent. Every check_every ticks Status and Speed of all devices
+    are read in one frame set and compared with the planned speeds.
+    The devices' own Acc and Dec limit how closely Speed follows the
+    table, so they should be set at or above the profile's acceleration
+    """
+
+    def __init__(
+            self, chain: Any,
+            table: SpeedTable,
+            positions: Optional[Sequence[int]] = None,
+            check_every: int = 0,
+        ) -> None:
+        """
+        :chain: SpinChain to drive
+        :table: Speeds to stream
+        :positions: Chain position of each axis, defaults to 0..axes-1
+        :check_every: Read back Speed every that many ticks, 0 to never
+        """
+        if positions is None:
+            positions = range(table.axes)
+
+        positions = list(positions)
+
+        assert len(positions) == table.axes
+        assert check_every >= 0
+
+        self._chain: Final = chain
+        self._table: Final = table
+        self._positions: Final = positions
+        self._check_every: Final = check_every
+
+        # Precompiled transfers per tick, shared while speeds are unchanged
+        self._frames: Final[List[List[List[int]]]] = []
+        self._changed: Final = bytearray(table.ticks)
+        self._compile()
+
+        self.sent_ticks = 0
+        self.late_ticks = 0
+        self.checks = 0
+        self.speed_error: Final = LatencyStats()  # Absolute, full steps/s
+        self.max_error: Final = [0.0] * table.axes
+        self.tick_latency: Final = LatencyStats()
+
+    def _compile(self) -> None:
+        """Turn the table into per-tick transfers"""
+        table = self._table
+        total_devices = self._chain._total_devices
+        previous = None
+
+        for tick in range(table.ticks):
+            start = tick * table.axes
+            speeds = table.speeds[start:start + table.axes]
+
+            if speeds == previous:
+                self._frames.append(self._frames[-1])
+                continue
+
+            previous = speeds
+            lines = [None] * total_devices
+
+            for axis, position in enumerate(self._positions):
+                lines[position] = encodeRun(table.getSpeed(tick, axis))
+
+            self._frames.append(toFrames(lines))
+            self._changed[tick] = 1
+
+    def _check(self, tick: int) -> None:
+        """Compare achieved against planned speed of every axis"""
+        values = self._chain.allGetRegisters(CheckRegisters)
+        self.checks += 1
+
+        for axis, position in enumerate(self._positions):
+            value = values[position]
+            achieved = value[Register.Speed] / Constant.SpsToSpeed
+
+            if not value[Register.Status] & Status.Dir:
+                achieved = -achieved
+
+            error = abs(achieved - self._table.getSpeed(tick, axis))
+            self.speed_error.add(error)
+            self.max_error[axis] = max(self.max_error[axis], error)
+
+    def stream(self) -> None:
+        """Send the whole table at its rate, blocking until done
+        Overdue ticks are dropped so the profile keeps its timing;
+        the final stop tick is never dropped
+        """
+        chain = self._chain
+        ticks = self._table.ticks
+        period = 1 / self._table.rate_hz
+        start = time.perf_counter()
+        tick = 0
+        pending = False
+
+        while tick < ticks:
+            due = start + tick * period
+            now = time.perf_counter()
+
+            if due > now:
+                time.sleep(due - now)
+
+            if self._changed[tick] or pending:
+                with chain._lock:
+                    for frame in self._frames[tick]:
+                        chain._pllwrite(frame)
+
+                self.sent_ticks += 1
+
+            if self._check_every and tick % self._check_every == 0:
+                self._check(tick)
+
+            now = time.perf_counter()
+            self.tick_latency.add(now - due)
+
+            due_tick = int((now - start) / period)
+            skipped = range(tick + 1, min(due_tick, ticks - 1))
+            self.late_ticks += len(skipped)
+            # A speed change in a dropped tick is carried by the next one
+            pending = any(self._changed[t] for t in skipped)
+            tick += 1 + len(skipped)
+
+        memory = chain._memory
+
+        if memory is not None:
+            # Run state was changed behind the command memory
+            for position in self._positions:
+                memory.forget(position)
+
+    def getReport(self) -> Dict[str, Any]:
+        """Summarize streaming and speed tracking
+
+        :returns: Counters, tick lateness and speed error summaries
+        """
+        return {
+            'ticks': self._table.ticks,
+            'sent_ticks': self.sent_ticks,
+            'late_ticks': self.late_ticks,
+            'checks': self.checks,
+            'max_error': list(self.max_error),
+            'speed_error': self.speed_error.getSummary(),
+            'tick_latency': self.tick_latency.getSummary(),
+        }
@@ -0,0 +1,249 @@
+import os
+import struct
+import tempfile
+import time
+
+from typing import (
+    Dict,
+    List,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Constant,
+    Register,
+    Status,
+)
+from .families import FamilyCodec, VolatileRegisters
+
+Magic: Final = b'STSPSNAP'
+Version: Final = 1
+
+# Magic, version, total devices, register count, wall clock time
+_Header: Final = struct.Struct('<8sHHHd')
+
+# Volatile registers a snapshot still needs: Status for resets and the
+# direction, PosAbs for the position check
+_CheckRegisters: Final = (Register.PosAbs, Register.Status)
+
+
+class SnapshotError(Exception):
+    """Devices no longer match a snapshot, or the snapshot is unreadable"""
+
+
+class ChainSnapshot:
+    """Register contents and in-process state of every device in a chain"""
+
+    def __init__(
+            self, registers: Sequence[int],
+            values: List[Dict[int, int]],
+            directions: List[int],
+            timestamp: float = 0.0,
+        ) -> None:
+        """
+        :registers: Registers held by the snapshot
+        :values: Register values of each device, indexed by position
+        :directions: Last commanded direction of each device
+        :timestamp: Wall clock time the snapshot was taken
+        """
+        assert len(values) == len(directions)
+
+        self.registers: Final   = list(registers)
+        self.values: Final      = values
+        self.directions: Final  = directions
+        self.timestamp: Final   = timestamp or time.time()
+
+    def toBytes(self) -> bytes:
+        """Serialize to the versioned snapshot format
+
+        :returns: Snapshot file contents
+        """
+        data = [
+            _Header.pack(
+                Magic, Version,
+                len(self.values), len(self.registers),
+                self.timestamp,
+            ),
+            bytes(self.registers),
+        ]
+
+        record = struct.Struct(f'<B{len(self.registers)}I')
+
+        for direction, values in zip(self.directions, self.values):
+            # Registers missing from a device's family are stored as 0
+            data.append(record.pack(
+                direction,
+                *[values.get(register, 0) for register in self.registers]
+            ))
+
+        return b''.join(data)
+
+    @classmethod
+    def fromBytes(cls, data: bytes) -> 'ChainSnapshot':
+        """Deserialize the versioned snapshot format
+
+        :data: Snapshot file contents
+        :returns: Snapshot
+        :raises SnapshotError: Not a snapshot, another version or truncated
+        """
+        if len(data) < _Header.size:
+            raise SnapshotError('Truncated snapshot header')
+
+        magic, version, total_devices, register_count, timestamp = \
+            _Header.unpack_from(data)
+
+        if magic != Magic:
+            raise SnapshotError('Not a chain snapshot')
+
+        if version != Version:
+            raise SnapshotError(f'Unsupported snapshot version {version}')
+
+        record = struct.Struct(f'<B{register_count}I')
+        size = _Header.size + register_count + total_devices * record.size
+
+        if len(data) < size:
+            raise SnapshotError(
+                f'Truncated snapshot, {len(data)} of {size} bytes'
+            )
+
+        offset = _Header.size
+        registers = list(data[offset:offset + register_count])
+        offset += register_count
+        values = []
+        directions = []
+
+        for _ in range(total_devices):
+            direction, *register_values = record.unpack_from(data, offset)
+            offset += record.size
+
+            directions.append(direction)
+            values.append(dict(zip(registers, register_values)))
+
+        return cls(registers, values, directions, timestamp)
+
+    def save(self, path: str) -> None:
+        """Write the snapshot to a file
+        A temporary file in the same directory is written and synced, then
+        renamed over the path, so a crash or power loss leaves either the
+        previous snapshot or the new one
+
+        :path: File to write
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temporary = tempfile.mkstemp(
+            dir=directory, prefix='.snapshot-',
+        )
+
+        try:
+            with os.fdopen(descriptor, 'wb') as snapshot_file:
+                snapshot_file.write(self.toBytes())
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        # Make the rename itself durable
+        directory_descriptor = os.open(directory, os.O_RDONLY)
+
+        try:
+            os.fsync(directory_descriptor)
+        finally:
+            os.close(directory_descriptor)
+
+    @classmethod
+    def load(cls, path: str) -> 'ChainSnapshot':
+        """Read a snapshot from a file
+
+        :path: File to read
+        :returns: Snapshot
+        :raises SnapshotError: Not a snapshot, another version or truncated
+        """
+        with open(path, 'rb') as snapshot_file:
+            return cls.fromBytes(snapshot_file.read())
+
+    def compare(
+            self, current: List[Dict[int, int]],
+            check_position: bool = True,
+        ) -> List[str]:
+        """Compare freshly read registers against the snapshot
+        A device whose undervoltage flag is latched was reset or lost
+        power since its flags were last cleared, which snapshot() does.
+        The flag is bit 9 of Status in every family
+
+        :current: Register values of each device, indexed by position
+        :check_position: Also require PosAbs to be unchanged
+        :returns: Description of every mismatch, empty if none
+        """
+        if len(current) != len(self.values):
+            return [
+                f'chain has {len(current)} devices, '
+                f'snapshot has {len(self.values)}'
+            ]
+
+        problems = []
+
+        for position, (saved, values) in enumerate(zip(self.values, current)):
+            status = values.get(Register.Status)
+
+            if status is None or 0xFFFF == status:
+                problems.append(f'device {position}: no response')
+                continue
+
+            if not status & Status.NotUndervoltage:
+                problems.append(
+                    f'device {position}: reset or undervoltage since the '
+                    'snapshot'
+                )
+                continue
+
+            for register in self.registers:
+                if register in VolatileRegisters and not (
+                        check_position and Register.PosAbs == register):
+                    continue
+
+                if register not in values:
+                    # Not in this device's family
+                    continue
+
+                if saved[register] != values[register]:
+                    problems.append(
+                        f'device {position}: register 0x{register:02X} '
+                        f'is 0x{values[register]:X}, '
+                        f'was 0x{saved[register]:X}'
+                    )
+
+        return problems
+
+
+def getSnapshotRegisters(codecs: Sequence[FamilyCodec]) -> List[int]:
+    """Registers to snapshot for a chain: the configuration registers
+    of every device family in it, plus Status and PosAbs. A device is only
+    asked for those of its own family
+
+    :codecs: Register codec of each position
+    :returns: Canonical register ids, sorted
+    """
+    registers = set(_CheckRegisters)
+
+    for codec in codecs:
+        registers.update(
+            register for register in codec.family.registers
+            if register not in VolatileRegisters
+        )
+
+    return sorted(registers)
+
+
+def getDirection(status: int) -> int:
+    """Direction reported by a Status register value
+
+    :status: Status register value
+    :returns: Constant.DirForward or Constant.DirReverse
+    """
+    return Constant.DirForward if status & Status.Dir else Constant.DirReverse
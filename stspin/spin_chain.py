@@ -5,16 +5,40 @@ from .constants import (
     Status,
 )
 from stspin.utility import toByteArray, toByteArrayWithLength, toInt, toPlusAndDir, toSignedInt, transpose
+from stspin.edges import EdgeLine, EdgeSource
+from stspin.elision import CommandMemory
+from stspin.families import DeviceFamily, L6470, getCodec
+from stspin.fields import FieldEditor, Fields
+from stspin.frames import (
+    DeviceLine,
+    encodeGoTo,
+    encodeGoToDir,
+    encodeGoUntil,
+    encodeMove,
+    encodeReleaseSw,
+    encodeRun,
+    encodeStepClock,
+    fromFrames,
+    toFrames,
+)
+from stspin.piggyback import DefaultRegisters, PiggybackReader
+from stspin.snapshot import ChainSnapshot, SnapshotError, getDirection, getSnapshotRegisters
+from stspin.triggers import PositionTrigger, TriggerCallback, TriggerScheduler
 from typing import (
     Callable,
+    Dict,
     List,
     Optional,
+    Sequence,
     Tuple,
+    Union,
 )
 from typing_extensions import (
     Final,
 )
 from itertools import zip_longest
+import threading
+import time
 
 from stspin.spin_device import SpinDevice
 
@@ -27,6 +51,9 @@ class SpinChain:
             spi_transfer: Optional[
                 Callable[[List[int]], List[int]]
             ] = None,
+            spi_speed_hz: int = Constant.SpiSpeedHz,
+            families: Optional[Sequence[DeviceFamily]] = None,
+            edge_source: Optional[EdgeSource] = None,
         ) -> None:
         """
         if different from hardware SPI CS pin
@@ -37,13 +64,44 @@ class SpinChain:
             It should write a list of bytes as ints with MSB first,
             while correctly latching using the chip select pins
             Then return an equal-length list of bytes as ints from MISO
+        :spi_speed_hz: SPI clock frequency used with spi_select
+        :families: Device family of each position, all L6470 if None.
+            Registers are addressed by canonical id and translated
+            for each position's family
+        :edge_source: BUSY and FLAG lines of the chain. Waits block on
+            their edges instead of polling Status over SPI if given
 
         """
         assert total_devices > 0
+        assert families is None or len(families) == total_devices
         assert (spi_select is None) != (spi_transfer is None), \
             'Either supply a SPI transfer function or use spidev\'s'
 
         self._total_devices: Final = total_devices
+        self._spi_speed_hz: Final = spi_speed_hz
+        self._edge_source: Final = edge_source
+        self._codecs: Final = [
+            getCodec(family)
+            for family in (families or [L6470] * total_devices)
+        ]
+        # Held for whole frame sets, so multi-byte commands stay intact
+        # when several threads share the chain. A BusScheduler may
+        # replace it to share the bus between traffic classes
+        self._lock = threading.RLock()
+        # Register bitfields of every device, e.g. fields.StepMode.step_sel
+        self.fields: Final = Fields(
+            FieldEditor(dict(enumerate(self._codecs)), self._sendLines),
+            range(total_devices),
+            single=False,
+        )
+        # Last command state per device, when redundant commands are elided
+        self._memory: Optional[CommandMemory] = None
+        # Register reads filling idle positions, when piggybacking
+        self._piggyback: Optional[PiggybackReader] = None
+        # Background position-crossing triggers, once enabled
+        self._triggers: Optional[TriggerScheduler] = None
+        # Devices handed out by create(), so their state can be restored
+        self._devices: Final[Dict[int, SpinDevice]] = {}
         self.commands = [Command.Nop] * self._total_devices
         self.datasize = [0] * self._total_devices
 
@@ -61,7 +119,7 @@ class SpinChain:
             self._spi.mode = 3
             # Device expects MSB to be sent first
             self._spi.lsbfirst = False
-            self._spi.max_speed_hz = 5000000
+            self._spi.max_speed_hz = spi_speed_hz
             # CS pin is active low
             self._spi.cshigh = False
 
@@ -91,11 +149,16 @@ class SpinChain:
         assert position >= 0
         assert position < self._total_devices
 
-        return SpinDevice(
+        device = SpinDevice(
             position,
             self._total_devices,
             self._spi_transfer,
+            self._exchange,
+            self._codecs[position],
         )
+        self._devices[position] = device
+
+        return device
         
     def _resetCommands(self):
         """
@@ -109,24 +172,10 @@ class SpinChain:
         self.datasize = [0] * self._total_devices
 
     def _completeCommands(self,data):
+        """Pad per-device commands with NOPs and split them into transfers
         """
-        """
-        maxlen = 1
-
-        for cmd in data:
-            if not(isinstance(cmd,int)):
-                maxlen = max(len(cmd), maxlen)
-        if maxlen >1:
-            for i in range (self._total_devices):
-                if (isinstance(data[i],int)):
-                    n = maxlen - 1
-                else:
-                    n = maxlen - len(data[i])
-                if n > 0:
-                    data[i].append([0x00] * n)
-           
-        return transpose(data)       
-                               
+        return toFrames(data)
+
     def addCommand(self, data) -> None:
         """
         """
@@ -151,6 +200,14 @@ class SpinChain:
 
         return self._spi_transfer(data)
     
+    def _transferFrames(self, frames: List[List[int]]) -> List[List[int]]:
+        """Send a frame set, the caller holding the lock
+
+        :frames: Transfers, each holding one byte per position
+        :returns: MISO bytes of each transfer
+        """
+        return [self._pllwrite(frame) for frame in frames]
+
     def _getResponses(self,data,datalenght):
         """
         """
@@ -166,115 +223,436 @@ class SpinChain:
                 
         return response
                             
-    def runCommands(self, data:List[List[int]]):
+    def _exchange(self, lines: List[DeviceLine]) -> List[List[int]]:
+        """Send per-device commands to the whole chain as one frame set
+
+        :lines: Bytes for each position in the chain, None for NOP.
+            Missing trailing positions receive NOPs
+        :return: Response bytes for each position, one per transfer
+        """
+        assert len(lines) <= self._total_devices
+
+        lines = list(lines) + [None] * (self._total_devices - len(lines))
+
+        with self._lock:
+            memory = self._memory
+
+            if memory is not None:
+                frames = self._completeCommands(lines)
+                lines = memory.filter(lines)
+
+                if all(line is None for line in lines):
+                    # Nothing would change, the responses are all NOPs
+                    return fromFrames(
+                        [[Command.Nop] * self._total_devices for _ in frames]
+                    )
+
+            piggyback = self._piggyback
+            filled: Dict[int, List[int]] = {}
+
+            if piggyback is not None:
+                lines, filled = piggyback.fill(lines)
+
+            responses = self._transferFrames(self._completeCommands(lines))
+            result = fromFrames(responses)
+
+            if memory is not None:
+                memory.observe(lines, result)
+
+            if filled:
+                piggyback.collect(filled, result)
+
+                # Callers sent NOPs there, so they get NOP responses
+                for position in filled:
+                    result[position] = [Command.Nop] * len(result[position])
+
+        return result
+
+    def _sendLines(self, lines: Dict[int, List[int]]) -> Dict[int, List[int]]:
+        """Send per-device commands given by position as one frame set
+
+        :lines: Bytes by position, other positions receive NOPs
+        :return: Response bytes by position
+        """
+        responses = self._exchange(
+            [lines.get(position) for position in range(self._total_devices)]
+        )
+
+        return dict(enumerate(responses))
+
+    def setElision(self, enabled: bool) -> Optional[CommandMemory]:
+        """Drop commands that would not change anything on a device
+        Applies to chain-wide commands and to every device of the chain.
+        A repeated Run with the same speed and direction, or a write of
+        the value a register already holds, is not sent. Status reads
+        showing a stop, stall or switch event clear the remembered Run
+
+        :enabled: True to remember command state, False to forget it
+        :returns: The command memory with its counters, None if disabled
+        """
+        with self._lock:
+            self._memory = CommandMemory(self._total_devices, self._codecs) \
+                if enabled else None
+
+        return self._memory
+
+    def setPiggyback(
+            self, enabled: bool,
+            registers: Sequence[int] = DefaultRegisters,
+        ) -> Optional[PiggybackReader]:
+        """Read registers of idle devices while others are commanded
+        Positions receiving only NOPs in a frame set get register reads
+        that fit in it instead, rotating through the registers. The values
+        are cached with their time, at no extra bus time
+
+        :enabled: True to fill idle positions, False to send NOPs
+        :registers: Canonical register ids to read in rotation
+        :returns: The reader holding the latest values, None if disabled
+        """
+        with self._lock:
+            self._piggyback = PiggybackReader(self._codecs, registers) \
+                if enabled else None
+
+        return self._piggyback
+
+    def setTriggers(
+            self, enabled: bool,
+            window_seconds: float = 0.005,
+            poll_seconds: float = 0.0005,
+            max_sleep_seconds: float = 0.1,
+        ) -> Optional[TriggerScheduler]:
+        """Watch axes for position crossings in a background thread
+        Positions are read occasionally to predict the soonest crossing,
+        and densely only shortly before it. Disabling stops the thread
+        and drops pending triggers
+
+        :enabled: True to start watching, False to stop
+        :window_seconds: Time before a predicted crossing when dense
+            polling starts
+        :poll_seconds: Time between reads while polling densely
+        :max_sleep_seconds: Longest time a watched axis goes unread
+        :returns: The scheduler, for its report, None if disabled
+        """
+        if self._triggers is not None:
+            self._triggers.stop()
+            self._triggers = None
+
+        if enabled:
+            self._triggers = TriggerScheduler(
+                self, window_seconds, poll_seconds, max_sleep_seconds,
+            )
+            self._triggers.start()
+
+        return self._triggers
+
+    def addTrigger(
+            self, position: int,
+            threshold: int,
+            action: Union[TriggerCallback, Sequence[DeviceLine]],
+            direction: Optional[int] = None,
+        ) -> PositionTrigger:
+        """Run an action once an axis passes a position, e.g. set Mark
+        or start another axis. Triggers are enabled with default timing
+        if they were not
+
+        :position: Device position in chain of the watched axis
+        :threshold: Absolute (micro)step position to pass
+        :action: Callback called with the position and the value read,
+            or bytes for each position to send as one frame set
+        :direction: Constant.DirForward or DirReverse to only fire when
+            passing that way, None for either
+        :returns: Trigger, whose fired event is set once the action ran
+        """
+        triggers = self._triggers or self.setTriggers(True)
+
+        return triggers.addTrigger(position, threshold, action, direction)
+
+    def runCommands(self, data:List[DeviceLine]):
         """Write some bytes to all devices
         :data: List containing list of byte indexed by postiton in the chain
-            MSB coming first.
+            MSB coming first. A single command byte or None (NOP)
+            may be given in place of a list
         :return: List of responses, MSB first
         """        
         
-        data_byte =[]
-        responses = []
-
-        datat = self._completeCommands(data)
-        
-        if len(datat[0]) != self._total_devices:
-            pass
-
-        for data_byte in datat:
-            responses.append(self._pllwrite(data_byte))
-        
-        size = self.datasize
-        self._resetCommands()
-        rdata=self._getResponses(transpose(responses),size)
+        with self._lock:
+            size = self.datasize
+            self._resetCommands()
+            rdata=self._getResponses(self._exchange(data),size)
         
         return rdata
     
-    def allSoftStop(self):
+    def _selectCommand(
+            self, command: int,
+            selected: Optional[Sequence[bool]],
+        ) -> None:
+        """Send a command without payload to some devices in one frame set
+
+        :command: Command byte
+        :selected: Whether each position receives the command,
+            None for every device
         """
+        if selected is None:
+            selected = [True] * self._total_devices
+
+        self._exchange([command if s else None for s in selected])
+
+    def _setDirections(self, directions: Sequence[Optional[int]]) -> None:
+        """Record the commanded direction of the devices created from
+        this chain, like their own motion commands do
+
+        :directions: Direction of each position, None if unchanged
         """
-        command = [Command.StopSoft] * self._total_devices
-        
-        self.runCommands(command)
-        
-    def allHardStop(self):
+        for position, direction in enumerate(directions):
+            device = self._devices.get(position)
+
+            if device is not None and direction is not None:
+                device._direction = direction
+
+    def allSoftStop(self, selected: Optional[Sequence[bool]] = None):
+        """Stop motors, maintain holding current
+
+        :selected: Whether each position is stopped, None for every device
         """
+        self._selectCommand(Command.StopSoft, selected)
+
+    def allHardStop(self, selected: Optional[Sequence[bool]] = None):
+        """Stop motors abruptly, maintain holding current
+
+        :selected: Whether each position is stopped, None for every device
         """
-        command = [Command.StopHard] * self._total_devices
-        
-        self.runCommands(command)
+        self._selectCommand(Command.StopHard, selected)
 
-    def allHiZSoft(self):
+    def allHiZSoft(self, selected: Optional[Sequence[bool]] = None):
+        """Stop motors, release holding current
+
+        :selected: Whether each position is stopped, None for every device
         """
+        self._selectCommand(Command.HiZSoft, selected)
+
+    def allHiZHard(self, selected: Optional[Sequence[bool]] = None):
+        """Stop motors abruptly, release holding current
+
+        :selected: Whether each position is stopped, None for every device
         """
-        command = [Command.HiZSoft] * self._total_devices
-        
-        self.runCommands(command)
-        
-    def allHiZHard(self):
+        self._selectCommand(Command.HiZHard, selected)
+
+    def allMove(self, steps: Sequence[Optional[int]]) -> None:
+        """Move every motor by its own number of steps in one frame set
+
+        :steps: Signed (micro)steps for each position, None for NOP
         """
+        self._exchange([
+            None if s is None else encodeMove(s) for s in steps
+        ])
+        self._setDirections([
+            None if s is None else toPlusAndDir(s)[0] for s in steps
+        ])
+
+    def allGoTo(self, positions: Sequence[Optional[int]]) -> None:
+        """Go to absolute positions using the shortest way
+
+        :positions: Absolute (micro)steps for each position, None for NOP
         """
-        command = [Command.HiZHard] * self._total_devices
-        
-        self.runCommands(command)
-        
-    def allGetRegister(self, register: int) -> int:
-        """Fetches a register's contents and returns the current value
+        self._exchange([
+            None if p is None else encodeGoTo(p) for p in positions
+        ])
+
+    def allGoToDir(
+            self, targets: Sequence[Optional[Tuple[int, int]]],
+        ) -> None:
+        """Go to absolute positions in forced directions
 
-        :register: Register location to be accessed
-        :returns: Value of specified register
+        :targets: (direction, absolute (micro)steps) for each position,
+            None for NOP
         """
-        command = []
-        RegisterSize = Register.getSize(register)
-        self.datasize = [RegisterSize] * self._total_devices
-        
-        command.append(Command.ParamGet | register)
-        i=0
-        for i in range(RegisterSize):
-            command.append(Command.Nop)
-        commands = [command] *self._total_devices
+        self._exchange([
+            None if t is None else encodeGoToDir(*t) for t in targets
+        ])
+        self._setDirections([None if t is None else t[0] for t in targets])
 
-        response=self.runCommands(commands)
-        
-        return response
+    def allGoUntil(
+            self, speeds: Sequence[Optional[float]],
+            action: int = Constant.ActResetPos,
+        ) -> None:
+        """Run at the given speeds until each device's switch closes
 
-    def allSetRegister(self, register : int, values: List[int]) -> None:
+        :speeds: Full steps per second for each position, None for NOP
+        :action: Constant.ActResetPos or Constant.ActSetMark
         """
+        self._exchange([
+            None if s is None else encodeGoUntil(action, s) for s in speeds
+        ])
+        self._setDirections([
+            None if s is None else toPlusAndDir(s)[0] for s in speeds
+        ])
+
+    def allReleaseSw(
+            self, directions: Sequence[Optional[int]],
+            action: int = Constant.ActResetPos,
+        ) -> None:
+        """Move at minimum speed until each device's switch opens
+
+        :directions: Direction for each position, None for NOP
+        :action: Constant.ActResetPos or Constant.ActSetMark
         """
-        set_command = []
-        RegisterSize = Register.getSize(register)
-        cmd = Command.ParamSet | register
+        self._exchange([
+            None if d is None else encodeReleaseSw(action, d)
+            for d in directions
+        ])
+        self._setDirections(directions)
 
-        for v in values:
-            cmdline = []
-            tobytes = toByteArrayWithLength(v, RegisterSize)
-            cmdline.append(cmd)
+    def allStepClock(self, directions: Sequence[Optional[int]]) -> None:
+        """Switch devices to step-clock mode
 
-            for i in range(RegisterSize):
-                cmdline.append(tobytes[i])
-            set_command.append(cmdline)
+        :directions: Direction for each position, None for NOP
+        """
+        self._exchange([
+            None if d is None else encodeStepClock(d) for d in directions
+        ])
+        self._setDirections(directions)
 
-        self.runCommands(set_command)
-        
-    def allGetPosition(self):
+    def allGoHome(self, selected: Optional[Sequence[bool]] = None) -> None:
+        """Go to position 0 using the shortest way
+
+        :selected: Whether each position moves, None for every device
         """
+        self._selectCommand(Command.GoHome, selected)
+
+    def allGoMark(self, selected: Optional[Sequence[bool]] = None) -> None:
+        """Go to the Mark position using the shortest way
+
+        :selected: Whether each position moves, None for every device
+        """
+        self._selectCommand(Command.GoMark, selected)
+
+    def allResetPos(self, selected: Optional[Sequence[bool]] = None) -> None:
+        """Clear the absolute position
+
+        :selected: Whether each position is reset, None for every device
+        """
+        self._selectCommand(Command.ResetPos, selected)
+
+    def allResetDevice(
+            self, selected: Optional[Sequence[bool]] = None,
+        ) -> None:
+        """Reset devices to their power-up state
+
+        :selected: Whether each position is reset, None for every device
+        """
+        self._selectCommand(Command.ResetDevice, selected)
+
+    def allClearStatus(self) -> List[int]:
+        """Read Status of every device with GetStatus,
+        which also clears the alarm flags. Does not reset HiZ
+
+        :returns: Status of every device before clearing
+        """
+        PayloadSize = Command.getPayloadSize(Command.StatusGet)
+        command = [Command.StatusGet] + [Command.Nop] * PayloadSize
+
+        responses = self._exchange([command] * self._total_devices)
+
+        return [toInt(response[1:]) for response in responses]
+
+    def getFamily(self, position: int) -> DeviceFamily:
+        """Device family of a position
+
+        :position: Device position in chain
+        :returns: Device family
+        """
+        return self._codecs[position].family
+
+    def allGetRegister(self, register: int) -> List[Optional[int]]:
+        """Fetches a register's contents and returns the current value
+
+        :register: Canonical register id to be accessed
+        :returns: Value of specified register for each position,
+            None where the device family has no such register
+        """
+        values = self.allGetRegisters([register])
+
+        return [device_values.get(register) for device_values in values]
+
+    def allGetRegisters(self, registers: Sequence[int]) -> List[Dict[int, int]]:
+        """Fetch several registers of every device in a single frame set
+        Registers a device's family lacks are skipped for that device
+
+        :registers: Canonical register ids to be accessed
+        :returns: Register values of each device, indexed by position
+        """
+        lines = []
+
+        for codec in self._codecs:
+            command = []
+
+            for register in registers:
+                if codec.supports(register):
+                    command.extend(codec.encodeGet(register))
+
+            lines.append(command or None)
+
+        responses = self._exchange(lines)
+        values = []
+
+        for codec, response in zip(self._codecs, responses):
+            device_values = {}
+            offset = 0
+
+            for register in registers:
+                size = codec.size[register]
+
+                if not size:
+                    continue
+
+                device_values[register] = toInt(
+                    response[offset + 1:offset + 1 + size]
+                )
+                offset += 1 + size
+
+            values.append(device_values)
+
+        return values
+
+    def allSetRegister(
+            self, register: int,
+            values: Sequence[Optional[int]],
+        ) -> None:
+        """Set a register of every device in one frame set
+
+        :register: Canonical register id
+        :values: Value for each position, None for NOP
+        """
+        self.runCommands([
+            None if v is None else codec.encodeSet(register, v)
+            for codec, v in zip(self._codecs, values)
+        ])
+
+    def allGetPosition(self):
+        """Get the signed absolute position of every device
+
+        :returns: (Micro)steps for each position, None where the device
+            family has no PosAbs register
         """
         data = []
         rawdata = self.allGetRegister(Register.PosAbs)
         
         for i in rawdata:
-            data.append(toSignedInt(i))
+            data.append(None if i is None else toSignedInt(i))
         
         return data
 
     def allGetMark(self):
-        """
+        """Get the signed Mark position of every device
+
+        :returns: (Micro)steps for each position, None where the device
+            family has no Mark register
         """
         data = []
         rawdata = self.allGetRegister(Register.Mark)
         
         for i in rawdata:
-            data.append(toSignedInt(i))
+            data.append(None if i is None else toSignedInt(i))
         
         return data
 
@@ -289,15 +667,22 @@ class SpinChain:
         self.allSetRegister(Register.Mark,positions)
 
     def allGetSpeed(self):
-        """
+        """Get the signed speed of every device
+
+        :returns: Full steps per second for each position, None where the
+            device family has no Speed register
         """
         data = []
 
         rawdata = self.allGetRegister(Register.Speed)
         dir = self.allGetStatus(Status.Dir)
         
-        for i in rawdata:
-            if not dir[i]:   # 0 is negative
+        for i, d in zip(rawdata, dir):
+            if i is None:   # No Speed register, e.g. L6474
+                data.append(None)
+                continue
+
+            if not d:   # 0 is negative
                 i = -i
 
             data.append(i/Constant.SpsToSpeed)
@@ -305,39 +690,148 @@ class SpinChain:
         return data
         
     def allGetStatus(self, statusmask) -> int:
-        """
+        """Get masked Status bits of every device
+
+        :statusmask: Status bits to keep
+        :returns: Masked Status for each position, None where the device
+            family has no Status register
         """
         returndata = []
 
         stdatas = self.allGetRegister(Register.Status)
 
         for stdata in stdatas:
-            returndata.append(stdata & statusmask)
+            returndata.append(None if stdata is None else stdata & statusmask)
 
         return returndata
 
-    def allRun(self,speeds):
+    def allRun(self, speeds: Sequence[Optional[float]]) -> None:
+        """Run every motor at its own speed in one frame set
 
+        :speeds: Full steps per second for each position, None for NOP
         """
+        self.runCommands([
+            None if s is None else encodeRun(s) for s in speeds
+        ])
+        self._setDirections([
+            None if s is None else toPlusAndDir(s)[0] for s in speeds
+        ])
+
+    def snapshot(self, path: str) -> ChainSnapshot:
+        """Save the configuration of every device and the in-process state
+        Registers are read in a single frame set, after GetStatus clears
+        the alarm flags, so a later reset shows in the undervoltage flag.
+        Each device is read in its own family's register map
+
+        :path: File to write
+        :returns: The saved snapshot
         """
-        command = []
-        ds =[]
-        #self.datasize = [Register.getSize(Register.Speed)]*self._total_devices
-                
-        for s in speeds:
-            ints = int(Constant.SpsToSpeed *s)
-            ds = toPlusAndDir(ints)
-            bytelen = Register.getSize(Register.Speed)
-            commandline = []
-            commandline.append(Command.Run | ds[0])
-            tobytes = toByteArrayWithLength(ds[1], bytelen)
-
-            for i in range(bytelen):
-                commandline.append(tobytes[i])
-
-            command.append(commandline)
-        
-        self.runCommands(command)
+        registers = getSnapshotRegisters(self._codecs)
+
+        with self._lock:
+            self.allClearStatus()
+            values = self.allGetRegisters(registers)
+            directions = [
+                self._devices[position]._direction
+                if position in self._devices
+                else getDirection(values[position][Register.Status])
+                for position in range(self._total_devices)
+            ]
+
+        snapshot = ChainSnapshot(registers, values, directions)
+        snapshot.save(path)
+
+        return snapshot
+
+    def restore(self, path: str, check_position: bool = True) -> ChainSnapshot:
+        """Resume from a snapshot without any motion
+        The devices must still be powered and configured as saved,
+        otherwise SnapshotError is raised and nothing is restored
+
+        :path: File written by snapshot()
+        :check_position: Also require PosAbs to be unchanged
+        :returns: Snapshot holding the registers as read now
+        """
+        saved = ChainSnapshot.load(path)
+
+        with self._lock:
+            current = self.allGetRegisters(saved.registers)
+            problems = saved.compare(current, check_position)
+
+            if problems:
+                raise SnapshotError('; '.join(problems))
+
+            for position, device in self._devices.items():
+                device._direction = saved.directions[position]
+
+            if self._memory is not None:
+                self._memory.forget()
+
+                for position, values in enumerate(current):
+                    for register, value in values.items():
+                        self._memory.remember(position, register, value)
+
+        return ChainSnapshot(saved.registers, current, saved.directions)
+
+    def waitIdle(
+            self, timeout: Optional[float] = None,
+            poll_seconds: float = 0.01,
+        ) -> bool:
+        """Wait until no device is busy
+        Blocks on the BUSY line without SPI traffic with an edge source,
+        polls Status otherwise
+
+        :timeout: Seconds to wait at most, None for no limit
+        :poll_seconds: Time between Status polls without an edge source
+        :returns: False on timeout
+        """
+        if self._edge_source is not None:
+            return self._edge_source.waitLevel(EdgeLine.Busy, True, timeout)
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        while self.isOneBusy():
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+
+            time.sleep(poll_seconds)
+
+        return True
+
+    def waitAlarm(
+            self, timeout: Optional[float] = None,
+            poll_seconds: float = 0.01,
+        ) -> Optional[List[int]]:
+        """Wait until a device raises an alarm, then find out which
+        Blocks on the FLAG line with an edge source and only touches SPI
+        once it falls, polls Status otherwise. The alarm flags are read
+        with GetStatus, which clears them and releases FLAG
+
+        :timeout: Seconds to wait at most, None for no limit
+        :poll_seconds: Time between Status polls without an edge source
+        :returns: Status of every device before clearing, None on timeout
+        """
+        if self._edge_source is not None:
+            if not self._edge_source.waitLevel(EdgeLine.Flag, False, timeout):
+                return None
+
+            return self.allClearStatus()
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        while True:
+            statuses = self.allGetRegister(Register.Status)
+
+            if any(
+                    codec.status.getAlarms(status)
+                    for codec, status in zip(self._codecs, statuses)
+                    if status is not None):
+                return self.allClearStatus()
+
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+
+            time.sleep(poll_seconds)
 
     def isOneBusy(self):
         """
@@ -1,6 +1,7 @@
 from stspin.constants.command import PayloadSize
 from typing import (
     Callable,
+    Dict,
     List,
     Optional,
 )
@@ -14,6 +15,23 @@ from .constants import (
     Register,
     Status,
 )
+from .families import (
+    FamilyCodec,
+    L6470,
+    getCodec,
+)
+from .fields import (
+    FieldEditor,
+    Fields,
+)
+from .frames import (
+    DeviceLine,
+    encodeCommand,
+    encodeGoTo,
+    encodeGoToDir,
+    encodeGoUntil,
+    encodeReleaseSw,
+)
 from .utility import (
     toByteArrayWithLength,
     toInt, toSignedInt
@@ -27,15 +45,32 @@ class SpinDevice:
             self, position: int,
             total_devices: int,
             spi_transfer: Callable[[List[int]], List[int]],
+            exchange: Optional[
+                Callable[[List[DeviceLine]], List[List[int]]]
+            ] = None,
+            codec: Optional[FamilyCodec] = None,
         ):
         """
         :position: Position in chain, where 0 is the last device in chain
         :total_devices: Total number of devices in chain
         :spi: SPI object used for serial communication
+        :exchange: Frame set function of the owning SpinChain (if any).
+            Whole commands are sent through it, so they are never
+            interleaved with other traffic on the chain
+        :codec: Register codec of the device family, L6470 if None
         """
         self._position: Final           = position
         self._total_devices: Final      = total_devices
         self._spi_transfer: Final       = spi_transfer
+        self._exchange: Final           = exchange
+        self._codec: Final              = codec or getCodec(L6470)
+
+        # Register bitfields, e.g. fields.StepMode.step_sel
+        self.fields: Final = Fields(
+            FieldEditor({position: self._codec}, self._sendLines),
+            [position],
+            single=True,
+        )
 
         self._direction                 = Constant.DirForward
 
@@ -69,6 +104,30 @@ class SpinDevice:
 
         return toInt(response)
 
+    def _transact(self, data: List[int]) -> List[int]:
+        """Write a complete command to the device as one frame set
+
+        :data: Command byte followed by payload or NOP bytes
+        :return: Response byte for each byte sent
+        """
+        if self._exchange is None:
+            return [self._write(data_byte) for data_byte in data]
+
+        lines: List[DeviceLine] = [None] * self._total_devices
+        lines[self._position] = data
+
+        return self._exchange(lines)[self._position]
+
+    def _sendLines(self, lines: Dict[int, List[int]]) -> Dict[int, List[int]]:
+        """Send the line for this device as one frame set
+
+        :lines: Bytes by position, holding only this device's position
+        :return: Response bytes by position
+        """
+        return {
+            position: self._transact(line) for position, line in lines.items()
+        }
+
     def _writeCommand(
             self, command: int,
             payload: Optional[int] = None,
@@ -81,42 +140,33 @@ class SpinDevice:
         :return: Response bytes as int
         """
         
-        assert (payload is None) == (payload_size is None), \
-            'payload and payload_size must be either both None, xor present'
-
-        response = self._write(command)
+        response = self._transact(
+            encodeCommand(command, payload, payload_size)
+        )
 
-        # payload_size does not need to be checked here,
-        # but mypy is not quite that advanced yet
-        if payload is None or payload_size is None:
-            return response
+        if payload is None:
+            return response[0]
 
-        return self._writeMultiple(
-            toByteArrayWithLength(payload, payload_size)
-        )
+        return toInt(response[1:])
 
     def setRegister(self, register: int, value: int) -> None:
         """Set the specified register to the given value
         
-        :register: The register location
+        :register: Canonical register id
         :value: Value register should be set to
         """
-        RegisterSize = Register.getSize(register)
-        set_command = Command.ParamSet | register
-
-        self._writeCommand(set_command, value, RegisterSize)
+        self._transact(self._codec.encodeSet(register, value))
 
     def getRegister(self, register: int) -> int:
         """Fetches a register's contents and returns the current value
 
-        :register: Register location to be accessed
+        :register: Canonical register id to be accessed
         :returns: Value of specified register
         """
         
-        RegisterSize = Register.getSize(register)
-        self._writeCommand(Command.ParamGet | register)
+        response = self._transact(self._codec.encodeGet(register))
 
-        return self._writeMultiple([Command.Nop] * RegisterSize)
+        return toInt(response[1:])
 
     def move(self, steps: int) -> None:
         """Move motor n steps
@@ -156,13 +206,9 @@ class SpinDevice:
         """
         assert direction >= 0
         assert direction < Constant.DirMax
-        assert position < 1<<22
-        assert position > -(1<<22)
         
         self._direction=direction
-
-        PayloadSize = Command.getPayloadSize(Command.GoToDir)
-        self._writeCommand(Command.GoToDir | self._direction, position, PayloadSize)
+        self._transact(encodeGoToDir(direction, position))
         
     def goto(self,position: int, steps_per_second: float) -> None:
         """Go to absolute position using the shortest way and at the given speed
@@ -171,17 +217,13 @@ class SpinDevice:
         :steps_per_second: Full steps per second from 0 up to 15625.
         0.015 step/s resolution
         """
-        assert position < 1<<22
-        assert position > -(1<<22)
         assert steps_per_second > 0
         assert steps_per_second <= Constant.MaxStepsPerSecond
         
-        speed = int(steps_per_second * Constant.SpsToSpeed)
-        oldMaxSpd = self.getRegister(Register.SpeedMin)
-        self.setRegister(Register.SpeedMax,speed)
-        PayloadSize = Command.getPayloadSize(Command.GoTo)
-        
-        self._writeCommand(Command.GoTo |  position, PayloadSize)
+        speed = int(steps_per_second * Constant.SpsToMaxSpeed)
+        oldMaxSpd = self.getRegister(Register.SpeedMax)
+        self.setRegister(Register.SpeedMax, min(speed, 0x3FF))
+        self._transact(encodeGoTo(position))
         self.setRegister(Register.SpeedMax,oldMaxSpd)
 
     def goUntil(self, action: int, steps_per_second: float) -> None:
@@ -193,18 +235,8 @@ class SpinDevice:
         0.015 step/s resolution
         """
         
-        assert steps_per_second > -Constant.MaxStepsPerSecond
-        assert steps_per_second < Constant.MaxStepsPerSecond
-        assert action >= 0
-        assert action < 2
-        assert steps_per_second > -Constant.MaxStepsPerSecond
-        assert steps_per_second < Constant.MaxStepsPerSecond
-        
-        speed = int(steps_per_second * Constant.SpsToSpeed)
-        speed = self._toAbsAndDir(speed)
-        PayloadSize = Command.getPayloadSize(Command.GoUntil)
-        
-        self._writeCommand(Command.GoUntil | action, self.direction, speed, PayloadSize)
+        self._toAbsAndDir(steps_per_second)
+        self._transact(encodeGoUntil(action, steps_per_second))
 
     def releaseSw(self, action: int, steps_per_second: float) ->None:
         """Move the motor at the given speed until the switch is released
@@ -212,17 +244,16 @@ class SpinDevice:
         :steps_per_second: Full steps per second from -15625 up to 15625.
         0.015 step/s resolution
         """
-        assert action >= 0
-        assert action < 2
         assert steps_per_second != 0
         
-        speed = int(steps_per_second * Constant.SpsToSpeed)
-        speed = self._toAbsAndDir(speed)
+        # SpeedMin holds the low speed optimization bit above the speed
+        speed = int(abs(steps_per_second) * Constant.SpsToMinSpeed)
         oldMinSpd = self.getRegister(Register.SpeedMin)
-        self.setRegister(Register.SpeedMin,speed)
-        PayloadSize = Command.getPayloadSize(Command.ReleaseSw)
-        
-        self._writeCommand(Command.ReleaseSw | action, self.direction, PayloadSize)
+        self.setRegister(
+            Register.SpeedMin, (oldMinSpd & ~0xFFF) | min(speed, 0xFFF),
+        )
+        self._toAbsAndDir(steps_per_second)
+        self._transact(encodeReleaseSw(action, self._direction))
         self.setRegister(Register.SpeedMin,oldMinSpd)
                 
     def setEndStopAndCenter(self, steps_per_second:float) ->None:
@@ -251,7 +282,7 @@ class SpinDevice:
         self.releaseSw(Constant.ActSetMark,-steps_per_second/20)
         while self.isBusy():
             pass
-        self.gotoDir(Constant.DirReverse,self.getMark()/2)
+        self.gotoDir(Constant.DirReverse,self.getMark()//2)
         while self.getSpeed() < 0:
             pass
         print("position reset completed")
@@ -323,7 +354,7 @@ class SpinDevice:
         """
         stepsPerTick=self.getRegister(Register.Speed)
         dir=self.getDir()
-        if ~dir:
+        if not dir:
             stepsPerTick*=-1
         return stepsPerTick/Constant.SpsToSpeed
 
@@ -333,9 +364,12 @@ class SpinDevice:
         
         :returns: 2 bytes status as an int
         """
-        self._writeCommand(Command.StatusGet)
+        PayloadSize = Command.getPayloadSize(Command.StatusGet)
+        response = self._transact(
+            [Command.StatusGet] + [Command.Nop] * PayloadSize
+        )
 
-        return self._writeMultiple([Command.Nop] * 2)
+        return toInt(response[1:])
 
     def isBusy(self) -> bool:
         """Checks busy status of the device
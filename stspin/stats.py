@@ -0,0 +1,85 @@
+import math
+
+from collections import deque
+from typing import (
+    Deque,
+    Dict,
+)
+from typing_extensions import (
+    Final,
+)
+
+
+class LatencyStats:
+    """Running latency statistics
+    Count, mean and extremes cover every sample,
+    percentiles only the most recent window
+    """
+
+    def __init__(self, window: int = 4096) -> None:
+        """
+        :window: Number of recent samples kept for percentiles
+        """
+        assert window > 0
+
+        self._samples: Final[Deque[float]] = deque(maxlen=window)
+
+        self.count      = 0
+        self.total      = 0.0
+        self.min        = math.inf
+        self.max        = 0.0
+        self.last       = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Record a sample
+
+        :seconds: Measured latency
+        """
+        self._samples.append(seconds)
+
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+
+        if seconds < self.min:
+            self.min = seconds
+
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        """Mean of every sample"""
+        return self.total / self.count if self.count else 0.0
+
+    def getPercentile(self, percentile: float) -> float:
+        """Get a percentile of the recent samples
+
+        :percentile: Percentile from 0 to 100
+        :returns: Latency in seconds, 0 without samples
+        """
+        assert percentile >= 0
+        assert percentile <= 100
+
+        if not self._samples:
+            return 0.0
+
+        ordered = sorted(self._samples)
+        index = int(round(percentile / 100 * (len(ordered) - 1)))
+
+        return ordered[index]
+
+    def getSummary(self) -> Dict[str, float]:
+        """Summarize the statistics
+
+        :returns: Count, min, mean, p50, p90, p99 and max in seconds
+        """
+        return {
+            'count': self.count,
+            'min': self.min if self.count else 0.0,
+            'mean': self.mean,
+            'p50': self.getPercentile(50),
+            'p90': self.getPercentile(90),
+            'p99': self.getPercentile(99),
+            'max': self.max,
+        }
@@ -0,0 +1,254 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    MotorStatus,
+    Register,
+    Status,
+)
+
+# Status bits that read low when their condition is present
+ActiveLowBits: Final = (
+    Status.NotBusy
+    | Status.SwitchFlag
+    | Status.NotUndervoltage
+    | Status.NotThermalWarning
+    | Status.NotThermalShutdown
+    | Status.NotOvercurrent
+    | Status.NotStepLossA
+    | Status.NotStepLossB
+)
+
+
+class StatusEvent:
+    """Status conditions as active high flags, at their register bits"""
+    HiZ: Final              = Status.HiZ
+    Busy: Final             = Status.NotBusy
+    SwitchClosed: Final     = Status.SwitchFlag
+    SwitchEvent: Final      = Status.SwitchEvent
+    Forward: Final          = Status.Dir
+    Motor: Final            = MotorStatus.ConstantSpeed  # Both state bits
+    CmdNotPerformed: Final  = Status.CmdNotPerformed
+    CmdWrong: Final         = Status.CmdWrong
+    Undervoltage: Final     = Status.NotUndervoltage
+    ThermalWarning: Final   = Status.NotThermalWarning
+    ThermalShutdown: Final  = Status.NotThermalShutdown
+    Overcurrent: Final      = Status.NotOvercurrent
+    StepLossA: Final        = Status.NotStepLossA
+    StepLossB: Final        = Status.NotStepLossB
+    StepLoss: Final         = Status.NotStepLossA | Status.NotStepLossB
+    StepClockMode: Final    = Status.StepClockMode
+
+
+# Conditions that pull the FLAG output low, when enabled in AlarmEn
+AlarmEvents: Final = (
+    StatusEvent.SwitchEvent
+    | StatusEvent.CmdNotPerformed
+    | StatusEvent.CmdWrong
+    | StatusEvent.Undervoltage
+    | StatusEvent.ThermalWarning
+    | StatusEvent.ThermalShutdown
+    | StatusEvent.Overcurrent
+    | StatusEvent.StepLoss
+)
+
+
+class Edge:
+    Rise: Final             = 1  # Condition appeared
+    Fall: Final             = 2  # Condition cleared
+    Both: Final             = 3
+
+
+# (position, rising flags, falling flags, all current flags)
+StatusCallback = Callable[[int, int, int, int], None]
+
+
+class _Subscription(NamedTuple):
+    callback: StatusCallback
+    mask: int
+    edge: int
+    positions: Optional[frozenset]
+
+
+def decodeStatus(status: int) -> int:
+    """Turn a Status register value into active high StatusEvent flags
+
+    :status: Status register value
+    :returns: StatusEvent flags
+    """
+    return status ^ ActiveLowBits
+
+
+class StatusDispatcher:
+    """Turn chain-wide Status reads into edge callbacks
+
+    Every read is decoded to StatusEvent flags and XORed with the
+    previous read of the same device. Subscribers are only called for
+    the devices and flags they asked for, when those flags change.
+    Lookup tables indexed by each byte of the change select the
+    subscribers to check, so unrelated changes cost no callbacks.
+    The first read of each device only sets its baseline.
+    """
+
+    def __init__(self, total_devices: int) -> None:
+        """
+        :total_devices: Total number of devices in chain
+        """
+        self._total_devices: Final = total_devices
+
+        self._flags: Final[List[Optional[int]]] = [None] * total_devices
+        self._subscriptions: Final[Dict[int, _Subscription]] = {}
+
+        # Subscription handles as bitsets, by byte of a change and position
+        self._low_table: Final = [0] * 256
+        self._high_table: Final = [0] * 256
+        self._position_table: Final = [0] * total_devices
+
+        self.reads = 0
+        self.calls = 0
+
+    def subscribe(
+            self, callback: StatusCallback,
+            mask: int,
+            edge: int = Edge.Both,
+            positions: Optional[Sequence[int]] = None,
+        ) -> int:
+        """Call back when some flags change
+
+        :callback: Called with position, rising, falling and current flags
+        :mask: StatusEvent flags of interest
+        :edge: Edge.Rise, Edge.Fall or Edge.Both
+        :positions: Devices of interest, None for every device
+        :returns: Handle for unsubscribe
+        """
+        assert mask & 0xFFFF
+        assert edge in (Edge.Rise, Edge.Fall, Edge.Both)
+
+        # Handles are bit indices in the tables, so free ones are reused
+        handle = 0
+
+        while handle in self._subscriptions:
+            handle += 1
+
+        self._subscriptions[handle] = _Subscription(
+            callback,
+            mask & 0xFFFF,
+            edge,
+            None if positions is None else frozenset(positions),
+        )
+        self._buildTables()
+
+        return handle
+
+    def unsubscribe(self, handle: int) -> None:
+        """Stop calling back a subscriber
+
+        :handle: Returned by subscribe
+        """
+        del self._subscriptions[handle]
+        self._buildTables()
+
+    def _buildTables(self) -> None:
+        """Precompute which subscriptions each change byte can concern"""
+        for index in range(256):
+            low = high = 0
+
+            for handle, subscription in self._subscriptions.items():
+                if subscription.mask & index:
+                    low |= 1 << handle
+
+                if (subscription.mask >> 8) & index:
+                    high |= 1 << handle
+
+            self._low_table[index] = low
+            self._high_table[index] = high
+
+        for position in range(self._total_devices):
+            self._position_table[position] = sum(
+                1 << handle
+                for handle, subscription in self._subscriptions.items()
+                if subscription.positions is None
+                or position in subscription.positions
+            )
+
+    def dispatch(self, statuses: Sequence[int]) -> int:
+        """Feed a chain-wide Status read
+
+        :statuses: Status register value of each position
+        :returns: Number of callbacks made
+        """
+        calls = 0
+        self.reads += 1
+
+        for position, status in enumerate(statuses):
+            flags = status ^ ActiveLowBits
+            previous = self._flags[position]
+            self._flags[position] = flags
+
+            if previous is None:
+                continue
+
+            change = previous ^ flags
+
+            if not change:
+                continue
+
+            candidates = (
+                self._low_table[change & 0xFF]
+                | self._high_table[change >> 8]
+            ) & self._position_table[position]
+
+            while candidates:
+                bit = candidates & -candidates
+                candidates ^= bit
+                subscription = self._subscriptions.get(bit.bit_length() - 1)
+
+                if subscription is None:
+                    # Unsubscribed by an earlier callback
+                    continue
+
+                changed = change & subscription.mask
+                rising = changed & flags \
+                    if subscription.edge & Edge.Rise else 0
+                falling = changed & previous \
+                    if subscription.edge & Edge.Fall else 0
+
+                if rising or falling:
+                    subscription.callback(position, rising, falling, flags)
+                    calls += 1
+
+        self.calls += calls
+
+        return calls
+
+    def poll(self, chain: Any) -> int:
+        """Read Status of every device once and dispatch it
+        Reading the register does not clear the alarm flags
+
+        :chain: SpinChain to read
+        :returns: Number of callbacks made
+        """
+        return self.dispatch(chain.allGetRegister(Register.Status))
+
+    def getFlags(self, position: int) -> Optional[int]:
+        """Last StatusEvent flags of a device
+
+        :position: Device position in chain
+        :returns: Flags, None before the first read
+        """
+        return self._flags[position]
+
+    def reset(self) -> None:
+        """Forget the previous reads, the next one sets a new baseline"""
+        for position in range(self._total_devices):
+            self._flags[position] = None
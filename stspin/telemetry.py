@@ -0,0 +1,523 @@
+import bisect
+import math
+import mmap
+import os
+import struct
+import time
+
+from array import array
+from typing import (
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Register,
+)
+
+Magic: Final = b'STSPTLM\x00'
+# Version 1 stored perf_counter times, meaningless after a restart
+Version: Final = 2
+
+# Fixed part: magic, version, total devices, depth, channel count
+_Header: Final = struct.Struct('<8sIIII')
+# Per channel: name, typecode, head, count
+_ChannelHeader: Final = struct.Struct('<23sc2Q')
+_Counters: Final = struct.Struct('<2Q')
+_CountersOffset: Final = _ChannelHeader.size - _Counters.size
+
+ItemSize: Final = 8
+
+DefaultChannels: Final[Dict[str, str]] = {
+    'position': 'q',    # signed (micro)steps
+    'speed': 'd',       # signed full steps/s
+    'status': 'q',      # raw Status register
+}
+
+# Stored for devices without a value, e.g. the Speed of an L6474
+_NoValue: Final[Dict[str, Any]] = {
+    'q': 0,
+    'd': math.nan,
+}
+
+
+class TelemetryRange(NamedTuple):
+    """Samples of one channel within a time range"""
+    times: array                    # time.time() timestamps
+    values: List[array]             # One column per device
+
+
+class _Channel:
+    """Ring buffer columns of one channel"""
+
+    def __init__(
+            self, name: str,
+            typecode: str,
+            header_offset: int,
+            columns_offset: int,
+            times: memoryview,
+            columns: List[memoryview],
+        ) -> None:
+        self.name: Final            = name
+        self.typecode: Final        = typecode
+        self.header_offset: Final   = header_offset
+        self.columns_offset: Final  = columns_offset
+        self.times: Final           = times
+        self.columns: Final         = columns
+        self.head                   = 0
+        self.count                  = 0
+
+
+class _OrderedTimes:
+    """Timestamps of a channel in logical order, for bisect"""
+
+    def __init__(self, ring: _Channel, depth: int) -> None:
+        self._ring: Final   = ring
+        self._depth: Final  = depth
+
+    def __len__(self) -> int:
+        return self._ring.count
+
+    def __getitem__(self, index: int) -> float:
+        ring = self._ring
+
+        return ring.times[(ring.head - ring.count + index) % self._depth]
+
+
+class TelemetryStore:
+    """Columnar ring buffer of chain telemetry
+
+    Every channel has its own timestamp column and one column per device,
+    all backed by a single buffer. The buffer is either in memory or a
+    memory-mapped file that survives restarts. Timestamps are wall clock
+    time.time() seconds, so samples of earlier runs keep their place;
+    a wall clock stepping back is clamped to keep every channel ordered.
+    """
+
+    def __init__(
+            self, total_devices: int,
+            depth: int = 65536,
+            channels: Optional[Dict[str, str]] = None,
+            path: Optional[str] = None,
+        ) -> None:
+        """
+        :total_devices: Total number of devices in chain
+        :depth: Number of samples kept per channel
+        :channels: Channel names and array typecodes ('q' or 'd')
+        :path: File to memory-map, reopened if it matches the layout
+        """
+        assert total_devices > 0
+        assert depth > 0
+
+        channels = dict(DefaultChannels if channels is None else channels)
+
+        for name, typecode in channels.items():
+            assert typecode in ('q', 'd'), f'{name}: unsupported typecode'
+            assert len(name.encode()) <= 23, f'{name}: name too long'
+
+        self._total_devices: Final  = total_devices
+        self._depth: Final          = depth
+        self._path: Final           = path
+        self._file: Optional[Any]   = None
+        self._mmap: Optional[mmap.mmap] = None
+
+        # Ids of the chains recorded by attach
+        self._attached: Final[Set[int]] = set()
+
+        header_size = _Header.size + _ChannelHeader.size * len(channels)
+        header_size += -header_size % ItemSize
+        channel_size = (total_devices + 1) * depth * ItemSize
+        size = header_size + channel_size * len(channels)
+
+        if path is None:
+            self._buffer: Any = bytearray(size)
+            resume = False
+        else:
+            resume = self._openFile(path, size, channels)
+            self._buffer = self._mmap
+
+        self._view: Final = memoryview(self._buffer)
+        self._channels: Final[Dict[str, _Channel]] = {}
+
+        for index, (name, typecode) in enumerate(channels.items()):
+            offset = header_size + index * channel_size
+            column_size = depth * ItemSize
+
+            times = self._view[offset:offset + column_size].cast('d')
+            columns = [
+                self._view[start:start + column_size].cast(typecode)
+                for start in range(
+                    offset + column_size,
+                    offset + channel_size,
+                    column_size,
+                )
+            ]
+
+            channel = _Channel(
+                name,
+                typecode,
+                _Header.size + index * _ChannelHeader.size,
+                offset + column_size,
+                times,
+                columns,
+            )
+
+            if resume:
+                _, _, channel.head, channel.count = \
+                    _ChannelHeader.unpack_from(self._buffer, channel.header_offset)
+
+            self._channels[name] = channel
+
+        if not resume:
+            _Header.pack_into(
+                self._buffer, 0,
+                Magic, Version, total_devices, depth, len(channels),
+            )
+
+            for channel in self._channels.values():
+                self._writeChannelHeader(channel)
+
+    def _openFile(self, path: str, size: int, channels: Dict[str, str]) -> bool:
+        """Memory-map the backing file, creating it if needed
+
+        :returns: True if an existing file with the same layout was opened
+        """
+        exists = os.path.exists(path) and os.path.getsize(path) == size
+        self._file = open(path, 'r+b' if exists else 'w+b')
+
+        if not exists:
+            self._file.truncate(size)
+
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+        if not exists:
+            return False
+
+        magic, version, total_devices, depth, channel_count = \
+            _Header.unpack_from(self._mmap, 0)
+
+        if (magic, version, total_devices, depth, channel_count) != \
+                (Magic, Version, self._total_devices, self._depth, len(channels)):
+            return False
+
+        for index, (name, typecode) in enumerate(channels.items()):
+            stored_name, stored_typecode, _, _ = _ChannelHeader.unpack_from(
+                self._mmap, _Header.size + index * _ChannelHeader.size,
+            )
+
+            if stored_name.rstrip(b'\x00').decode() != name or \
+                    stored_typecode.decode() != typecode:
+                return False
+
+        return True
+
+    def _writeChannelHeader(self, channel: _Channel) -> None:
+        """Store name, typecode and ring counters of a channel"""
+        _ChannelHeader.pack_into(
+            self._buffer, channel.header_offset,
+            channel.name.encode(), channel.typecode.encode(),
+            channel.head, channel.count,
+        )
+
+    def getChannels(self) -> List[str]:
+        """Get the names of all channels
+
+        :returns: Channel names
+        """
+        return list(self._channels)
+
+    def getCount(self, channel: str) -> int:
+        """Get the number of samples held by a channel
+
+        :channel: Channel name
+        :returns: Sample count, at most depth
+        """
+        return self._channels[channel].count
+
+    def record(
+            self, channel: str,
+            values: Sequence[Any],
+            timestamp: Optional[float] = None,
+        ) -> None:
+        """Append one sample of every device to a channel
+        The oldest sample is overwritten once the ring is full
+
+        :channel: Channel name
+        :values: One value per device, indexed by position. None where
+            a device has no value is stored as NaN, or 0 in 'q' channels
+        :timestamp: time.time() time, now if None
+        """
+        ring = self._channels[channel]
+        no_value = _NoValue[ring.typecode]
+
+        assert len(values) == self._total_devices
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        index = ring.head
+
+        if ring.count:
+            # Time ranges are bisected, so never go back in time
+            timestamp = max(timestamp, ring.times[(index - 1) % self._depth])
+
+        ring.times[index] = timestamp
+
+        for column, value in zip(ring.columns, values):
+            column[index] = no_value if value is None else value
+
+        ring.head = (index + 1) % self._depth
+        ring.count = min(ring.count + 1, self._depth)
+        _Counters.pack_into(
+            self._buffer, ring.header_offset + _CountersOffset,
+            ring.head, ring.count,
+        )
+
+    def sample(self, chain: Any, timestamp: Optional[float] = None) -> None:
+        """Read position, speed and status of every device into the store
+
+        :chain: SpinChain to read from
+        :timestamp: time.time() time, now if None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        if 'position' in self._channels:
+            self.record('position', chain.allGetPosition(), timestamp)
+
+        if 'speed' in self._channels:
+            self.record('speed', chain.allGetSpeed(), timestamp)
+
+        if 'status' in self._channels:
+            self.record(
+                'status', chain.allGetRegister(Register.Status), timestamp,
+            )
+
+    def attach(self, chain: Any) -> None:
+        """Record the results of a chain's own chain-wide reads
+        allGetPosition and allGetSpeed feed the position and speed channels,
+        every chain-wide Status register read feeds the status channel
+
+        :chain: SpinChain to record from
+        """
+        key = id(chain)
+
+        assert key not in self._attached, 'Chain already attached'
+
+        get_position = chain.allGetPosition
+        get_speed = chain.allGetSpeed
+        get_register = chain.allGetRegister
+
+        def allGetPosition():
+            positions = get_position()
+            if key in self._attached:
+                self.record('position', positions)
+            return positions
+
+        def allGetSpeed():
+            speeds = get_speed()
+            if key in self._attached:
+                self.record('speed', speeds)
+            return speeds
+
+        def allGetRegister(register):
+            values = get_register(register)
+            if Register.Status == register and key in self._attached:
+                self.record('status', values)
+            return values
+
+        self._attached.add(key)
+
+        for name, method in (
+                ('position', allGetPosition),
+                ('speed', allGetSpeed),
+                ('status', allGetRegister)):
+            if name in self._channels:
+                method._telemetry = self  # type: ignore
+                setattr(chain, method.__name__, method)
+
+    def detach(self, chain: Any) -> None:
+        """Stop recording a chain attached earlier
+        Only methods still holding this store's wrappers are restored.
+        Wrappers installed later, e.g. by ChainTracer, stay in place and
+        call through ours, which no longer record
+
+        :chain: SpinChain previously attached
+        """
+        self._attached.discard(id(chain))
+
+        for name in ('allGetPosition', 'allGetSpeed', 'allGetRegister'):
+            method = chain.__dict__.get(name)
+
+            if getattr(method, '_telemetry', None) is self:
+                del chain.__dict__[name]
+
+    def _physical(self, ring: _Channel, index: int) -> int:
+        """Map a logical index, 0 being the oldest sample, to the ring"""
+        return (ring.head - ring.count + index) % self._depth
+
+    def _findRange(
+            self, ring: _Channel,
+            start: Optional[float],
+            end: Optional[float],
+        ) -> Tuple[int, int]:
+        """Find logical indices of samples with start <= time < end"""
+        ordered: Any = _OrderedTimes(ring, self._depth)
+        first = 0 if start is None else bisect.bisect_left(ordered, start)
+        last = ring.count if end is None else bisect.bisect_left(ordered, end)
+
+        return first, max(first, last)
+
+    def getRange(
+            self, channel: str,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+        ) -> TelemetryRange:
+        """Copy the samples of a time range, oldest first
+
+        :channel: Channel name
+        :start: First time.time() time included, None for the oldest
+        :end: time.time() time excluded, None for the newest
+        :returns: Timestamps and one column per device
+        """
+        ring = self._channels[channel]
+        first, last = self._findRange(ring, start, end)
+
+        indices = [self._physical(ring, i) for i in range(first, last)]
+
+        return TelemetryRange(
+            array('d', [ring.times[i] for i in indices]),
+            [
+                array(ring.typecode, [column[i] for i in indices])
+                for column in ring.columns
+            ],
+        )
+
+    def downsample(
+            self, channel: str,
+            position: int,
+            buckets: int,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+        ) -> List[Tuple[float, float, float, float]]:
+        """Reduce a time range to equal-width buckets
+
+        :channel: Channel name
+        :position: Device position in chain
+        :buckets: Number of buckets
+        :start: First time.time() time included, None for the oldest
+        :end: time.time() time excluded, None for the newest
+        :returns: (bucket start, min, max, mean) of every non-empty bucket
+        """
+        assert buckets > 0
+
+        ring = self._channels[channel]
+        first, last = self._findRange(ring, start, end)
+
+        if first == last:
+            return []
+
+        times = ring.times
+        column = ring.columns[position]
+
+        t_first = times[self._physical(ring, first)]
+        t_last = times[self._physical(ring, last - 1)]
+        width = (t_last - t_first) / buckets or 1.0
+
+        result = []
+        bucket = -1
+        low = high = total = 0.0
+        count = 0
+
+        for logical in range(first, last):
+            index = self._physical(ring, logical)
+            value = column[index]
+            current = min(int((times[index] - t_first) / width), buckets - 1)
+
+            if current != bucket:
+                if count:
+                    result.append(
+                        (t_first + bucket * width, low, high, total / count)
+                    )
+
+                bucket = current
+                low = high = total = value
+                count = 1
+                continue
+
+            low = min(low, value)
+            high = max(high, value)
+            total += value
+            count += 1
+
+        if count:
+            result.append((t_first + bucket * width, low, high, total / count))
+
+        return result
+
+    def getOldestIndex(self, channel: str) -> int:
+        """Index of the oldest sample in the raw columns
+
+        :channel: Channel name
+        :returns: Index into toNumpy() arrays
+        """
+        ring = self._channels[channel]
+
+        return self._physical(ring, 0)
+
+    def toNumpy(self, channel: str) -> Tuple[Any, Any]:
+        """View a channel as NumPy arrays without copying
+        Arrays are in ring order, see getOldestIndex(), and only the
+        first getCount() entries are valid before the ring wraps
+
+        :channel: Channel name
+        :returns: Timestamps of shape (depth,) and values of shape
+            (total_devices, depth). Drop them before close()
+        """
+        import numpy
+
+        ring = self._channels[channel]
+        times = numpy.frombuffer(ring.times, dtype=numpy.float64)
+        values = numpy.frombuffer(
+            self._buffer,
+            dtype=numpy.int64 if ring.typecode == 'q' else numpy.float64,
+            count=self._total_devices * self._depth,
+            offset=ring.columns_offset,
+        ).reshape(self._total_devices, self._depth)
+
+        return times, values
+
+    def flush(self) -> None:
+        """Write a memory-mapped store to disk"""
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        """Release the buffer, flushing a memory-mapped store"""
+        for ring in self._channels.values():
+            ring.times.release()
+
+            for column in ring.columns:
+                column.release()
+
+        self._channels.clear()
+        self._view.release()
+
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
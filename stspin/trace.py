@@ -0,0 +1,622 @@
+import json
+import os
+import struct
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Constant,
+    Register,
+)
+from .frames import CommandLength
+from .instrument import instrumentMethods
+
+# (phase, name, category, start ns, duration ns, track, args)
+TraceEvent = Tuple[str, str, str, int, int, int, Optional[Dict[str, Any]]]
+
+# Chrome trace phases
+PhaseComplete: Final = 'X'
+PhaseInstant: Final = 'i'
+PhaseCounter: Final = 'C'
+
+_CommandNames: Final[Dict[int, str]] = {
+    value: name for name, value in vars(Command).items()
+    if isinstance(value, int) and not name.startswith('_')
+}
+_RegisterNames: Final[Dict[int, str]] = {
+    value: name for name, value in vars(Register).items()
+    if isinstance(value, int) and not name.startswith('_')
+}
+
+# {{{ Perfetto protobuf field numbers
+_TracePacket: Final = 1
+_PacketTimestamp: Final = 8
+_PacketSequenceId: Final = 10
+_PacketTrackEvent: Final = 11
+_PacketTrackDescriptor: Final = 60
+
+_TrackUuid: Final = 1
+_TrackName: Final = 2
+_TrackProcess: Final = 3
+_TrackThread: Final = 4
+_TrackParentUuid: Final = 5
+_TrackCounter: Final = 8
+
+_ProcessPid: Final = 1
+_ProcessName: Final = 6
+_ThreadPid: Final = 1
+_ThreadTid: Final = 2
+_ThreadName: Final = 5
+
+_EventAnnotations: Final = 4
+_EventType: Final = 9
+_EventTrackUuid: Final = 11
+_EventCategories: Final = 22
+_EventName: Final = 23
+_EventDoubleCounterValue: Final = 44
+
+_AnnotationInt: Final = 4
+_AnnotationDouble: Final = 5
+_AnnotationString: Final = 6
+_AnnotationName: Final = 10
+
+_TypeSliceBegin: Final = 1
+_TypeSliceEnd: Final = 2
+_TypeInstant: Final = 3
+_TypeCounter: Final = 4
+# }}}
+
+
+def getCommandName(command: int) -> str:
+    """Readable name of a command byte
+
+    :command: Command byte, including any ORed flags
+    :returns: Command name, with the register for ParamGet and ParamSet
+    """
+    if command & 0xE0 in (Command.ParamGet, Command.ParamSet) \
+            and Command.Nop != command:
+        kind = 'ParamGet' if command & Command.ParamGet else 'ParamSet'
+        register = command & 0x1F
+
+        return f'{kind} {_RegisterNames.get(register, f"0x{register:02X}")}'
+
+    for base in (
+            command,
+            command & ~Constant.DirForward,
+            command & ~(Constant.DirForward | Constant.ActSetMark),
+        ):
+        if base in _CommandNames:
+            return _CommandNames[base]
+
+    return f'0x{command:02X}'
+
+
+def _varint(value: int) -> bytes:
+    """Protobuf varint, negative values as 64-bit two's complement"""
+    value &= (1 << 64) - 1
+    data = bytearray()
+
+    while value > 0x7F:
+        data.append(0x80 | value & 0x7F)
+        value >>= 7
+
+    data.append(value)
+
+    return bytes(data)
+
+
+def _uintField(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _bytesField(field: int, data: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(data)) + data
+
+
+def _stringField(field: int, text: str) -> bytes:
+    return _bytesField(field, text.encode())
+
+
+def _doubleField(field: int, value: float) -> bytes:
+    return _varint(field << 3 | 1) + struct.pack('<d', value)
+
+
+class _TracedLock:
+    """Chain lock recording how long threads wait for the bus"""
+
+    def __init__(self, tracer: 'ChainTracer', lock: Any) -> None:
+        self._tracer: Final = tracer
+        self.lock: Final = lock
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self.lock.acquire(False):
+            return True
+
+        if not blocking:
+            return False
+
+        start = time.perf_counter_ns()
+        acquired = self.lock.acquire(True, timeout)
+        self._tracer.record(
+            PhaseComplete, 'bus wait', 'wait',
+            start, time.perf_counter_ns() - start,
+            args={'acquired': acquired},
+        )
+
+        return acquired
+
+    def release(self) -> None:
+        self.lock.release()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *args: Any) -> None:
+        self.release()
+
+
+class _ChainTracks:
+    """Transfer and per-device command tracking of one traced chain"""
+
+    def __init__(
+            self, transfer: Callable[[List[int]], List[int]],
+            lock: Any,
+            bus_track: int,
+            device_tracks: List[int],
+        ) -> None:
+        self.transfer: Final = transfer
+        self.lock: Final = lock
+        self.bus_track: Final = bus_track
+        self.device_tracks: Final = device_tracks
+        # Frames left, start ns and name of each device's current command
+        self.commands: Final[List[Optional[List[Any]]]] = \
+            [None] * len(device_tracks)
+
+
+class ChainTracer:
+    """Timeline of chain activity for Chrome or Perfetto trace viewers
+
+    Records every transfer on a bus track, every command on a track per
+    device, every public method call on the calling thread's track and
+    every wait for the bus, with perf_counter_ns timestamps. Events go
+    into a bounded buffer that keeps the most recent ones, so tracing
+    can stay on in production and be dumped when something went wrong.
+    """
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        """
+        :capacity: Number of events kept
+        """
+        assert capacity > 0
+
+        self._events: Final[Deque[TraceEvent]] = deque(maxlen=capacity)
+        self._tracks_lock: Final = threading.Lock()
+        # Group and name of each track, indexed by track id
+        self._tracks: Final[List[Tuple[str, str]]] = []
+        self._thread_tracks: Final[Dict[int, int]] = {}
+        self._counter_tracks: Final[Dict[str, int]] = {}
+        self._chains: Final[Dict[int, _ChainTracks]] = {}
+
+        self.recorded = 0
+
+    @property
+    def dropped(self) -> int:
+        """Events pushed out of the buffer by newer ones"""
+        return self.recorded - len(self._events)
+
+    def attach(self, target: Any, name: Optional[str] = None) -> None:
+        """Trace the public method calls of an object
+        A SpinChain also gets its transfers, device commands and bus waits
+        traced. Attach a chain before creating its devices, so they share
+        the traced transfer function. Also suits SpinDevice, MotionQueue,
+        ControlLoop or StatusDispatcher, whose poll loops then show up
+
+        :target: Object to trace
+        :name: Track group name of a chain, 'chain N' if None
+        """
+        if hasattr(target, '_spi_transfer') and hasattr(target, '_devices'):
+            self._attachChain(target, name)
+
+        instrumentMethods(target, self._wrapCall)
+
+    def detach(self, chain: Any) -> None:
+        """Stop tracing a chain's transfers and bus waits
+        Method calls stay traced
+
+        :chain: SpinChain given to attach
+        """
+        tracks = self._chains.pop(id(chain))
+        chain._spi_transfer = tracks.transfer
+        chain._lock = tracks.lock
+
+    def _attachChain(self, chain: Any, name: Optional[str]) -> None:
+        assert id(chain) not in self._chains, 'Chain already traced'
+
+        group = name or f'chain {len(self._chains)}'
+        tracks = _ChainTracks(
+            chain._spi_transfer,
+            chain._lock,
+            self._addTrack(group, 'spi bus'),
+            [
+                self._addTrack(group, f'device {position}')
+                for position in range(chain._total_devices)
+            ],
+        )
+        self._chains[id(chain)] = tracks
+
+        def tracedTransfer(buffer: List[int]) -> List[int]:
+            start = time.perf_counter_ns()
+            response = tracks.transfer(buffer)
+            end = time.perf_counter_ns()
+
+            self._recordFrame(tracks, buffer, start, end)
+
+            return response
+
+        chain._spi_transfer = tracedTransfer
+        chain._lock = _TracedLock(self, chain._lock)
+
+    def _recordFrame(
+            self, tracks: _ChainTracks,
+            buffer: List[int],
+            start: int,
+            end: int,
+        ) -> None:
+        """Record a transfer and the device commands it starts or ends"""
+        self.record(
+            PhaseComplete, 'frame', 'bus', start, end - start,
+            tracks.bus_track,
+            {'bytes': bytes(buffer).hex()},
+        )
+
+        for position, data_byte in enumerate(buffer[:len(tracks.commands)]):
+            command = tracks.commands[position]
+
+            if command is None:
+                if Command.Nop == data_byte:
+                    continue
+
+                command = [
+                    CommandLength[data_byte], start, getCommandName(data_byte),
+                ]
+
+            command[0] -= 1
+
+            if command[0] > 0:
+                tracks.commands[position] = command
+                continue
+
+            tracks.commands[position] = None
+            self.record(
+                PhaseComplete, command[2], 'command',
+                command[1], end - command[1],
+                tracks.device_tracks[position],
+            )
+
+    def _wrapCall(self, name: str, method: Callable) -> Callable:
+        """Wrap a bound method so each call is recorded"""
+        def tracedMethod(*args, **kwargs):
+            with self.span(name, 'call'):
+                return method(*args, **kwargs)
+
+        return tracedMethod
+
+    @contextmanager
+    def span(
+            self, name: str,
+            category: str = 'user',
+            args: Optional[Dict[str, Any]] = None,
+        ) -> Iterator[None]:
+        """Record the block as a slice on the calling thread's track
+
+        :name: Slice name
+        :category: Slice category, for filtering in the viewer
+        :args: Values shown with the slice
+        """
+        start = time.perf_counter_ns()
+
+        try:
+            yield
+        finally:
+            self.record(
+                PhaseComplete, name, category,
+                start, time.perf_counter_ns() - start,
+                args=args,
+            )
+
+    def instant(
+            self, name: str,
+            category: str = 'user',
+            args: Optional[Dict[str, Any]] = None,
+        ) -> None:
+        """Record a point in time on the calling thread's track
+
+        :name: Event name
+        :category: Event category
+        :args: Values shown with the event
+        """
+        self.record(
+            PhaseInstant, name, category, time.perf_counter_ns(), 0,
+            args=args,
+        )
+
+    def counter(self, name: str, value: float) -> None:
+        """Record a value plotted over time
+
+        :name: Counter name, one track per name
+        :value: Current value
+        """
+        track = self._counter_tracks.get(name)
+
+        if track is None:
+            with self._tracks_lock:
+                track = self._counter_tracks.get(name)
+
+                if track is None:
+                    track = self._addTrackLocked('counters', name)
+                    self._counter_tracks[name] = track
+
+        self.record(
+            PhaseCounter, name, 'counter', time.perf_counter_ns(), 0, track,
+            {'value': value},
+        )
+
+    def record(
+            self, phase: str,
+            name: str,
+            category: str,
+            start: int,
+            duration: int,
+            track: Optional[int] = None,
+            args: Optional[Dict[str, Any]] = None,
+        ) -> None:
+        """Record a raw event
+
+        :phase: PhaseComplete, PhaseInstant or PhaseCounter
+        :name: Event name
+        :category: Event category
+        :start: perf_counter_ns time
+        :duration: Nanoseconds, 0 for instants and counters
+        :track: Track id, the calling thread's track if None
+        :args: Values shown with the event
+        """
+        if track is None:
+            track = self._getThreadTrack()
+
+        self._events.append(
+            (phase, name, category, start, duration, track, args)
+        )
+        self.recorded += 1
+
+    def _getThreadTrack(self) -> int:
+        """Track of the calling thread, created on first use"""
+        ident = threading.get_ident()
+        track = self._thread_tracks.get(ident)
+
+        if track is None:
+            with self._tracks_lock:
+                track = self._addTrackLocked(
+                    'threads', threading.current_thread().name,
+                )
+                self._thread_tracks[ident] = track
+
+        return track
+
+    def _addTrack(self, group: str, name: str) -> int:
+        with self._tracks_lock:
+            return self._addTrackLocked(group, name)
+
+    def _addTrackLocked(self, group: str, name: str) -> int:
+        """Create a track, caller must hold _tracks_lock"""
+        self._tracks.append((group, name))
+
+        return len(self._tracks) - 1
+
+    def getEvents(self) -> List[TraceEvent]:
+        """Events currently in the buffer, in recording order
+
+        :returns: Raw events
+        """
+        return list(self._events)
+
+    def clear(self) -> None:
+        """Discard all buffered events"""
+        self._events.clear()
+        self.recorded = 0
+
+    def _getGroups(self) -> Dict[str, int]:
+        """Number each track group, in order of creation"""
+        groups: Dict[str, int] = {}
+
+        for group, _ in self._tracks:
+            groups.setdefault(group, len(groups) + 1)
+
+        return groups
+
+    def toChromeTrace(self) -> Dict[str, Any]:
+        """Build a Chrome trace event document
+        Track groups become processes and tracks threads
+
+        :returns: JSON-serializable trace
+        """
+        groups = self._getGroups()
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+
+        for group, group_id in groups.items():
+            events.append({
+                'ph': 'M', 'name': 'process_name',
+                'pid': group_id, 'tid': 0,
+                'args': {'name': f'{group} ({pid})'},
+            })
+
+        for track, (group, name) in enumerate(self._tracks):
+            events.append({
+                'ph': 'M', 'name': 'thread_name',
+                'pid': groups[group], 'tid': track,
+                'args': {'name': name},
+            })
+            events.append({
+                'ph': 'M', 'name': 'thread_sort_index',
+                'pid': groups[group], 'tid': track,
+                'args': {'sort_index': track},
+            })
+
+        for phase, name, category, start, duration, track, args in \
+                self.getEvents():
+            event: Dict[str, Any] = {
+                'ph': phase,
+                'name': name,
+                'cat': category,
+                'ts': start / 1e3,
+                'pid': groups[self._tracks[track][0]],
+                'tid': track,
+            }
+
+            if PhaseComplete == phase:
+                event['dur'] = duration / 1e3
+            elif PhaseInstant == phase:
+                event['s'] = 't'
+
+            if args:
+                event['args'] = args
+
+            events.append(event)
+
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ns',
+            'otherData': {'dropped_events': self.dropped},
+        }
+
+    def writeChromeTrace(self, path: str) -> None:
+        """Write the buffer as Chrome trace JSON, for chrome://tracing
+        or ui.perfetto.dev
+
+        :path: Output file
+        """
+        with open(path, 'w') as f:
+            json.dump(self.toChromeTrace(), f)
+
+    def toPerfetto(self) -> bytes:
+        """Encode the buffer as a Perfetto protobuf trace
+
+        :returns: Serialized Trace message
+        """
+        groups = self._getGroups()
+        pid = os.getpid()
+        sequence = _uintField(_PacketSequenceId, 1)
+        packets = []
+
+        # Track uuids: groups first, then tracks
+        for group, group_id in groups.items():
+            descriptor = _uintField(_TrackUuid, group_id) + _bytesField(
+                _TrackProcess,
+                _uintField(_ProcessPid, pid + group_id)
+                + _stringField(_ProcessName, f'{group} ({pid})'),
+            )
+            packets.append(
+                _bytesField(_PacketTrackDescriptor, descriptor) + sequence
+            )
+
+        for track, (group, name) in enumerate(self._tracks):
+            uuid = len(groups) + 1 + track
+            descriptor = _uintField(_TrackUuid, uuid) \
+                + _uintField(_TrackParentUuid, groups[group])
+
+            if 'threads' == group:
+                descriptor += _bytesField(
+                    _TrackThread,
+                    _uintField(_ThreadPid, pid + groups[group])
+                    + _uintField(_ThreadTid, uuid)
+                    + _stringField(_ThreadName, name),
+                )
+            else:
+                descriptor += _stringField(_TrackName, name)
+
+            if 'counters' == group:
+                descriptor += _bytesField(_TrackCounter, b'')
+
+            packets.append(
+                _bytesField(_PacketTrackDescriptor, descriptor) + sequence
+            )
+
+        # Slices are split into begin and end, which must be ordered per
+        # track: ends before begins at the same time, inner slices inside
+        items = []
+
+        for phase, name, category, start, duration, track, args in \
+                self.getEvents():
+            uuid = len(groups) + 1 + track
+
+            if PhaseComplete == phase:
+                items.append((start, 1, -duration, uuid, _TypeSliceBegin,
+                              name, category, args))
+                items.append((start + duration, 0, duration, uuid,
+                              _TypeSliceEnd, None, None, None))
+            elif PhaseInstant == phase:
+                items.append((start, 1, 0, uuid, _TypeInstant,
+                              name, category, args))
+            else:
+                items.append((start, 1, 0, uuid, _TypeCounter,
+                              None, None, args))
+
+        items.sort(key=lambda item: item[:3])
+
+        for start, _, _, uuid, event_type, name, category, args in items:
+            event = _uintField(_EventType, event_type) \
+                + _uintField(_EventTrackUuid, uuid)
+
+            if name is not None:
+                event += _stringField(_EventCategories, category) \
+                    + _stringField(_EventName, name)
+
+            if _TypeCounter == event_type:
+                event += _doubleField(
+                    _EventDoubleCounterValue, float(args['value']),
+                )
+            elif args:
+                for key, value in args.items():
+                    annotation = _stringField(_AnnotationName, key)
+
+                    if isinstance(value, float):
+                        annotation += _doubleField(_AnnotationDouble, value)
+                    elif isinstance(value, int):
+                        annotation += _uintField(_AnnotationInt, value)
+                    else:
+                        annotation += _stringField(_AnnotationString, str(value))
+
+                    event += _bytesField(_EventAnnotations, annotation)
+
+            packets.append(
+                _uintField(_PacketTimestamp, start)
+                + sequence
+                + _bytesField(_PacketTrackEvent, event)
+            )
+
+        return b''.join(_bytesField(_TracePacket, packet) for packet in packets)
+
+    def writePerfetto(self, path: str) -> None:
+        """Write the buffer as a Perfetto trace, for ui.perfetto.dev
+
+        :path: Output file
+        """
+        with open(path, 'wb') as f:
+            f.write(self.toPerfetto())
@@ -0,0 +1,492 @@
+import threading
+import time
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Constant,
+    Register,
+    Status,
+)
+from .frames import (
+    DeviceLine,
+    toFrames,
+)
+from .kinematics import (
+    AxisKinematics,
+    KinematicsError,
+)
+from .stats import LatencyStats
+from .utility import (
+    toInt,
+    toSignedInt,
+)
+
+# Called with the axis position and the position read past the threshold
+TriggerCallback = Callable[[int, int], None]
+
+# Registers read to predict a crossing, and to detect it in the window
+_PredictRegisters: Final = (Register.PosAbs, Register.Speed, Register.Status)
+_WindowRegisters: Final = (Register.PosAbs,)
+
+
+class PositionTrigger:
+    """Action waiting for an axis to pass a position"""
+
+    def __init__(
+            self, position: int,
+            threshold: int,
+            direction: Optional[int],
+            callback: Optional[TriggerCallback],
+            frames: Optional[List[List[int]]],
+        ) -> None:
+        self.position: Final    = position
+        self.threshold: Final   = threshold
+        self.direction: Final   = direction
+        self._callback: Final   = callback
+        self._frames: Final     = frames
+
+        # Last position read since the trigger was added, and its time
+        self._last: Optional[Tuple[float, int]] = None
+
+        # Set once the action ran
+        self.fired: Final = threading.Event()
+        # Position read when the crossing was detected
+        self.fired_value: Optional[int] = None
+        # perf_counter time the action ran
+        self.fired_time: Optional[float] = None
+
+    def isCrossed(self, previous: int, current: int) -> bool:
+        """Whether moving between two positions passes the threshold
+
+        :previous: Earlier position read
+        :current: Later position read
+        :returns: True if crossed in the trigger's direction
+        """
+        threshold = self.threshold
+        rising = previous < threshold <= current
+        falling = previous > threshold >= current
+
+        if Constant.DirForward == self.direction:
+            return rising
+
+        if Constant.DirReverse == self.direction:
+            return falling
+
+        return rising or falling
+
+
+class _Axis:
+    """Reads and predictions of a single axis with pending triggers"""
+
+    def __init__(self, kinematics: AxisKinematics) -> None:
+        self.kinematics: Final = kinematics
+        self.triggers: Final[List[PositionTrigger]] = []
+        # Signed speed in (micro)steps/s from the last full read
+        self.speed = 0.0
+        # Next read due, and end of dense polling, perf_counter times
+        self.due = 0.0
+        self.window_end = 0.0
+        # Counts triggers added, so reads started before one is added
+        # do not schedule the axis
+        self.added = 0
+
+
+class TriggerScheduler:
+    """Run actions when axes pass positions, without polling them tightly
+
+    An occasional read of PosAbs, Speed and Status predicts the soonest
+    each pending threshold could be reached, assuming the axis accelerates
+    fully from its current speed. Nothing is read until shortly before
+    that, then PosAbs alone is polled densely until the crossing, or a new
+    prediction once the window passes. Stopped axes are read every
+    max_sleep_seconds, as only a new command can move them. Axes due at
+    the same time share a frame set. An action is either a callback or a
+    precompiled frame set, sent as soon as the crossing is read.
+
+    Trigger error is the distance past the threshold when the crossing
+    was read, and the time since the crossing, interpolated between the
+    last two reads.
+    """
+
+    def __init__(
+            self, chain: Any,
+            window_seconds: float = 0.005,
+            poll_seconds: float = 0.0005,
+            max_sleep_seconds: float = 0.1,
+        ) -> None:
+        """
+        :chain: SpinChain whose axes are watched
+        :window_seconds: Time before the soonest predicted crossing when
+            dense polling starts
+        :poll_seconds: Time between reads while polling densely
+        :max_sleep_seconds: Longest time an axis with pending triggers
+            goes unread
+        """
+        assert window_seconds > 0
+        assert poll_seconds > 0
+        assert max_sleep_seconds >= poll_seconds
+
+        self._chain: Final = chain
+        self._window_seconds: Final = window_seconds
+        self._poll_seconds: Final = poll_seconds
+        self._max_sleep_seconds: Final = max_sleep_seconds
+
+        self._condition: Final = threading.Condition()
+        self._kinematics: Final[Dict[int, AxisKinematics]] = {}
+        self._axes: Final[Dict[int, _Axis]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self.polls = 0
+        self.window_polls = 0
+        self.fired = 0
+        # Distance past the threshold in (micro)steps, and time since the
+        # interpolated crossing, when each crossing was read
+        self.overshoot: Final = LatencyStats()
+        self.latency: Final = LatencyStats()
+
+    def setKinematics(self, position: int, kinematics: AxisKinematics) -> None:
+        """Set the motion parameters used to predict an axis
+        Axes without them get theirs read from Acc, Dec, SpeedMax and
+        StepMode when their first trigger is added
+
+        :position: Device position in chain
+        :kinematics: Motion parameters of the axis
+        """
+        with self._condition:
+            self._kinematics[position] = kinematics
+
+    def _getKinematics(self, position: int) -> AxisKinematics:
+        kinematics = self._kinematics.get(position)
+
+        if kinematics is None:
+            values = self._chain.allGetRegisters((
+                Register.Acc, Register.Dec,
+                Register.SpeedMax, Register.StepMode,
+            ))[position]
+
+            try:
+                kinematics = AxisKinematics.fromRegisters(
+                    values.get(Register.Acc),
+                    values.get(Register.Dec),
+                    values.get(Register.SpeedMax),
+                    values.get(Register.StepMode),
+                )
+            except KinematicsError as e:
+                raise KinematicsError(
+                    f'Axis {position}: {e}, set its kinematics first'
+                ) from e
+
+            self._kinematics[position] = kinematics
+
+        return kinematics
+
+    def addTrigger(
+            self, position: int,
+            threshold: int,
+            action: Union[TriggerCallback, Sequence[DeviceLine]],
+            direction: Optional[int] = None,
+        ) -> PositionTrigger:
+        """Run an action once an axis passes a position
+
+        :position: Device position in chain of the watched axis
+        :threshold: Absolute (micro)step position to pass
+        :action: Callback, or bytes for each position of the chain to
+            send as one frame set, None for NOP
+        :direction: Constant.DirForward or DirReverse to only fire when
+            passing that way, None for either
+        :returns: Trigger, whose fired event is set once the action ran
+        :raises KinematicsError: The device family lacks a register read
+            to predict the axis, e.g. Speed on the L6474, or the axis has
+            no kinematics set and its registers cannot predict its motion
+        """
+        assert position in range(self._chain._total_devices)
+        assert direction in (None, Constant.DirForward, Constant.DirReverse)
+
+        codec = self._chain._codecs[position]
+        missing = [r for r in _PredictRegisters if not codec.supports(r)]
+
+        if missing:
+            raise KinematicsError(
+                f'Axis {position}: {codec.family.name} has no register '
+                + ', '.join(f'0x{register:02X}' for register in missing)
+                + ', its motion cannot be predicted'
+            )
+
+        if callable(action):
+            trigger = PositionTrigger(
+                position, threshold, direction, action, None,
+            )
+        else:
+            assert len(action) <= self._chain._total_devices
+
+            trigger = PositionTrigger(
+                position, threshold, direction, None, toFrames(
+                    list(action)
+                    + [None] * (self._chain._total_devices - len(action))
+                ),
+            )
+
+        kinematics = self._getKinematics(position)
+
+        with self._condition:
+            axis = self._axes.get(position)
+
+            if axis is None:
+                axis = self._axes[position] = _Axis(kinematics)
+
+            axis.triggers.append(trigger)
+            # Predict again, taking the new threshold into account
+            axis.due = 0.0
+            axis.window_end = 0.0
+            axis.added += 1
+            self._condition.notify_all()
+
+        return trigger
+
+    def cancel(self, trigger: PositionTrigger) -> None:
+        """Drop a trigger that has not fired
+
+        :trigger: Trigger from addTrigger
+        """
+        with self._condition:
+            axis = self._axes.get(trigger.position)
+
+            if axis is not None and trigger in axis.triggers:
+                axis.triggers.remove(trigger)
+
+                if not axis.triggers:
+                    del self._axes[trigger.position]
+
+    def poll(self) -> Optional[float]:
+        """Read the axes that are due in one frame set and fire crossings
+
+        :returns: Seconds until the next read is due, None without
+            pending triggers
+        """
+        chain = self._chain
+        codecs = chain._codecs
+        now = time.perf_counter()
+
+        with self._condition:
+            due = {
+                position: (axis, axis.added)
+                for position, axis in self._axes.items()
+                if axis.due <= now
+            }
+
+        if due:
+            lines: List[DeviceLine] = [None] * chain._total_devices
+            read: Dict[int, Sequence[int]] = {}
+
+            for position, (axis, _) in due.items():
+                registers = _WindowRegisters \
+                    if now < axis.window_end else _PredictRegisters
+                read[position] = registers
+                lines[position] = [
+                    byte for register in registers
+                    for byte in codecs[position].encodeGet(register)
+                ]
+
+            responses = chain._exchange(lines)
+            read_time = time.perf_counter()
+
+            self.polls += 1
+
+            if all(r is _WindowRegisters for r in read.values()):
+                self.window_polls += 1
+
+            for position, registers in read.items():
+                values = {}
+                offset = 0
+
+                for register in registers:
+                    size = codecs[position].size[register]
+                    values[register] = toInt(
+                        responses[position][offset + 1:offset + 1 + size]
+                    )
+                    offset += 1 + size
+
+                axis, added = due[position]
+                self._update(position, axis, added, values, read_time)
+
+        with self._condition:
+            if not self._axes:
+                return None
+
+            return max(
+                0.0,
+                min(axis.due for axis in self._axes.values())
+                - time.perf_counter(),
+            )
+
+    def _update(
+            self, position: int,
+            axis: _Axis,
+            added: int,
+            values: Dict[int, int],
+            read_time: float,
+        ) -> None:
+        """Fire crossed triggers of an axis and schedule its next read"""
+        current = toSignedInt(values[Register.PosAbs])
+
+        if Register.Speed in values:
+            speed = self._chain._codecs[position].toUnits(
+                Register.Speed, values[Register.Speed],
+            ) * axis.kinematics.microsteps
+
+            if not values[Register.Status] & Status.Dir:
+                speed = -speed
+
+            axis.speed = speed
+
+        with self._condition:
+            crossed = []
+
+            for trigger in list(axis.triggers):
+                previous = trigger._last
+                trigger._last = (read_time, current)
+
+                if previous is not None \
+                        and trigger.isCrossed(previous[1], current):
+                    axis.triggers.remove(trigger)
+                    crossed.append((trigger, previous))
+
+            if not axis.triggers:
+                if self._axes.get(position) is axis:
+                    del self._axes[position]
+            elif added == axis.added:
+                self._schedule(axis, values, current, read_time)
+
+        for trigger, previous in crossed:
+            self._fire(trigger, previous, current, read_time)
+
+    def _schedule(
+            self, axis: _Axis,
+            values: Dict[int, int],
+            current: int,
+            read_time: float,
+        ) -> None:
+        """Set when an axis is read next"""
+        if read_time < axis.window_end:
+            # Keep polling densely until the window passes
+            axis.due = read_time + self._poll_seconds
+            return
+
+        if Register.Status in values and not axis.speed \
+                and values[Register.Status] & Status.NotBusy:
+            # Stopped, only a new command moves it
+            axis.due = read_time + self._max_sleep_seconds
+            return
+
+        soonest = min(
+            axis.kinematics.getEarliestSeconds(
+                trigger.threshold - current,
+                axis.speed if trigger.threshold >= current else -axis.speed,
+            )
+            for trigger in axis.triggers
+        )
+        sleep = soonest - self._window_seconds
+
+        if sleep <= 0:
+            axis.window_end = read_time + 2 * self._window_seconds
+            axis.due = read_time + self._poll_seconds
+        else:
+            axis.due = read_time + min(sleep, self._max_sleep_seconds)
+
+    def _fire(
+            self, trigger: PositionTrigger,
+            previous: Tuple[float, int],
+            current: int,
+            read_time: float,
+        ) -> None:
+        """Run a trigger's action and record its error"""
+        chain = self._chain
+
+        if trigger._frames is not None:
+            with chain._lock:
+                for frame in trigger._frames:
+                    chain._pllwrite(frame)
+
+            if chain._memory is not None:
+                chain._memory.forget()
+        else:
+            trigger._callback(trigger.position, current)
+
+        fired_time = time.perf_counter()
+        previous_time, previous_value = previous
+        crossing_time = previous_time + (read_time - previous_time) * (
+            (trigger.threshold - previous_value) / (current - previous_value)
+        )
+
+        trigger.fired_value = current
+        trigger.fired_time = fired_time
+        trigger.fired.set()
+
+        self.fired += 1
+        self.overshoot.add(abs(current - trigger.threshold))
+        self.latency.add(fired_time - crossing_time)
+
+    def start(self) -> None:
+        """Poll in a background thread"""
+        assert self._thread is None, 'Triggers already running'
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            name='stspin-triggers',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread, pending triggers stay"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            delay = self.poll()
+
+            with self._condition:
+                if not self._running:
+                    return
+
+                # New triggers wake the thread up for their prediction
+                self._condition.wait(delay)
+
+    def getReport(self) -> Dict[str, Any]:
+        """Summarize trigger activity
+
+        :returns: Polls, dense window polls, triggers fired and pending,
+            overshoot in (micro)steps and latency in seconds
+        """
+        with self._condition:
+            pending = sum(len(axis.triggers) for axis in self._axes.values())
+
+        return {
+            'polls': self.polls,
+            'window_polls': self.window_polls,
+            'fired': self.fired,
+            'pending': pending,
+            'overshoot': self.overshoot.getSummary(),
+            'latency': self.latency.getSummary(),
+        }
@@ -0,0 +1,304 @@
+import threading
+import time
+
+from contextlib import nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+
+from .constants import (
+    Command,
+    Register,
+)
+from .families import StatusLayout
+from .frames import toFrames
+from .scheduler import BusScheduler, TrafficClass
+from .stats import LatencyStats
+
+
+class FaultMask(NamedTuple):
+    """Status bits of one device treated as faults"""
+    active_low: int             # Faults when they read low
+    active_high: int            # Faults when they read high
+
+
+def getFaultMask(layout: StatusLayout) -> FaultMask:
+    """Default faults of a device family: overcurrent, step loss,
+    undervoltage and thermal shutdown, but not thermal warnings
+
+    :layout: Status layout of the device family
+    :returns: Fault mask in the family's Status bits
+    """
+    return FaultMask(
+        active_low=layout.not_overcurrent
+        | layout.not_step_loss_a
+        | layout.not_step_loss_b
+        | layout.not_undervoltage
+        | layout.not_thermal_shutdown,
+        active_high=layout.thermal_shutdown,
+    )
+
+
+# (position, new faults as set bits, raw status)
+FaultCallback = Callable[[int, int, int], None]
+
+
+class StopScope:
+    Device: Final           = 0  # Stop only the devices reporting a fault
+    Chain: Final            = 1  # Stop every device in the chain
+
+
+class FaultWatchdog:
+    """Poll Status chain-wide and stop motors as soon as a fault appears
+
+    Status is read with a precompiled frame set. Faults are the bits of
+    each device's fault mask that read low (or high for active high
+    bits); only faults not present in the previous poll trigger the
+    precompiled stop frame and subscribers.
+    On a bus shared by a BusScheduler, reads and stops are Safety traffic,
+    and stopped devices are forgotten by elided command memory.
+    """
+
+    def __init__(
+            self, chain: Any,
+            fault_masks: Optional[Sequence[FaultMask]] = None,
+            stop_command: int = Command.StopHard,
+            stop_scope: int = StopScope.Device,
+            rate_hz: float = 1000.0,
+        ) -> None:
+        """
+        :chain: SpinChain to watch
+        :fault_masks: Fault mask of every position, in the Status layout
+            of its device family. getFaultMask of each family if None
+        :stop_command: Command.StopHard or Command.HiZHard
+        :stop_scope: StopScope.Device or StopScope.Chain
+        :rate_hz: Poll rate of the background thread
+        """
+        assert stop_command in (Command.StopHard, Command.HiZHard)
+        assert stop_scope in (StopScope.Device, StopScope.Chain)
+        assert rate_hz > 0
+
+        total_devices = chain._total_devices
+
+        if fault_masks is None:
+            fault_masks = [
+                getFaultMask(codec.status) for codec in chain._codecs
+            ]
+
+        assert len(fault_masks) == total_devices
+
+        self._chain: Final          = chain
+        self._fault_masks: Final    = list(fault_masks)
+        self._stop_command: Final   = stop_command
+        self._stop_scope: Final     = stop_scope
+        self._period: Final         = 1 / rate_hz
+
+        self._read_frames: Final = toFrames([
+            codec.encodeGet(Register.Status) for codec in chain._codecs
+        ])
+        self._chain_stop_frame: Final = [stop_command] * total_devices
+
+        self._faults: Final = [0] * total_devices
+        self._subscribers: Final[List[FaultCallback]] = []
+
+        self._thread: Optional[threading.Thread] = None
+        self._running = threading.Event()
+
+        self.statuses: List[int] = [0] * total_devices
+        self.polls = 0
+        self.stops = 0
+        self.read_latency: Final = LatencyStats()
+        self.stop_latency: Final = LatencyStats()
+        self.poll_interval: Final = LatencyStats()
+        self._last_poll: Optional[float] = None
+
+    def subscribe(self, callback: FaultCallback) -> None:
+        """Call back after every stop caused by a new fault
+
+        :callback: Called with position, new fault bits and raw status
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: FaultCallback) -> None:
+        """Stop calling back a subscriber
+
+        :callback: Previously subscribed callback
+        """
+        self._subscribers.remove(callback)
+
+    def poll(self) -> List[int]:
+        """Read Status of every device once, stop on new faults
+
+        :returns: Positions with new faults
+        """
+        chain = self._chain
+        start = time.perf_counter()
+
+        if self._last_poll is not None:
+            self.poll_interval.add(start - self._last_poll)
+
+        self._last_poll = start
+
+        with self._safety(), chain._lock:
+            responses = [chain._pllwrite(frame) for frame in self._read_frames]
+        detected = time.perf_counter()
+
+        self.polls += 1
+        self.read_latency.add(detected - start)
+
+        msb, lsb = responses[1], responses[2]
+        statuses = [(high << 8) | low for high, low in zip(msb, lsb)]
+        self.statuses = statuses
+
+        faulted = []
+        new_faults = []
+
+        for position, status in enumerate(statuses):
+            mask = self._fault_masks[position]
+            faults = (~status & mask.active_low) \
+                | (status & mask.active_high)
+            new = faults & ~self._faults[position]
+            self._faults[position] = faults
+
+            if new:
+                faulted.append(position)
+                new_faults.append(new)
+
+        if not faulted:
+            return faulted
+
+        if self._stop_scope == StopScope.Chain:
+            stop_frame = self._chain_stop_frame
+        else:
+            stop_frame = [Command.Nop] * len(statuses)
+
+            for position in faulted:
+                stop_frame[position] = self._stop_command
+
+        with self._safety(), chain._lock:
+            chain._pllwrite(stop_frame)
+
+            # Stopped devices no longer run what elision remembers
+            if chain._memory is not None:
+                if self._stop_scope == StopScope.Chain:
+                    chain._memory.forget()
+                else:
+                    for position in faulted:
+                        chain._memory.forget(position)
+
+        self.stop_latency.add(time.perf_counter() - detected)
+        self.stops += 1
+
+        for position, new in zip(faulted, new_faults):
+            for callback in list(self._subscribers):
+                callback(position, new, statuses[position])
+
+        return faulted
+
+    def _safety(self) -> ContextManager[Any]:
+        """Tag the watchdog's traffic as Safety on a scheduled bus"""
+        lock = self._chain._lock
+
+        if isinstance(lock, BusScheduler):
+            return lock.traffic(TrafficClass.Safety)
+
+        return nullcontext()
+
+    def clearFaults(self) -> List[int]:
+        """Clear the latched alarm flags of every device with GetStatus
+        Faults still present will be reported again by the next poll
+
+        :returns: Status of every device before clearing
+        """
+        chain = self._chain
+        PayloadSize = Command.getPayloadSize(Command.StatusGet)
+        command = [Command.StatusGet] + [Command.Nop] * PayloadSize
+
+        with self._safety(), chain._lock:
+            chain.datasize = [PayloadSize] * chain._total_devices
+            statuses = chain.runCommands([command] * chain._total_devices)
+
+        for position in range(len(self._faults)):
+            self._faults[position] = 0
+
+        return statuses
+
+    def getWorstCaseSeconds(self) -> float:
+        """Worst-case time from a fault appearing until the stop frame
+        A fault may appear right after a read, so it takes up to one
+        poll interval plus a read to detect, then the stop itself
+
+        :returns: Observed worst case in seconds
+        """
+        interval = max(self.poll_interval.max, self._period)
+
+        return interval + self.read_latency.max + self.stop_latency.max
+
+    def getReport(self) -> str:
+        """Render latency statistics as text
+
+        :returns: Human-readable report
+        """
+        lines = [
+            f'polls: {self.polls}, stops: {self.stops}',
+            f'worst-case detect-to-stop: '
+            f'{self.getWorstCaseSeconds() * 1e3:.3f} ms',
+        ]
+
+        for name, stats in (
+                ('poll interval', self.poll_interval),
+                ('status read', self.read_latency),
+                ('stop frame', self.stop_latency)):
+            summary = stats.getSummary()
+            lines.append(
+                f'{name}: mean {summary["mean"] * 1e3:.3f} ms, '
+                f'p99 {summary["p99"] * 1e3:.3f} ms, '
+                f'max {summary["max"] * 1e3:.3f} ms'
+            )
+
+        return '\n'.join(lines)
+
+    def start(self) -> None:
+        """Start polling in a background thread"""
+        assert self._thread is None, 'Watchdog already running'
+
+        self._running.set()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='stspin-watchdog',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._running.clear()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Poll at a fixed rate until stopped"""
+        next_poll = time.perf_counter()
+
+        while self._running.is_set():
+            self.poll()
+
+            next_poll += self._period
+            delay = next_poll - time.perf_counter()
+
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Overran, do not try to catch up with a burst of polls
+                next_poll = time.perf_counter()
@@ -0,0 +1,319 @@
+import threading
+import time
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+from typing_extensions import (
+    Final,
+)
+from contextlib import contextmanager
+
+from .constants import (
+    Command,
+    Constant,
+    Register,
+)
+from .frames import CommandLength
+from .instrument import instrumentMethods
+
+UnattributedOperation: Final = '<unattributed>'
+
+
+class WireTimeModel:
+    """Theoretical SPI bus time of chain operations
+
+    Every transfer clocks one byte through each device in the chain,
+    followed by a chip select deassert gap so the devices latch it.
+    """
+
+    def __init__(
+            self, total_devices: int,
+            spi_speed_hz: int = Constant.SpiSpeedHz,
+            cs_gap_seconds: float = Constant.CsDisableSeconds,
+        ) -> None:
+        """
+        :total_devices: Total number of devices in chain
+        :spi_speed_hz: SPI clock frequency
+        :cs_gap_seconds: Time chip select stays deasserted between frames
+        """
+        assert total_devices > 0
+        assert spi_speed_hz > 0
+        assert cs_gap_seconds >= 0
+
+        self._total_devices: Final  = total_devices
+        self._spi_speed_hz: Final   = spi_speed_hz
+        self._cs_gap_seconds: Final = cs_gap_seconds
+
+        self._frame_seconds: Final = \
+            total_devices * 8 / spi_speed_hz + cs_gap_seconds
+
+    @classmethod
+    def fromChain(
+            cls, chain: Any,
+            cs_gap_seconds: float = Constant.CsDisableSeconds,
+        ) -> 'WireTimeModel':
+        """Create a model matching a SpinChain's length and clock
+
+        :chain: SpinChain to model
+        :cs_gap_seconds: Time chip select stays deasserted between frames
+        :returns: Model for the chain
+        """
+        return cls(
+            chain._total_devices,
+            chain._spi_speed_hz,
+            cs_gap_seconds,
+        )
+
+    def getFrameSeconds(self, frames: int = 1) -> float:
+        """Bus time of a number of full-chain transfers
+
+        :frames: Number of transfers of total_devices bytes each
+        :returns: Time in seconds
+        """
+        return frames * self._frame_seconds
+
+    def getCommandSeconds(self, command: int) -> float:
+        """Bus time of one command sent to a single device
+        All other devices receive NOPs for the duration
+
+        :command: Command byte, including any ORed flags
+        :returns: Time in seconds
+        """
+        return self.getFrameSeconds(CommandLength[command])
+
+    def getRegisterSeconds(self, register: int) -> float:
+        """Bus time of a single-device register read or write
+
+        :register: Register to access
+        :returns: Time in seconds
+        """
+        return self.getFrameSeconds(1 + Register.getSize(register))
+
+    def getChainSeconds(self, commands: Sequence[Sequence[int]]) -> float:
+        """Bus time of a chain-wide frame set, as sent by runCommands
+
+        :commands: Per-device command bytes, indexed by position
+        :returns: Time in seconds
+        """
+        frames = max([len(command) for command in commands] + [1])
+
+        return self.getFrameSeconds(frames)
+
+
+class OperationStats:
+    """Accumulated bus statistics of a single operation"""
+
+    def __init__(self, name: str) -> None:
+        self.name: Final            = name
+        self.calls                  = 0
+        self.frames                 = 0
+        self.bytes                  = 0
+        self.useful_bytes           = 0
+        self.wire_seconds           = 0.0
+        self.transfer_seconds       = 0.0
+        self.wall_seconds           = 0.0
+
+    @property
+    def padding_bytes(self) -> int:
+        """Bytes that were only NOP padding for idle devices"""
+        return self.bytes - self.useful_bytes
+
+    @property
+    def syscall_seconds(self) -> float:
+        """Time spent inside the transfer function beyond the wire time"""
+        return max(0.0, self.transfer_seconds - self.wire_seconds)
+
+    @property
+    def python_seconds(self) -> float:
+        """Time spent outside the transfer function"""
+        return max(0.0, self.wall_seconds - self.transfer_seconds)
+
+    @property
+    def efficiency(self) -> float:
+        """Ratio of useful wire time to measured wall time"""
+        if not self.wall_seconds or not self.bytes:
+            return 0.0
+
+        useful = self.wire_seconds * self.useful_bytes / self.bytes
+
+        return useful / self.wall_seconds
+
+
+class WireProfiler:
+    """Compare theoretical bus time against measured time per operation
+
+    Operations are the public methods of profiled chains and devices.
+    Calls nested inside an operation are accounted to the outermost one.
+    """
+
+    def __init__(self, model: WireTimeModel) -> None:
+        """
+        :model: Wire time model of the profiled chain
+        """
+        self._model: Final = model
+        self._stats: Dict[str, OperationStats] = {}
+        self._stats_lock: Final = threading.Lock()
+        self._context: Final = threading.local()
+
+        # Command bytes still expected by each position
+        self._remaining = [0] * model._total_devices
+
+    def attach(self, target: Any) -> None:
+        """Profile a SpinChain or SpinDevice
+        Attach a chain before creating its devices,
+        so they share the profiled transfer function
+
+        :target: SpinChain or SpinDevice instance
+        """
+        if getattr(target._spi_transfer, '_profiler', None) is not self:
+            target._spi_transfer = self.wrapTransfer(target._spi_transfer)
+
+        instrumentMethods(target, self._wrapOperation)
+
+    def wrapTransfer(
+            self, spi_transfer: Callable[[List[int]], List[int]],
+        ) -> Callable[[List[int]], List[int]]:
+        """Wrap a SPI transfer function so every frame is accounted
+
+        :spi_transfer: Function behaving like spidev.xfer2
+        :returns: Wrapped transfer function
+        """
+        def profiledTransfer(buffer: List[int]) -> List[int]:
+            start = time.perf_counter()
+            response = spi_transfer(buffer)
+            elapsed = time.perf_counter() - start
+
+            self._accountFrame(buffer, elapsed)
+
+            return response
+
+        profiledTransfer._profiler = self  # type: ignore
+
+        return profiledTransfer
+
+    @contextmanager
+    def operation(self, name: str) -> Iterator[None]:
+        """Account everything inside the block to a named operation
+
+        :name: Operation name shown in the report
+        """
+        depth = getattr(self._context, 'depth', 0)
+
+        if depth:
+            yield
+            return
+
+        self._context.depth = 1
+        self._context.name = name
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._context.depth = 0
+
+            with self._stats_lock:
+                stats = self._getStats(name)
+                stats.calls += 1
+                stats.wall_seconds += elapsed
+
+    def getReport(self) -> List[OperationStats]:
+        """Get collected statistics, most expensive operation first
+
+        :returns: Statistics per operation
+        """
+        with self._stats_lock:
+            report = list(self._stats.values())
+
+        return sorted(report, key=lambda s: s.wall_seconds, reverse=True)
+
+    def formatReport(self) -> str:
+        """Render collected statistics as a text table
+
+        :returns: Table with one line per operation
+        """
+        header = (
+            f'{"operation":<28} {"calls":>7} {"frames":>8} '
+            f'{"bytes":>9} {"useful":>9} {"padding":>9} '
+            f'{"wire ms":>9} {"syscall ms":>10} {"python ms":>10} '
+            f'{"eff %":>6}'
+        )
+        lines = [header]
+
+        for s in self.getReport():
+            lines.append(
+                f'{s.name:<28} {s.calls:>7} {s.frames:>8} '
+                f'{s.bytes:>9} {s.useful_bytes:>9} {s.padding_bytes:>9} '
+                f'{s.wire_seconds * 1e3:>9.3f} '
+                f'{s.syscall_seconds * 1e3:>10.3f} '
+                f'{s.python_seconds * 1e3:>10.3f} '
+                f'{s.efficiency * 100:>6.1f}'
+            )
+
+        return '\n'.join(lines)
+
+    def reset(self) -> None:
+        """Discard all collected statistics"""
+        with self._stats_lock:
+            self._stats = {}
+
+    def _wrapOperation(self, name: str, method: Callable) -> Callable:
+        """Wrap a bound method so each call is accounted as an operation
+        """
+        def profiledMethod(*args, **kwargs):
+            with self.operation(name):
+                return method(*args, **kwargs)
+
+        return profiledMethod
+
+    def _getStats(self, name: str) -> OperationStats:
+        """Get or create the statistics of an operation
+        Caller must hold _stats_lock
+        """
+        stats = self._stats.get(name)
+
+        if stats is None:
+            stats = self._stats[name] = OperationStats(name)
+
+        return stats
+
+    def _accountFrame(self, buffer: List[int], elapsed: float) -> None:
+        """Account a single transfer to the current operation
+
+        :buffer: Bytes sent, indexed by position
+        :elapsed: Time spent in the transfer function
+        """
+        useful = 0
+
+        with self._stats_lock:
+            remaining = self._remaining
+
+            for position, data_byte in enumerate(buffer[:len(remaining)]):
+                if remaining[position]:
+                    remaining[position] -= 1
+                    useful += 1
+
+                elif Command.Nop != data_byte:
+                    remaining[position] = CommandLength[data_byte] - 1
+                    useful += 1
+
+            if getattr(self._context, 'depth', 0):
+                stats = self._getStats(self._context.name)
+            else:
+                stats = self._getStats(UnattributedOperation)
+                stats.calls += 1
+                stats.wall_seconds += elapsed
+
+            stats.frames += 1
+            stats.bytes += len(buffer)
+            stats.useful_bytes += useful
+            stats.wire_seconds += self._model.getFrameSeconds()
+            stats.transfer_seconds += elapsed
@@ -0,0 +1,118 @@
+import unittest
+
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
+
+from stspin import (
+    Register,
+    SpinChain,
+)
+from stspin.calibration import ThresholdCalibrator
+from stspin.constants import MotorStatus
+from stspin.fake import FakeTransport
+from stspin.families import (
+    DeviceFamily,
+    L6470,
+    L6480,
+)
+
+
+class TrippingTransport(FakeTransport):
+    """Raises alarm flags while running below a threshold"""
+
+    def __init__(
+            self, limits: List[Dict[int, int]],
+            families: Optional[Sequence[DeviceFamily]] = None,
+        ) -> None:
+        super().__init__(len(limits), families)
+        self.limits = limits
+
+    def __call__(self, buffer: List[int]) -> List[int]:
+        response = super().__call__(buffer)
+
+        for device, limits in zip(self.devices, self.limits):
+            registers = device.registers
+            layout = device._codec.status
+
+            if not registers[Register.Status] & MotorStatus.ConstantSpeed:
+                continue
+
+            if registers[Register.ThStl] < limits[Register.ThStl]:
+                registers[Register.Status] &= ~layout.not_step_loss_a
+
+            if registers[Register.ThOcd] < limits[Register.ThOcd]:
+                registers[Register.Status] &= ~layout.not_overcurrent
+
+        return response
+
+
+class TestThresholdCalibrator(unittest.TestCase):
+
+    def testParallelSearch(self) -> None:
+        limits = [
+            {Register.ThStl: 40, Register.ThOcd: 3},
+            {Register.ThStl: 0, Register.ThOcd: 15},
+            {Register.ThStl: 127, Register.ThOcd: 9},
+        ]
+        fake = TrippingTransport(limits)
+        chain = SpinChain(3, spi_transfer=fake)
+        calibrator = ThresholdCalibrator(
+            chain, settle_seconds=0, dwell_seconds=0, margin=2,
+        )
+
+        profile = calibrator.calibrate()
+
+        self.assertEqual(profile.values, [
+            {Register.ThStl: 42, Register.ThOcd: 5},
+            {Register.ThStl: 2, Register.ThOcd: 15},
+            {Register.ThStl: 127, Register.ThOcd: 11},
+        ])
+        self.assertEqual(profile.failed, [[], [], []])
+        # Seven steps for ThStl plus a final check, four plus one for ThOcd
+        self.assertEqual(calibrator.steps, 13)
+
+        # Original thresholds are back, motors stopped
+        self.assertEqual(chain.allGetRegister(Register.ThStl), [0x40] * 3)
+        self.assertEqual(chain.allGetRegister(Register.ThOcd), [0x8] * 3)
+
+        profile.apply(chain)
+
+        self.assertEqual(chain.allGetRegister(Register.ThStl), [42, 2, 127])
+        self.assertAlmostEqual(profile.units[0][Register.ThOcd], 2.25)
+
+    def testTripAtMaximumFails(self) -> None:
+        limits = [{Register.ThStl: 200, Register.ThOcd: 0}] * 2
+        chain = SpinChain(2, spi_transfer=TrippingTransport(limits))
+
+        profile = ThresholdCalibrator(
+            chain, positions=[1], settle_seconds=0, dwell_seconds=0,
+        ).calibrate([Register.ThStl])
+
+        self.assertEqual(profile.failed, [[], [Register.ThStl]])
+        self.assertEqual(profile.values, [{}, {}])
+        self.assertIn('failed', profile.toDict()['devices'][1])
+
+    def testL6480StatusLayout(self) -> None:
+        limits = [
+            {Register.ThStl: 40, Register.ThOcd: 3},
+            {Register.ThStl: 20, Register.ThOcd: 12},
+        ]
+        families = [L6470, L6480]
+        fake = TrippingTransport(limits, families)
+        chain = SpinChain(2, spi_transfer=fake, families=families)
+
+        profile = ThresholdCalibrator(
+            chain, settle_seconds=0, dwell_seconds=0, margin=0,
+        ).calibrate()
+
+        # An L6470 reading of the L6480 Status would see its thermal
+        # status bit as overcurrent and miss the stall flags
+        self.assertEqual(profile.values, [
+            {Register.ThStl: 40, Register.ThOcd: 3},
+            {Register.ThStl: 20, Register.ThOcd: 12},
+        ])
+        self.assertEqual(profile.failed, [[], []])
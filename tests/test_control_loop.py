@@ -0,0 +1,132 @@
+import threading
+import time
+import unittest
+
+from typing import (
+    Any,
+    List,
+)
+
+from stspin import (
+    ControlLoop,
+    Register,
+    SpinChain,
+)
+from stspin.control_loop import (
+    ChainState,
+    LoopCommands,
+    SkipPolicy,
+    StopHard,
+)
+from stspin.fake import FakeTransport
+from stspin.families import L6470, L6474
+
+
+class TestControlLoop(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = FakeTransport(2)
+        self.chain = SpinChain(2, spi_transfer=self.fake)
+        self.ticks: List[int] = []
+
+    def _callback(self, state: ChainState, tick: int) -> LoopCommands:
+        self.ticks.append(tick)
+
+        return [100.0 * (tick + 1), StopHard]
+
+    def testTickRate(self) -> None:
+        loop = ControlLoop(self.chain, 0.01, self._callback)
+        start = time.perf_counter()
+
+        loop.run(ticks=5)
+
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(self.ticks, [0, 1, 2, 3, 4])
+        self.assertEqual(loop.ticks, 5)
+        # Ticks start on a 10 ms grid, the first one right away
+        self.assertGreaterEqual(elapsed, 0.04)
+        self.assertEqual(loop.frame_sets, 5)
+        self.assertEqual(loop.getReport()['jitter']['count'], 5)
+
+        state = loop.readState()
+
+        self.assertAlmostEqual(state.speed[0], 500.0, places=0)
+        self.assertEqual(state.speed[1], 0.0)
+        self.assertEqual(
+            self.chain.allGetRegister(Register.Speed)[1], 0,
+        )
+
+    def testDeviceWithoutSpeed(self) -> None:
+        families = [L6470, L6474]
+        fake = FakeTransport(2, families)
+        chain = SpinChain(2, spi_transfer=fake, families=families)
+        chain.allRun([100.0, None])
+        fake.devices[1].registers[Register.PosAbs] = (1 << 22) - 5
+
+        state = ControlLoop(chain, 0.01, self._callback).readState()
+
+        self.assertAlmostEqual(state.speed[0], 100.0, places=0)
+        self.assertIsNone(state.speed[1])
+        self.assertEqual(state.position[1], -5)
+
+    def testOverrunsSkipTicks(self) -> None:
+        def slow(state: ChainState, tick: int) -> LoopCommands:
+            time.sleep(0.025)
+            return None
+
+        loop = ControlLoop(self.chain, 0.01, slow, SkipPolicy.Skip)
+        loop.run(ticks=2)
+
+        self.assertEqual(loop.overruns, 2)
+        self.assertGreaterEqual(loop.skipped, 2)
+        # Nothing to send
+        self.assertEqual(loop.frame_sets, 0)
+
+    def testSendByPosition(self) -> None:
+        self.chain.allRun([100.0, 100.0])
+        loop = ControlLoop(self.chain, 0.01, self._callback)
+
+        self.assertFalse(loop.send({0: None}))
+        self.assertTrue(loop.send({1: StopHard}))
+        self.assertEqual(loop.frame_sets, 1)
+
+        speeds = self.chain.allGetRegister(Register.Speed)
+
+        self.assertNotEqual(speeds[0], 0)
+        self.assertEqual(speeds[1], 0)
+
+    def testStopInBackground(self) -> None:
+        loop = ControlLoop(self.chain, 0.005, self._callback)
+        loop.start()
+
+        while len(self.ticks) < 3:
+            time.sleep(0.001)
+
+        loop.stop()
+        ticks = loop.ticks
+        time.sleep(0.02)
+
+        self.assertEqual(loop.ticks, ticks)
+
+    def testStopRightAfterStart(self) -> None:
+        loop = ControlLoop(self.chain, 0.001, self._callback)
+        run = loop._run
+        gate = threading.Event()
+
+        def delayedRun(*args: Any) -> None:
+            gate.wait()
+            run(*args)
+
+        # Hold the thread back until stop() has been called
+        loop._run = delayedRun  # type: ignore
+        loop.start()
+
+        stopper = threading.Thread(target=loop.stop, daemon=True)
+        stopper.start()
+        time.sleep(0.01)
+        gate.set()
+        stopper.join(1.0)
+
+        self.assertFalse(stopper.is_alive())
+        self.assertEqual(loop.ticks, 0)
@@ -0,0 +1,84 @@
+import unittest
+
+from typing import (
+    List,
+)
+
+from stspin import (
+    Register,
+    SpinChain,
+)
+from stspin.discovery import (
+    AlignmentGuard,
+    TopologyError,
+    discoverTopology,
+    measureChainLength,
+    verifyAlignment,
+)
+from stspin.fake import FakeTransport
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def testMeasuresRealLength(self) -> None:
+        for total_devices in (1, 3, 7):
+            fake = FakeTransport(total_devices)
+            self.assertEqual(measureChainLength(fake), total_devices)
+
+    def testNoChainFound(self) -> None:
+        with self.assertRaises(TopologyError):
+            measureChainLength(FakeTransport(5), max_devices=4)
+
+    def testDiscoverChecksPositionsAndRestoresScratch(self) -> None:
+        fake = FakeTransport(3)
+        chain = SpinChain(3, spi_transfer=fake)
+        chain.allSetRegister(Register.Mark, [1, 2, 3])
+
+        topology = discoverTopology(chain)
+
+        self.assertTrue(topology.matches)
+        self.assertEqual(topology.responding, [True] * 3)
+        self.assertEqual(chain.allGetRegister(Register.Mark), [1, 2, 3])
+
+    def testDiscoverWrongCount(self) -> None:
+        chain = SpinChain(2, spi_transfer=FakeTransport(3))
+
+        topology = discoverTopology(chain)
+
+        self.assertFalse(topology.matches)
+        self.assertEqual(topology.total_devices, 3)
+        self.assertFalse(verifyAlignment(chain))
+
+        chain = SpinChain(3, spi_transfer=FakeTransport(3))
+
+        self.assertTrue(verifyAlignment(chain))
+
+    def testGuardPassesFramesThrough(self) -> None:
+        fake = FakeTransport(2)
+        chain = SpinChain(2, spi_transfer=fake)
+        guard = AlignmentGuard(chain)
+        guard.attach()
+
+        chain.allSetRegister(Register.Mark, [5, 6])
+
+        self.assertEqual(chain.allGetRegister(Register.Mark), [5, 6])
+        self.assertEqual(guard.failures, 0)
+        self.assertEqual(guard.checks, fake.transfers)
+
+    def testGuardCatchesMisalignmentOnFirstPoll(self) -> None:
+        misaligned: List[List[int]] = []
+        chain = SpinChain(2, spi_transfer=FakeTransport(3))
+        guard = AlignmentGuard(chain, misaligned.append)
+        guard.attach()
+
+        chain.allGetRegister(Register.Status)
+
+        self.assertEqual(guard.failures, guard.checks)
+        self.assertTrue(misaligned)
+
+        guard.detach()
+        guard = AlignmentGuard(chain)
+        guard.attach()
+
+        with self.assertRaises(TopologyError):
+            chain.allGetRegister(Register.Status)
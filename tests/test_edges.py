@@ -0,0 +1,114 @@
+import threading
+import time
+import unittest
+
+from stspin import (
+    Register,
+    SpinChain,
+)
+from stspin.constants import Status
+from stspin.edges import (
+    EdgeLine,
+    FakeEdgeSource,
+    _GetLineEventIoctl,
+    _GetLineValuesIoctl,
+)
+from stspin.fake import FakeTransport
+from stspin.families import L6470, L6472, L6480
+
+
+def setLater(edges: FakeEdgeSource, line: int, level: bool) -> threading.Thread:
+    def drive() -> None:
+        time.sleep(0.01)
+        edges.setLevel(line, level)
+
+    thread = threading.Thread(target=drive)
+    thread.start()
+
+    return thread
+
+
+class TestEdgeWaits(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = FakeTransport(2)
+        self.edges = FakeEdgeSource()
+        self.chain = SpinChain(
+            2, spi_transfer=self.fake, edge_source=self.edges,
+        )
+
+    def testWaitIdleWithoutSpi(self) -> None:
+        self.edges.setLevel(EdgeLine.Busy, False)
+        thread = setLater(self.edges, EdgeLine.Busy, True)
+
+        self.assertTrue(self.chain.waitIdle(timeout=1))
+        thread.join()
+
+        self.assertEqual(self.fake.transfers, 0)
+
+    def testWaitIdleTimeout(self) -> None:
+        self.edges.setLevel(EdgeLine.Busy, False)
+        # A pulse leaves the line low, so it is only another check
+        self.edges.setLevel(EdgeLine.Busy, True)
+        self.edges.setLevel(EdgeLine.Busy, False)
+
+        self.assertFalse(self.chain.waitIdle(timeout=0.01))
+        self.assertEqual(self.fake.transfers, 0)
+
+    def testWaitAlarmReadsStatusOnce(self) -> None:
+        self.fake.devices[1].registers[Register.Status] &= ~Status.NotOvercurrent
+        thread = setLater(self.edges, EdgeLine.Flag, False)
+
+        statuses = self.chain.waitAlarm(timeout=1)
+        thread.join()
+
+        self.assertIsNotNone(statuses)
+        self.assertFalse(statuses[1] & Status.NotOvercurrent)
+        self.assertTrue(statuses[0] & Status.NotOvercurrent)
+        # One GetStatus frame set, which cleared the flag
+        self.assertEqual(self.fake.transfers, 3)
+        self.assertTrue(
+            self.fake.devices[1].registers[Register.Status]
+            & Status.NotOvercurrent
+        )
+
+    def testWaitAlarmTimeout(self) -> None:
+        self.assertIsNone(self.chain.waitAlarm(timeout=0.01))
+        self.assertEqual(self.fake.transfers, 0)
+
+    def testPollingWithoutEdgeSource(self) -> None:
+        fake = FakeTransport(2)
+        chain = SpinChain(2, spi_transfer=fake)
+
+        self.assertTrue(chain.waitIdle(timeout=0))
+        self.assertIsNone(chain.waitAlarm(timeout=0, poll_seconds=0))
+
+        fake.devices[0].registers[Register.Status] |= Status.CmdWrong
+
+        statuses = chain.waitAlarm(timeout=0)
+
+        self.assertTrue(statuses[0] & Status.CmdWrong)
+
+    def testPollingMixedFamilies(self) -> None:
+        families = [L6470, L6480, L6472]
+        fake = FakeTransport(3, families)
+        chain = SpinChain(3, spi_transfer=fake, families=families)
+
+        # Healthy devices in their own Status layouts
+        self.assertIsNone(chain.waitAlarm(timeout=0, poll_seconds=0))
+
+        registers = fake.devices[1].registers
+        registers[Register.Status] &= ~L6480.status.not_overcurrent
+        statuses = chain.waitAlarm(timeout=0)
+
+        self.assertIsNotNone(statuses)
+        self.assertFalse(statuses[1] & L6480.status.not_overcurrent)
+
+        # Thermal warning in the L6480 two-bit thermal status
+        registers[Register.Status] |= L6480.status.thermal_status & 0x0800
+
+        self.assertIsNotNone(chain.waitAlarm(timeout=0))
+
+    def testGpioIoctlCodes(self) -> None:
+        self.assertEqual(_GetLineEventIoctl, 0xC030B404)
+        self.assertEqual(_GetLineValuesIoctl, 0xC040B408)
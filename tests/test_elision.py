@@ -0,0 +1,153 @@
+import unittest
+
+from stspin import (
+    Command,
+    Register,
+    SpinChain,
+)
+from stspin.constants import MotorStatus, Status
+from stspin.elision import CommandMemory
+from stspin.fake import FakeTransport
+from stspin.families import (
+    L6470,
+    L6480,
+    getCodec,
+)
+from stspin.frames import encodeParamSet, encodeRun
+
+
+class TestCommandMemory(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = FakeTransport(2)
+        self.chain = SpinChain(2, spi_transfer=self.fake)
+        memory = self.chain.setElision(True)
+
+        assert memory is not None
+        self.memory: CommandMemory = memory
+
+    def testIdenticalRunDropped(self) -> None:
+        self.chain.allRun([100.0, 200.0])
+        transfers = self.fake.transfers
+
+        self.chain.allRun([100.0, 200.0])
+
+        self.assertEqual(self.fake.transfers, transfers)
+        self.assertEqual(self.memory.elided_commands, [1, 1])
+        self.assertEqual(self.memory.getReport()['elided_frame_sets'], 1)
+
+    def testChangedRunSent(self) -> None:
+        self.chain.allRun([100.0, 200.0])
+        transfers = self.fake.transfers
+
+        # Same speed, other direction on the first device
+        self.chain.allRun([-100.0, 250.0])
+
+        self.assertGreater(self.fake.transfers, transfers)
+        self.assertEqual(self.memory.elided_commands, [0, 0])
+
+    def testPartialFrameSetKeepsChangedDevices(self) -> None:
+        self.chain.allRun([100.0, 200.0])
+        self.chain.allRun([100.0, 300.0])
+
+        self.assertEqual(self.memory.elided_commands, [1, 0])
+        self.assertEqual(self.memory.elided_frame_sets, 0)
+
+        speed = self.fake.devices[1].registers[Register.Speed]
+
+        self.assertAlmostEqual(
+            getCodec(L6470).toUnits(Register.Speed, speed), 300.0, places=0,
+        )
+
+    def testIdenticalRegisterWriteDropped(self) -> None:
+        self.chain.allSetRegister(Register.KvalRun, [0x30, 0x40])
+        transfers = self.fake.transfers
+
+        self.chain.allSetRegister(Register.KvalRun, [0x30, 0x40])
+
+        self.assertEqual(self.fake.transfers, transfers)
+
+        self.chain.allSetRegister(Register.KvalRun, [0x30, 0x41])
+
+        self.assertEqual(self.memory.elided_commands, [2, 1])
+        self.assertEqual(
+            self.fake.devices[1].registers[Register.KvalRun], 0x41,
+        )
+
+    def testReadValueRemembered(self) -> None:
+        values = self.chain.allGetRegister(Register.Acc)
+        transfers = self.fake.transfers
+
+        self.chain.allSetRegister(Register.Acc, values)
+
+        self.assertEqual(self.fake.transfers, transfers)
+
+    def testStoppedStatusClearsRun(self) -> None:
+        self.chain.allRun([100.0, 200.0])
+
+        # Device 0 stalls and stops, device 1 keeps running
+        device = self.fake.devices[0]
+        device.registers[Register.Status] &= \
+            ~(Status.NotStepLossA | MotorStatus.ConstantSpeed)
+        device.registers[Register.Speed] = 0
+        self.chain.allClearStatus()
+
+        self.chain.allRun([100.0, 200.0])
+
+        self.assertEqual(self.memory.elided_commands, [0, 1])
+        self.assertGreater(device.registers[Register.Speed], 0)
+
+    def testMotorStoppedClearsRun(self) -> None:
+        self.chain.allRun([100.0, 200.0])
+        self.fake.devices[1].registers[Register.Status] &= \
+            ~MotorStatus.ConstantSpeed
+        self.chain.allGetRegister(Register.Status)
+
+        self.chain.allRun([100.0, 200.0])
+
+        self.assertEqual(self.memory.elided_commands, [1, 0])
+
+    def testStatusLayoutPerFamily(self) -> None:
+        memory = CommandMemory(2, [getCodec(L6470), getCodec(L6480)])
+        run = encodeRun(100.0)
+        running = MotorStatus.ConstantSpeed | Status.NotBusy
+
+        for position, layout in enumerate((L6470.status, L6480.status)):
+            memory.observe(
+                [run if p == position else None for p in range(2)],
+                [[0] * len(run)] * 2,
+            )
+            memory.observeStatus(position, running | layout.active_low)
+
+            self.assertTrue(memory.isRedundant(position, run))
+
+            memory.observeStatus(
+                position,
+                running | layout.active_low & ~layout.not_overcurrent,
+            )
+
+            self.assertFalse(memory.isRedundant(position, run))
+
+        memory.observe([None, run], [[0] * len(run)] * 2)
+        memory.observeStatus(
+            1, running | L6480.status.active_low | 0x1000,
+        )
+
+        # Thermal shutdown on the L6480
+        self.assertFalse(memory.isRedundant(1, run))
+
+    def testResetForgetsRegisters(self) -> None:
+        memory = CommandMemory(1)
+        write = encodeParamSet(Register.Acc, 0x20)
+
+        memory.observe([write], [[0] * len(write)])
+
+        self.assertTrue(memory.isRedundant(0, write))
+
+        memory.observe([[Command.ResetDevice]], [[0]])
+
+        self.assertFalse(memory.isRedundant(0, write))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import unittest
+
+from stspin import (
+    Register,
+    SpinChain,
+)
+from stspin.constants import Status
+from stspin.bench import ChainBench, Workload
+from stspin.fake import FakeTransport
+from stspin.families import L6470, L6480
+
+
+class TestFakeTransport(unittest.TestCase):
+
+    def testRegistersReadBackPerPosition(self) -> None:
+        fake = FakeTransport(3)
+        chain = SpinChain(3, spi_transfer=fake)
+
+        chain.allSetRegister(Register.Mark, [1, None, 0x3FFFFF])
+
+        self.assertEqual(chain.allGetRegister(Register.Mark), [1, 0, 0x3FFFFF])
+        self.assertEqual(chain.allGetRegister(Register.StepMode), [7, 7, 7])
+        self.assertEqual(fake.devices[2].registers[Register.Mark], 0x3FFFFF)
+
+    def testMotionCommands(self) -> None:
+        chain = SpinChain(2, spi_transfer=FakeTransport(2))
+
+        chain.allMove([-100, 50])
+        chain.allRun([None, 10])
+
+        self.assertEqual(chain.allGetPosition(), [-100, 50])
+        self.assertFalse(chain.isOneBusy())
+        self.assertEqual(
+            chain.allGetRegister(Register.Status)[1] & Status.HiZ, 0
+        )
+
+    def testGetStatusClearsLatchedFlags(self) -> None:
+        fake = FakeTransport(1)
+        chain = SpinChain(1, spi_transfer=fake)
+        fake.devices[0].registers[Register.Status] |= Status.CmdWrong
+
+        self.assertTrue(chain.allClearStatus()[0] & Status.CmdWrong)
+        self.assertFalse(
+            chain.allGetRegister(Register.Status)[0] & Status.CmdWrong
+        )
+
+    def testShortTransfersMisalign(self) -> None:
+        fake = FakeTransport(3)
+        fake.devices[1].registers[Register.Mark] = 0x123456
+
+        # A chain believed to be one device short shifts its commands one
+        # position further, so device 0 only sees NOPs
+        chain = SpinChain(2, spi_transfer=fake)
+
+        self.assertEqual(chain.allGetRegister(Register.Mark), [0, 0x123456])
+        self.assertEqual(fake.transfers, 4)
+        self.assertEqual(fake.bytes, 8)
+
+    def testMixedFamilies(self) -> None:
+        families = [L6470, L6480]
+        chain = SpinChain(
+            2,
+            spi_transfer=FakeTransport(2, families),
+            families=families,
+        )
+
+        self.assertEqual(chain.allGetRegister(Register.Config), [0x2E88] * 2)
+
+
+class TestChainBench(unittest.TestCase):
+
+    def testReportCoversWorkloadsAndRestoresScratch(self) -> None:
+        fake = FakeTransport(2)
+        chain = SpinChain(2, spi_transfer=fake)
+        chain.allSetRegister(Register.Mark, [11, 22])
+
+        report = ChainBench(chain).run(Workload.All, seconds=0.01)
+
+        self.assertEqual(set(report['workloads']), set(Workload.All))
+
+        for result in report['workloads'].values():
+            self.assertGreater(result['ops'], 0)
+            self.assertGreater(result['bytes_per_second'], 0)
+            self.assertEqual(result['latency']['count'], result['ops'])
+
+        self.assertEqual(chain.allGetRegister(Register.Mark), [11, 22])
+        json.dumps(report)
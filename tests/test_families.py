@@ -0,0 +1,92 @@
+import unittest
+
+from stspin import (
+    Command,
+    Register,
+    SpinChain,
+)
+from stspin.fake import RecordingTransport
+from stspin.families import (
+    FamilyRegister,
+    L6470,
+    L6472,
+    L6474,
+    L6480,
+    getCodec,
+)
+from stspin.frames import CommandLength
+
+
+class TestFamilies(unittest.TestCase):
+
+    def testL6470MatchesGlobalTables(self) -> None:
+        codec = getCodec(L6470)
+
+        self.assertEqual(codec.command_length, CommandLength)
+
+        for register in (Register.Config, Register.Status, Register.Mark):
+            self.assertEqual(codec.address[register], register)
+            self.assertEqual(codec.size[register], Register.getSize(register))
+
+    def testL6480RelocatesConfigAndStatus(self) -> None:
+        codec = getCodec(L6480)
+
+        self.assertEqual(codec.encodeGet(Register.Status), [0x3B, 0, 0])
+        self.assertEqual(codec.address[FamilyRegister.GateCfg1], 0x18)
+        self.assertEqual(codec.command_length[Command.ParamGet | 0x19], 2)
+        self.assertEqual(codec.canonical[0x1A], Register.Config)
+
+    def testStatusLayouts(self) -> None:
+        l6470 = getCodec(L6470).status
+        l6480 = getCodec(L6480).status
+
+        self.assertEqual(l6470.not_overcurrent, 0x1000)
+        self.assertEqual(l6480.not_overcurrent, 0x2000)
+        self.assertEqual(l6480.not_step_loss_b, 0x8000)
+        self.assertFalse(l6480.active_low & l6480.thermal_status)
+        self.assertEqual(getCodec(L6474).status.not_step_loss_a, 0)
+
+    def testSignedAndUnits(self) -> None:
+        codec = getCodec(L6472)
+
+        self.assertEqual(
+            codec.encodeSet(Register.PosAbs, -1),
+            [Command.ParamSet | Register.PosAbs, 0x3F, 0xFF, 0xFF],
+        )
+        self.assertEqual(codec.decode(Register.Mark, [0x20, 0, 0]), -(1 << 21))
+        self.assertAlmostEqual(
+            codec.toUnits(FamilyRegister.TvalHold, 0x1F), 1.0,
+        )
+        self.assertEqual(codec.fromUnits(FamilyRegister.TvalHold, 1.0), 0x1F)
+        self.assertFalse(codec.supports(Register.KvalHold))
+
+        with self.assertRaises(KeyError):
+            codec.encodeGet(Register.KvalHold)
+
+    def testMixedChainTranslatesPerPosition(self) -> None:
+        transfer = RecordingTransport(0x12)
+        frames = transfer.frames
+
+        chain = SpinChain(
+            total_devices=3,
+            spi_transfer=transfer,
+            families=[L6470, L6480, L6474],
+        )
+        values = chain.allGetRegister(Register.Status)
+
+        self.assertEqual(frames[0], [
+            Command.ParamGet | 0x19,
+            Command.ParamGet | 0x1B,
+            Command.ParamGet | 0x19,
+        ])
+        self.assertEqual(values, [0x1212] * 3)
+
+        frames.clear()
+        self.assertEqual(
+            chain.allGetRegister(Register.Speed), [0x121212, 0x121212, None],
+        )
+        self.assertEqual(frames[0][2], Command.Nop)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from stspin import (
+    Command,
+    Register,
+    SpinChain,
+)
+from stspin.fake import (
+    FakeTransport,
+    RecordingTransport,
+)
+from stspin.families import (
+    L6470,
+    L6474,
+)
+
+
+class TestFields(unittest.TestCase):
+
+    def setUp(self) -> None:
+        families = [L6470, L6470, L6474]
+        fake = FakeTransport(3, families)
+
+        for device in fake.devices:
+            device.registers[Register.StepMode] = 0x70
+
+        transport = RecordingTransport(transfer=fake)
+        self.frames = transport.frames
+        self.chain = SpinChain(
+            total_devices=3,
+            spi_transfer=transport,
+            families=families,
+        )
+
+    def testDeviceFieldIsReadModifyWrite(self) -> None:
+        device = self.chain.create(1)
+
+        self.assertEqual(device.fields.StepMode.sync_sel, 7)
+
+        self.frames.clear()
+        device.fields.StepMode.step_sel = 7
+
+        self.assertEqual(len(self.frames), 4)
+        self.assertEqual(
+            [frame[1] for frame in self.frames[2:]],
+            [Command.ParamSet | Register.StepMode, 0x77],
+        )
+
+    def testBatchMergesEditsOfOneRegister(self) -> None:
+        device = self.chain.create(0)
+
+        with device.fields.batch():
+            device.fields.Config.sw_mode = 1
+            device.fields.Config.oc_sd = 0
+            device.fields.StepMode.step_sel = 3
+
+        # One read of both registers, then one write of both
+        self.assertEqual(len(self.frames), 5 + 5)
+        self.assertEqual(
+            [frame[0] for frame in self.frames[5:]],
+            [Command.ParamSet | Register.Config, 0x2E, 0x18,
+             Command.ParamSet | Register.StepMode, 0x73],
+        )
+
+    def testChainFieldIsOneReadAndOneWrite(self) -> None:
+        self.chain.fields.StepMode.step_sel = 7
+
+        self.assertEqual(len(self.frames), 2 + 2)
+        self.assertEqual(self.frames[2], [Command.ParamSet | 0x16] * 3)
+        # L6474 has no sync_en, its bit 7 is kept
+        self.assertEqual(self.frames[3], [0x77] * 3)
+        self.assertEqual(
+            self.chain.fields.StepMode.sync_en, [0, 0, None],
+        )
+
+    def testChainFieldPerPositionValues(self) -> None:
+        self.chain.fields.Config.osc_sel = [None, 0xF, None]
+
+        self.assertEqual(self.frames[0], [
+            Command.Nop, Command.ParamGet | Register.Config, Command.Nop,
+        ])
+        self.assertEqual(
+            [frame[1] for frame in self.frames[3:]],
+            [Command.ParamSet | Register.Config, 0x2E, 0x8F],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+
+from typing import (
+    List,
+)
+from unittest import mock
+
+from stspin import (
+    Command,
+    Constant,
+    Register,
+    SpinChain,
+)
+from stspin.constants import Status
+from stspin.fake import FakeTransport, RecordingTransport
+from stspin.gcode import (
+    GCodeInterpreter,
+    parseLine,
+)
+
+
+class TestGCode(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # Every device reports not busy
+        transfer = RecordingTransport(0xFF)
+        self.frames = transfer.frames
+
+        self.chain = SpinChain(total_devices=3, spi_transfer=transfer)
+        self.interpreter = GCodeInterpreter(
+            self.chain,
+            axes={'X': 0, 'Y': 2},
+            steps_per_unit={'X': 100.0, 'Y': 100.0},
+            max_speed={'X': 1000.0, 'Y': 500.0},
+            microsteps={'X': 1, 'Y': 1},
+            poll_seconds=0,
+        )
+
+    def testParseLine(self) -> None:
+        self.assertIsNone(parseLine('; only a comment'))
+        self.assertIsNone(parseLine(''))
+
+        parsed = parseLine('N10 g1 x1.5 Y-.25 (inline) F600 ; trailing*42')
+        self.assertEqual(parsed.codes, ['G1'])
+        self.assertEqual(parsed.words, {'X': 1.5, 'Y': -0.25, 'F': 600.0})
+
+        parsed = parseLine('G90 G0 X10')
+        self.assertEqual(parsed.codes, ['G90', 'G0'])
+
+        parsed = parseLine('M18 X Y')
+        self.assertEqual(parsed.codes, ['M18'])
+        self.assertEqual(parsed.words, {'X': 0.0, 'Y': 0.0})
+
+    def testTranslate(self) -> None:
+        blocks = list(self.interpreter.translate([
+            'G91',
+            'G1 X3 Y4 F300',
+            'X0',
+            'G90 G0 Y0',
+            'G92 X1',
+            'M18 Y',
+        ]))
+
+        self.assertEqual(len(blocks), 4)
+
+        move = blocks[0]
+        self.assertEqual(move.positions, [0, 2])
+        self.assertIsNone(move.lines[1])
+
+        # 5 units at 5 units/s: X runs 300 steps/s, Y 400 steps/s
+        x_speed = int(round(300 * Constant.SpsToMaxSpeed))
+        self.assertEqual(
+            move.lines[0][:3],
+            [Command.ParamSet | Register.SpeedMax, x_speed >> 8, x_speed & 0xFF]
+        )
+        self.assertEqual(move.lines[0][3:], [Command.GoTo, 0, 0x01, 0x2C])
+
+        rapid = blocks[1]
+        self.assertEqual(rapid.positions, [2])
+        self.assertEqual(rapid.lines[2][3:], [Command.GoTo, 0, 0, 0])
+
+        set_position = blocks[2]
+        self.assertEqual(
+            set_position.lines[0],
+            [Command.ParamSet | Register.PosAbs, 0, 0, 100]
+        )
+        self.assertIsNone(set_position.lines[2])
+
+        self.assertEqual(blocks[3].lines, [None, None, [Command.HiZSoft]])
+
+    def testExecute(self) -> None:
+        self.interpreter.execute(['G1 X1 F6000', 'G1 X2', 'M17'])
+
+        self.assertEqual(self.interpreter.blocks_sent, 3)
+        self.assertEqual(self.interpreter.lines_read, 3)
+        self.assertEqual(
+            self.frames[-1],
+            [Command.StopHard, Command.Nop, Command.StopHard]
+        )
+
+    def testNextAxisWaitsForPreviousBlock(self) -> None:
+        fake = FakeTransport(3)
+        chain = SpinChain(3, spi_transfer=fake)
+        interpreter = GCodeInterpreter(
+            chain,
+            axes={'X': 0, 'Y': 2},
+            steps_per_unit={'X': 100.0, 'Y': 100.0},
+            max_speed={'X': 1000.0, 'Y': 500.0},
+            microsteps={'X': 1, 'Y': 1},
+        )
+        runCommands = chain.runCommands
+        events: List[object] = []
+
+        def run(lines: List[object]) -> object:
+            positions = [p for p, line in enumerate(lines) if line]
+            events.append(positions)
+            response = runCommands(lines)
+
+            # Still moving until the next sleep
+            for position in positions:
+                registers = fake.devices[position].registers
+                registers[Register.Status] &= ~Status.NotBusy
+
+            return response
+
+        def sleep(seconds: float) -> None:
+            for device in fake.devices:
+                device.registers[Register.Status] |= Status.NotBusy
+
+            events.append('idle')
+
+        with mock.patch.object(chain, 'runCommands', run), \
+                mock.patch('stspin.gcode.time.sleep', sleep):
+            interpreter.execute(['G1 X10 F6000', 'G1 Y10'])
+
+        self.assertEqual(events, [[0], 'idle', [2]])
+
+    def testPollOncePerSleep(self) -> None:
+        interpreter = GCodeInterpreter(
+            self.chain,
+            axes={'X': 0},
+            steps_per_unit={'X': 100.0},
+            max_speed={'X': 1000.0},
+            microsteps={'X': 1},
+            lookahead=2,
+        )
+        # Busy on the first three polls of every block
+        busy = [True, True, True, False] * 6
+        lines_read = []
+
+        def isBusy() -> bool:
+            lines_read.append(interpreter.lines_read)
+            return busy.pop(0)
+
+        with mock.patch.object(interpreter, '_isBusy', isBusy), \
+                mock.patch('stspin.gcode.time.sleep') as sleep:
+            interpreter.execute(
+                ['G1 X1 F6000'] + [f'G1 X{x}' for x in range(2, 7)]
+            )
+
+        self.assertEqual(interpreter.blocks_sent, 6)
+        self.assertEqual(len(lines_read), 24)
+        self.assertEqual(sleep.call_count, 18)
+        # The lookahead is filled again before the second poll
+        self.assertEqual(lines_read[:2], [2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
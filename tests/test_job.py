@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from stspin import (
+    Command,
+    Register,
+    SpinChain,
+)
+from stspin.constants import Status
+from stspin.fake import FakeTransport
+from stspin.job import Job, JobError, JobPlayer
+
+
+class TestJob(unittest.TestCase):
+
+    def setUp(self) -> None:
+        handle, self.path = tempfile.mkstemp(suffix='.job')
+        os.close(handle)
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+
+    def testPlaybackMatchesChainCommands(self) -> None:
+        job = Job(2)
+        job.setRegister(Register.Mark, [100, 200])
+        job.move([50, -20]).waitIdle().goTo([None, 7])
+        job.command(Command.GoMark, [True, False]).delay(0.0).at(0.0)
+        job.compile(self.path)
+
+        expected = FakeTransport(2)
+        chain = SpinChain(2, spi_transfer=expected)
+        chain.allSetRegister(Register.Mark, [100, 200])
+        chain.allMove([50, -20])
+        chain.allGetRegister(Register.Status)
+        chain.allGoTo([None, 7])
+        chain.allGoMark([True, False])
+
+        fake = FakeTransport(2)
+        chain = SpinChain(2, spi_transfer=fake)
+
+        with JobPlayer(chain, self.path) as player:
+            player.play(repeat=2)
+            report = player.getReport()
+
+        self.assertEqual(chain.allGetPosition(), [100, 7])
+        self.assertEqual(report['runs'], 2)
+        self.assertEqual(report['polls'], 2)
+        self.assertEqual(fake.transfers, expected.transfers * 2 + 4)
+
+    def testBarrierTimeout(self) -> None:
+        Job(1).waitIdle(timeout=0.01).compile(self.path)
+        fake = FakeTransport(1)
+        fake.devices[0].registers[Register.Status] &= ~Status.NotBusy
+        chain = SpinChain(1, spi_transfer=fake)
+
+        with JobPlayer(chain, self.path) as player:
+            with self.assertRaises(JobError):
+                player.play()
+
+            self.assertGreater(player.polls, 1)
+
+    def testBarrierOnlyWaitsForSelectedDevices(self) -> None:
+        Job(2).waitIdle([0], timeout=0.01).compile(self.path)
+        fake = FakeTransport(2)
+        fake.devices[1].registers[Register.Status] &= ~Status.NotBusy
+
+        with JobPlayer(SpinChain(2, spi_transfer=fake), self.path) as player:
+            player.play()
+
+            self.assertEqual(player.polls, 1)
+
+    def testRejectsOtherChainLength(self) -> None:
+        Job(3).move([1, 2, 3]).compile(self.path)
+
+        with self.assertRaises(JobError):
+            JobPlayer(SpinChain(2, spi_transfer=FakeTransport(2)), self.path)
+
+        with open(self.path, 'ab') as f:
+            f.write(b'\x00')
+
+        with self.assertRaises(JobError):
+            JobPlayer(SpinChain(3, spi_transfer=FakeTransport(3)), self.path)
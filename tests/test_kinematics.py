@@ -0,0 +1,61 @@
+import unittest
+
+from stspin.constants import Constant
+from stspin.kinematics import (
+    AxisKinematics,
+    KinematicsError,
+    TrapezoidSegment,
+)
+
+
+class TestKinematics(unittest.TestCase):
+
+    def testTrapezoid(self) -> None:
+        segment = TrapezoidSegment(1000, 0.0, 100.0, 50.0, 100.0)
+
+        # 2 s accelerating over 100 steps, 0.5 s decelerating over 50
+        self.assertAlmostEqual(segment.accel_seconds, 2.0)
+        self.assertAlmostEqual(segment.decel_seconds, 1.0)
+        self.assertAlmostEqual(segment.cruise_seconds, 8.5)
+        self.assertAlmostEqual(segment.duration, 11.5)
+        self.assertAlmostEqual(segment.getDistanceAt(segment.duration), 1000)
+        self.assertAlmostEqual(segment.getTimeAt(100), 2.0)
+        self.assertAlmostEqual(segment.getSpeedAt(11.0), 50.0)
+
+    def testTriangle(self) -> None:
+        segment = TrapezoidSegment(100, 0.0, 1000.0, 50.0, 50.0)
+
+        # Never reaches the limit, peaks halfway
+        self.assertAlmostEqual(segment.peak_speed, 50 * 2 ** 0.5)
+        self.assertEqual(segment.cruise_seconds, 0.0)
+        self.assertAlmostEqual(segment.getDistanceAt(segment.accel_seconds), 50)
+
+    def testFromRegisters(self) -> None:
+        kinematics = AxisKinematics.fromRegisters(0x8A, 0x45, 0x41, 2)
+
+        self.assertEqual(kinematics.microsteps, 4)
+        self.assertAlmostEqual(
+            kinematics.acceleration, 0x8A / Constant.Sps2ToAcc * 4,
+        )
+        self.assertAlmostEqual(
+            kinematics.deceleration * 2, kinematics.acceleration,
+        )
+        self.assertAlmostEqual(
+            kinematics.max_speed, 0x41 / Constant.SpsToMaxSpeed * 4,
+        )
+
+    def testUnusableRegisters(self) -> None:
+        with self.assertRaisesRegex(KinematicsError, 'Acc, Dec, SpeedMax'):
+            AxisKinematics.fromRegisters(None, None, None, 0)
+
+        with self.assertRaisesRegex(KinematicsError, 'Dec is 0'):
+            AxisKinematics.fromRegisters(0x8A, 0, 0x41, 0)
+
+        # Full steps are a StepMode of 0
+        self.assertEqual(
+            AxisKinematics.fromRegisters(0x8A, 0x8A, 0x41, 0).microsteps, 1,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from stspin import (
+    Register,
+    SpinChain,
+)
+from stspin.fake import FakeTransport
+from stspin.families import (
+    L6470,
+    L6474,
+)
+from stspin.motion_queue import MotionQueue
+
+
+class TestMotionQueue(unittest.TestCase):
+
+    def testSegmentsRunInOrder(self) -> None:
+        fake = FakeTransport(2)
+        chain = SpinChain(2, spi_transfer=fake)
+        queue = MotionQueue(chain, poll_seconds=0.001)
+        queue.move(0, 100)
+        queue.move(0, -30)
+        queue.goTo(1, 500)
+
+        self.assertEqual(len(queue), 3)
+        self.assertTrue(queue.runUntilDone(timeout=2.0))
+        self.assertEqual(chain.allGetPosition(), [70, 500])
+        self.assertEqual(queue.stats.segments, 3)
+        # Both devices start together, then the second move of device 0
+        self.assertEqual(queue.stats.frame_sets, 2)
+
+    def testKinematicsSkipsUnusableDevices(self) -> None:
+        families = [L6470, L6474, L6470]
+        fake = FakeTransport(3, families)
+        chain = SpinChain(3, spi_transfer=fake, families=families)
+        fake.devices[2].registers[Register.Acc] = 0
+        queue = MotionQueue(chain)
+
+        queue.loadKinematics()
+
+        kinematics = queue._kinematics
+
+        assert kinematics is not None
+        self.assertIsNotNone(kinematics[0])
+        # No Acc, Dec and SpeedMax on the L6474, Acc of 0 on device 2
+        self.assertIsNone(kinematics[1])
+        self.assertIsNone(kinematics[2])
+
+        # Devices without kinematics still run, without predictions
+        queue.move(0, 10)
+        queue.move(2, 20)
+        queue.poll()
+
+        self.assertIsNotNone(queue._expected_end[0])
+        self.assertIsNone(queue._expected_end[2])
+        self.assertTrue(queue.runUntilDone(timeout=2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from stspin import (
+    Command,
+    Register,
+    SpinChain,
+)
+from stspin.fake import FakeTransport
+from stspin.frames import encodeRun, toFrames
+from stspin.multibus import SynchronizedStart
+
+
+class TestSynchronizedStart(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fakes = [FakeTransport(2), FakeTransport(3)]
+        self.chains = [
+            SpinChain(len(fake.devices), spi_transfer=fake)
+            for fake in self.fakes
+        ]
+
+    def testCommandsEndOnLastFrame(self) -> None:
+        frames = toFrames([encodeRun(100), Command.StopSoft], align_end=True)
+
+        self.assertEqual(len(frames), 4)
+        self.assertEqual(frames[-1][1], Command.StopSoft)
+        self.assertEqual(
+            [frame[1] for frame in frames[:-1]], [Command.Nop] * 3,
+        )
+
+    def testStartsEveryChain(self) -> None:
+        start = SynchronizedStart(self.chains, lead_seconds=0.001)
+        report = start.move([[10, -20], [None, 30]])
+
+        self.assertEqual([fake.transfers for fake in self.fakes], [4, 4])
+        self.assertEqual(self.chains[0].allGetPosition(), [10, -20])
+        self.assertEqual(self.chains[1].allGetPosition(), [0, 30, 0])
+        self.assertGreaterEqual(min(report.sent_ns), report.deadline_ns)
+        self.assertGreaterEqual(report.skew_ns, 0)
+        self.assertEqual(start.getReport()['skew']['count'], 1)
+
+    def testFailedChainAbortsStart(self) -> None:
+        def broken(data):
+            raise OSError('bus gone')
+
+        chains = [self.chains[0], SpinChain(1, spi_transfer=broken)]
+        start = SynchronizedStart(chains)
+
+        with self.assertRaises(OSError):
+            start.run([[100, 100], [100]])
+
+        # Staged commands were completed and stopped, so later frame sets
+        # are not taken as their missing bytes
+        for _ in range(2):
+            self.assertEqual(
+                self.chains[0].allGetRegister(Register.Speed), [0, 0],
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from stspin import (
+    Command,
+    Register,
+    SpinChain,
+)
+from stspin.fake import FakeTransport
+
+
+class TestPiggyback(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = FakeTransport(3)
+        self.chain = SpinChain(3, spi_transfer=self.fake)
+        self.reader = self.chain.setPiggyback(True)
+        self.fake.devices[1].registers[Register.PosAbs] = 1234
+        self.fake.devices[2].registers[Register.Speed] = 99
+
+    def testIdleDevicesReadWithoutExtraTransfers(self) -> None:
+        device = self.chain.create(0)
+
+        # Mark takes 4 transfers, room for one read on every idle device
+        for _ in range(3):
+            device.setRegister(Register.Mark, 7)
+
+        self.assertEqual(self.fake.transfers, 12)
+        self.assertEqual(self.reader.reads, 6)
+        self.assertEqual(
+            self.reader.getLatest(1, Register.PosAbs).value, 1234,
+        )
+        self.assertEqual(self.reader.getLatest(2, Register.Speed).value, 99)
+        self.assertIsNotNone(self.reader.getLatest(1, Register.Status))
+        self.assertIsNone(self.reader.getLatest(0, Register.Status))
+
+    def testCommandedDeviceStillAnswers(self) -> None:
+        device = self.chain.create(0)
+        device.setRegister(Register.Mark, 42)
+
+        self.assertEqual(device.getRegister(Register.Mark), 42)
+        self.assertEqual(self.chain.allGetRegister(Register.Mark), [42, 0, 0])
+
+    def testShortFrameSetsUnchanged(self) -> None:
+        self.chain.allSoftStop([True, False, False])
+
+        self.assertEqual(self.fake.transfers, 1)
+        self.assertEqual(self.reader.reads, 0)
+
+    def testLongFrameSetsCarrySeveralReads(self) -> None:
+        # Three reads on device 0 take 12 transfers, room for all of
+        # Status, PosAbs and Speed on the idle devices
+        self.chain._sendLines({0: [
+            Command.ParamGet | Register.Mark, 0, 0, 0,
+            Command.ParamGet | Register.PosAbs, 0, 0, 0,
+            Command.ParamGet | Register.Speed, 0, 0, 0,
+        ]})
+
+        self.assertEqual(self.fake.transfers, 12)
+        self.assertEqual(self.reader.getReport(), {'reads': 6, 'frame_sets': 1})
+        self.assertEqual(
+            [v and v.value for v in self.reader.getLatestValues(Register.Speed)],
+            [None, 0, 99],
+        )
+
+    def testDisable(self) -> None:
+        self.assertIsNone(self.chain.setPiggyback(False))
+
+        self.chain.create(0).setRegister(Register.Mark, 1)
+
+        self.assertEqual(self.reader.reads, 0)
@@ -0,0 +1,76 @@
+import time
+import unittest
+
+from stspin import (
+    SpinChain,
+)
+from stspin.constants import MotorStatus, Status
+from stspin.fake import FakeTransport
+from stspin.polling import AdaptivePoller, PollState, getPollState
+from stspin.status_events import StatusDispatcher, StatusEvent
+
+
+class TestAdaptivePoller(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = FakeTransport(3)
+        self.chain = SpinChain(3, spi_transfer=self.fake)
+
+    def testPollStates(self) -> None:
+        self.assertEqual(getPollState(Status.HiZ), PollState.Parked)
+        self.assertEqual(getPollState(Status.NotBusy), PollState.Holding)
+        self.assertEqual(
+            getPollState(MotorStatus.Decelerating), PollState.Stopping,
+        )
+        self.assertEqual(
+            getPollState(MotorStatus.ConstantSpeed), PollState.Cruising,
+        )
+
+    def testRatesFollowMotion(self) -> None:
+        self.chain.allSoftStop([False, False, True])
+        self.chain.allRun([100.0, None, None])
+        poller = AdaptivePoller(self.chain, rates={
+            PollState.Parked: 1.0,
+            PollState.Holding: 1.0,
+            PollState.Cruising: 500.0,
+        })
+        end = time.perf_counter() + 0.1
+
+        while time.perf_counter() < end:
+            time.sleep(poller.poll())
+
+        report = poller.getReport()
+
+        self.assertEqual(report['states'], ['cruising', 'parked', 'holding'])
+        self.assertGreater(report['reads']['cruising'], 10)
+        # Every device once at the start, then only the running one
+        self.assertEqual(report['reads']['holding'], 3)
+        self.assertEqual(report['reads']['parked'], 0)
+        self.assertAlmostEqual(poller.speeds[0], 100.0, places=0)
+
+    def testExpectedStopReadEarly(self) -> None:
+        dispatcher = StatusDispatcher(3)
+        changes = []
+        dispatcher.subscribe(
+            lambda *args: changes.append(args), StatusEvent.Motor,
+        )
+        poller = AdaptivePoller(
+            self.chain,
+            rates={PollState.Parked: 0.1, PollState.Holding: 0.1},
+            dispatcher=dispatcher,
+        )
+        poller.poll()
+        self.assertGreater(poller.poll(), 1.0)
+
+        self.chain.allRun([None, 50.0, None])
+        poller.expectStop(1, 0.0)
+        poller.poll()
+
+        self.assertEqual(poller.frame_sets, 2)
+        self.assertEqual(sum(poller.reads), 4)
+        self.assertEqual(poller.states[1], PollState.Stopping)
+        self.assertEqual(len(changes), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
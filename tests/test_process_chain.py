@@ -0,0 +1,121 @@
+import functools
+import threading
+import time
+import unittest
+
+from stspin import (
+    Register,
+)
+from stspin.discovery import discoverTopology, verifyAlignment
+from stspin.fake import FakeTransport
+from stspin.process_chain import (
+    ChainProcessError,
+    ProcessChain,
+    SharedRing,
+)
+
+
+def _brokenTransfer(data):
+    raise OSError('bus gone')
+
+
+def _createBrokenTransfer():
+    return _brokenTransfer
+
+
+class _SlowTransport(FakeTransport):
+    """Fake chain whose fifth transfer takes longer than a timeout"""
+
+    def __call__(self, buffer):
+        if 4 == self.transfers:
+            time.sleep(0.8)
+
+        return super().__call__(buffer)
+
+
+class TestSharedRing(unittest.TestCase):
+
+    def testMessagesWrapAround(self) -> None:
+        ring = SharedRing(memoryview(bytearray(SharedRing.getSize(64))))
+
+        for index in range(20):
+            message = bytes([index]) * (index % 7 + 1)
+            ring.put(message)
+            self.assertEqual(ring.get(), message)
+
+    def testFullRingTimesOut(self) -> None:
+        ring = SharedRing(memoryview(bytearray(SharedRing.getSize(64))))
+        ring.put(bytes(28))
+        ring.put(bytes(28))
+
+        with self.assertRaises(ChainProcessError):
+            ring.put(b'x', timeout=0.01)
+
+        with self.assertRaises(ChainProcessError):
+            SharedRing(
+                memoryview(bytearray(SharedRing.getSize(64)))
+            ).get(timeout=0.01)
+
+    def testProducerWaitsForConsumer(self) -> None:
+        ring = SharedRing(memoryview(bytearray(SharedRing.getSize(64))))
+        messages = [bytes([index]) * (index % 13 + 1) for index in range(200)]
+
+        def produce() -> None:
+            for message in messages:
+                ring.put(message, timeout=2.0)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        received = [ring.get(timeout=2.0) for _ in messages]
+        producer.join(2.0)
+
+        self.assertEqual(received, messages)
+
+
+class TestProcessChain(unittest.TestCase):
+
+    def testChainMethodsThroughBusProcess(self) -> None:
+        with ProcessChain(
+                2, transfer_factory=functools.partial(FakeTransport, 2),
+            ) as chain:
+            chain.allMove([10, -20])
+            chain.allSetRegister(Register.Mark, [5, 6])
+            device = chain.create(1)
+
+            self.assertEqual(chain.allGetPosition(), [10, -20])
+            self.assertEqual(chain.allGetMark(), [5, 6])
+            self.assertEqual(device.getRegister(Register.Mark), 6)
+
+    def testSingleTransfersKeepTheirLength(self) -> None:
+        with ProcessChain(
+                2, transfer_factory=functools.partial(FakeTransport, 2),
+            ) as chain:
+            self.assertTrue(verifyAlignment(chain))
+            self.assertTrue(discoverTopology(chain, max_devices=4).matches)
+
+    def testTransferErrorsRaised(self) -> None:
+        with ProcessChain(1, transfer_factory=_createBrokenTransfer) \
+                as chain:
+            with self.assertRaises(ChainProcessError):
+                chain.allGetPosition()
+
+    def testLateResponseDropped(self) -> None:
+        with ProcessChain(
+                2, transfer_factory=functools.partial(_SlowTransport, 2),
+                timeout=0.5,
+            ) as chain:
+            # Four transfers, once the bus process is up
+            self.assertEqual(chain.allGetMark(), [0, 0])
+
+            with self.assertRaises(ChainProcessError):
+                chain.allMove([10, -20])
+
+            # The Move still went out, its late response is not taken for
+            # the answer to the next request
+            self.assertEqual(chain.allGetPosition(), [10, -20])
+            self.assertEqual(chain.allGetMark(), [0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
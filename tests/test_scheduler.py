@@ -0,0 +1,125 @@
+import threading
+import time
+import unittest
+
+from typing import (
+    List,
+)
+
+from stspin import (
+    BusScheduler,
+    Register,
+    SpinChain,
+)
+from stspin.fake import FakeTransport
+from stspin.scheduler import TrafficClass
+
+
+class TestBusScheduler(unittest.TestCase):
+
+    def _waitQueued(self, scheduler: BusScheduler, count: int) -> None:
+        """Wait until some threads wait for the bus"""
+        end = time.perf_counter() + 2.0
+
+        while sum(len(queue) for queue in scheduler._queues) < count:
+            self.assertLess(time.perf_counter(), end)
+            time.sleep(0.001)
+
+    def testHandOverByPriority(self) -> None:
+        chain = SpinChain(2, spi_transfer=FakeTransport(2))
+        scheduler = BusScheduler(chain)
+        scheduler.attach()
+        order: List[int] = []
+
+        def use(traffic_class: int) -> None:
+            with scheduler.traffic(traffic_class):
+                chain.allGetRegister(Register.Acc)
+                order.append(traffic_class)
+
+        classes = [
+            TrafficClass.Diagnostics, TrafficClass.Telemetry,
+            TrafficClass.Command, TrafficClass.Safety,
+        ]
+        threads = [
+            threading.Thread(target=use, args=(c,), daemon=True)
+            for c in classes
+        ]
+
+        # Queue every class while the bus is held, most urgent last
+        with chain._lock:
+            for count, thread in enumerate(threads, 1):
+                thread.start()
+                self._waitQueued(scheduler, count)
+
+        for thread in threads:
+            thread.join(2.0)
+
+        self.assertEqual(order, [
+            TrafficClass.Safety, TrafficClass.Command,
+            TrafficClass.Telemetry, TrafficClass.Diagnostics,
+        ])
+
+        usage = scheduler.getUsage()
+
+        self.assertEqual(usage['safety']['grants'], 1)
+        # Reading a 12-bit register takes three frames
+        self.assertEqual(usage['diagnostics']['frames'], 3)
+
+    def testBudgetThrottlesUnderContention(self) -> None:
+        chain = SpinChain(2, spi_transfer=FakeTransport(
+            2, transfer_seconds=0.001,
+        ))
+        scheduler = BusScheduler(
+            chain, budgets={TrafficClass.Telemetry: 0.2},
+            window_seconds=0.05,
+        )
+        scheduler.attach()
+        end = time.perf_counter() + 0.5
+
+        def loop(traffic_class: int) -> None:
+            with scheduler.traffic(traffic_class):
+                while time.perf_counter() < end:
+                    chain.allGetRegister(Register.Acc)
+
+        threads = [
+            threading.Thread(target=loop, args=(c,), daemon=True)
+            for c in (TrafficClass.Command, TrafficClass.Telemetry)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join(2.0)
+
+        usage = scheduler.getUsage()
+        telemetry = usage['telemetry']
+
+        # Handed the bus between commands, but held near its budget
+        self.assertGreater(telemetry['grants'], 0)
+        self.assertGreater(telemetry['throttled'], 0)
+        self.assertLess(telemetry['share'], 0.35)
+        self.assertGreater(usage['command']['share'], 0.6)
+
+    def testIdleBusNotThrottled(self) -> None:
+        chain = SpinChain(2, spi_transfer=FakeTransport(
+            2, transfer_seconds=0.001,
+        ))
+        scheduler = BusScheduler(
+            chain, budgets={TrafficClass.Telemetry: 0.1},
+        )
+        scheduler.attach()
+
+        with scheduler.traffic(TrafficClass.Telemetry):
+            for _ in range(20):
+                chain.allGetRegister(Register.Acc)
+
+        telemetry = scheduler.getUsage()['telemetry']
+
+        self.assertEqual(telemetry['grants'], 20)
+        self.assertEqual(telemetry['throttled'], 0)
+        self.assertTrue(scheduler.admit(TrafficClass.Telemetry))
+
+
+if __name__ == '__main__':
+    unittest.main()
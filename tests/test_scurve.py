@@ -0,0 +1,69 @@
+import unittest
+
+from stspin import (
+    Command,
+    SpinChain,
+)
+from stspin.fake import RecordingTransport
+from stspin.scurve import (
+    SCurveSegment,
+    SCurveStreamer,
+    SpeedTable,
+)
+
+
+class TestSCurve(unittest.TestCase):
+
+    def testSegmentReachesMaxSpeed(self) -> None:
+        segment = SCurveSegment(-2000, 1000, 4000, 40000)
+
+        self.assertAlmostEqual(segment.peak_speed, 1000)
+        self.assertAlmostEqual(segment.jerk_seconds, 0.1)
+        self.assertAlmostEqual(segment.ramp_seconds, 0.35)
+        self.assertAlmostEqual(
+            segment.getSpeedAt(segment.duration / 2), -1000,
+        )
+        self.assertEqual(segment.getSpeedAt(segment.duration), 0.0)
+
+    def testShortSegmentLowersPeak(self) -> None:
+        segment = SCurveSegment(50, 1000, 4000, 40000)
+
+        self.assertLess(segment.peak_speed, 1000)
+        self.assertEqual(segment.cruise_seconds, 0.0)
+
+    def testTableIntegratesToDistance(self) -> None:
+        rate_hz = 1000
+        table = SpeedTable.fromSegments([
+            SCurveSegment(-2000, 1000, 4000, 40000),
+            None,
+            SCurveSegment(300, 800, 2000, 20000),
+        ], rate_hz)
+
+        for axis, distance in enumerate([-2000, 0, 300]):
+            travelled = sum(
+                table.getSpeed(tick, axis) for tick in range(table.ticks)
+            ) / rate_hz
+            self.assertAlmostEqual(travelled, distance, delta=0.5)
+            self.assertEqual(table.getSpeed(table.ticks - 1, axis), 0.0)
+
+    def testStreamSendsOnlyChangedTicks(self) -> None:
+        transfer = RecordingTransport()
+        frames = transfer.frames
+
+        chain = SpinChain(total_devices=3, spi_transfer=transfer)
+        table = SpeedTable.fromSegments(
+            [SCurveSegment(100, 500, 5000, 100000)], 2000,
+        )
+        streamer = SCurveStreamer(chain, table, positions=[2])
+        streamer.stream()
+
+        self.assertLess(streamer.sent_ticks, table.ticks)
+        self.assertEqual(len(frames), 4 * streamer.sent_ticks)
+
+        for frame in frames[::4]:
+            self.assertEqual(frame[:2], [Command.Nop] * 2)
+            self.assertEqual(frame[2] & ~1, Command.Run)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+
+from stspin import (
+    ChainSnapshot,
+    Constant,
+    Register,
+    SnapshotError,
+    SpinChain,
+)
+from stspin.constants import Status
+from stspin.fake import FakeTransport
+from stspin.families import FamilyRegister, L6470, L6472, L6480
+
+
+class TestChainSnapshot(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'chain.snap')
+        self.fake = FakeTransport(2)
+        self.chain = SpinChain(2, spi_transfer=self.fake)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def testSaveAndRestore(self) -> None:
+        self.chain.allSetRegister(Register.ThStl, [0x10, 0x20])
+        saved = self.chain.snapshot(self.path)
+
+        # Only the snapshot is left, no temporary file
+        self.assertEqual(os.listdir(self.directory.name), ['chain.snap'])
+
+        loaded = ChainSnapshot.load(self.path)
+
+        self.assertEqual(loaded.values, saved.values)
+        self.assertEqual(loaded.directions, saved.directions)
+
+        restored = self.chain.restore(self.path)
+
+        self.assertEqual(restored.values[1][Register.ThStl], 0x20)
+
+    def testSaveReplacesPreviousSnapshot(self) -> None:
+        self.chain.snapshot(self.path)
+        self.chain.allSetRegister(Register.ThOcd, [0x3, 0x4])
+        self.chain.snapshot(self.path)
+
+        loaded = ChainSnapshot.load(self.path)
+
+        self.assertEqual(loaded.values[1][Register.ThOcd], 0x4)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+    def testRestoreDirection(self) -> None:
+        device = self.chain.create(1)
+        device._direction = Constant.DirReverse
+        self.chain.snapshot(self.path)
+        device._direction = Constant.DirForward
+
+        self.chain.restore(self.path)
+
+        self.assertEqual(device._direction, Constant.DirReverse)
+
+    def testTruncatedSnapshot(self) -> None:
+        data = self.chain.snapshot(self.path).toBytes()
+
+        for length in (0, 10, len(data) - 1):
+            with self.assertRaises(SnapshotError):
+                ChainSnapshot.fromBytes(data[:length])
+
+        with self.assertRaises(SnapshotError):
+            ChainSnapshot.fromBytes(b'NOTASNAP' + data[8:])
+
+    def testResetDeviceRefused(self) -> None:
+        self.chain.snapshot(self.path)
+
+        # A power cycle restores the registers and latches the
+        # undervoltage flag
+        device = self.fake.devices[1]
+        device.reset()
+        device.registers[Register.Status] &= ~Status.NotUndervoltage
+
+        with self.assertRaises(SnapshotError) as context:
+            self.chain.restore(self.path)
+
+        self.assertIn('device 1: reset', str(context.exception))
+
+    def testMissingDeviceRefused(self) -> None:
+        self.chain.snapshot(self.path)
+        # A device no longer answering reads all ones
+        self.fake.devices[1].registers[Register.Status] = 0xFFFF
+
+        with self.assertRaises(SnapshotError) as context:
+            self.chain.restore(self.path)
+
+        self.assertIn('device 1: no response', str(context.exception))
+
+    def testChangedRegisterRefused(self) -> None:
+        self.chain.snapshot(self.path)
+        self.fake.devices[0].registers[Register.KvalRun] = 0x40
+
+        with self.assertRaises(SnapshotError) as context:
+            self.chain.restore(self.path)
+
+        self.assertIn('device 0: register 0x0A', str(context.exception))
+
+    def testFamilyRegisters(self) -> None:
+        families = [L6470, L6480, L6472]
+        fake = FakeTransport(3, families)
+        chain = SpinChain(3, spi_transfer=fake, families=families)
+        chain.allSetRegister(
+            FamilyRegister.TFast, [None, None, 0x25],
+        )
+
+        saved = chain.snapshot(self.path)
+
+        self.assertIn(FamilyRegister.GateCfg1, saved.values[1])
+        self.assertNotIn(FamilyRegister.GateCfg1, saved.values[0])
+        self.assertEqual(saved.values[2][FamilyRegister.TFast], 0x25)
+        self.assertNotIn(Register.KvalRun, saved.values[2])
+        # Volatile registers beyond the checks are left out
+        self.assertNotIn(Register.Speed, saved.registers)
+        self.assertIn(Register.PosAbs, saved.registers)
+
+        fake.devices[1].registers[FamilyRegister.GateCfg2] ^= 0x01
+
+        with self.assertRaises(SnapshotError) as context:
+            chain.restore(self.path)
+
+        self.assertIn(
+            f'device 1: register 0x{FamilyRegister.GateCfg2:02X}',
+            str(context.exception),
+        )
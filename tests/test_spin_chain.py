@@ -0,0 +1,91 @@
+import unittest
+
+from stspin import (
+    Command,
+    Constant,
+    SpinChain,
+)
+from stspin.constants import Status
+from stspin.fake import FakeTransport, RecordingTransport
+from stspin.families import L6470, L6474
+
+
+class TestSpinChain(unittest.TestCase):
+
+    def setUp(self) -> None:
+        transfer = RecordingTransport()
+        self.frames = transfer.frames
+
+        self.chain = SpinChain(total_devices=3, spi_transfer=transfer)
+
+    def testAllMoveIsOneFrameSet(self) -> None:
+        device = self.chain.create(2)
+        self.chain.allMove([0x10203, None, -1])
+
+        self.assertEqual(self.frames, [
+            [Command.Move | Constant.DirForward, Command.Nop,
+             Command.Move | Constant.DirReverse],
+            [0x01, Command.Nop, 0x00],
+            [0x02, Command.Nop, 0x00],
+            [0x03, Command.Nop, 0x01],
+        ])
+        self.assertEqual(device._direction, Constant.DirReverse)
+
+    def testAllGoToMasksNegativePositions(self) -> None:
+        self.chain.allGoTo([None, -1])
+
+        self.assertEqual(
+            [frame[1] for frame in self.frames],
+            [Command.GoTo, 0x3F, 0xFF, 0xFF],
+        )
+        self.assertEqual(self.frames[0][2], Command.Nop)
+
+    def testAllGoUntilSetsActionAndDirection(self) -> None:
+        self.chain.allGoUntil([-100, None, 100], Constant.ActSetMark)
+
+        self.assertEqual(len(self.frames), 4)
+        self.assertEqual(self.frames[0], [
+            Command.GoUntil | Constant.ActSetMark | Constant.DirReverse,
+            Command.Nop,
+            Command.GoUntil | Constant.ActSetMark | Constant.DirForward,
+        ])
+
+    def testSelectedCommandsAreOneTransfer(self) -> None:
+        self.chain.allGoHome([True, False, True])
+        self.chain.allGoMark()
+        self.chain.allReleaseSw([None, Constant.DirForward, None])
+
+        self.assertEqual(self.frames, [
+            [Command.GoHome, Command.Nop, Command.GoHome],
+            [Command.GoMark] * 3,
+            [Command.Nop, Command.ReleaseSw | Constant.DirForward,
+             Command.Nop],
+        ])
+
+    def testAllRunSkipsNone(self) -> None:
+        self.chain.allRun([None, 1.0, None])
+
+        self.assertEqual(len(self.frames), 4)
+        self.assertEqual(
+            self.frames[0],
+            [Command.Nop, Command.Run | Constant.DirForward, Command.Nop],
+        )
+
+    def testDeviceWithoutSpeed(self) -> None:
+        families = [L6474, L6470]
+        fake = FakeTransport(2, families)
+        chain = SpinChain(2, spi_transfer=fake, families=families)
+        chain.allRun([None, -100.0])
+
+        speeds = chain.allGetSpeed()
+
+        self.assertIsNone(speeds[0])
+        self.assertAlmostEqual(speeds[1], -100.0, places=0)
+        self.assertEqual(chain.allGetPosition(), [0, 0])
+        self.assertEqual(
+            chain.allGetStatus(Status.NotBusy), [Status.NotBusy] * 2,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from stspin import (
+    Command,
+    Constant,
+    Register,
+    SpinChain,
+)
+from stspin.fake import FakeTransport, RecordingTransport
+
+
+class TestSpinDevice(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = FakeTransport(1)
+        transfer = RecordingTransport(transfer=self.fake)
+        self.frames = transfer.frames
+
+        self.chain = SpinChain(total_devices=1, spi_transfer=transfer)
+        self.device = self.chain.create(0)
+        self.registers = self.fake.devices[0].registers
+
+    def _sent(self) -> list:
+        """Bytes sent since the last call, one device in the chain"""
+        sent = [frame[0] for frame in self.frames]
+        self.frames.clear()
+
+        return sent
+
+    def testGoToRestoresSpeedMax(self) -> None:
+        self.registers[Register.SpeedMax] = 0x41
+        self._sent()
+
+        self.device.goto(-100, 300)
+        sent = self._sent()
+        speed = int(300 * Constant.SpsToMaxSpeed)
+        go_to = sent.index(Command.GoTo)
+
+        # Limited to the requested speed during the GoTo only
+        self.assertEqual(sent[go_to - 3:go_to], [
+            Command.ParamSet | Register.SpeedMax, speed >> 8, speed & 0xFF,
+        ])
+        self.assertEqual(sent[go_to + 1:go_to + 4], [0x3F, 0xFF, 0x9C])
+        self.assertEqual(self.registers[Register.SpeedMax], 0x41)
+        self.assertEqual(self.device.getPosition(), -100)
+
+    def testGoUntilRunsInDirection(self) -> None:
+        self.device.goUntil(Constant.ActResetPos, -200)
+
+        self.assertEqual(
+            self._sent()[0], Command.GoUntil | Constant.DirReverse,
+        )
+        self.assertEqual(self.device._direction, Constant.DirReverse)
+        self.assertAlmostEqual(self.device.getSpeed(), -200, places=0)
+
+        self.device.goUntil(Constant.ActSetMark, 200)
+
+        self.assertAlmostEqual(self.device.getSpeed(), 200, places=0)
+
+    def testReleaseSwRestoresSpeedMin(self) -> None:
+        # Low speed optimization enabled
+        self.registers[Register.SpeedMin] = 0x1000 | 0x20
+        self._sent()
+
+        self.device.releaseSw(Constant.ActSetMark, -50)
+        sent = self._sent()
+        speed = int(50 * Constant.SpsToMinSpeed)
+        release = sent.index(
+            Command.ReleaseSw | Constant.ActSetMark | Constant.DirReverse,
+        )
+
+        self.assertEqual(sent[release - 3:release], [
+            Command.ParamSet | Register.SpeedMin,
+            0x10 | speed >> 8, speed & 0xFF,
+        ])
+        self.assertEqual(self.registers[Register.SpeedMin], 0x1020)
+
+    def testCenterBetweenEndStops(self) -> None:
+        self.registers[Register.Mark] = 1001
+        self.device.isBusy = lambda: False  # type: ignore
+        self.device.getSpeed = lambda: 0.0  # type: ignore
+
+        self.device.setEndStopAndCenter(100)
+
+        self.assertEqual(self.device.getPosition(), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
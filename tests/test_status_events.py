@@ -0,0 +1,90 @@
+import unittest
+
+from typing import (
+    List,
+    Tuple,
+)
+
+from stspin.constants import (
+    MotorStatus,
+    Status,
+)
+from stspin.status_events import (
+    ActiveLowBits,
+    Edge,
+    StatusDispatcher,
+    StatusEvent,
+    decodeStatus,
+)
+
+# Idle, no faults, switch open, motor stopped
+Idle = ActiveLowBits
+
+
+class TestStatusEvents(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.events: List[Tuple[int, int, int, int]] = []
+        self.dispatcher = StatusDispatcher(total_devices=3)
+
+    def record(self, *event: int) -> None:
+        self.events.append(event)
+
+    def testDecodeIsActiveHigh(self) -> None:
+        self.assertEqual(decodeStatus(Idle), 0)
+        self.assertEqual(
+            decodeStatus(Idle & ~Status.NotBusy & ~Status.NotStepLossA),
+            StatusEvent.Busy | StatusEvent.StepLossA,
+        )
+
+    def testFirstReadOnlySetsBaseline(self) -> None:
+        self.dispatcher.subscribe(self.record, StatusEvent.Busy)
+        busy = Idle & ~Status.NotBusy
+
+        self.assertEqual(self.dispatcher.dispatch([busy] * 3), 0)
+        self.assertEqual(self.dispatcher.getFlags(1), StatusEvent.Busy)
+
+    def testBusyToIdleEdgeFiltersByPosition(self) -> None:
+        self.dispatcher.subscribe(
+            self.record, StatusEvent.Busy, Edge.Fall, positions=[2],
+        )
+        busy = Idle & ~Status.NotBusy
+
+        self.dispatcher.dispatch([Idle, busy, busy])
+        self.dispatcher.dispatch([busy, Idle, Idle])
+
+        self.assertEqual(self.events, [(2, 0, StatusEvent.Busy, 0)])
+
+    def testMotorStateAndMaskedChanges(self) -> None:
+        self.dispatcher.subscribe(self.record, StatusEvent.Motor)
+        self.dispatcher.subscribe(self.record, StatusEvent.StepLoss, Edge.Rise)
+        moving = Idle | MotorStatus.Accelerating
+
+        self.dispatcher.dispatch([Idle] * 3)
+        # Direction alone concerns no subscriber
+        self.assertEqual(self.dispatcher.dispatch([Idle | Status.Dir] * 3), 0)
+
+        self.dispatcher.dispatch([moving & ~Status.NotStepLossB, Idle, Idle])
+
+        self.assertEqual(self.events, [
+            (0, MotorStatus.Accelerating, 0,
+             MotorStatus.Accelerating | StatusEvent.StepLossB),
+            (0, StatusEvent.StepLossB, 0,
+             MotorStatus.Accelerating | StatusEvent.StepLossB),
+        ])
+
+    def testUnsubscribeReusesHandle(self) -> None:
+        first = self.dispatcher.subscribe(self.record, StatusEvent.HiZ)
+        self.dispatcher.unsubscribe(first)
+
+        self.dispatcher.dispatch([Idle] * 3)
+        self.dispatcher.dispatch([Idle | Status.HiZ] * 3)
+
+        self.assertEqual(self.events, [])
+        self.assertEqual(
+            self.dispatcher.subscribe(self.record, StatusEvent.HiZ), first,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import math
+import os
+import struct
+import tempfile
+import time
+import unittest
+
+from stspin import (
+    SpinChain,
+    TelemetryStore,
+)
+from stspin.fake import FakeTransport, RecordingTransport
+from stspin.families import L6470, L6474
+from stspin.trace import ChainTracer
+
+
+class TestTelemetry(unittest.TestCase):
+
+    def testRingBuffer(self) -> None:
+        store = TelemetryStore(total_devices=2, depth=4)
+
+        for t in range(6):
+            store.record('position', [t, -t], timestamp=float(t))
+
+        self.assertEqual(store.getCount('position'), 4)
+        self.assertEqual(store.getCount('speed'), 0)
+
+        samples = store.getRange('position')
+        self.assertEqual(list(samples.times), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(list(samples.values[0]), [2, 3, 4, 5])
+        self.assertEqual(list(samples.values[1]), [-2, -3, -4, -5])
+
+        samples = store.getRange('position', start=3.0, end=5.0)
+        self.assertEqual(list(samples.times), [3.0, 4.0])
+
+        self.assertEqual(store.getOldestIndex('position'), 2)
+
+        store.close()
+
+    def testDownsample(self) -> None:
+        store = TelemetryStore(total_devices=1, depth=16)
+
+        for t in range(10):
+            store.record('speed', [float(t % 3)], timestamp=float(t))
+
+        buckets = store.downsample('speed', 0, buckets=3)
+        self.assertEqual(len(buckets), 3)
+        self.assertEqual(buckets[0], (0.0, 0.0, 2.0, 1.0))
+        self.assertEqual(buckets[-1][1:], (0.0, 2.0, 0.75))
+
+        self.assertEqual(store.downsample('speed', 0, 2, start=100.0), [])
+
+        store.close()
+
+    def testPersistence(self) -> None:
+        path = os.path.join(tempfile.mkdtemp(), 'telemetry.bin')
+
+        store = TelemetryStore(total_devices=3, depth=8, path=path)
+        store.record('status', [1, 2, 3], timestamp=1.0)
+        store.record('status', [4, 5, 6], timestamp=2.0)
+        store.close()
+
+        store = TelemetryStore(total_devices=3, depth=8, path=path)
+        samples = store.getRange('status')
+        self.assertEqual(list(samples.times), [1.0, 2.0])
+        self.assertEqual(list(samples.values[2]), [3, 6])
+        store.close()
+
+        # A different layout starts over
+        store = TelemetryStore(total_devices=3, depth=4, path=path)
+        self.assertEqual(store.getCount('status'), 0)
+        store.close()
+
+    def testWallClockTimes(self) -> None:
+        store = TelemetryStore(total_devices=1, depth=4)
+        before = time.time()
+        store.record('position', [1])
+        store.record('position', [2], timestamp=before - 10.0)
+
+        times = list(store.getRange('position').times)
+
+        self.assertGreaterEqual(times[0], before)
+        self.assertLessEqual(times[0], time.time())
+        # A wall clock stepping back keeps the ring ordered
+        self.assertEqual(times[1], times[0])
+
+        store.close()
+
+    def testOlderVersionDiscarded(self) -> None:
+        path = os.path.join(tempfile.mkdtemp(), 'telemetry.bin')
+
+        store = TelemetryStore(total_devices=1, depth=4, path=path)
+        store.record('status', [1], timestamp=1.0)
+        store.close()
+
+        # Version 1 held perf_counter times of a past run
+        with open(path, 'r+b') as telemetry_file:
+            telemetry_file.seek(8)
+            telemetry_file.write(struct.pack('<I', 1))
+
+        store = TelemetryStore(total_devices=1, depth=4, path=path)
+
+        self.assertEqual(store.getCount('status'), 0)
+
+        store.close()
+
+    def testChainReads(self) -> None:
+        chain = SpinChain(
+            total_devices=2, spi_transfer=RecordingTransport(0x01),
+        )
+        store = TelemetryStore(total_devices=2, depth=8)
+
+        store.sample(chain, timestamp=1.0)
+        self.assertEqual(store.getCount('position'), 1)
+        self.assertEqual(store.getCount('speed'), 1)
+        self.assertEqual(store.getCount('status'), 1)
+
+        store.attach(chain)
+        chain.allGetPosition()
+        chain.allGetSpeed()
+        self.assertEqual(store.getCount('position'), 2)
+        # allGetSpeed reads Status for the direction
+        self.assertEqual(store.getCount('status'), 2)
+
+        store.detach(chain)
+        chain.allGetPosition()
+        self.assertEqual(store.getCount('position'), 2)
+
+        self.assertEqual(
+            list(store.getRange('position').values[0]),
+            [0x010101, 0x010101]
+        )
+
+        store.close()
+
+    def testDetachKeepsLaterWrappers(self) -> None:
+        chain = SpinChain(2, spi_transfer=FakeTransport(2))
+        store = TelemetryStore(total_devices=2, depth=8)
+        tracer = ChainTracer()
+
+        store.attach(chain)
+        tracer.attach(chain)
+        store.detach(chain)
+        chain.allGetPosition()
+
+        # Still traced through the store's wrapper, no longer recorded
+        self.assertEqual(store.getCount('position'), 0)
+        self.assertIn(
+            'SpinChain.allGetPosition',
+            [event[1] for event in tracer.getEvents()],
+        )
+
+        store.close()
+
+    def testDeviceWithoutRegister(self) -> None:
+        families = [L6470, L6474]
+        chain = SpinChain(
+            2, spi_transfer=FakeTransport(2, families), families=families,
+        )
+        chain.allRun([100.0, None])
+        store = TelemetryStore(total_devices=2, depth=8)
+
+        store.sample(chain)
+        speeds = store.getRange('speed').values
+
+        self.assertAlmostEqual(speeds[0][0], 100.0, places=0)
+        self.assertTrue(math.isnan(speeds[1][0]))
+
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import threading
+import time
+import unittest
+
+from typing import (
+    List,
+    Tuple,
+)
+
+from stspin import (
+    Register,
+    SpinChain,
+)
+from stspin.fake import FakeTransport
+from stspin.trace import ChainTracer, getCommandName
+
+
+def readVarint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+
+        if not byte & 0x80:
+            return value, offset
+
+
+def readFields(data: bytes) -> List[Tuple[int, object]]:
+    fields = []
+    offset = 0
+
+    while offset < len(data):
+        key, offset = readVarint(data, offset)
+        field, wire = key >> 3, key & 7
+
+        if 0 == wire:
+            value, offset = readVarint(data, offset)
+        elif 1 == wire:
+            value, offset = data[offset:offset + 8], offset + 8
+        else:
+            assert 2 == wire
+            length, offset = readVarint(data, offset)
+            value, offset = data[offset:offset + length], offset + length
+
+        fields.append((field, value))
+
+    return fields
+
+
+class TestChainTracer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tracer = ChainTracer()
+        self.chain = SpinChain(2, spi_transfer=FakeTransport(2))
+        self.tracer.attach(self.chain)
+
+    def testCommandNames(self) -> None:
+        self.assertEqual(getCommandName(0x23), 'ParamGet Mark')
+        self.assertEqual(getCommandName(0x51), 'Run')
+        self.assertEqual(getCommandName(0x8B), 'GoUntil')
+        self.assertEqual(getCommandName(0xE5), '0xE5')
+
+    def testChromeTraceTracks(self) -> None:
+        self.chain.allSetRegister(Register.Mark, [None, 5])
+        self.tracer.counter('queue depth', 3)
+
+        events = self.tracer.toChromeTrace()['traceEvents']
+        names = {
+            e['args']['name']: e['tid']
+            for e in events if 'thread_name' == e['name']
+        }
+        slices = [e for e in events if 'X' == e['ph']]
+        frames = [e for e in slices if 'frame' == e['name']]
+        commands = [e for e in slices if 'command' == e['cat']]
+        calls = [e['name'] for e in slices if 'call' == e['cat']]
+
+        self.assertEqual(len(frames), 4)
+        self.assertTrue(all(names['spi bus'] == e['tid'] for e in frames))
+        self.assertEqual(len(commands), 1)
+        self.assertEqual(commands[0]['name'], 'ParamSet Mark')
+        self.assertEqual(commands[0]['tid'], names['device 1'])
+        self.assertAlmostEqual(
+            commands[0]['dur'],
+            frames[-1]['ts'] + frames[-1]['dur'] - frames[0]['ts'],
+            places=3,
+        )
+        self.assertIn('SpinChain.allSetRegister', calls)
+        self.assertIn('SpinChain.runCommands', calls)
+        self.assertEqual(
+            [e['args'] for e in events if 'C' == e['ph']], [{'value': 3}],
+        )
+
+    def testBusWait(self) -> None:
+        held = threading.Event()
+
+        def hold() -> None:
+            with self.chain._lock:
+                held.set()
+                time.sleep(0.01)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait()
+        self.chain.allGetRegister(Register.Status)
+        thread.join()
+
+        waits = [e for e in self.tracer.getEvents() if 'wait' == e[2]]
+
+        self.assertEqual(len(waits), 1)
+        self.assertGreater(waits[0][4], 1e6)
+
+    def testBoundedBuffer(self) -> None:
+        tracer = ChainTracer(capacity=10)
+
+        for _ in range(25):
+            tracer.instant('tick')
+
+        self.assertEqual(len(tracer.getEvents()), 10)
+        self.assertEqual(tracer.dropped, 15)
+
+    def testPerfettoPackets(self) -> None:
+        self.chain.allGetRegister(Register.Status)
+
+        packets = readFields(self.tracer.toPerfetto())
+        slices = [e for e in self.tracer.getEvents() if 'X' == e[0]]
+        begins = ends = descriptors = 0
+        last_time = 0
+
+        self.assertTrue(all(1 == field for field, _ in packets))
+
+        for _, packet in packets:
+            fields = dict(readFields(packet))
+
+            if 60 in fields:
+                descriptors += 1
+                continue
+
+            event = dict(readFields(fields[11]))
+            self.assertGreaterEqual(fields[8], last_time)
+            last_time = fields[8]
+            begins += 1 == event[9]
+            ends += 2 == event[9]
+
+        # Two groups, bus, two devices and the main thread
+        self.assertEqual(descriptors, 6)
+        self.assertEqual(begins, len(slices))
+        self.assertEqual(ends, len(slices))
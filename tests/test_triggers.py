@@ -0,0 +1,125 @@
+import time
+import unittest
+
+from stspin import (
+    Register,
+    SpinChain,
+)
+from stspin.constants import Constant, Status
+from stspin.fake import FakeTransport
+from stspin.families import L6470, L6474
+from stspin.kinematics import AxisKinematics, KinematicsError
+from stspin.triggers import TriggerScheduler
+
+
+class MovingTransport(FakeTransport):
+    """Fake chain whose first axis runs at a constant speed"""
+
+    def __init__(self, total_devices: int, speed: float) -> None:
+        super().__init__(total_devices)
+        self.speed = speed
+        self.start = time.perf_counter()
+
+        device = self.devices[0]
+        device.registers[Register.Speed] = \
+            device._codec.fromUnits(Register.Speed, speed)
+        device.registers[Register.Status] |= Status.Dir
+
+    def __call__(self, data):
+        position = int(self.speed * (time.perf_counter() - self.start))
+        self.devices[0].registers[Register.PosAbs] = position
+
+        return super().__call__(data)
+
+
+class TestTriggers(unittest.TestCase):
+
+    def testEarliestSeconds(self) -> None:
+        kinematics = AxisKinematics(100.0, 100.0, 50.0)
+
+        # Accelerates for 0.5 s over 12.5 steps, then cruises
+        self.assertAlmostEqual(kinematics.getEarliestSeconds(12.5), 0.5)
+        self.assertAlmostEqual(kinematics.getEarliestSeconds(62.5), 1.5)
+        self.assertAlmostEqual(kinematics.getEarliestSeconds(50, 50.0), 1.0)
+        self.assertAlmostEqual(
+            kinematics.getEarliestSeconds(12.5, -20.0), 0.5,
+        )
+
+    def testFramesSentOnCrossing(self) -> None:
+        fake = MovingTransport(2, speed=20000.0)
+        chain = SpinChain(2, spi_transfer=fake)
+        triggers = chain.setTriggers(True)
+        mark = chain._codecs[1].encodeSet(Register.Mark, 77)
+
+        try:
+            trigger = chain.addTrigger(0, 3000, [None, mark])
+            self.assertTrue(trigger.fired.wait(2.0))
+        finally:
+            chain.setTriggers(False)
+
+        report = triggers.getReport()
+
+        self.assertEqual(chain.allGetMark()[1], 77)
+        self.assertGreaterEqual(trigger.fired_value, 3000)
+        self.assertEqual(report['fired'], 1)
+        self.assertEqual(report['pending'], 0)
+        # Sleeps through most of the 0.15 s before the crossing
+        self.assertLess(report['polls'], 100)
+        self.assertGreater(report['window_polls'], 0)
+
+    def testCallbackDirection(self) -> None:
+        fake = FakeTransport(1)
+        chain = SpinChain(1, spi_transfer=fake)
+        triggers = TriggerScheduler(
+            chain, poll_seconds=1e-6, max_sleep_seconds=1e-6,
+        )
+        triggers.setKinematics(0, AxisKinematics(100.0, 100.0, 50.0))
+        fired = []
+
+        trigger = triggers.addTrigger(
+            0, 100, lambda p, v: fired.append((p, v)), Constant.DirReverse,
+        )
+
+        for position in (0, 150, 50):
+            fake.devices[0].registers[Register.PosAbs] = position
+            time.sleep(0.001)
+            triggers.poll()
+
+        self.assertEqual(fired, [(0, 50)])
+        self.assertTrue(trigger.fired.is_set())
+        self.assertEqual(triggers.getReport()['overshoot']['max'], 50)
+
+
+    def testAxisWithoutKinematicsRejected(self) -> None:
+        fake = FakeTransport(2, [L6470, L6474])
+        chain = SpinChain(2, spi_transfer=fake, families=[L6470, L6474])
+        triggers = TriggerScheduler(chain)
+        fake.devices[0].registers[Register.Dec] = 0
+
+        with self.assertRaisesRegex(KinematicsError, 'Axis 0: Dec is 0'):
+            triggers.addTrigger(0, 100, lambda p, v: None)
+
+        self.assertEqual(triggers.getReport()['pending'], 0)
+
+        # Kinematics set by hand make the axis usable
+        triggers.setKinematics(0, AxisKinematics(100.0, 100.0, 50.0))
+        triggers.addTrigger(0, 100, lambda p, v: None)
+
+        self.assertEqual(triggers.getReport()['pending'], 1)
+
+    def testAxisWithoutSpeedRejected(self) -> None:
+        fake = FakeTransport(2, [L6470, L6474])
+        chain = SpinChain(2, spi_transfer=fake, families=[L6470, L6474])
+        triggers = TriggerScheduler(chain)
+        triggers.setKinematics(1, AxisKinematics(100.0, 100.0, 50.0))
+
+        # Speed could not be read in the background thread
+        with self.assertRaisesRegex(
+                KinematicsError, 'Axis 1: L6474 has no register 0x04'):
+            triggers.addTrigger(1, 100, lambda p, v: None)
+
+        self.assertEqual(triggers.getReport()['pending'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+from stspin import (
+    BusScheduler,
+    Register,
+    SpinChain,
+)
+from stspin.constants import Status
+from stspin.fake import FakeTransport
+from stspin.families import L6470, L6472, L6480
+from stspin.watchdog import FaultWatchdog, StopScope
+
+
+class TestFaultWatchdog(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fake = FakeTransport(2)
+        self.chain = SpinChain(2, spi_transfer=self.fake)
+        self.chain.allRun([100.0, 100.0])
+
+    def _fault(self, position: int, bits: int) -> None:
+        self.fake.devices[position].registers[Register.Status] &= ~bits
+
+    def _getSpeeds(self):
+        return self.chain.allGetRegister(Register.Speed)
+
+    def testStopsFaultedDevice(self) -> None:
+        watchdog = FaultWatchdog(self.chain)
+        faults = []
+        watchdog.subscribe(lambda *args: faults.append(args[:2]))
+
+        self.assertEqual(watchdog.poll(), [])
+        self._fault(1, Status.NotOvercurrent)
+
+        self.assertEqual(watchdog.poll(), [1])
+        self.assertEqual(faults, [(1, Status.NotOvercurrent)])
+        self.assertEqual(self._getSpeeds()[1], 0)
+        self.assertNotEqual(self._getSpeeds()[0], 0)
+
+        # Still present, but not new
+        self.assertEqual(watchdog.poll(), [])
+        self.assertEqual(watchdog.stops, 1)
+
+    def testChainScope(self) -> None:
+        watchdog = FaultWatchdog(self.chain, stop_scope=StopScope.Chain)
+        self._fault(0, Status.NotStepLossA)
+
+        self.assertEqual(watchdog.poll(), [0])
+        self.assertEqual(self._getSpeeds(), [0, 0])
+
+    def testStoppedRunNotElided(self) -> None:
+        self.chain.setElision(True)
+        self.chain.allRun([100.0, 100.0])
+        speeds = self._getSpeeds()
+        watchdog = FaultWatchdog(self.chain)
+        self._fault(0, Status.NotOvercurrent)
+        watchdog.poll()
+
+        self.chain.allRun([100.0, 100.0])
+
+        self.assertEqual(self._getSpeeds(), speeds)
+
+    def testSafetyTraffic(self) -> None:
+        scheduler = BusScheduler(self.chain)
+        scheduler.attach()
+        watchdog = FaultWatchdog(self.chain)
+        self._fault(0, Status.NotOvercurrent)
+        watchdog.poll()
+
+        usage = scheduler.getUsage()
+
+        self.assertEqual(usage['safety']['grants'], 2)
+        self.assertEqual(usage['command']['grants'], 0)
+
+    def testMixedFamilies(self) -> None:
+        families = [L6470, L6480, L6472]
+        fake = FakeTransport(3, families)
+        chain = SpinChain(3, spi_transfer=fake, families=families)
+        watchdog = FaultWatchdog(chain)
+
+        # Healthy devices in their own Status layouts
+        self.assertEqual(watchdog.poll(), [])
+
+        registers = fake.devices[1].registers
+        registers[Register.Status] &= ~L6480.status.not_step_loss_b
+
+        self.assertEqual(watchdog.poll(), [1])
+
+        # Bridges shut down on the L6480 and its thermal status reads high
+        registers[Register.Status] |= L6480.status.thermal_shutdown
+        faults = []
+        watchdog.subscribe(lambda *args: faults.append(args[:2]))
+
+        self.assertEqual(watchdog.poll(), [1])
+        self.assertEqual(faults, [(1, L6480.status.thermal_shutdown)])
+
+        # A thermal warning alone is not a fault
+        fake.devices[2].registers[Register.Status] &= \
+            ~L6472.status.not_thermal_warning
+
+        self.assertEqual(watchdog.poll(), [])
+
+    def testReport(self) -> None:
+        watchdog = FaultWatchdog(self.chain)
+        watchdog.poll()
+        self._fault(0, Status.NotUndervoltage)
+        watchdog.poll()
+
+        self.assertEqual(watchdog.polls, 2)
+        self.assertGreater(watchdog.getWorstCaseSeconds(), 0)
+        self.assertIn('polls: 2, stops: 1', watchdog.getReport())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+
+from stspin import (
+    Command,
+    Register,
+    SpinChain,
+    WireProfiler,
+    WireTimeModel,
+)
+from stspin.fake import RecordingTransport
+from stspin.frames import getCommandLength
+
+
+class TestWireTime(unittest.TestCase):
+
+    def setUp(self) -> None:
+        transfer = RecordingTransport()
+        self.frames = transfer.frames
+
+        self.chain = SpinChain(
+            total_devices=4,
+            spi_transfer=transfer,
+            spi_speed_hz=4000000,
+        )
+
+    def testCommandLength(self) -> None:
+        self.assertEqual(getCommandLength(Command.Nop), 1)
+        self.assertEqual(getCommandLength(Command.HiZHard), 1)
+        self.assertEqual(getCommandLength(Command.Move | 1), 4)
+        self.assertEqual(getCommandLength(Command.GoUntil | 0x09), 4)
+        self.assertEqual(getCommandLength(Command.StatusGet), 3)
+        self.assertEqual(
+            getCommandLength(Command.ParamGet | Register.PosAbs),
+            4
+        )
+        self.assertEqual(
+            getCommandLength(Command.ParamSet | Register.KvalRun),
+            2
+        )
+
+    def testModel(self) -> None:
+        model = WireTimeModel(4, 4000000, cs_gap_seconds=1e-6)
+
+        self.assertAlmostEqual(model.getFrameSeconds(), 9e-6)
+        self.assertAlmostEqual(model.getCommandSeconds(Command.Move), 36e-6)
+        self.assertAlmostEqual(
+            model.getRegisterSeconds(Register.Status),
+            27e-6
+        )
+        self.assertAlmostEqual(
+            model.getChainSeconds([[1], [1, 2, 3], []]),
+            27e-6
+        )
+
+        from_chain = WireTimeModel.fromChain(self.chain, cs_gap_seconds=1e-6)
+        self.assertAlmostEqual(from_chain.getFrameSeconds(), 9e-6)
+
+    def testProfileDeviceAndChain(self) -> None:
+        profiler = WireProfiler(WireTimeModel.fromChain(self.chain))
+        profiler.attach(self.chain)
+
+        device = self.chain.create(2)
+        device.move(100)
+        device.move(-100)
+        self.chain.allHardStop()
+
+        report = {s.name: s for s in profiler.getReport()}
+
+        create = report['SpinChain.create']
+        self.assertEqual(create.calls, 1)
+        self.assertEqual(create.frames, 0)
+
+        self.assertEqual(len(self.frames), 9)
+
+        profiler.attach(device)
+        device.hiZHard()
+        report = {s.name: s for s in profiler.getReport()}
+
+        hiz = report['SpinDevice.hiZHard']
+        self.assertEqual(hiz.frames, 1)
+        self.assertEqual(hiz.bytes, 4)
+        self.assertEqual(hiz.useful_bytes, 1)
+        self.assertEqual(hiz.padding_bytes, 3)
+
+        stop = report['SpinChain.allHardStop']
+        self.assertEqual(stop.frames, 1)
+        self.assertEqual(stop.useful_bytes, 4)
+
+        unattributed = report['<unattributed>']
+        self.assertEqual(unattributed.frames, 8)
+        self.assertEqual(unattributed.useful_bytes, 8)
+
+        self.assertIn('SpinDevice.hiZHard', profiler.formatReport())
+
+
+if __name__ == '__main__':
+    unittest.main()